@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from .routers import auth, symptom_check, symptom_history, ocr_symptom_check, ocr_symptom_history
+from .routers import auth, symptom_check, symptom_history, ocr_symptom_check, ocr_symptom_history, timeline, metrics
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
@@ -7,5 +7,7 @@ api_router.include_router(symptom_check.router, prefix="/symptom-check", tags=["
 api_router.include_router(symptom_history.router, prefix="/symptom-history", tags=["symptom-history"])
 api_router.include_router(ocr_symptom_check.router, prefix="/ocr-symptom-check", tags=["ocr-symptom-check"])
 api_router.include_router(ocr_symptom_history.router, prefix="/ocr-symptom-history", tags=["ocr-symptom-history"])
+api_router.include_router(timeline.router, prefix="/timeline", tags=["timeline"])
+api_router.include_router(metrics.router, prefix="/metrics", tags=["metrics"])
 
 __all__ = ["api_router"]
\ No newline at end of file
@@ -1,15 +1,34 @@
 import time
 import redis.asyncio as redis
 
+from typing import AsyncGenerator
 from fastapi import Header, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_session
+from app.core.metrics import REGISTRY, Counter, Histogram
+from app.db.session import AsyncSessionLocal, get_session, read_sessionmaker
 from app.db.redis_session import get_redis_client
 from app.crud.user import get_user_by_id
 from app.utils.security import decrypt_api_key
 from app.schemas.authenticated_user import AuthenticatedUser
 
+_FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+AUTH_SECONDS = REGISTRY.register(Histogram(
+    "auth_seconds",
+    "Time to authenticate a request (user lookup and API key check)",
+    buckets=_FAST_BUCKETS,
+))
+RATE_LIMIT_SECONDS = REGISTRY.register(Histogram(
+    "rate_limit_seconds",
+    "Time for the Redis rate limiter to admit or reject a request, by endpoint",
+    buckets=_FAST_BUCKETS,
+))
+RATE_LIMIT_DECISIONS = REGISTRY.register(Counter(
+    "rate_limit_decisions_total",
+    "Rate limiter decisions, by endpoint and decision (allowed, limited)",
+))
+
 async def get_current_user(
     # Use Header to extract values from the request headers
     user_id: str = Header(..., alias="X-User-ID", description="The User's unique ID"),
@@ -17,6 +36,13 @@ async def get_current_user(
     db: AsyncSession = Depends(get_session)
 ) -> AuthenticatedUser:
     """Dependency to get the current authenticated user based on headers."""
+    started = time.perf_counter()
+    try:
+        return await _authenticate(db, user_id, api_key)
+    finally:
+        AUTH_SECONDS.observe(time.perf_counter() - started)
+
+async def _authenticate(db: AsyncSession, user_id: str, api_key: str) -> AuthenticatedUser:
     user = await get_user_by_id(db, user_id)
 
     if not user:
@@ -41,20 +67,65 @@ async def get_current_user(
 
     return AuthenticatedUser(id=str(user.id), api_key=api_key)
 
+async def get_read_session(
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    redis_client: redis.Redis = Depends(get_redis_client),
+    db: AsyncSession = Depends(get_session),
+) -> AsyncGenerator[AsyncSession, None]:
+    """Dependency for read-only routes: a session on a healthy read replica, or on the primary right after the user's own writes."""
+    session_factory = await read_sessionmaker(redis_client, current_user.id)
+    if session_factory is AsyncSessionLocal:
+        # The session authentication used; a second primary session per request could
+        # deadlock the pool once every connection is held by a request waiting for another
+        yield db
+        return
+    async with session_factory() as session:
+        yield session
+
 class RedisTokenBucketRateLimiter:
-    """A rate limiter that uses the token bucket algorithm with Redis as the backend."""
-    def __init__(self, capacity: int, refill_rate: float, endpoint: str):
+    """A rate limiter that uses the token bucket algorithm with Redis as the backend.
+
+    Each request takes one token up front. Endpoints that can answer with 304 Not
+    Modified may hand part of it back via refund_not_modified(), so that such a
+    request costs only `not_modified_cost` tokens.
+    """
+    def __init__(self, capacity: int, refill_rate: float, endpoint: str, not_modified_cost: float = 1.0):
         self.capacity = capacity
         self.refill_rate = refill_rate
         self.endpoint = endpoint
+        self.not_modified_cost = not_modified_cost
+
+    def _key(self, user_id: str) -> str:
+        return f"rate_limit:{self.endpoint}:{user_id}"
+
+    async def refund_not_modified(self, redis_client: redis.Redis, user_id: str) -> None:
+        """Return the unused part of a request's token after answering it with 304."""
+        refund = 1 - self.not_modified_cost
+        if refund <= 0:
+            return
+        try:
+            await redis_client.hincrbyfloat(self._key(user_id), "tokens", refund)
+        except redis.RedisError:
+            # Best effort: the request was already admitted at full price
+            pass
 
     async def __call__(self,
                        redis_client: redis.Redis = Depends(get_redis_client),
                        current_user: AuthenticatedUser = Depends(get_current_user)):
-        
-        user_id = current_user.id
+        started = time.perf_counter()
+        try:
+            await self._take_token(redis_client, current_user.id)
+        except HTTPException:
+            RATE_LIMIT_DECISIONS.inc({"endpoint": self.endpoint, "decision": "limited"})
+            raise
+        else:
+            RATE_LIMIT_DECISIONS.inc({"endpoint": self.endpoint, "decision": "allowed"})
+        finally:
+            RATE_LIMIT_SECONDS.observe(time.perf_counter() - started, {"endpoint": self.endpoint})
+
+    async def _take_token(self, redis_client: redis.Redis, user_id: str) -> None:
         current_time = time.time()
-        key = f"rate_limit:{self.endpoint}:{user_id}"
+        key = self._key(user_id)
 
         # Use a Redis transaction (pipeline) to ensure atomicity
         async with redis_client.pipeline(transaction=True) as pipe:
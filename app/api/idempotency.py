@@ -0,0 +1,186 @@
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import uuid
+from typing import Callable, Iterable, List, Optional, Tuple
+
+import redis.asyncio as redis
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.db.redis_session import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+MAX_KEY_LENGTH = 255
+
+# Release the in-flight marker only if it is still ours
+_RELEASE_IN_FLIGHT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def _header(scope: Scope, name: bytes) -> Optional[str]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+class IdempotencyMiddleware:
+    """Replays the stored response of a POST retried with the same `Idempotency-Key` header.
+
+    The first request with a key leaves an in-flight marker in Redis (for at most
+    `in_flight_ttl` seconds) and runs as usual; a successful response is then stored,
+    status, headers and body exactly as sent, for `ttl` seconds. A retry arriving while
+    the first request runs waits for it, and one arriving later gets the stored response
+    back with `Idempotent-Replayed: true`, before authentication, rate limiting or any
+    database or OpenAI work. Unsuccessful responses are not stored: the marker is removed
+    so a retry runs again.
+
+    Keys are scoped per path and X-User-ID. A stored response is only replayed to the
+    same X-API-Key it was produced for, and only for the same request body; reusing a
+    key for a different body gets 422. Requests carry on without idempotency when Redis
+    is unavailable.
+    """
+    def __init__(self, app: ASGIApp, paths: Iterable[str], ttl: int = 86400, in_flight_ttl: int = 120,
+                 poll_interval: float = 0.1, redis_factory: Callable[[], redis.Redis] = get_redis_client):
+        self.app = app
+        self.paths = frozenset(paths)
+        self.ttl = ttl
+        self.in_flight_ttl = in_flight_ttl
+        self.poll_interval = poll_interval
+        self.redis_factory = redis_factory
+
+        self.replays = 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            return await self.app(scope, receive, send)
+        idempotency_key = _header(scope, b"idempotency-key")
+        if idempotency_key is None:
+            return await self.app(scope, receive, send)
+        if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+            return await JSONResponse({"detail": "Invalid Idempotency-Key"}, status_code=400)(scope, receive, send)
+
+        body, receive = await self._buffer_body(receive)
+        user_id = _header(scope, b"x-user-id") or ""
+        key = f"idempotency:{scope['path']}:{user_id}:{idempotency_key}"
+        owner = hashlib.sha256(f"{user_id}:{_header(scope, b'x-api-key') or ''}".encode()).hexdigest()
+        fingerprint = hashlib.sha256(body).hexdigest()
+        marker = json.dumps({"state": "in_flight", "owner": owner, "fingerprint": fingerprint, "token": uuid.uuid4().hex})
+
+        redis_client = self.redis_factory()
+        try:
+            entry = await self._claim_or_wait(redis_client, key, marker, owner, fingerprint)
+        except redis.RedisError as e:
+            logger.warning("Idempotency store unavailable, processing request without it: %s", e)
+            return await self.app(scope, receive, send)
+
+        if entry is not None:
+            if entry["owner"] != owner:
+                # Not the credentials the key was used with; let authentication answer
+                return await self.app(scope, receive, send)
+            if entry["fingerprint"] != fingerprint:
+                return await JSONResponse({"detail": "Idempotency-Key was already used with a different request body"}, status_code=422)(scope, receive, send)
+            if entry["state"] == "in_flight":
+                return await JSONResponse({"detail": "A request with this Idempotency-Key is still being processed"}, status_code=409)(scope, receive, send)
+            self.replays += 1
+            return await self._replay(entry, send)
+
+        response: dict = {"status": None, "headers": [], "body": []}
+
+        async def capture(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = message.get("headers", [])
+            elif message["type"] == "http.response.body":
+                response["body"].append(message.get("body", b""))
+            await send(message)
+
+        stored = False
+        try:
+            await self.app(scope, receive, capture)
+            if response["status"] is not None and 200 <= response["status"] < 300:
+                stored = await self._store(redis_client, key, owner, fingerprint, response)
+        finally:
+            if not stored:
+                try:
+                    await redis_client.eval(_RELEASE_IN_FLIGHT, 1, key, marker)
+                except redis.RedisError:
+                    # The marker expires after in_flight_ttl
+                    pass
+
+    @staticmethod
+    async def _buffer_body(receive: Receive) -> Tuple[bytes, Receive]:
+        """Read the whole request body, and return it with a receive() that hands it on again."""
+        chunks: List[bytes] = []
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                break
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        body = b"".join(chunks)
+        replayed = False
+
+        async def replay_receive() -> Message:
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        return body, replay_receive
+
+    async def _claim_or_wait(self, redis_client: redis.Redis, key: str, marker: str, owner: str, fingerprint: str) -> Optional[dict]:
+        """
+        None once this request holds the key and should run; otherwise the stored entry,
+        or the other request's in-flight marker if it is for different credentials or
+        a different body, or is still there after waiting `in_flight_ttl`.
+        """
+        waited = 0.0
+        while True:
+            if await redis_client.set(key, marker, nx=True, ex=self.in_flight_ttl):
+                return None
+            raw = await redis_client.get(key)
+            if raw is None:
+                # Released or expired in between; try to claim it again
+                continue
+            entry = json.loads(raw)
+            if entry["state"] != "in_flight" or waited >= self.in_flight_ttl:
+                return entry
+            if entry["owner"] != owner or entry["fingerprint"] != fingerprint:
+                return entry
+            await asyncio.sleep(self.poll_interval)
+            waited += self.poll_interval
+
+    async def _store(self, redis_client: redis.Redis, key: str, owner: str, fingerprint: str, response: dict) -> bool:
+        entry = {
+            "state": "completed",
+            "owner": owner,
+            "fingerprint": fingerprint,
+            "status": response["status"],
+            "headers": [[k.decode("latin-1"), v.decode("latin-1")] for k, v in response["headers"]],
+            "body": base64.b64encode(b"".join(response["body"])).decode(),
+        }
+        try:
+            await redis_client.set(key, json.dumps(entry), ex=self.ttl)
+            return True
+        except redis.RedisError as e:
+            logger.warning("Could not store idempotent response for %s: %s", key, e)
+            return False
+
+    @staticmethod
+    async def _replay(entry: dict, send: Send) -> None:
+        headers = [(k.encode("latin-1"), v.encode("latin-1")) for k, v in entry["headers"]]
+        headers.append((b"idempotent-replayed", b"true"))
+        await send({"type": "http.response.start", "status": entry["status"], "headers": headers})
+        await send({"type": "http.response.body", "body": base64.b64decode(entry["body"])})
+
@@ -3,10 +3,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas.auth import SignupIn, SigninIn, SigninOut
 from app.services.auth_service import register_user, signin_and_rotate_api_key
 from app.db.session import get_session
+from app.api.routing import ORJSONRoute
 
 from starlette.responses import Response
 
-router = APIRouter()
+router = APIRouter(route_class=ORJSONRoute)
 
 @router.post("/signup", status_code=status.HTTP_201_CREATED)
 async def signup(payload: SignupIn, db: AsyncSession = Depends(get_session)):
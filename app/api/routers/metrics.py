@@ -0,0 +1,19 @@
+import secrets
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException, Response, status
+from app.core.db_config import db_settings
+from app.core.metrics import CONTENT_TYPE, REGISTRY
+from app.api.routing import ORJSONRoute
+
+router = APIRouter(route_class=ORJSONRoute)
+
+@router.get("", include_in_schema=False)
+async def metrics(authorization: Optional[str] = Header(None)):
+    """ Prometheus scrape endpoint: per-stage latency histograms, error and rate limiter counters, pool gauges.
+
+        Each worker process keeps its own metrics, so scrape every worker (or run one per container).
+    """
+    token = db_settings.METRICS_TOKEN
+    if token and not secrets.compare_digest(authorization or "", f"Bearer {token}"):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
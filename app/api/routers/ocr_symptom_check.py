@@ -1,22 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Dict, Union
+from typing import Dict, Optional, Union
 
 from app.schemas.ocr_symptom_check import OCRSymptomCheckIn, OCRSymptomCheckOut
 from app.services.ocr_symptoms_check_service import process_symptom_check
 from app.db.session import get_session
 from app.schemas.authenticated_user import AuthenticatedUser
 from app.api.dependencies import get_current_user, RedisTokenBucketRateLimiter
+from app.api.routing import ORJSONRoute
 from app.exceptions.openai_exceptions import OpenAIError
+from app.utils import openai_client
 
-router = APIRouter()
+router = APIRouter(route_class=ORJSONRoute)
 
 ocr_symptom_check_rate_limiter = RedisTokenBucketRateLimiter(capacity=5, refill_rate=1/12, endpoint="post_symptom_check")  # 5 requests per minute, shared with text-based symptom check
 
 @router.post("/", status_code=status.HTTP_201_CREATED, dependencies=[Depends(ocr_symptom_check_rate_limiter)])
-async def ocr_symptom_check(payload: OCRSymptomCheckIn, current_user: AuthenticatedUser = Depends(get_current_user), db: AsyncSession = Depends(get_session)):
+async def ocr_symptom_check(payload: OCRSymptomCheckIn, current_user: AuthenticatedUser = Depends(get_current_user), db: AsyncSession = Depends(get_session),
+                            # Handled by IdempotencyMiddleware before this runs; declared here for the API docs
+                            idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255,
+                                                                    description="Client-generated key; retries with the same key get the first response back")):
     """ Endpoint to process a symptom check request using OCR-identified data.
 
+        Retries that send the same `Idempotency-Key` header get the first successful response back instead of a new check.
+
         **Note:** This is a protected endpoint that requires authentication. to get an API key and user ID, sign up at POST /auth/signup then login with the credentials at POST /auth/login and use the returned API key and user ID for authentication header.
     """
     try:
@@ -35,6 +42,7 @@ async def ocr_symptom_check(payload: OCRSymptomCheckIn, current_user: Authentica
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except OpenAIError as e:
+        openai_client.ERRORS.inc({"type": type(e).__name__, "endpoint": "ocr_symptom_check"})
         raise HTTPException(status_code=502, detail=f"Upstream OpenAI error: {str(e)}")
     
     return OCRSymptomCheckOut(
@@ -43,5 +51,6 @@ async def ocr_symptom_check(payload: OCRSymptomCheckIn, current_user: Authentica
         timestamp=result.submitted_at,
         input=result.input,
         analysis=result.analysis,
-        status=result.status
+        status=result.status,
+        structured=(result.meta or {}).get("structured")
     )
\ No newline at end of file
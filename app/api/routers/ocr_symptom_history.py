@@ -1,46 +1,113 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+import redis.asyncio as redis
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.schemas.ocr_symptom_history import OCRSymptomCheckOut, OCRSymptomHistoryOut
+from app.schemas.ocr_symptom_history import OCRSymptomHistoryOut, OCRVitalsFilter
 from app.schemas.symptom_history import SymptomHistoryOut
-from app.services.ocr_symptoms_history_service import ocr_get_symptom_history
-from app.db.session import get_session
-from app.api.dependencies import get_current_user, RedisTokenBucketRateLimiter
+from app.services.ocr_symptoms_history_service import ocr_filter_symptom_history, ocr_get_symptom_history, ocr_get_symptom_history_changes
+from app.db.redis_session import get_redis_client
+from app.api.dependencies import get_current_user, get_read_session, RedisTokenBucketRateLimiter
+from app.api.routing import ORJSONRoute
 from app.schemas.authenticated_user import AuthenticatedUser
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.utils.history_json import ocr_symptom_history_json
+from app.utils.history_cache import ocr_symptom_history_cache, etag_matches
 
 
-router = APIRouter()
+router = APIRouter(route_class=ORJSONRoute)
 
-ocr_symptom_history_rate_limiter = RedisTokenBucketRateLimiter(capacity=10, refill_rate=1/6, endpoint="get_symptom_history")  # 10 requests per minute
+ocr_symptom_history_rate_limiter = RedisTokenBucketRateLimiter(capacity=10, refill_rate=1/6, endpoint="get_symptom_history", not_modified_cost=0.25)  # 10 requests per minute; 304s cost a quarter
+ocr_symptom_filter_rate_limiter = RedisTokenBucketRateLimiter(capacity=10, refill_rate=1/6, endpoint="filter_symptom_history")  # 10 requests per minute
 
-@router.get("/", status_code=status.HTTP_200_OK, dependencies=[Depends(ocr_symptom_history_rate_limiter)])
-async def ocr_symptom_history(current_user: AuthenticatedUser = Depends(get_current_user), db: AsyncSession = Depends(get_session)):
+@router.get("/", status_code=status.HTTP_200_OK, response_model=OCRSymptomHistoryOut, dependencies=[Depends(ocr_symptom_history_rate_limiter)])
+async def ocr_symptom_history(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="`next_cursor` from the previous page"),
+    since: Optional[str] = Query(None, description="`watermark` from the previous sync (`0` the first time): return only checks created or updated after it"),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match", description="`ETag` of a copy the client already has"),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_session),
+    redis_client: redis.Redis = Depends(get_redis_client),
+):
     """ Endpoint to retrieve the symptom history for the authenticated user using OCR-identified data.
 
+        Results are newest first and paginated: pass the returned `next_cursor` as `cursor` to get the next page.
+
+        Delta sync: pass `since` (`0` the first time) to get only the checks created or updated after that watermark, oldest change first, plus a new `watermark` for the next sync. Repeat while a full page comes back. Changes show up after a few seconds.
+
+        Responses carry an `ETag`. Send it back in `If-None-Match` to get `304 Not Modified` while the history is unchanged; those requests count a quarter against the rate limit.
+
+        **Note:** This is a protected endpoint that requires authentication. to get an API key and user ID, sign up at POST /auth/signup then login with the credentials at POST /auth/login and use the returned API key and user ID for authentication header.
+    """
+    if since is not None:
+        if cursor is not None:
+            raise HTTPException(status_code=400, detail="cursor_with_since")
+        # Neither ETag nor page cache: held-back recent changes surface without a version bump
+        try:
+            result, watermark = await ocr_get_symptom_history_changes(
+                db,
+                user_id=current_user.id,
+                api_key=current_user.api_key,
+                since=since,
+                limit=limit
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return Response(content=ocr_symptom_history_json(current_user.id, result, None, watermark=watermark), media_type="application/json")
+
+    etag = await ocr_symptom_history_cache.etag(redis_client, current_user.id, limit, cursor)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"} if etag else None
+    if etag is not None and etag_matches(if_none_match, etag):
+        # Nothing changed since the client's copy: skip the query and most of the rate-limit cost
+        await ocr_symptom_history_rate_limiter.refund_not_modified(redis_client, current_user.id)
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    async def load_page() -> bytes:
+        try:
+            result, next_cursor = await ocr_get_symptom_history(
+                db,
+                user_id=current_user.id,
+                api_key=current_user.api_key,
+                limit=limit,
+                cursor=cursor
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        return ocr_symptom_history_json(current_user.id, result, next_cursor)
+
+    # The default first page is what clients poll; serve it from the per-user cache
+    if cursor is None and limit == DEFAULT_PAGE_SIZE:
+        body = await ocr_symptom_history_cache.get_or_load(redis_client, current_user.id, load_page)
+    else:
+        body = await load_page()
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/filter", status_code=status.HTTP_200_OK, response_model=OCRSymptomHistoryOut, dependencies=[Depends(ocr_symptom_filter_rate_limiter)])
+async def ocr_symptom_history_filter(
+    filters: OCRVitalsFilter = Depends(),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="`next_cursor` from the previous page"),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_session),
+):
+    """ Endpoint to retrieve the authenticated user's OCR symptom checks whose vitals fall within the given bounds.
+
+        Bounds are inclusive and in canonical units: `min_`/`max_` of `temperature_f`, `heart_rate_bpm`, `spo2_pct` and `wbc_count` (per µL), e.g. `?min_wbc_count=11000&min_temperature_f=100.4`. Values submitted under other names or units (`Temp: "38 C"`, `pulse`, `WBC: "11.5 K/uL"`) are converted on submission. Results are newest first and paginated like GET /ocr-symptom-history/.
+
         **Note:** This is a protected endpoint that requires authentication. to get an API key and user ID, sign up at POST /auth/signup then login with the credentials at POST /auth/login and use the returned API key and user ID for authentication header.
     """
     try:
-        result = await ocr_get_symptom_history(
+        result, next_cursor = await ocr_filter_symptom_history(
             db,
             user_id=current_user.id,
-            api_key=current_user.api_key
+            api_key=current_user.api_key,
+            ranges=filters.ranges(),
+            limit=limit,
+            cursor=cursor
         )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
-    
-    history = []
-    for item in result:
-        history.append(
-            OCRSymptomCheckOut(
-                id=str(item.id),
-                user_id=str(item.user_id),
-                timestamp=item.submitted_at,
-                input=item.input,
-                analysis=item.analysis,
-                status=item.status
-            )
-        )
 
-    return OCRSymptomHistoryOut(
-        user_id=current_user.id,
-        history=history
-        )
\ No newline at end of file
+    return Response(content=ocr_symptom_history_json(current_user.id, result, next_cursor), media_type="application/json")
@@ -1,20 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas.symptom_check import SymptomCheckIn, SymptomInput, SymptomCheckOut
 from app.services.symptoms_check_service import process_symptom_check
 from app.db.session import get_session
 from app.schemas.authenticated_user import AuthenticatedUser
 from app.api.dependencies import get_current_user, RedisTokenBucketRateLimiter
+from app.api.routing import ORJSONRoute
 from app.exceptions.openai_exceptions import OpenAIError
+from app.utils import openai_client
 
-router = APIRouter()
+router = APIRouter(route_class=ORJSONRoute)
 
 symptom_check_rate_limiter = RedisTokenBucketRateLimiter(capacity=5, refill_rate=1/12, endpoint="post_symptom_check")  # 5 requests per minute
 
 @router.post("/", status_code=status.HTTP_201_CREATED, dependencies=[Depends(symptom_check_rate_limiter)])
-async def symptom_check(payload: SymptomCheckIn, current_user: AuthenticatedUser = Depends(get_current_user), db: AsyncSession = Depends(get_session)):
+async def symptom_check(payload: SymptomCheckIn, current_user: AuthenticatedUser = Depends(get_current_user), db: AsyncSession = Depends(get_session),
+                        # Handled by IdempotencyMiddleware before this runs; declared here for the API docs
+                        idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255,
+                                                                description="Client-generated key; retries with the same key get the first response back")):
     """ Endpoint to process a symptom check request.
 
+        Retries that send the same `Idempotency-Key` header get the first successful response back instead of a new check.
+
         **Note:** This is a protected endpoint that requires authentication. to get an API key and user ID, sign up at POST /auth/signup then login with the credentials at POST /auth/login and use the returned API key and user ID for authentication header.
     """
     try:
@@ -32,17 +40,9 @@ async def symptom_check(payload: SymptomCheckIn, current_user: AuthenticatedUser
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except OpenAIError as e:
+        openai_client.ERRORS.inc({"type": type(e).__name__, "endpoint": "symptom_check"})
         raise HTTPException(status_code=502, detail=f"Upstream OpenAI error: {str(e)}")
     
-    SymptomInput(
-        age=result.age,
-        sex=result.sex,
-        symptoms=result.symptoms,
-        duration=result.duration,
-        severity=result.severity,
-        additional_notes=result.additional_notes
-    )
-
     return SymptomCheckOut(
         id=str(result.id),
         user_id=str(result.user_id),
@@ -56,5 +56,6 @@ async def symptom_check(payload: SymptomCheckIn, current_user: AuthenticatedUser
             additional_notes=result.additional_notes
         ),
         analysis=result.analysis,
-        status=result.status
+        status=result.status,
+        structured=(result.meta or {}).get("structured")
     )
\ No newline at end of file
@@ -1,51 +1,81 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+import redis.asyncio as redis
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.schemas.symptom_history import SymptomHistoryOut, SymptomCheckOut, SymptomInput 
-from app.services.symptoms_history_services import get_symptom_history
-from app.db.session import get_session
-from app.api.dependencies import get_current_user, RedisTokenBucketRateLimiter
+from app.schemas.symptom_history import SymptomHistoryOut
+from app.services.symptoms_history_services import get_symptom_history, get_symptom_history_changes
+from app.db.redis_session import get_redis_client
+from app.api.dependencies import get_current_user, get_read_session, RedisTokenBucketRateLimiter
+from app.api.routing import ORJSONRoute
 from app.schemas.authenticated_user import AuthenticatedUser
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.utils.history_json import symptom_history_json
+from app.utils.history_cache import symptom_history_cache, etag_matches
 
-router = APIRouter()
+router = APIRouter(route_class=ORJSONRoute)
 
-symptom_history_rate_limiter = RedisTokenBucketRateLimiter(capacity=10, refill_rate=1/6, endpoint="get_symptom_history")  # 10 requests per minute
+symptom_history_rate_limiter = RedisTokenBucketRateLimiter(capacity=10, refill_rate=1/6, endpoint="get_symptom_history", not_modified_cost=0.25)  # 10 requests per minute; 304s cost a quarter
 
-@router.get("/", status_code=status.HTTP_200_OK, dependencies=[Depends(symptom_history_rate_limiter)])
-async def symptom_history(current_user: AuthenticatedUser = Depends(get_current_user), db: AsyncSession = Depends(get_session)):
+@router.get("/", status_code=status.HTTP_200_OK, response_model=SymptomHistoryOut, dependencies=[Depends(symptom_history_rate_limiter)])
+async def symptom_history(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="`next_cursor` from the previous page"),
+    since: Optional[str] = Query(None, description="`watermark` from the previous sync (`0` the first time): return only checks created or updated after it"),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match", description="`ETag` of a copy the client already has"),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_session),
+    redis_client: redis.Redis = Depends(get_redis_client),
+):
     """ Endpoint to retrieve the symptom history for the authenticated user.
 
+       Results are newest first and paginated: pass the returned `next_cursor` as `cursor` to get the next page.
+
+       Delta sync: pass `since` (`0` the first time) to get only the checks created or updated after that watermark, oldest change first, plus a new `watermark` for the next sync. Repeat while a full page comes back. Changes show up after a few seconds.
+
+       Responses carry an `ETag`. Send it back in `If-None-Match` to get `304 Not Modified` while the history is unchanged; those requests count a quarter against the rate limit.
+
        **Note:** This is a protected endpoint that requires authentication. to get an API key and user ID, sign up at POST /auth/signup then login with the credentials at POST /auth/login and use the returned API key and user ID for authentication header.
     """
-    try:
-        result = await get_symptom_history(
-            db,
-            user_id=current_user.id,
-            api_key=current_user.api_key
-        )
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    
-    history = []
-    for item in result:
-        history.append(
-            SymptomCheckOut(
-                id=str(item.id),
-                user_id=str(item.user_id),
-                timestamp=item.submitted_at,
-                input=SymptomInput(
-                    age=item.age,
-                    sex=item.sex,
-                    symptoms=item.symptoms,
-                    duration=item.duration,
-                    severity=item.severity,
-                    additional_notes=item.additional_notes
-                ),
-                analysis=item.analysis,
-                status=item.status
+    if since is not None:
+        if cursor is not None:
+            raise HTTPException(status_code=400, detail="cursor_with_since")
+        # Neither ETag nor page cache: held-back recent changes surface without a version bump
+        try:
+            result, watermark = await get_symptom_history_changes(
+                db,
+                user_id=current_user.id,
+                api_key=current_user.api_key,
+                since=since,
+                limit=limit
             )
-        )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return Response(content=symptom_history_json(current_user.id, result, None, watermark=watermark), media_type="application/json")
+
+    etag = await symptom_history_cache.etag(redis_client, current_user.id, limit, cursor)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"} if etag else None
+    if etag is not None and etag_matches(if_none_match, etag):
+        # Nothing changed since the client's copy: skip the query and most of the rate-limit cost
+        await symptom_history_rate_limiter.refund_not_modified(redis_client, current_user.id)
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    async def load_page() -> bytes:
+        try:
+            result, next_cursor = await get_symptom_history(
+                db,
+                user_id=current_user.id,
+                api_key=current_user.api_key,
+                limit=limit,
+                cursor=cursor
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        return symptom_history_json(current_user.id, result, next_cursor)
 
-    return SymptomHistoryOut(
-        user_id=current_user.id,
-        history=history
-        )
\ No newline at end of file
+    # The default first page is what clients poll; serve it from the per-user cache
+    if cursor is None and limit == DEFAULT_PAGE_SIZE:
+        body = await symptom_history_cache.get_or_load(redis_client, current_user.id, load_page)
+    else:
+        body = await load_page()
+    return Response(content=body, media_type="application/json", headers=headers)
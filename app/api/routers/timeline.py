@@ -0,0 +1,107 @@
+import re
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+import redis.asyncio as redis
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.schemas.timeline import TimelineOut, TimelineSearchOut
+from app.services.timeline_service import get_timeline, search_timeline, stream_timeline_export
+from app.db.session import read_sessionmaker
+from app.db.redis_session import get_redis_client
+from app.api.dependencies import get_current_user, get_read_session, RedisTokenBucketRateLimiter
+from app.api.routing import ORJSONRoute
+from app.schemas.authenticated_user import AuthenticatedUser
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.utils.history_json import timeline_json, timeline_search_json
+
+router = APIRouter(route_class=ORJSONRoute)
+
+timeline_rate_limiter = RedisTokenBucketRateLimiter(capacity=10, refill_rate=1/6, endpoint="get_timeline")  # 10 requests per minute
+timeline_search_rate_limiter = RedisTokenBucketRateLimiter(capacity=10, refill_rate=1/6, endpoint="search_timeline")  # 10 requests per minute
+timeline_export_rate_limiter = RedisTokenBucketRateLimiter(capacity=2, refill_rate=1/300, endpoint="export_timeline")  # 2 exports, then 1 per 5 minutes
+
+def _accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    for part in (accept_encoding or "").lower().split(","):
+        coding, _, params = part.partition(";")
+        if coding.strip() in ("gzip", "*"):
+            return not re.search(r"q\s*=\s*0(\.0*)?\s*$", params)
+    return False
+
+@router.get("/", status_code=status.HTTP_200_OK, response_model=TimelineOut, dependencies=[Depends(timeline_rate_limiter)])
+async def timeline(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="`next_cursor` from the previous page"),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_session),
+):
+    """ Endpoint to retrieve the text and OCR symptom checks of the authenticated user as one timeline.
+
+       Results are newest first and paginated: pass the returned `next_cursor` as `cursor` to get the next page. Each item's `type` is `symptom` (shaped like a `/symptom-history/` item) or `ocr` (shaped like an `/ocr-symptom-history/` item).
+
+       **Note:** This is a protected endpoint that requires authentication. to get an API key and user ID, sign up at POST /auth/signup then login with the credentials at POST /auth/login and use the returned API key and user ID for authentication header.
+    """
+    try:
+        result, next_cursor = await get_timeline(
+            db,
+            user_id=current_user.id,
+            api_key=current_user.api_key,
+            limit=limit,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return Response(content=timeline_json(current_user.id, result, next_cursor), media_type="application/json")
+
+
+@router.get("/search", status_code=status.HTTP_200_OK, response_model=TimelineSearchOut, dependencies=[Depends(timeline_search_rate_limiter)])
+async def timeline_search(
+    q: str = Query(..., min_length=2, max_length=200, description='Words to look for, e.g. `chest pain`; supports "quoted phrases", `or` and `-excluded` words'),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="`next_cursor` from the previous page"),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_session),
+):
+    """ Endpoint to search the authenticated user's text and OCR symptom checks by keyword.
+
+       Matches the symptoms, notes, OCR values and analyses of completed checks (English stemming, so `pains` finds `pain`). Results are best match first and paginated: pass the returned `next_cursor` as `cursor` to get the next page. Items are shaped like GET /timeline/ items.
+
+       **Note:** This is a protected endpoint that requires authentication. to get an API key and user ID, sign up at POST /auth/signup then login with the credentials at POST /auth/login and use the returned API key and user ID for authentication header.
+    """
+    try:
+        result, next_cursor = await search_timeline(
+            db,
+            user_id=current_user.id,
+            api_key=current_user.api_key,
+            query=q,
+            limit=limit,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return Response(content=timeline_search_json(current_user.id, q, result, next_cursor), media_type="application/json")
+
+
+@router.get("/export", status_code=status.HTTP_200_OK, response_class=StreamingResponse, dependencies=[Depends(timeline_export_rate_limiter)])
+async def export_timeline(
+    accept_encoding: Optional[str] = Header(None, alias="Accept-Encoding"),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    redis_client: redis.Redis = Depends(get_redis_client),
+):
+    """ Endpoint to download the authenticated user's complete history, text and OCR checks together, newest first.
+
+       The response is streamed as NDJSON: one timeline item (see GET /timeline/) per line. It is gzip-compressed when the request sends `Accept-Encoding: gzip`.
+
+       **Note:** This is a protected endpoint that requires authentication. to get an API key and user ID, sign up at POST /auth/signup then login with the credentials at POST /auth/login and use the returned API key and user ID for authentication header.
+    """
+    compress = _accepts_gzip(accept_encoding)
+    session_factory = await read_sessionmaker(redis_client, current_user.id)
+    headers = {"Content-Disposition": 'attachment; filename="history.ndjson"', "Vary": "Accept-Encoding"}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        stream_timeline_export(current_user.id, compress=compress, session_factory=session_factory),
+        media_type="application/x-ndjson",
+        headers=headers,
+    )
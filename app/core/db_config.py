@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -9,6 +10,65 @@ class Settings(BaseSettings):
     REDIS_PORT: int
     REDIS_USE_SSL: bool = False
 
+    # Connection pool of each engine, per worker process: DB_POOL_SIZE kept open, up to DB_MAX_OVERFLOW more under load
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    # Seconds a request waits for a free connection before failing
+    DB_POOL_TIMEOUT_SEC: float = 30
+    # Connections older than this are replaced on checkout (-1 keeps them); stay under server and proxy idle timeouts
+    DB_POOL_RECYCLE_SEC: int = 1800
+    # Test each connection on checkout, so one closed by a restart or failover isn't handed out
+    DB_POOL_PRE_PING: bool = True
+    # Connecting through PgBouncer in transaction mode: no prepared statement caching, unique statement names
+    DB_PGBOUNCER: bool = False
+
+    # Open database and Redis connections (at most DB_POOL_SIZE) and the OpenAI connection when a worker starts
+    STARTUP_WARMUP: bool = True
+    STARTUP_WARMUP_CONNECTIONS: int = 2
+    STARTUP_WARMUP_TIMEOUT_SEC: float = 10.0
+
+    # Write completed checks in batches: one multi-row INSERT and commit per window, instead of one per request
+    DB_WRITE_BUFFER_ENABLED: bool = False
+    DB_WRITE_BUFFER_WINDOW_MS: int = 5
+    DB_WRITE_BUFFER_MAX_SIZE: int = 100
+
+    # Comma-separated read replica URLs; history, search and export reads go to them round-robin
+    USER_DATABASE_REPLICA_URLS: str = ""
+    # Replicas further behind the primary than this are skipped; keep it below HISTORY_SYNC_SETTLE_SEC
+    REPLICA_MAX_LAG_SEC: float = 2.0
+    # How often each replica's health and lag are checked again
+    REPLICA_HEALTH_CHECK_SEC: float = 5.0
+    # A user's reads stay on the primary this long after one of their writes
+    READ_YOUR_WRITES_SEC: int = 5
+
+    # How long a successful POST response is replayed to retries with the same Idempotency-Key
+    IDEMPOTENCY_TTL_SEC: int = 86400
+    # Retries wait at most this long for the first request; keep it above the longest analysis
+    IDEMPOTENCY_IN_FLIGHT_TTL_SEC: int = 120
+
+    # When set, GET /metrics requires "Authorization: Bearer <token>"; leave unset only behind a private network
+    METRICS_TOKEN: Optional[str] = None
+
+    # Lifetime of cached first history pages; writes invalidate them immediately
+    HISTORY_CACHE_TTL_SEC: int = 300
+    # Lifetime of a user's history version (and so of their ETags) without new writes
+    HISTORY_VERSION_TTL_SEC: int = 86400
+    # Delta sync holds back changes this recent, so a row whose transaction commits late is never skipped
+    HISTORY_SYNC_SETTLE_SEC: int = 5
+
+    # Partition maintenance (python -m app.db.partitions) connects with the migration credentials
+    MIGRATION_DATABASE_URL: Optional[str] = None
+    # Monthly partitions created ahead of the current month; inserts into a missing month fail
+    PARTITION_PREMAKE_MONTHS: int = 3
+    # Full months of checks kept before the current one; older partitions are detached (0 keeps everything)
+    PARTITION_RETENTION_MONTHS: int = 0
+    # Drop expired partitions instead of leaving them detached for archiving
+    PARTITION_DROP_EXPIRED: bool = False
+
+    # Store new analyses zstd-compressed with the newest trained dictionary (python -m app.db.analysis_compression)
+    ANALYSIS_COMPRESSION: bool = False
+    ANALYSIS_COMPRESSION_LEVEL: int = 9
+
     model_config = {
         "env_file": ".env.app",
         "extra": "allow"
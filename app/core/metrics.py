@@ -0,0 +1,157 @@
+import bisect
+import math
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Default latency buckets in seconds, tuned for LLM-bound requests
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Content type of the Prometheus text exposition format that Registry.render() produces
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelKey = Tuple[Tuple[str, str], ...]
+# (labels, value) pairs read from the application when the metrics are rendered
+Collector = Callable[[], Iterable[Tuple[Dict[str, str], float]]]
+
+
+def _label_key(labels: Optional[Dict[str, str]]) -> LabelKey:
+    return tuple(sorted(labels.items())) if labels else ()
+
+
+class Histogram:
+    """A lightweight, in-process histogram with fixed buckets and optional labels.
+
+    Observations are plain list/float updates so recording on the hot path stays cheap.
+    """
+    type = "histogram"
+
+    def __init__(self, name: str, description: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[Tuple[str, str], ...], list] = {}
+
+    def _get_series(self, labels: Optional[Dict[str, str]]) -> list:
+        key = _label_key(labels)
+        series = self._series.get(key)
+        if series is None:
+            # [bucket counts..., +Inf count], sum
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        return series
+
+    def observe(self, value: float, labels: Optional[Dict[str, str]] = None) -> None:
+        series = self._get_series(labels)
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def snapshot(self, labels: Optional[Dict[str, str]] = None) -> dict:
+        """Return cumulative bucket counts, total count and sum for one label set."""
+        counts, total = self._get_series(labels)
+        cumulative, running = {}, 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            running += count
+            cumulative[bound] = running
+        return {"buckets": cumulative, "count": running, "sum": total}
+
+    def quantile(self, q: float, labels: Optional[Dict[str, str]] = None) -> float:
+        """Estimate a quantile as the upper bound of the bucket containing it."""
+        snap = self.snapshot(labels)
+        if snap["count"] == 0:
+            return 0.0
+        target = q * snap["count"]
+        for bound, running in snap["buckets"].items():
+            if running >= target:
+                return bound
+        return float("inf")
+
+    def samples(self) -> Iterable[Tuple[str, LabelKey, float]]:
+        for key, (counts, total) in list(self._series.items()):
+            running = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                running += count
+                yield "_bucket", key + (("le", _format_value(bound)),), running
+            yield "_sum", key, total
+            yield "_count", key, running
+
+
+class Counter:
+    """A monotonically increasing count per label set, e.g. errors by type.
+
+    With `collect`, the values are instead read from the application when the
+    metrics are rendered, for counts it already keeps.
+    """
+    type = "counter"
+
+    def __init__(self, name: str, description: str, collect: Optional[Collector] = None):
+        self.name = name
+        self.description = description
+        self.collect = collect
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, labels: Optional[Dict[str, str]] = None, amount: float = 1.0) -> None:
+        key = _label_key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, labels: Optional[Dict[str, str]] = None) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def samples(self) -> Iterable[Tuple[str, LabelKey, float]]:
+        if self.collect is not None:
+            for labels, value in self.collect():
+                yield "", _label_key(labels), value
+        for key, value in list(self._values.items()):
+            yield "", key, value
+
+
+class Gauge(Counter):
+    """A value that goes up and down, e.g. connections in use.
+
+    Prefer `collect` for state the application already tracks: it is read only when
+    the metrics are rendered, so the hot path pays nothing for it.
+    """
+    type = "gauge"
+
+    def set(self, value: float, labels: Optional[Dict[str, str]] = None) -> None:
+        self._values[_label_key(labels)] = value
+
+    def dec(self, labels: Optional[Dict[str, str]] = None, amount: float = 1.0) -> None:
+        self.inc(labels, -amount)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Registry:
+    """The metrics to expose, rendered in the Prometheus text format by render()."""
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {_escape(metric.description)}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for suffix, key, value in metric.samples():
+                labels = ",".join(f'{name}="{_escape(label)}"' for name, label in key)
+                lines.append(f"{metric.name}{suffix}{{{labels}}} {_format_value(value)}" if labels else f"{metric.name}{suffix} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Everything /metrics exposes; modules register their metrics here when imported
+REGISTRY = Registry()
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -5,6 +7,28 @@ class Settings(BaseSettings):
     OPENAI_MODEL: str = "gpt-4o"
     OPENAI_MAX_CONCURRENCY: int = 5
     OPENAI_TIMEOUT_SEC: int = 30
+    OPENAI_MAX_INFLIGHT_PER_USER: int = 2
+    # Connect to the API at worker startup (retrieves OPENAI_MODEL, which costs no tokens)
+    OPENAI_WARMUP: bool = True
+
+    # Complexity-based routing: simple requests go to the fast model (routing is off while it is unset)
+    OPENAI_FAST_MODEL: Optional[str] = None
+    OPENAI_ROUTING_POLICY: str = "balanced"
+
+    # Hedging: race a second call when the first is slower than the recent percentile latency and a call
+    # slot is free, with at most OPENAI_HEDGE_BUDGET_RATIO extra calls; hedges and failed calls use the fallback model if set
+    OPENAI_HEDGE_ENABLED: bool = False
+    OPENAI_HEDGE_PERCENTILE: float = 95
+    OPENAI_HEDGE_BUDGET_RATIO: float = 0.05
+    OPENAI_HEDGE_INITIAL_DELAY_SEC: float = 10
+    OPENAI_FALLBACK_MODEL: Optional[str] = None
+
+    # Maximum prompt size per endpoint; larger inputs are trimmed by relevance before the call
+    OPENAI_MAX_PROMPT_TOKENS_SYMPTOM: int = 1500
+    OPENAI_MAX_PROMPT_TOKENS_OCR: int = 2500
+
+    # Ask the model for compact JSON and render the markdown (and disclaimer) server-side
+    OPENAI_STRUCTURED_OUTPUT: bool = False
 
     model_config = {
         "env_file": ".env.app",
@@ -1,19 +1,85 @@
-from sqlalchemy import select, update
+from sqlalchemy import func, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Optional
-from app.models.ocr_symptoms import OCRSymptom, StatusEnum
+from typing import Dict, Optional, Tuple
+import datetime
+import decimal
+import uuid
+from app.models.ocr_symptoms import OCR_VITALS, OCRSymptom, StatusEnum
+from app.crud.symptom import COMPLETED, failed_check_update
+from app.utils.analysis_codec import ensure_loaded, fetch_all
 
-async def ocr_submit_symptom_check(db: AsyncSession, user_id: int, input: dict):
-    # Implementation for submitting a symptom check
-    symptom_check = OCRSymptom(
-        user_id=user_id,
-        input=input
+# Columns read by the history endpoints; `meta` is only needed for its structured analysis
+OCR_HISTORY_COLUMNS = (
+    OCRSymptom.id, OCRSymptom.user_id, OCRSymptom.submitted_at, OCRSymptom.input, OCRSymptom.analysis,
+    OCRSymptom.status, OCRSymptom.meta["structured"].label("structured"),
+)
+
+async def ocr_insert_symptom_check(db: AsyncSession, id: uuid.UUID, submitted_at: datetime.datetime, user_id: uuid.UUID, input: dict, analysis: str, meta: dict) -> OCRSymptom:
+    """
+    Writes a completed check in one INSERT ... RETURNING and returns it, but does NOT commit. `input` is
+    normalized (see normalize_identified_data), so known vitals land in the typed OCR_VITALS columns.
+    """
+    await ensure_loaded(db)  # so the analysis can be stored compressed
+    q = insert(OCRSymptom).values(
+        id=id, submitted_at=submitted_at, user_id=user_id, input=input,
+        status=StatusEnum.completed, meta=meta, **OCRSymptom.analysis_values(analysis),
+    ).returning(OCRSymptom)
+    return (await db.execute(q)).scalar_one()
+
+async def ocr_upsert_failed_symptom_check(db: AsyncSession, id: uuid.UUID, submitted_at: datetime.datetime, user_id: uuid.UUID, input: dict, analysis: str) -> OCRSymptom:
+    """Records a check whose analysis failed in one statement; see upsert_failed_symptom_check. Does NOT commit."""
+    await ensure_loaded(db)
+    q = insert(OCRSymptom).values(
+        id=id, submitted_at=submitted_at, user_id=user_id, input=input,
+        status=StatusEnum.not_completed, **OCRSymptom.analysis_values(analysis),
+    )
+    q = q.on_conflict_do_update(index_elements=[OCRSymptom.id, OCRSymptom.submitted_at], set_=failed_check_update(q)).returning(OCRSymptom)
+    return (await db.execute(q)).scalar_one()
+
+async def ocr_get_symptom_checkby_user_id(db: AsyncSession, user_id: str, limit: int = 10, cursor: Optional[Tuple[datetime.datetime, uuid.UUID]] = None):
+    """
+    Newest-first completed checks as lightweight rows holding only the columns history
+    responses need, resuming strictly after `cursor` (submitted_at, id) when given.
+    """
+    q = select(*OCR_HISTORY_COLUMNS).where(OCRSymptom.user_id == user_id).where(OCRSymptom.status == COMPLETED)
+    if cursor is not None:
+        q = q.where(tuple_(OCRSymptom.submitted_at, OCRSymptom.id) < tuple_(*cursor))
+    q = q.order_by(OCRSymptom.submitted_at.desc(), OCRSymptom.id.desc()).limit(limit)
+    return await fetch_all(db, q)
+
+async def ocr_get_symptom_changes_by_user_id(db: AsyncSession, user_id: str, since: Tuple[datetime.datetime, uuid.UUID], limit: int = 10, settle_sec: int = 5):
+    """
+    Completed checks created or updated strictly after `since` (updated_at, id), oldest change first,
+    as OCR_HISTORY_COLUMNS rows followed by updated_at; see get_symptom_changes_by_user_id.
+    """
+    q = (
+        select(*OCR_HISTORY_COLUMNS, OCRSymptom.updated_at)
+        .where(OCRSymptom.user_id == user_id).where(OCRSymptom.status == COMPLETED)
+        .where(tuple_(OCRSymptom.updated_at, OCRSymptom.id) > tuple_(*since))
+        .where(OCRSymptom.updated_at <= func.clock_timestamp() - datetime.timedelta(seconds=settle_sec))
+        .order_by(OCRSymptom.updated_at, OCRSymptom.id).limit(limit)
     )
-    db.add(symptom_check)
-    await db.flush()  # Use flush to get the ID without committing
-    return symptom_check
+    return await fetch_all(db, q)
 
-async def ocr_get_symptom_checkby_user_id(db: AsyncSession, user_id: str, limit: int = 10, offset: int = 0):
-    q = select(OCRSymptom).where(OCRSymptom.user_id == user_id).where(OCRSymptom.status == StatusEnum.completed).order_by(OCRSymptom.submitted_at.desc()).limit(limit).offset(offset)
-    res = await db.execute(q)
-    return res.scalars().all()
\ No newline at end of file
+async def ocr_filter_symptom_checks(db: AsyncSession, ranges: Dict[str, Tuple[Optional[decimal.Decimal], Optional[decimal.Decimal]]], user_id: Optional[str] = None, limit: int = 10, cursor: Optional[Tuple[datetime.datetime, uuid.UUID]] = None):
+    """
+    Newest-first completed checks whose OCR_VITALS fall within `ranges` ({name: (min, max)},
+    inclusive, either end optional) as OCR_HISTORY_COLUMNS rows, resuming strictly after
+    `cursor` (submitted_at, id) when given. Across all users when `user_id` is None.
+    """
+    q = select(*OCR_HISTORY_COLUMNS).where(OCRSymptom.status == COMPLETED)
+    if user_id is not None:
+        q = q.where(OCRSymptom.user_id == user_id)
+    for name, (low, high) in ranges.items():
+        if name not in OCR_VITALS:
+            raise ValueError("unknown_vital")
+        column = getattr(OCRSymptom, name)
+        if low is not None:
+            q = q.where(column >= low)
+        if high is not None:
+            q = q.where(column <= high)
+    if cursor is not None:
+        q = q.where(tuple_(OCRSymptom.submitted_at, OCRSymptom.id) < tuple_(*cursor))
+    q = q.order_by(OCRSymptom.submitted_at.desc(), OCRSymptom.id.desc()).limit(limit)
+    return await fetch_all(db, q)
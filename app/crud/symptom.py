@@ -1,37 +1,83 @@
-from sqlalchemy import select
+from sqlalchemy import func, literal_column, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Optional
+from typing import Optional, Tuple
 from app.models.symptoms import Symptom, SexEnum, StatusEnum
+from app.utils.analysis_codec import ensure_loaded, fetch_all
+import datetime
 import uuid
 
-async def submit_symptom_check(
-    db: AsyncSession, user_id: uuid.UUID, age: int, sex: SexEnum, 
-    symptoms: str, duration: str, severity: int, additional_notes: Optional[str] = None
+# Inlined instead of bound: the history indexes are partial (WHERE status = 'completed'), and the
+# generic plan Postgres switches to for a prepared statement can't use them against `status = $1`
+COMPLETED = literal_column("'completed'")
+
+# Columns read by the history endpoints; `meta` is only needed for its structured analysis
+HISTORY_COLUMNS = (
+    Symptom.id, Symptom.user_id, Symptom.submitted_at, Symptom.age, Symptom.sex, Symptom.symptoms,
+    Symptom.duration, Symptom.severity, Symptom.additional_notes, Symptom.analysis, Symptom.status,
+    Symptom.meta["structured"].label("structured"),
+)
+
+def failed_check_update(q) -> dict:
+    """SET clause of the failed-check upserts (`q`: their INSERT). It names columns and skips onupdate, so updated_at is set here."""
+    return {
+        "analysis": q.excluded.analysis, "analysis_zstd": q.excluded.analysis_zstd, "analysis_dict": q.excluded.analysis_dict,
+        "status": q.excluded.status, "updated_at": func.clock_timestamp(),
+    }
+
+async def insert_symptom_check(
+    db: AsyncSession, id: uuid.UUID, submitted_at: datetime.datetime, user_id: uuid.UUID, age: int, sex: SexEnum,
+    symptoms: str, duration: str, severity: int, additional_notes: Optional[str], analysis: str, meta: dict
 ) -> Symptom:
-    """Creates a symptom check object and adds it to the session."""
-    symptom_check = Symptom(
-        user_id=user_id, age=age, sex=sex, symptoms=symptoms,
-        duration=duration, severity=severity, additional_notes=additional_notes,
-        status=StatusEnum.not_completed 
-    )
-    db.add(symptom_check)
-    await db.flush()  # Use flush to get the ID without committing
-    return symptom_check
+    """Writes a completed check in one INSERT ... RETURNING and returns it, but does NOT commit."""
+    await ensure_loaded(db)  # so the analysis can be stored compressed
+    q = insert(Symptom).values(
+        id=id, submitted_at=submitted_at, user_id=user_id, age=age, sex=sex, symptoms=symptoms, duration=duration,
+        severity=severity, additional_notes=additional_notes, status=StatusEnum.completed, meta=meta,
+        **Symptom.analysis_values(analysis),
+    ).returning(Symptom)
+    return (await db.execute(q)).scalar_one()
 
-async def update_symptom_analysis(
-    db: AsyncSession, symptom_id: uuid.UUID, analysis_text: str, status: StatusEnum
+async def upsert_failed_symptom_check(
+    db: AsyncSession, id: uuid.UUID, submitted_at: datetime.datetime, user_id: uuid.UUID, age: int, sex: SexEnum,
+    symptoms: str, duration: str, severity: int, additional_notes: Optional[str], analysis: str
 ) -> Symptom:
-    """Finds a symptom check, updates it, but does NOT commit."""
-    result = await db.execute(select(Symptom).where(Symptom.id == symptom_id))
-    symptom_check = result.scalar_one()
-    
-    symptom_check.analysis = analysis_text
-    symptom_check.status = status
-    
-    await db.flush() # Flush to ensure changes are sent to the DB within the transaction
-    return symptom_check
+    """
+    Records a check whose analysis failed as not completed, with `analysis` explaining why, in one
+    statement; a check already stored under (id, submitted_at) gets the new analysis and status.
+    Does NOT commit.
+    """
+    await ensure_loaded(db)
+    q = insert(Symptom).values(
+        id=id, submitted_at=submitted_at, user_id=user_id, age=age, sex=sex, symptoms=symptoms, duration=duration,
+        severity=severity, additional_notes=additional_notes, status=StatusEnum.not_completed,
+        **Symptom.analysis_values(analysis),
+    )
+    q = q.on_conflict_do_update(index_elements=[Symptom.id, Symptom.submitted_at], set_=failed_check_update(q)).returning(Symptom)
+    return (await db.execute(q)).scalar_one()
+
+async def get_symptom_checkby_user_id(db: AsyncSession, user_id: str, limit: int = 10, cursor: Optional[Tuple[datetime.datetime, uuid.UUID]] = None):
+    """
+    Newest-first completed checks as lightweight rows holding only the columns history
+    responses need, resuming strictly after `cursor` (submitted_at, id) when given.
+    """
+    q = select(*HISTORY_COLUMNS).where(Symptom.user_id == user_id).where(Symptom.status == COMPLETED)
+    if cursor is not None:
+        q = q.where(tuple_(Symptom.submitted_at, Symptom.id) < tuple_(*cursor))
+    q = q.order_by(Symptom.submitted_at.desc(), Symptom.id.desc()).limit(limit)
+    return await fetch_all(db, q)
 
-async def get_symptom_checkby_user_id(db: AsyncSession, user_id: str, limit: int = 10, offset: int = 0):
-    q = select(Symptom).where(Symptom.user_id == user_id).where(Symptom.status == StatusEnum.completed).order_by(Symptom.submitted_at.desc()).limit(limit).offset(offset)
-    res = await db.execute(q)
-    return res.scalars().all()
\ No newline at end of file
+async def get_symptom_changes_by_user_id(db: AsyncSession, user_id: str, since: Tuple[datetime.datetime, uuid.UUID], limit: int = 10, settle_sec: int = 5):
+    """
+    Completed checks created or updated strictly after `since` (updated_at, id), oldest change first,
+    as HISTORY_COLUMNS rows followed by updated_at. Changes younger than `settle_sec` are left for
+    the next sync, so a watermark taken from this page can't jump past a row that commits late.
+    """
+    q = (
+        select(*HISTORY_COLUMNS, Symptom.updated_at)
+        .where(Symptom.user_id == user_id).where(Symptom.status == COMPLETED)
+        .where(tuple_(Symptom.updated_at, Symptom.id) > tuple_(*since))
+        .where(Symptom.updated_at <= func.clock_timestamp() - datetime.timedelta(seconds=settle_sec))
+        .order_by(Symptom.updated_at, Symptom.id).limit(limit)
+    )
+    return await fetch_all(db, q)
\ No newline at end of file
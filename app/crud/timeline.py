@@ -0,0 +1,119 @@
+from typing import AsyncIterator, Optional, Sequence, Tuple
+from sqlalchemy import Float, bindparam, func, literal_column, null, select, tuple_, type_coerce, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.symptoms import Symptom
+from app.models.ocr_symptoms import OCRSymptom
+from app.crud.symptom import COMPLETED
+from app.utils.analysis_codec import fetch_all, load_dictionaries
+import datetime
+import uuid
+
+# Values of the `type` discriminator
+SYMPTOM = "symptom"
+OCR = "ocr"
+
+# Both branches return the same columns; the text-only ones are NULL for OCR checks and vice versa
+_SYMPTOM_COLUMNS = (
+    literal_column(f"'{SYMPTOM}'").label("type"), Symptom.id, Symptom.user_id, Symptom.submitted_at,
+    Symptom.age, Symptom.sex, Symptom.symptoms, Symptom.duration, Symptom.severity, Symptom.additional_notes,
+    type_coerce(null(), OCRSymptom.input.type).label("input"),
+    Symptom.analysis, Symptom.status, Symptom.meta["structured"].label("structured"),
+)
+_OCR_COLUMNS = (
+    literal_column(f"'{OCR}'"), OCRSymptom.id, OCRSymptom.user_id, OCRSymptom.submitted_at,
+    null(), null(), null(), null(), null(), null(),
+    OCRSymptom.input, OCRSymptom.analysis, OCRSymptom.status, OCRSymptom.meta["structured"],
+)
+
+def _branch(model, columns, with_cursor: bool, limited: bool):
+    q = select(*columns).where(model.user_id == bindparam("user_id")).where(model.status == COMPLETED)
+    if with_cursor:
+        q = q.where(tuple_(model.submitted_at, model.id) < tuple_(
+            bindparam("after_at", type_=model.submitted_at.type), bindparam("after_id", type_=model.id.type)
+        ))
+    q = q.order_by(model.submitted_at.desc(), model.id.desc())
+    return q.limit(bindparam("limit")) if limited else q
+
+def _timeline_statement(with_cursor: bool, limited: bool = True):
+    merged = union_all(
+        _branch(Symptom, _SYMPTOM_COLUMNS, with_cursor, limited), _branch(OCRSymptom, _OCR_COLUMNS, with_cursor, limited)
+    ).subquery("timeline")
+    q = select(merged).order_by(merged.c.submitted_at.desc(), merged.c.id.desc())
+    return q.limit(bindparam("limit")) if limited else q
+
+# Built once: constructing the UNION subquery costs more than running it
+_TIMELINE = _timeline_statement(with_cursor=False)
+_TIMELINE_AFTER = _timeline_statement(with_cursor=True)
+_TIMELINE_ALL = _timeline_statement(with_cursor=False, limited=False)
+
+def timeline_query(user_id: str, limit: int = 10, cursor: Optional[Tuple[datetime.datetime, uuid.UUID]] = None):
+    """
+    Newest-first completed text and OCR checks in one UNION ALL, as (statement, params). Each
+    branch is limited on its own so it can stop early on its partial (user_id, submitted_at
+    DESC, id DESC) index, then the merged rows are ordered and limited again.
+    """
+    params = {"user_id": user_id, "limit": limit}
+    if cursor is None:
+        return _TIMELINE, params
+    params["after_at"], params["after_id"] = cursor
+    return _TIMELINE_AFTER, params
+
+# websearch_to_tsquery accepts what users type ("chest pain", "migraine -aura", quoted phrases) without syntax errors
+_SEARCH_QUERY = func.websearch_to_tsquery(literal_column("'english'::regconfig"), bindparam("q"))
+
+def _search_branch(model, columns, with_cursor: bool):
+    rank = func.ts_rank_cd(model.search_vector, _SEARCH_QUERY)
+    q = (
+        select(*columns, rank.label("rank"))
+        .where(model.user_id == bindparam("user_id")).where(model.status == COMPLETED)
+        .where(model.search_vector.op("@@")(_SEARCH_QUERY))
+    )
+    if with_cursor:
+        q = q.where(tuple_(rank, model.submitted_at, model.id) < tuple_(
+            bindparam("after_rank", type_=Float), bindparam("after_at", type_=model.submitted_at.type),
+            bindparam("after_id", type_=model.id.type),
+        ))
+    return q.order_by(rank.desc(), model.submitted_at.desc(), model.id.desc()).limit(bindparam("limit"))
+
+def _search_statement(with_cursor: bool):
+    merged = union_all(
+        _search_branch(Symptom, _SYMPTOM_COLUMNS, with_cursor), _search_branch(OCRSymptom, _OCR_COLUMNS, with_cursor)
+    ).subquery("matches")
+    return (
+        select(merged)
+        .order_by(merged.c.rank.desc(), merged.c.submitted_at.desc(), merged.c.id.desc())
+        .limit(bindparam("limit"))
+    )
+
+_SEARCH = _search_statement(with_cursor=False)
+_SEARCH_AFTER = _search_statement(with_cursor=True)
+
+async def get_timeline_by_user_id(db: AsyncSession, user_id: str, limit: int = 10, cursor: Optional[Tuple[datetime.datetime, uuid.UUID]] = None):
+    """Rows of timeline_query(), resuming strictly after `cursor` (submitted_at, id) when given."""
+    return await fetch_all(db, *timeline_query(user_id, limit, cursor))
+
+
+async def stream_timeline_by_user_id(db: AsyncSession, user_id: str, batch_size: int = 500) -> AsyncIterator[Sequence]:
+    """
+    All of the user's timeline rows, newest first, in batches of up to `batch_size` read from a
+    server-side cursor, so memory use does not grow with the length of the history.
+    """
+    # Rows are decoded as they stream, so pick up dictionaries trained since this process started first
+    await load_dictionaries(db)
+    result = await db.stream(_TIMELINE_ALL, {"user_id": user_id}, execution_options={"yield_per": batch_size})
+    async for rows in result.partitions():
+        yield rows
+
+async def search_timeline_by_user_id(db: AsyncSession, user_id: str, query: str, limit: int = 10, cursor: Optional[Tuple[float, datetime.datetime, uuid.UUID]] = None):
+    """
+    The user's completed text and OCR checks matching the web-search style `query`, best match
+    first, as timeline rows followed by their rank. Resumes strictly after `cursor`
+    (rank, submitted_at, id) when given.
+    """
+    params = {"user_id": user_id, "q": query, "limit": limit}
+    if cursor is None:
+        statement = _SEARCH
+    else:
+        statement = _SEARCH_AFTER
+        params["after_rank"], params["after_at"], params["after_id"] = cursor
+    return await fetch_all(db, statement, params)
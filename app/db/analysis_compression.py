@@ -0,0 +1,195 @@
+"""Train analysis dictionaries, recompress stored analyses and report the savings.
+
+    python -m app.db.analysis_compression train [--samples N] [--dict-size BYTES]
+    python -m app.db.analysis_compression recompress [--batch-size N]
+    python -m app.db.analysis_compression report [--sample N]
+
+`train` stores a new dictionary version trained on the newest analyses. `recompress` moves
+every analysis not yet compressed with the newest dictionary onto it, one batch per
+transaction, so it can be stopped and rerun at any time; rows changed while it runs are
+skipped and picked up by the next run. Set ANALYSIS_COMPRESSION so new analyses are stored
+compressed as well (see app.utils.analysis_codec). App processes started before a new
+dictionary load it the first time they read a row that needs it.
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+from typing import Dict, Optional, Sequence
+
+import zstandard
+from sqlalchemy import func, or_, select, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+
+from app.core.db_config import db_settings
+from app.models.analysis import AnalysisDictionary
+from app.models.ocr_symptoms import OCRSymptom
+from app.models.symptoms import Symptom
+from app.utils import analysis_codec
+
+logger = logging.getLogger(__name__)
+
+MODELS = (Symptom, OCRSymptom)
+
+
+async def train(conn: AsyncConnection, samples: int = 5000, dict_size: int = 32768) -> int:
+    """Train a dictionary on the newest `samples` analyses, store it as the next version and return that."""
+    await analysis_codec.load_dictionaries(conn)
+    texts = []
+    for model in MODELS:
+        q = (
+            select(model.analysis).where(model.analysis_plain.isnot(None) | model.analysis_zstd.isnot(None))
+            .order_by(model.submitted_at.desc()).limit(samples)
+        )
+        texts += [analysis.encode("utf-8") for (analysis,) in await analysis_codec.fetch_all(conn, q)]
+    if not texts:
+        raise ValueError("no_analyses")
+
+    version = (await conn.execute(select(func.coalesce(func.max(AnalysisDictionary.version), 0) + 1))).scalar_one()
+    dictionary = zstandard.train_dictionary(dict_size, texts, dict_id=version, level=db_settings.ANALYSIS_COMPRESSION_LEVEL)
+    await conn.execute(AnalysisDictionary.__table__.insert().values(
+        version=version, dictionary=dictionary.as_bytes(), sample_count=len(texts),
+    ))
+    analysis_codec.register_dictionary(version, dictionary.as_bytes())
+    logger.info("trained analysis dictionary v%s on %d analyses (%d bytes)", version, len(texts), len(dictionary.as_bytes()))
+    return version
+
+
+def _pending(model, version: int):
+    # Stored as text, or compressed with an older dictionary
+    return or_(model.analysis_plain.isnot(None), model.analysis_dict != version)
+
+
+def _update_sql(table: str):
+    # One statement per batch. updated_at must still match, so a row changed meanwhile is left
+    # for the next run, and is not bumped: same content, no delta for syncing clients. The
+    # search_vector trigger keeps the lexemes it has when only a frame comes in.
+    return text(
+        f"UPDATE {table} AS t SET analysis = b.analysis, analysis_zstd = b.frame, analysis_dict = b.version "
+        "FROM unnest(CAST(:ids AS uuid[]), CAST(:submitted_at AS timestamptz[]), CAST(:updated_at AS timestamptz[]), "
+        "CAST(:texts AS text[]), CAST(:frames AS bytea[]), CAST(:versions AS smallint[])) "
+        "AS b(id, submitted_at, updated_at, analysis, frame, version) "
+        "WHERE t.id = b.id AND t.submitted_at = b.submitted_at AND t.updated_at = b.updated_at "
+        "RETURNING t.id"
+    )
+
+
+async def recompress_table(engine, model, version: int, batch_size: int = 500) -> Dict[str, int]:
+    """Store every analysis in `model`'s table compressed with dictionary `version`; returns row counts."""
+    update_sql = _update_sql(model.__tablename__)
+    counts = {"compressed": 0, "kept_plain": 0, "skipped": 0}
+    after = None
+    while True:
+        async with engine.begin() as conn:
+            q = select(model.id, model.submitted_at, model.updated_at, model.analysis_dict, model.analysis).where(_pending(model, version))
+            if after is not None:
+                q = q.where(tuple_(model.id, model.submitted_at) > tuple_(*after))
+            rows = await analysis_codec.fetch_all(conn, q.order_by(model.id, model.submitted_at).limit(batch_size))
+            if not rows:
+                return counts
+
+            batch = {"ids": [], "submitted_at": [], "updated_at": [], "texts": [], "frames": [], "versions": []}
+            for id_, submitted_at, updated_at, stored_with, analysis in rows:
+                compressed = analysis_codec.compress(analysis, version)
+                counts["compressed" if compressed else "kept_plain"] += 1
+                if compressed is None and stored_with is None:
+                    continue  # too short to gain anything, and already stored as text
+                frame, dict_version = compressed or (None, None)
+                for key, value in zip(batch, (id_, submitted_at, updated_at, None if compressed else analysis, frame, dict_version)):
+                    batch[key].append(value)
+            if batch["ids"]:
+                updated = len((await conn.execute(update_sql, batch)).all())
+                counts["skipped"] += len(batch["ids"]) - updated
+            after = rows[-1][:2]
+        logger.info("%s: %s", model.__tablename__, counts)
+
+
+async def report(conn: AsyncConnection, sample: int = 1000) -> Dict[str, dict]:
+    """Stored bytes per table and, from a sample of compressed rows, the ratio and decode time."""
+    await analysis_codec.load_dictionaries(conn)
+    out = {}
+    for model in MODELS:
+        plain_rows, plain_bytes, packed_rows, packed_bytes = (await conn.execute(select(
+            func.count(model.analysis_plain), func.coalesce(func.sum(func.octet_length(model.analysis_plain)), 0),
+            func.count(model.analysis_zstd), func.coalesce(func.sum(func.octet_length(model.analysis_zstd)), 0),
+        ))).one()
+        versions = dict((await conn.execute(
+            select(model.analysis_dict, func.count()).where(model.analysis_dict.isnot(None)).group_by(model.analysis_dict)
+        )).all())
+
+        frames = [bytes(frame) for (frame,) in (await conn.execute(
+            select(model.analysis_zstd).where(model.analysis_zstd.isnot(None)).limit(sample)
+        )).all()]
+        decode_us, ratio = [], None
+        if frames:
+            texts = []
+            for frame in frames:
+                started = time.perf_counter()
+                texts.append(analysis_codec.decompress(frame))
+                decode_us.append((time.perf_counter() - started) * 1e6)
+            ratio = sum(len(analysis.encode("utf-8")) for analysis in texts) / sum(map(len, frames))
+
+        # Text size of the compressed rows estimated from the sample's ratio
+        original = plain_bytes + (packed_bytes * ratio if ratio else 0)
+        stored = plain_bytes + packed_bytes
+        out[model.__tablename__] = {
+            "plain_rows": plain_rows, "compressed_rows": packed_rows, "rows_by_dictionary": versions,
+            "text_bytes": int(original), "stored_bytes": stored,
+            "saved_bytes": int(original - stored), "ratio": ratio,
+            "decode_us_p50": statistics.median(decode_us) if decode_us else None,
+            "decode_us_p99": statistics.quantiles(decode_us, n=100)[98] if len(decode_us) >= 2 else None,
+        }
+    return out
+
+
+def _print_report(tables: Dict[str, dict]) -> None:
+    for table, r in tables.items():
+        print(f"{table}: {r['compressed_rows']:,} compressed (by dictionary: {r['rows_by_dictionary']}), {r['plain_rows']:,} plain")
+        print(f"  analysis text  ~{r['text_bytes']:>14,} bytes")
+        print(f"  stored          {r['stored_bytes']:>14,} bytes")
+        print(f"  saved          ~{r['saved_bytes']:>14,} bytes")
+        if r["ratio"]:
+            print(f"  frames {r['ratio']:.1f}x smaller than their text; decode p50 {r['decode_us_p50']:.1f}us, p99 {r['decode_us_p99'] or 0:.1f}us per analysis")
+
+
+async def run(command: str, database_url: str, args: argparse.Namespace) -> None:
+    engine = create_async_engine(database_url)
+    try:
+        if command == "train":
+            async with engine.begin() as conn:
+                await train(conn, args.samples, args.dict_size)
+        elif command == "recompress":
+            async with engine.connect() as conn:
+                await analysis_codec.load_dictionaries(conn)
+            version = analysis_codec.active_version()
+            if version is None:
+                raise SystemExit("No analysis dictionary yet; run `train` first.")
+            for model in MODELS:
+                counts = await recompress_table(engine, model, version, args.batch_size)
+                logger.info("%s: done, %s", model.__tablename__, counts)
+        else:
+            async with engine.connect() as conn:
+                _print_report(await report(conn, args.sample))
+    finally:
+        await engine.dispose()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.db.analysis_compression", description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    trainer = commands.add_parser("train", help="train and store a new dictionary version")
+    trainer.add_argument("--samples", type=int, default=5000, help="newest analyses per table to train on")
+    trainer.add_argument("--dict-size", type=int, default=32768, help="dictionary size in bytes")
+    commands.add_parser("recompress", help="compress stored analyses with the newest dictionary").add_argument(
+        "--batch-size", type=int, default=500, help="rows per transaction")
+    commands.add_parser("report", help="print bytes saved and decode time").add_argument(
+        "--sample", type=int, default=1000, help="compressed rows per table to measure")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    asyncio.run(run(args.command, db_settings.USER_DATABASE_URL, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Monthly partitions of the check tables: pre-creation and retention.
+
+symptoms and ocr_symptoms are range-partitioned on submitted_at, one partition per UTC
+month named <table>_pYYYY_MM. Run this daily (cron, a scheduled container) with the
+migration credentials:
+
+    python -m app.db.partitions [--premake N] [--retention-months N] [--drop] [--dry-run]
+
+It creates the partitions for the current month and the next PARTITION_PREMAKE_MONTHS, so
+inserts never find their month missing. With PARTITION_RETENTION_MONTHS set, months that
+ended more than that many months ago are detached (kept as plain tables to archive), or
+dropped with --drop / PARTITION_DROP_EXPIRED. Detaching and dropping touch metadata only,
+unlike a DELETE of the same rows.
+"""
+import argparse
+import asyncio
+import datetime
+import logging
+import re
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_TABLES = ("symptoms", "ocr_symptoms")
+
+_NAME_RE = re.compile(r"^(?P<table>\w+)_p(?P<year>\d{4})_(?P<month>\d{2})$")
+
+
+def month_start(day: datetime.date) -> datetime.date:
+    return day.replace(day=1)
+
+
+def add_months(month: datetime.date, count: int) -> datetime.date:
+    index = month.year * 12 + month.month - 1 + count
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def months(first: datetime.date, last: datetime.date) -> Iterator[datetime.date]:
+    """First days of every month from `first` through `last`, inclusive."""
+    month = month_start(first)
+    while month <= last:
+        yield month
+        month = add_months(month, 1)
+
+
+def partition_name(table: str, month: datetime.date) -> str:
+    return f"{table}_p{month:%Y_%m}"
+
+
+def partition_month(table: str, name: str) -> Optional[datetime.date]:
+    """The month a partition of `table` holds, from its name; None for anything else."""
+    match = _NAME_RE.match(name)
+    if not match or match.group("table") != table:
+        return None
+    return datetime.date(int(match.group("year")), int(match.group("month")), 1)
+
+
+def create_partition_sql(table: str, month: datetime.date) -> str:
+    # Bounds in UTC, whatever the session time zone
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table, month)} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{month:%Y-%m-%d} 00:00:00+00') TO ('{add_months(month, 1):%Y-%m-%d} 00:00:00+00')"
+    )
+
+
+def expired_before(today: datetime.date, retention_months: int) -> Optional[datetime.date]:
+    """Months starting before this are past retention; None when retention is off (0)."""
+    if retention_months <= 0:
+        return None
+    return add_months(month_start(today), -retention_months)
+
+
+async def _partitions(conn: AsyncConnection, table: str) -> List[Tuple[str, bool]]:
+    """(name, detach pending) of the partitions attached to `table`."""
+    res = await conn.execute(text(
+        "SELECT c.relname, i.inhdetachpending FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = CAST(:table AS regclass)"
+    ), {"table": table})
+    return [tuple(row) for row in res.all()]
+
+
+async def _detached(conn: AsyncConnection, table: str) -> List[str]:
+    """Plain tables left behind by earlier detaches of `table`'s partitions."""
+    res = await conn.execute(text(
+        "SELECT c.relname FROM pg_class c WHERE c.relkind = 'r' AND c.relnamespace = CAST(current_schema() AS regnamespace) "
+        "AND c.relname LIKE :prefix AND NOT c.relispartition"
+    ), {"prefix": f"{table}\\_p%"})
+    return [name for (name,) in res.all()]
+
+
+async def maintain_table(
+    conn: AsyncConnection, table: str, today: datetime.date, premake_months: int,
+    retention_months: int = 0, drop: bool = False, dry_run: bool = False,
+) -> List[str]:
+    """
+    Bring `table`'s partitions in line with the policy on an AUTOCOMMIT connection; returns the
+    statements run (or that would run, with `dry_run`).
+    """
+    statements = []
+    attached = await _partitions(conn, table)
+    names = {name for name, _ in attached}
+
+    for month in months(today, add_months(month_start(today), premake_months)):
+        if partition_name(table, month) not in names:
+            statements.append(create_partition_sql(table, month))
+
+    cutoff = expired_before(today, retention_months)
+    if cutoff is not None:
+        for name, pending in sorted(attached):
+            month = partition_month(table, name)
+            if month is None or month >= cutoff:
+                continue
+            # CONCURRENTLY leaves queries on the parent running; FINALIZE completes one that was interrupted
+            statements.append(f"ALTER TABLE {table} DETACH PARTITION {name} {'FINALIZE' if pending else 'CONCURRENTLY'}")
+            if drop:
+                statements.append(f"DROP TABLE {name}")
+        if drop:
+            for name in sorted(await _detached(conn, table)):
+                month = partition_month(table, name)
+                if month is not None and month < cutoff and name not in names:
+                    statements.append(f"DROP TABLE {name}")
+
+    for statement in statements:
+        logger.info("%s%s", "(dry run) " if dry_run else "", statement)
+        if not dry_run:
+            await conn.execute(text(statement))
+    return statements
+
+
+async def run_maintenance(
+    database_url: str, premake_months: int, retention_months: int, drop: bool,
+    dry_run: bool = False, tables: Sequence[str] = PARTITIONED_TABLES, today: Optional[datetime.date] = None,
+) -> List[str]:
+    today = today or datetime.datetime.now(datetime.timezone.utc).date()
+    engine = create_async_engine(database_url)
+    try:
+        # DETACH ... CONCURRENTLY cannot run inside a transaction block
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            # Partitions are owned by the same role as their tables (see migrations/env.py)
+            await conn.execute(text("SET ROLE app_owner"))
+            statements = []
+            for table in tables:
+                statements += await maintain_table(conn, table, today, premake_months, retention_months, drop, dry_run)
+            return statements
+    finally:
+        await engine.dispose()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    from app.core.db_config import db_settings
+
+    parser = argparse.ArgumentParser(prog="python -m app.db.partitions", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--premake", type=int, default=db_settings.PARTITION_PREMAKE_MONTHS, help="months to create ahead of the current one")
+    parser.add_argument("--retention-months", type=int, default=db_settings.PARTITION_RETENTION_MONTHS, help="full months to keep before the current one; 0 keeps everything")
+    parser.add_argument("--drop", action="store_true", default=db_settings.PARTITION_DROP_EXPIRED, help="drop expired partitions instead of only detaching them")
+    parser.add_argument("--dry-run", action="store_true", help="print the statements without running them")
+    args = parser.parse_args(argv)
+
+    database_url = db_settings.MIGRATION_DATABASE_URL
+    if not database_url:
+        raise SystemExit("MIGRATION_DATABASE_URL is not set in the environment.")
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    statements = asyncio.run(run_maintenance(database_url, args.premake, args.retention_months, args.drop, args.dry_run))
+    if not statements:
+        logger.info("partitions are up to date")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import time
+import uuid
+from typing import Dict
+
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.db_config import db_settings
+from app.core.metrics import REGISTRY, Counter, Histogram
+
+_DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Checkout wait per pool, shared by every engine in the process
+CHECKOUT_WAIT_SECONDS = REGISTRY.register(Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time to check out a database connection (queueing for a free one, connecting, pre-ping), by pool",
+    buckets=_DB_BUCKETS,
+))
+QUERY_SECONDS = REGISTRY.register(Histogram(
+    "db_query_seconds",
+    "Time for Postgres to run a statement and return its rows, by pool",
+    buckets=_DB_BUCKETS,
+))
+# Checkouts that gave up after DB_POOL_TIMEOUT_SEC, by pool
+checkout_timeouts: Dict[str, int] = {}
+REGISTRY.register(Counter(
+    "db_pool_checkout_timeouts_total",
+    "Checkouts that gave up waiting for a database connection, by pool",
+    collect=lambda: [({"pool": label}, count) for label, count in checkout_timeouts.items()],
+))
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """The default async queue pool, timing every checkout into CHECKOUT_WAIT_SECONDS.
+
+    The pool's label is its `pool_logging_name`, which survives the pool being recreated.
+    """
+    @property
+    def label(self) -> str:
+        return self._orig_logging_name or "primary"
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            checkout_timeouts[self.label] = checkout_timeouts.get(self.label, 0) + 1
+            raise
+        finally:
+            CHECKOUT_WAIT_SECONDS.observe(time.perf_counter() - started, {"pool": self.label})
+
+
+def instrument_queries(engine: AsyncEngine) -> None:
+    """Time every statement `engine` runs into QUERY_SECONDS, labelled with its pool."""
+    labels = {"pool": engine.pool.label}
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _started(conn, cursor, statement, parameters, context, executemany):
+        context._query_started = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _finished(conn, cursor, statement, parameters, context, executemany):
+        QUERY_SECONDS.observe(time.perf_counter() - context._query_started, labels)
+
+
+def _prepared_statement_name() -> str:
+    return f"__asyncpg_{uuid.uuid4().hex}__"
+
+
+def engine_options(label: str = "primary") -> dict:
+    """create_async_engine() keyword arguments for the pool settings in db_settings."""
+    options = {
+        "poolclass": InstrumentedPool,
+        "pool_logging_name": label,
+        "pool_size": db_settings.DB_POOL_SIZE,
+        "max_overflow": db_settings.DB_MAX_OVERFLOW,
+        "pool_timeout": db_settings.DB_POOL_TIMEOUT_SEC,
+        "pool_recycle": db_settings.DB_POOL_RECYCLE_SEC,
+        "pool_pre_ping": db_settings.DB_POOL_PRE_PING,
+    }
+    if db_settings.DB_PGBOUNCER:
+        # In transaction pooling consecutive statements can run on different server connections,
+        # where a cached prepared statement doesn't exist or its default name is taken by another client
+        options["connect_args"] = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": _prepared_statement_name,
+        }
+    return options
+
+
+def pool_stats(engine: AsyncEngine) -> dict:
+    """Connections of `engine`'s pool by state, checkout timeouts and checkout wait quantiles."""
+    pool = engine.pool
+    labels = {"pool": pool.label}
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        # overflow() counts down from -size while the pool is still filling
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+        "timeouts": checkout_timeouts.get(pool.label, 0),
+        "checkout_wait_p50": CHECKOUT_WAIT_SECONDS.quantile(0.5, labels),
+        "checkout_wait_p99": CHECKOUT_WAIT_SECONDS.quantile(0.99, labels),
+    }
@@ -1,9 +1,23 @@
 import redis.asyncio as redis
 from app.core.db_config import db_settings
+from app.core.metrics import REGISTRY, Gauge
 
 REDIS_URL = f"{'rediss' if db_settings.REDIS_USE_SSL else 'redis'}://{db_settings.REDIS_HOST}:{db_settings.REDIS_PORT}/0"
 
 pool = redis.ConnectionPool.from_url(REDIS_URL, decode_responses=True)
 
 def get_redis_client() -> redis.Redis:
-    return redis.Redis(connection_pool=pool)
\ No newline at end of file
+    return redis.Redis(connection_pool=pool)
+
+
+def _pool_connections():
+    # redis-py keeps no public counts; both collections exist on every ConnectionPool in 5.x and 6.x
+    yield {"state": "in_use"}, len(getattr(pool, "_in_use_connections", ()))
+    yield {"state": "idle"}, len(getattr(pool, "_available_connections", ()))
+
+
+REGISTRY.register(Gauge(
+    "redis_pool_connections",
+    "Redis connections by state (in_use, idle)",
+    collect=_pool_connections,
+))
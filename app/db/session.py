@@ -1,11 +1,170 @@
-from typing import AsyncGenerator
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+import asyncio
+import itertools
+import logging
+import time
+from typing import AsyncGenerator, Dict, List, Optional
+
+import redis.asyncio as redis
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
 from app.core.db_config import db_settings
+from app.core.metrics import REGISTRY, Gauge
+from app.db.pool import engine_options, instrument_queries, pool_stats
 
-engine = create_async_engine(db_settings.USER_DATABASE_URL, future=True, echo=False)
+logger = logging.getLogger(__name__)
+
+engine = create_async_engine(db_settings.USER_DATABASE_URL, future=True, echo=False, **engine_options())
+instrument_queries(engine)
 AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
 
-# FastAPI dependency to get session:
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     async with AsyncSessionLocal() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+
+# Seconds the replica is behind the primary; 0 while it has replayed everything it received,
+# so an idle primary doesn't make a caught-up replica look stale
+_REPLICA_LAG_SQL = text(
+    "SELECT pg_is_in_recovery(), CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE coalesce(extract(epoch FROM clock_timestamp() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class Replica:
+    """A read replica's engine and sessionmaker, and the outcome of its last health check."""
+    def __init__(self, url: str, engine: Optional[AsyncEngine] = None, label: str = "replica"):
+        self.name = make_url(url).render_as_string(hide_password=True)
+        if engine is None:
+            engine = create_async_engine(url, future=True, echo=False, **engine_options(label))
+            instrument_queries(engine)
+        self.engine = engine
+        self.sessionmaker = async_sessionmaker(self.engine, expire_on_commit=False, class_=AsyncSession)
+        self.healthy: Optional[bool] = None  # not checked yet
+        self.checked_at: Optional[float] = None
+        self.lag: Optional[float] = None
+        self._check: Optional[asyncio.Future] = None
+
+
+class ReplicaRouter:
+    """Round-robin over the read replicas that passed their last health check.
+
+    A replica is checked the first time it is picked and again once its result is older than
+    `check_interval`; the callers that find it due share one check. It passes when it answers
+    within `check_timeout`, is still in recovery (a promoted replica is no longer one) and
+    lags the primary by at most `max_lag` seconds. pick() returns None when no replica
+    passes, and callers use the primary instead.
+    """
+    def __init__(self, replicas: List[Replica], check_interval: float = 5.0, check_timeout: float = 1.0, max_lag: float = 2.0):
+        self.replicas = replicas
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
+        self.max_lag = max_lag
+        self._next = itertools.count()
+
+    async def _query_lag(self, replica: Replica) -> tuple:
+        async with replica.engine.connect() as conn:
+            return (await conn.execute(_REPLICA_LAG_SQL)).one()
+
+    async def _run_check(self, replica: Replica) -> None:
+        try:
+            # Connecting counts against the timeout too: an unreachable host would otherwise hold
+            # every read sharing this check for the driver's connect timeout
+            in_recovery, lag = await asyncio.wait_for(self._query_lag(replica), self.check_timeout)
+            replica.lag = float(lag)
+            healthy = bool(in_recovery) and replica.lag <= self.max_lag
+            reason = "not in recovery" if not in_recovery else f"{replica.lag:.1f}s behind"
+        except Exception as e:
+            healthy, reason = False, repr(e)
+        if healthy != replica.healthy:
+            if healthy:
+                logger.info("Read replica %s is in rotation", replica.name)
+            else:
+                logger.warning("Read replica %s taken out of rotation: %s", replica.name, reason)
+        replica.healthy = healthy
+        replica.checked_at = time.monotonic()
+
+    async def check(self, replica: Replica) -> bool:
+        """Refresh `replica`'s health if its last check is stale; returns whether it is healthy."""
+        if replica.checked_at is not None and time.monotonic() - replica.checked_at < self.check_interval:
+            return bool(replica.healthy)
+        if replica._check is None:
+            replica._check = asyncio.ensure_future(self._run_check(replica))
+            replica._check.add_done_callback(lambda _: setattr(replica, "_check", None))
+        await asyncio.shield(replica._check)
+        return bool(replica.healthy)
+
+    async def pick(self) -> Optional[Replica]:
+        """The next healthy replica in turn, or None."""
+        start = next(self._next)
+        for i in range(len(self.replicas)):
+            replica = self.replicas[(start + i) % len(self.replicas)]
+            if await self.check(replica):
+                return replica
+        return None
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+
+REPLICA_URLS = [url.strip() for url in db_settings.USER_DATABASE_REPLICA_URLS.split(",") if url.strip()]
+
+replica_router = ReplicaRouter(
+    [Replica(url, label=f"replica{i}") for i, url in enumerate(REPLICA_URLS)],
+    check_interval=db_settings.REPLICA_HEALTH_CHECK_SEC,
+    max_lag=db_settings.REPLICA_MAX_LAG_SEC,
+)
+
+
+def all_pool_stats() -> Dict[str, dict]:
+    """pool_stats() of the primary's pool and each replica's, by pool label."""
+    engines = [engine] + [replica.engine for replica in replica_router.replicas]
+    return {e.pool.label: pool_stats(e) for e in engines}
+
+
+def _pool_connections():
+    for label, stats in all_pool_stats().items():
+        yield {"pool": label, "state": "checked_out"}, stats["checked_out"]
+        yield {"pool": label, "state": "idle"}, stats["idle"]
+
+
+REGISTRY.register(Gauge(
+    "db_pool_connections",
+    "Database connections by pool and state (checked_out, idle)",
+    collect=_pool_connections,
+))
+
+
+def _primary_key(user_id: str) -> str:
+    return f"db_primary:{user_id}"
+
+
+async def stick_to_primary(redis_client: redis.Redis, user_id: str) -> None:
+    """Send the user's reads to the primary for READ_YOUR_WRITES_SEC. Call after committing one of their writes."""
+    if not replica_router.replicas:
+        return
+    try:
+        await redis_client.set(_primary_key(user_id), 1, ex=db_settings.READ_YOUR_WRITES_SEC)
+    except redis.RedisError as e:
+        # Replicas within REPLICA_MAX_LAG_SEC bound how stale the user's next read can be
+        logger.warning("Could not pin user %s to the primary: %s", user_id, e)
+
+
+async def read_sessionmaker(redis_client: redis.Redis, user_id: str) -> async_sessionmaker:
+    """
+    Sessionmaker for a read-only request of `user_id`: a healthy replica's, or the primary's
+    while the user has a recent write (see stick_to_primary()) or no replica is healthy.
+    """
+    if not replica_router.replicas:
+        return AsyncSessionLocal
+    try:
+        pinned = await redis_client.exists(_primary_key(user_id))
+    except redis.RedisError:
+        # Without the marker we can't tell whether the user just wrote; the primary is always current
+        pinned = True
+    if pinned:
+        return AsyncSessionLocal
+    replica = await replica_router.pick()
+    return replica.sessionmaker if replica is not None else AsyncSessionLocal
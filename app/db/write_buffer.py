@@ -0,0 +1,145 @@
+import asyncio
+import logging
+from typing import List, Optional, Set, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.db_config import db_settings
+from app.db.session import AsyncSessionLocal
+from app.models.ocr_symptoms import OCRSymptom
+from app.models.symptoms import Symptom
+from app.utils.analysis_codec import ensure_loaded
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBuffer:
+    """Collects new check rows for a few milliseconds and writes them in one transaction.
+
+    submit() takes the row's column values by attribute name, with the analysis text under
+    `analysis`, and returns the stored row once its batch is committed. A batch is one
+    multi-row INSERT ... RETURNING, so the server defaults and what the search_vector
+    trigger stored come back with it, and ends in a single commit. If that fails on a row
+    (a constraint, a missing partition), each row is inserted again under its own savepoint,
+    so only the callers whose rows fail get the error; a connection error reaches every
+    caller of the batch. Rows are written even if their caller has gone away.
+    """
+    def __init__(self, model, session_factory: async_sessionmaker = AsyncSessionLocal, window_ms: float = 5, max_size: int = 100):
+        self.model = model
+        self.session_factory = session_factory
+        self.window = window_ms / 1000
+        self.max_size = max_size
+        self._pending: List[Tuple[dict, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushes: Set[asyncio.Task] = set()
+
+        self.batches = 0
+        self.rows = 0
+
+    async def submit(self, values: dict):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((values, future))
+
+        if len(self._pending) >= self.max_size:
+            self._flush_now()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush_now)
+
+        # The row is written either way; a cancelled caller just doesn't see it
+        return await asyncio.shield(future)
+
+    def _flush_now(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._write(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def drain(self) -> None:
+        """Write what is pending now and wait for every batch in flight."""
+        self._flush_now()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    async def _rows(self, session, batch: List[Tuple[dict, asyncio.Future]]) -> List[dict]:
+        await ensure_loaded(session)  # so the analyses can be stored compressed
+        rows = []
+        for values, _ in batch:
+            row = dict(values)
+            row.update(self.model.analysis_values(row.pop("analysis")))
+            rows.append(row)
+        return rows
+
+    async def _write(self, batch: List[Tuple[dict, asyncio.Future]]) -> None:
+        self.batches += 1
+        self.rows += len(batch)
+        statement = insert(self.model).returning(self.model, sort_by_parameter_order=True)
+        try:
+            async with self.session_factory() as session:
+                rows = await self._rows(session, batch)
+                stored = (await session.execute(statement, rows)).scalars().all()
+                await session.commit()
+        except DBAPIError as e:
+            if e.connection_invalidated or len(batch) == 1:
+                self._fail(batch, e)
+            else:
+                logger.warning("Batched insert of %d %s rows failed, retrying them one by one: %s", len(batch), self.model.__tablename__, e.orig)
+                await self._write_each(batch)
+            return
+        except BaseException as e:
+            self._fail(batch, e)
+            if not isinstance(e, Exception):
+                raise
+            return
+
+        for (_, future), row in zip(batch, stored):
+            if not future.done():
+                future.set_result(row)
+
+    async def _write_each(self, batch: List[Tuple[dict, asyncio.Future]]) -> None:
+        statement = insert(self.model).returning(self.model)
+        results = []
+        try:
+            async with self.session_factory() as session:
+                for row in await self._rows(session, batch):
+                    try:
+                        async with session.begin_nested():
+                            results.append((await session.execute(statement, row)).scalar_one())
+                    except DBAPIError as e:
+                        if e.connection_invalidated:
+                            raise
+                        results.append(e)
+                await session.commit()
+        except BaseException as e:
+            self._fail(batch, e)
+            if not isinstance(e, Exception):
+                raise
+            return
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+                future.exception()
+            else:
+                future.set_result(result)
+
+    @staticmethod
+    def _fail(batch: List[Tuple[dict, asyncio.Future]], error: BaseException) -> None:
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+                # Don't leave an unretrieved exception behind when the caller has gone away
+                future.exception()
+
+
+# Opt-in (DB_WRITE_BUFFER_ENABLED), for completed checks
+symptom_write_buffer = WriteBuffer(Symptom, window_ms=db_settings.DB_WRITE_BUFFER_WINDOW_MS, max_size=db_settings.DB_WRITE_BUFFER_MAX_SIZE)
+ocr_symptom_write_buffer = WriteBuffer(OCRSymptom, window_ms=db_settings.DB_WRITE_BUFFER_WINDOW_MS, max_size=db_settings.DB_WRITE_BUFFER_MAX_SIZE)
@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict
+
+import anyio.to_thread
+from fastapi import FastAPI
+from sqlalchemy.orm import configure_mappers
+
+from app.core.db_config import db_settings
+from app.core.openai_config import openai_settings
+from app.crud.user import get_user_by_id
+from app.db import redis_session
+from app.db.session import AsyncSessionLocal, engine, replica_router
+from app.db.write_buffer import ocr_symptom_write_buffer, symptom_write_buffer
+from app.utils import openai_client
+from app.utils.analysis_codec import ensure_loaded
+
+logger = logging.getLogger(__name__)
+
+
+async def _warm_database(connections: int) -> None:
+    configure_mappers()
+
+    async def authenticate():
+        # Every request starts with this lookup; running it compiles and prepares the statement
+        async with AsyncSessionLocal() as session:
+            await get_user_by_id(session, str(uuid.UUID(int=0)))
+
+    # Side by side, so the pool keeps `connections` connections rather than reusing one
+    await asyncio.gather(*(authenticate() for _ in range(connections)))
+    # Puts healthy replicas in rotation now instead of on the first read
+    await asyncio.gather(*(replica_router.check(replica) for replica in replica_router.replicas))
+    if db_settings.ANALYSIS_COMPRESSION:
+        async with AsyncSessionLocal() as session:
+            await ensure_loaded(session)
+
+
+async def _warm_redis(connections: int) -> None:
+    client = redis_session.get_redis_client()
+    await asyncio.gather(*(client.ping() for _ in range(connections)))
+
+
+async def warm_up(timeout: float) -> Dict[str, float]:
+    """
+    Open the worker's database, Redis and OpenAI connections before it takes requests.
+    Returns the seconds each step took. A step that fails or times out is logged and
+    skipped: the connection is then opened by the first request that needs it.
+    """
+    connections = min(db_settings.STARTUP_WARMUP_CONNECTIONS, db_settings.DB_POOL_SIZE)
+    steps: Dict[str, Callable[[], Awaitable[None]]] = {
+        "database": lambda: _warm_database(connections),
+        "redis": lambda: _warm_redis(connections),
+        # Sync dependencies run in anyio's thread pool; start it (and import its backend) now
+        "threadpool": lambda: anyio.to_thread.run_sync(int),
+    }
+    if openai_settings.OPENAI_WARMUP:
+        steps["openai"] = lambda: openai_client.warm_up(timeout)
+
+    timings: Dict[str, float] = {}
+
+    async def run(name: str, step: Callable[[], Awaitable[None]]) -> None:
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(step(), timeout)
+        except Exception as e:
+            logger.warning("Startup warmup of %s failed, continuing without it: %r", name, e)
+            return
+        timings[name] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run(name, step) for name, step in steps.items()))
+    logger.info(
+        "Warmed up in %.0f ms (%s)", (time.perf_counter() - started) * 1000,
+        ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in timings.items()) or "nothing warmed",
+    )
+    return timings
+
+
+async def shut_down() -> None:
+    """Write buffered checks, then close the worker's connections."""
+    for buffer in (symptom_write_buffer, ocr_symptom_write_buffer):
+        await buffer.drain()
+    await openai_client.close_client()
+    await redis_session.pool.aclose()
+    await replica_router.dispose()
+    await engine.dispose()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if db_settings.STARTUP_WARMUP:
+        await warm_up(db_settings.STARTUP_WARMUP_TIMEOUT_SEC)
+    yield
+    await shut_down()
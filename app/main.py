@@ -1,7 +1,15 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from app.api import api_router
+from app.api.idempotency import IdempotencyMiddleware
+from app.core.db_config import db_settings
+from app.lifespan import lifespan
 
-app = FastAPI(title="Orthonyx Backend")
+app = FastAPI(title="Orthonyx Backend", lifespan=lifespan, default_response_class=ORJSONResponse)
 app.include_router(api_router)
-
-
+app.add_middleware(
+    IdempotencyMiddleware,
+    paths=("/symptom-check/", "/ocr-symptom-check/"),
+    ttl=db_settings.IDEMPOTENCY_TTL_SEC,
+    in_flight_ttl=db_settings.IDEMPOTENCY_IN_FLIGHT_TTL_SEC,
+)
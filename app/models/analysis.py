@@ -0,0 +1,85 @@
+from typing import List
+from sqlalchemy import Column, DDL, ForeignKey, Integer, LargeBinary, SmallInteger, Text, TIMESTAMP, event, func
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import declared_attr
+from app.models.base import Base
+from app.utils import analysis_codec
+
+
+class AnalysisDictionary(Base):
+    __tablename__ = "analysis_dictionaries"
+
+    # Also the zstd dictionary id written into every frame compressed with it; rows are never updated
+    version = Column(SmallInteger, primary_key=True, autoincrement=False)
+    dictionary = Column(LargeBinary, nullable=False)
+    sample_count = Column(Integer, nullable=False)
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
+
+
+def search_vector_trigger(table: str, input_vector: str) -> List[str]:
+    """
+    DDL for the trigger maintaining `table`.search_vector: `input_vector` (over NEW) weighted as
+    given, plus the analysis at weight C. A compressed analysis arrives with its text in
+    `analysis` too, and the trigger clears that once the lexemes are taken; later updates that
+    bring no text keep the analysis lexemes already indexed.
+    """
+    return [
+        f"""
+        CREATE FUNCTION {table}_search_vector() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            NEW.search_vector := {input_vector} || CASE
+                WHEN NEW.analysis IS NOT NULL THEN setweight(to_tsvector('english', NEW.analysis), 'C')
+                WHEN TG_OP = 'UPDATE' AND NEW.analysis_zstd IS NOT NULL THEN ts_filter(OLD.search_vector, '{{c}}')
+                ELSE ''::tsvector
+            END;
+            IF NEW.analysis_zstd IS NOT NULL THEN
+                NEW.analysis := NULL;
+            END IF;
+            RETURN NEW;
+        END
+        $$
+        """,
+        f"CREATE TRIGGER {table}_search_vector BEFORE INSERT OR UPDATE ON {table} "
+        f"FOR EACH ROW EXECUTE FUNCTION {table}_search_vector()",
+    ]
+
+
+class AnalysisMixin:
+    """The analysis of a check, stored as text or zstd-compressed (see app.utils.analysis_codec)."""
+
+    # `analysis` is NULL once the row holds a compressed analysis
+    analysis_plain = Column("analysis", Text, nullable=True)
+    analysis_zstd = Column(LargeBinary, nullable=True)
+
+    @declared_attr
+    def analysis_dict(cls):
+        return Column(SmallInteger, ForeignKey("analysis_dictionaries.version"), nullable=True)
+
+    @hybrid_property
+    def analysis(self):
+        if self.analysis_zstd is not None:
+            return analysis_codec.decompress(self.analysis_zstd)
+        return self.analysis_plain
+
+    @analysis.inplace.setter
+    def _analysis_setter(self, text):
+        for key, value in self.analysis_values(text).items():
+            setattr(self, key, value)
+
+    @staticmethod
+    def analysis_values(text) -> dict:
+        """The storage column values for analysis `text`, by attribute name, for INSERT and UPDATE statements."""
+        # The text goes along for the search_vector trigger, which drops it when a frame is stored
+        frame, version = analysis_codec.encode(text)
+        return {"analysis_plain": text, "analysis_zstd": frame, "analysis_dict": version}
+
+    @analysis.inplace.expression
+    @classmethod
+    def _analysis_expression(cls):
+        return analysis_codec.analysis_expression(cls.analysis_plain, cls.analysis_zstd)
+
+
+def add_search_vector_trigger(table, input_vector: str) -> None:
+    """Create search_vector_trigger() along with `table` in create_all (scratch schemas); migrations create their own."""
+    for statement in search_vector_trigger(table.name, input_vector):
+        event.listen(table, "after_create", DDL(statement))
@@ -1,7 +1,9 @@
-from sqlalchemy import Column, Text, Boolean, TIMESTAMP, Integer, ForeignKey, func
-from sqlalchemy.dialects.postgresql import UUID, JSONB, ENUM
+from sqlalchemy import Column, Computed, Text, TIMESTAMP, Integer, Numeric, ForeignKey, func
+from sqlalchemy.dialects.postgresql import UUID, JSONB, ENUM, TSVECTOR
+from sqlalchemy.orm import deferred
 from sqlalchemy import text
 from app.models.base import Base
+from app.models.analysis import AnalysisMixin, add_search_vector_trigger
 import enum 
 
 class StatusEnum(str, enum.Enum):
@@ -9,20 +11,53 @@ class StatusEnum(str, enum.Enum):
     completed = "completed"
 
 
-class OCRSymptom(Base):
+# Numeric fields of `input` (canonical names, see app.utils.ocr_normalize) copied into typed, indexed columns
+OCR_VITALS = ("temperature_f", "heart_rate_bpm", "spo2_pct", "wbc_count")
+
+def _vital(key: str) -> Computed:
+    # Numbers, and numeric strings from rows stored before normalization; NULL for anything else
+    return Computed(
+        f"CASE WHEN jsonb_typeof(input -> '{key}') = 'number' "
+        f"OR (input ->> '{key}') ~ '^\\s*[-+]?[0-9]+(\\.[0-9]+)?\\s*$' "
+        f"THEN (input ->> '{key}')::numeric END",
+        persisted=True,
+    )
+
+
+# search_vector terms for the string and number values of `input`; the trigger adds the analysis
+SEARCH_INPUT_VECTOR = "setweight(jsonb_to_tsvector('english', NEW.input, '[\"string\", \"numeric\"]'), 'A')"
+
+
+class OCRSymptom(AnalysisMixin, Base):
     __tablename__ = "ocr_symptoms"
+    # Monthly range partitions on submitted_at, created and expired by app.db.partitions
+    __table_args__ = {"postgresql_partition_by": "RANGE (submitted_at)"}
 
     # Identifiers
-    id = Column(UUID(as_uuid=True), primary_key=True, index=True, server_default=text('gen_random_uuid()'))
+    # The partition key has to be part of the primary key, so (id, submitted_at) it is; ids are random UUIDs
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text('gen_random_uuid()'))
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     
     # Symptom Details
     input = Column(JSONB, nullable=False, server_default=text("'{}'::jsonb"))   
 
-    # Analysis
-    analysis = Column(Text, nullable=True)
+    # Analysis: `analysis` and its storage columns come from AnalysisMixin
 
     # Timestamps and Status
-    submitted_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())    
+    submitted_at = Column(TIMESTAMP(timezone=True), primary_key=True, nullable=False, server_default=func.now())    
+    # Bumped on every change (clock time, not transaction start) so clients can sync deltas
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now(), onupdate=func.clock_timestamp())
     status = Column(ENUM(StatusEnum, name="status_enum", create_type=False), nullable=False, server_default=text("'not_completed'::status_enum"))
-    meta = Column(JSONB, nullable=False, server_default=text("'{}'::jsonb"))
\ No newline at end of file
+    meta = Column(JSONB, nullable=False, server_default=text("'{}'::jsonb"))
+
+    # Full-text search document, maintained by the ocr_symptoms_search_vector trigger
+    search_vector = deferred(Column(TSVECTOR))
+
+    # Typed copies of OCR_VITALS, maintained by Postgres
+    temperature_f = deferred(Column(Numeric, _vital("temperature_f")))
+    heart_rate_bpm = deferred(Column(Numeric, _vital("heart_rate_bpm")))
+    spo2_pct = deferred(Column(Numeric, _vital("spo2_pct")))
+    wbc_count = deferred(Column(Numeric, _vital("wbc_count")))
+
+
+add_search_vector_trigger(OCRSymptom.__table__, SEARCH_INPUT_VECTOR)
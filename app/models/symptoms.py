@@ -1,7 +1,9 @@
-from sqlalchemy import Column, Text, Boolean, TIMESTAMP, Integer, ForeignKey, func
-from sqlalchemy.dialects.postgresql import UUID, JSONB, ENUM
+from sqlalchemy import Column, Text, TIMESTAMP, Integer, ForeignKey, func
+from sqlalchemy.dialects.postgresql import UUID, JSONB, ENUM, TSVECTOR
+from sqlalchemy.orm import deferred
 from sqlalchemy import text
 from app.models.base import Base
+from app.models.analysis import AnalysisMixin, add_search_vector_trigger
 import enum 
 
 class SexEnum(str, enum.Enum):
@@ -14,11 +16,21 @@ class StatusEnum(str, enum.Enum):
     completed = "completed"
 
 
-class Symptom(Base):
+# search_vector terms for the check's own columns; the trigger adds the analysis
+SEARCH_INPUT_VECTOR = (
+    "setweight(to_tsvector('english', NEW.symptoms), 'A') || "
+    "setweight(to_tsvector('english', coalesce(NEW.additional_notes, '')), 'B')"
+)
+
+
+class Symptom(AnalysisMixin, Base):
     __tablename__ = "symptoms"
+    # Monthly range partitions on submitted_at, created and expired by app.db.partitions
+    __table_args__ = {"postgresql_partition_by": "RANGE (submitted_at)"}
 
     # Identifiers
-    id = Column(UUID(as_uuid=True), primary_key=True, index=True, server_default=text('gen_random_uuid()'))
+    # The partition key has to be part of the primary key, so (id, submitted_at) it is; ids are random UUIDs
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text('gen_random_uuid()'))
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     
     # Symptom Details
@@ -29,10 +41,17 @@ class Symptom(Base):
     severity = Column(Integer, nullable=False)
     additional_notes = Column(Text, nullable=True)     
 
-    # Analysis
-    analysis = Column(Text, nullable=True)
+    # Analysis: `analysis` and its storage columns come from AnalysisMixin
 
     # Timestamps and Status
-    submitted_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())    
+    submitted_at = Column(TIMESTAMP(timezone=True), primary_key=True, nullable=False, server_default=func.now())    
+    # Bumped on every change (clock time, not transaction start) so clients can sync deltas
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now(), onupdate=func.clock_timestamp())
     status = Column(ENUM(StatusEnum, name="status_enum", create_type=False), nullable=False, server_default=text("'not_completed'::status_enum"))
-    meta = Column(JSONB, nullable=False, server_default=text("'{}'::jsonb"))
\ No newline at end of file
+    meta = Column(JSONB, nullable=False, server_default=text("'{}'::jsonb"))
+
+    # Full-text search document, maintained by the symptoms_search_vector trigger; deferred so ORM loads don't fetch it
+    search_vector = deferred(Column(TSVECTOR))
+
+
+add_search_vector_trigger(Symptom.__table__, SEARCH_INPUT_VECTOR)
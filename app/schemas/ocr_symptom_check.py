@@ -1,6 +1,7 @@
 from pydantic import BaseModel
-from typing import Dict, Union
+from typing import Dict, Union, Optional
 from datetime import datetime
+from app.schemas.structured_analysis import StructuredAnalysis
 
 class OCRSymptomCheckIn(BaseModel):
     age: int # Standard User Information
@@ -33,4 +34,5 @@ class OCRSymptomCheckOut(BaseModel):
     input: Dict[str, Union[int, float, str]]  
     analysis: str
     status: str
+    structured: Optional[StructuredAnalysis] = None  # present when the analysis was produced in structured-output mode
 
@@ -1,7 +1,27 @@
 from app.schemas.ocr_symptom_check import OCRSymptomCheckOut
+from app.models.ocr_symptoms import OCR_VITALS
+from decimal import Decimal
 from pydantic import BaseModel 
-from typing import Optional, List
+from typing import Dict, Optional, List, Tuple
 
 class OCRSymptomHistoryOut(BaseModel):
     user_id: str
-    history: List[OCRSymptomCheckOut]
\ No newline at end of file
+    history: List[OCRSymptomCheckOut]
+    next_cursor: Optional[str] = None
+    watermark: Optional[str] = None  # set on delta-sync (?since=) pages
+
+class OCRVitalsFilter(BaseModel):
+    """Inclusive bounds on the OCR vitals, in canonical units; any combination, at least one."""
+    min_temperature_f: Optional[Decimal] = None
+    max_temperature_f: Optional[Decimal] = None
+    min_heart_rate_bpm: Optional[Decimal] = None
+    max_heart_rate_bpm: Optional[Decimal] = None
+    min_spo2_pct: Optional[Decimal] = None
+    max_spo2_pct: Optional[Decimal] = None
+    min_wbc_count: Optional[Decimal] = None
+    max_wbc_count: Optional[Decimal] = None
+
+    def ranges(self) -> Dict[str, Tuple[Optional[Decimal], Optional[Decimal]]]:
+        """{vital: (min, max)} for the vitals with at least one bound."""
+        bounds = {name: (getattr(self, f"min_{name}"), getattr(self, f"max_{name}")) for name in OCR_VITALS}
+        return {name: bound for name, bound in bounds.items() if bound != (None, None)}
@@ -0,0 +1,14 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+# Compact analysis returned by the model in structured-output mode
+class PotentialCondition(BaseModel):
+    name: str = Field(min_length=1)
+    rationale: str
+
+class StructuredAnalysis(BaseModel):
+    conditions: List[PotentialCondition] = Field(default_factory=list, max_length=3)
+    explanation: str
+    next_steps: List[str] = Field(default_factory=list)
+    red_flags: List[str] = Field(default_factory=list)
+    clarifying_questions: List[str] = Field(default_factory=list)  # set when the input is too vague
@@ -1,6 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, Dict, Union
 from datetime import datetime
+from app.schemas.structured_analysis import StructuredAnalysis
 
 # Symptom check endpoint input schema
 class SymptomCheckIn(BaseModel):
@@ -8,7 +9,7 @@ class SymptomCheckIn(BaseModel):
     sex: str
     symptoms: str
     duration: str
-    severity: int
+    severity: int = Field(..., ge=0, le=10, description="Severity from 0 (none) to 10 (worst)")
     additional_notes: Optional[str] = None
 
     model_config = {
@@ -39,4 +40,5 @@ class SymptomCheckOut(BaseModel):
     timestamp: datetime
     input: SymptomInput 
     analysis: str
-    status: str
\ No newline at end of file
+    status: str
+    structured: Optional[StructuredAnalysis] = None  # present when the analysis was produced in structured-output mode
\ No newline at end of file
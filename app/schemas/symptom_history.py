@@ -4,4 +4,6 @@ from typing import Optional, List
 
 class SymptomHistoryOut(BaseModel):
     user_id: str
-    history: List[SymptomCheckOut]
\ No newline at end of file
+    history: List[SymptomCheckOut]
+    next_cursor: Optional[str] = None
+    watermark: Optional[str] = None  # set on delta-sync (?since=) pages
\ No newline at end of file
@@ -0,0 +1,18 @@
+from app.schemas.symptom_check import SymptomCheckOut
+from app.schemas.ocr_symptom_check import OCRSymptomCheckOut
+from pydantic import BaseModel, Field
+from typing import Annotated, List, Literal, Optional, Union
+
+class SymptomTimelineItem(SymptomCheckOut):
+    type: Literal["symptom"] = "symptom"
+
+class OCRSymptomTimelineItem(OCRSymptomCheckOut):
+    type: Literal["ocr"] = "ocr"
+
+class TimelineOut(BaseModel):
+    user_id: str
+    history: List[Annotated[Union[SymptomTimelineItem, OCRSymptomTimelineItem], Field(discriminator="type")]]
+    next_cursor: Optional[str] = None
+
+class TimelineSearchOut(TimelineOut):
+    query: str
@@ -1,9 +1,17 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.utils.security import decrypt_api_key
-from app.crud.ocr_symptom import ocr_submit_symptom_check
+from app.crud.ocr_symptom import ocr_insert_symptom_check, ocr_upsert_failed_symptom_check
 from app.crud.user import get_user_by_id
+from app.db.redis_session import get_redis_client
+from app.db.session import stick_to_primary
+from app.db.write_buffer import ocr_symptom_write_buffer
+from app.core.db_config import db_settings
+from app.utils.history_cache import ocr_symptom_history_cache
 from typing import Optional
+from datetime import datetime, timezone
+import uuid
 from app.models.ocr_symptoms import StatusEnum
+from app.utils.ocr_normalize import normalize_identified_data
 from app.utils.ocr_openai_call import ocr_open_ai_analysis, OpenAIAuthError, OpenAIRateLimitError, OpenAITransientError, OpenAITimeoutError, OpenAIUnavailableError
 import logging
 
@@ -19,33 +27,30 @@ async def process_symptom_check(db: AsyncSession, user_id : str, api_key: str, i
     if raw_api_key != api_key:
         raise ValueError("invalid_api_key")
     
-    # Submit symptom check
-    symptom_check = await ocr_submit_symptom_check(
-        db,
-        user_id=user.id,
-        input=identified_data
+    # Known vitals are stored under canonical names as numbers, and the analysis sees them that way too.
+    # The check is written once its analysis is known, so its id and submission time are fixed now.
+    check = dict(
+        id=uuid.uuid4(), submitted_at=datetime.now(timezone.utc), user_id=user.id,
+        input=normalize_identified_data(identified_data),
     )
+    # End the read transaction so the connection goes back to the pool during the OpenAI call
+    await db.commit()
 
-    # Call OpenAI for analysis
+    # Call OpenAI for analysis; `analysis_meta` collects how it was produced (e.g. structured output)
+    analysis_meta = {}
     try:
-        analysis_text = await ocr_open_ai_analysis(identified_data)
+        analysis_text = await ocr_open_ai_analysis(check["input"], user_id=str(user.id), meta=analysis_meta)
     except OpenAIAuthError as e:
         # Serious config issue (bad server API key)
         logger.exception("OpenAI authentication error — check server OPENAI_API_KEY")
-        symptom_check.analysis = "Analysis temporarily unavailable (server configuration)."
-        symptom_check.status = StatusEnum.not_completed
         # persist note so admins can detect, while keeping user data safe
-        await db.commit()
-        await db.refresh(symptom_check)
+        await _record_failed_check(db, check, "Analysis temporarily unavailable (server configuration).")
         raise e  
 
     except OpenAIRateLimitError as e:
         # Upstream rate limit
         logger.warning("OpenAI rate-limit: %s", e)
-        symptom_check.analysis = "Analysis delayed due to service load; please check back shortly."
-        symptom_check.status = StatusEnum.not_completed
-        await db.commit()
-        await db.refresh(symptom_check)
+        await _record_failed_check(db, check, "Analysis delayed due to service load; please check back shortly.")
         raise e  
 
     except (OpenAITransientError, OpenAITimeoutError, OpenAIUnavailableError) as e:
@@ -53,28 +58,31 @@ async def process_symptom_check(db: AsyncSession, user_id : str, api_key: str, i
         logger.warning("OpenAI transient/unavailable: %s", e)
         # Simple heuristic fallback (not diagnostic): echo input as minimal analysis
         heuristic = f"Unable to complete automated analysis."
-        symptom_check.analysis = heuristic
-        symptom_check.status = StatusEnum.not_completed
-        await db.commit()
-        await db.refresh(symptom_check)
+        await _record_failed_check(db, check, heuristic)
         raise e
 
     except Exception as e:
         # Catch-all
         logger.exception("Unexpected error while calling OpenAI: %s", e)
-        symptom_check.analysis = "Analysis currently unavailable."
-        symptom_check.status = StatusEnum.not_completed
-        await db.commit()
-        await db.refresh(symptom_check)
+        await _record_failed_check(db, check, "Analysis currently unavailable.")
         raise e
     
     # Placeholder
     # analysis_text = "Placeholder analysis text."
-    
-    symptom_check.analysis = analysis_text
-    symptom_check.status = StatusEnum.completed
 
-    await db.commit()
-    await db.refresh(symptom_check)
+    if db_settings.DB_WRITE_BUFFER_ENABLED:
+        # Written and committed together with the other checks finishing about now
+        symptom_check = await ocr_symptom_write_buffer.submit({**check, "status": StatusEnum.completed, "analysis": analysis_text, "meta": analysis_meta})
+    else:
+        symptom_check = await ocr_insert_symptom_check(db, **check, analysis=analysis_text, meta=analysis_meta)
+        await db.commit()
+    # The user's cached history page is now stale, and replicas may not have the check yet
+    await ocr_symptom_history_cache.invalidate(get_redis_client(), str(user.id))
+    await stick_to_primary(get_redis_client(), str(user.id))
+
+    return symptom_check
 
-    return symptom_check
\ No newline at end of file
+
+async def _record_failed_check(db: AsyncSession, check: dict, analysis_text: str) -> None:
+    await ocr_upsert_failed_symptom_check(db, **check, analysis=analysis_text)
+    await db.commit()
@@ -1,9 +1,50 @@
+from decimal import Decimal
+from typing import Dict, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.utils.security import decrypt_api_key
-from app.crud.ocr_symptom import ocr_get_symptom_checkby_user_id
+from app.crud.ocr_symptom import ocr_filter_symptom_checks, ocr_get_symptom_checkby_user_id, ocr_get_symptom_changes_by_user_id
 from app.crud.user import get_user_by_id
+from app.core.db_config import db_settings
+from app.utils.pagination import DEFAULT_PAGE_SIZE, decode_cursor, decode_watermark, next_page, next_watermark
+
+async def ocr_get_symptom_history(db: AsyncSession, user_id: str, api_key: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None):
+    """Returns one page of completed checks, newest first, and the cursor of the next page (None on the last page)."""
+    after = decode_cursor(cursor) if cursor else None
+
+    user = await get_user_by_id(db, user_id)
+    if not user:
+        raise ValueError("invalid_user")
+    
+    raw_api_key = decrypt_api_key(user.api_key_enc)
+    if raw_api_key != api_key:
+        raise ValueError("invalid_api_key")
+
+    # Fetch one extra row to learn whether another page exists
+    rows = await ocr_get_symptom_checkby_user_id(db, user_id=user.id, limit=limit + 1, cursor=after)
+    return next_page(rows, limit)
+
+async def ocr_filter_symptom_history(db: AsyncSession, user_id: str, api_key: str, ranges: Dict[str, Tuple[Optional[Decimal], Optional[Decimal]]], limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None):
+    """Returns one page of completed checks whose vitals fall within `ranges`, newest first, and the cursor of the next page (None on the last page)."""
+    if not ranges:
+        raise ValueError("empty_filter")
+    after = decode_cursor(cursor) if cursor else None
+
+    user = await get_user_by_id(db, user_id)
+    if not user:
+        raise ValueError("invalid_user")
+    
+    raw_api_key = decrypt_api_key(user.api_key_enc)
+    if raw_api_key != api_key:
+        raise ValueError("invalid_api_key")
+
+    # Fetch one extra row to learn whether another page exists
+    rows = await ocr_filter_symptom_checks(db, ranges=ranges, user_id=user.id, limit=limit + 1, cursor=after)
+    return next_page(rows, limit)
+
+async def ocr_get_symptom_history_changes(db: AsyncSession, user_id: str, api_key: str, since: str, limit: int = DEFAULT_PAGE_SIZE):
+    """Returns up to `limit` completed checks created or updated after the `since` watermark, oldest change first, and the new watermark."""
+    after = decode_watermark(since)
 
-async def ocr_get_symptom_history(db: AsyncSession, user_id: str, api_key: str):
     user = await get_user_by_id(db, user_id)
     if not user:
         raise ValueError("invalid_user")
@@ -12,5 +53,5 @@ async def ocr_get_symptom_history(db: AsyncSession, user_id: str, api_key: str):
     if raw_api_key != api_key:
         raise ValueError("invalid_api_key")
 
-    symptom_history = await ocr_get_symptom_checkby_user_id(db, user_id=user.id, limit=10, offset=0)
-    return symptom_history
+    rows = await ocr_get_symptom_changes_by_user_id(db, user_id=user.id, since=after, limit=limit, settle_sec=db_settings.HISTORY_SYNC_SETTLE_SEC)
+    return rows, next_watermark(rows, since)
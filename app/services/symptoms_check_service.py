@@ -2,9 +2,16 @@
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.utils.security import decrypt_api_key
-from app.crud.symptom import submit_symptom_check, update_symptom_analysis
+from app.crud.symptom import insert_symptom_check, upsert_failed_symptom_check
 from app.crud.user import get_user_by_id
+from app.db.redis_session import get_redis_client
+from app.db.session import stick_to_primary
+from app.db.write_buffer import symptom_write_buffer
+from app.core.db_config import db_settings
+from app.utils.history_cache import symptom_history_cache
 from typing import Optional
+from datetime import datetime, timezone
+import uuid
 from app.models.symptoms import SexEnum, StatusEnum
 from app.utils.openai_call import open_ai_analysis, OpenAIAuthError, OpenAIRateLimitError, OpenAITransientError, OpenAITimeoutError, OpenAIUnavailableError
 import logging
@@ -21,54 +28,53 @@ async def process_symptom_check(db: AsyncSession, user_id : str, api_key: str, a
     if raw_api_key != api_key:
         raise ValueError("invalid_api_key")
     
-    # Submit symptom check. Note we do NOT commit here.
-    # It's part of the overall transaction.
-    symptom_check = await submit_symptom_check(
-        db, user_id=user.id, age=age, sex=SexEnum(sex), symptoms=symptoms,
-        duration=duration, severity=severity, additional_notes=additional_notes
+    # The check is written once its analysis is known, so its id and submission time are fixed now
+    check = dict(
+        id=uuid.uuid4(), submitted_at=datetime.now(timezone.utc), user_id=user.id, age=age, sex=SexEnum(sex),
+        symptoms=symptoms, duration=duration, severity=severity, additional_notes=additional_notes,
     )
-    # The `await db.flush()` in `submit_symptom_check` makes the ID available
-    # without needing a commit.
-    symptom_check_id = symptom_check.id
+    # End the read transaction so the connection goes back to the pool during the OpenAI call
+    await db.commit()
 
-    # Call OpenAI for analysis
+    # Call OpenAI for analysis; `analysis_meta` collects how it was produced (e.g. structured output)
+    analysis_meta = {}
     try:
-        analysis_text = await open_ai_analysis(age, sex, symptoms, duration, severity, additional_notes)
-        final_status = StatusEnum.completed
+        analysis_text = await open_ai_analysis(age, sex, symptoms, duration, severity, additional_notes, user_id=str(user.id), meta=analysis_meta)
     except OpenAIAuthError as e:
         logger.exception("OpenAI authentication error — check server OPENAI_API_KEY")
-        analysis_text = "Analysis temporarily unavailable (server configuration)."
-        final_status = StatusEnum.not_completed
-        # We still update the record within the same transaction before re-raising
-        await update_symptom_analysis(db, symptom_check_id, analysis_text, final_status)
+        # We still record the check as not completed before re-raising
+        await _record_failed_check(db, check, "Analysis temporarily unavailable (server configuration).")
         raise e
     except OpenAIRateLimitError as e:
         logger.warning("OpenAI rate-limit: %s", e)
-        analysis_text = "Analysis delayed due to service load; please check back shortly."
-        final_status = StatusEnum.not_completed
-        await update_symptom_analysis(db, symptom_check_id, analysis_text, final_status)
+        await _record_failed_check(db, check, "Analysis delayed due to service load; please check back shortly.")
         raise e
     except (OpenAITransientError, OpenAITimeoutError, OpenAIUnavailableError) as e:
         logger.warning("OpenAI transient/unavailable: %s", e)
         heuristic = f"Unable to complete automated analysis. Patient reports: {symptoms[:300]}."
-        analysis_text = heuristic
-        final_status = StatusEnum.not_completed
-        await update_symptom_analysis(db, symptom_check_id, analysis_text, final_status)
+        await _record_failed_check(db, check, heuristic)
         raise e
     except Exception as e:
         logger.exception("Unexpected error while calling OpenAI: %s", e)
-        analysis_text = "Analysis currently unavailable."
-        final_status = StatusEnum.not_completed
-        await update_symptom_analysis(db, symptom_check_id, analysis_text, final_status)
+        await _record_failed_check(db, check, "Analysis currently unavailable.")
         raise e
 
     #placeholder
     # analysis_text = "Placeholder analysis text."
-    # final_status = StatusEnum.completed
-    
-    # Update symptom check with analysis if OpenAI call was successful
-    updated_symptom_check = await update_symptom_analysis(db, symptom_check_id, analysis_text, final_status)
+
+    if db_settings.DB_WRITE_BUFFER_ENABLED:
+        # Written and committed together with the other checks finishing about now
+        symptom_check = await symptom_write_buffer.submit({**check, "status": StatusEnum.completed, "analysis": analysis_text, "meta": analysis_meta})
+    else:
+        symptom_check = await insert_symptom_check(db, **check, analysis=analysis_text, meta=analysis_meta)
+        await db.commit()
+    # The user's cached history page is now stale, and replicas may not have the check yet
+    await symptom_history_cache.invalidate(get_redis_client(), str(user.id))
+    await stick_to_primary(get_redis_client(), str(user.id))
+
+    return symptom_check
+
+
+async def _record_failed_check(db: AsyncSession, check: dict, analysis_text: str) -> None:
+    await upsert_failed_symptom_check(db, **check, analysis=analysis_text)
     await db.commit()
-    await db.refresh(updated_symptom_check)
-    
-    return updated_symptom_check
\ No newline at end of file
@@ -0,0 +1,62 @@
+import zlib
+from typing import AsyncIterator, Optional
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.db.session import AsyncSessionLocal
+from app.utils.security import decrypt_api_key
+from app.crud.timeline import get_timeline_by_user_id, search_timeline_by_user_id, stream_timeline_by_user_id
+from app.crud.user import get_user_by_id
+from app.utils.history_json import timeline_ndjson
+from app.utils.pagination import DEFAULT_PAGE_SIZE, decode_cursor, decode_search_cursor, next_page, next_search_page
+
+EXPORT_BATCH_SIZE = 500
+
+async def get_timeline(db: AsyncSession, user_id: str, api_key: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None):
+    """Returns one page of completed text and OCR checks, newest first, and the cursor of the next page (None on the last page)."""
+    after = decode_cursor(cursor) if cursor else None
+
+    user = await get_user_by_id(db, user_id)
+    if not user:
+        raise ValueError("invalid_user")
+    
+    raw_api_key = decrypt_api_key(user.api_key_enc)
+    if raw_api_key != api_key:
+        raise ValueError("invalid_api_key")
+
+    # Fetch one extra row to learn whether another page exists
+    rows = await get_timeline_by_user_id(db, user_id=user.id, limit=limit + 1, cursor=after)
+    return next_page(rows, limit)
+
+
+async def search_timeline(db: AsyncSession, user_id: str, api_key: str, query: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None):
+    """Returns one page of completed checks matching `query`, best match first, and the cursor of the next page (None on the last page)."""
+    after = decode_search_cursor(cursor) if cursor else None
+
+    user = await get_user_by_id(db, user_id)
+    if not user:
+        raise ValueError("invalid_user")
+    
+    raw_api_key = decrypt_api_key(user.api_key_enc)
+    if raw_api_key != api_key:
+        raise ValueError("invalid_api_key")
+
+    # Fetch one extra row to learn whether another page exists
+    rows = await search_timeline_by_user_id(db, user_id=user.id, query=query, limit=limit + 1, cursor=after)
+    return next_search_page(rows, limit)
+
+async def stream_timeline_export(user_id: str, compress: bool = False, batch_size: int = EXPORT_BATCH_SIZE,
+                                 session_factory: Optional[async_sessionmaker] = None) -> AsyncIterator[bytes]:
+    """
+    The user's whole timeline as NDJSON chunks, one per batch of rows, gzip-compressed when `compress` is set.
+    Opens its own session from `session_factory` (default: the primary): a streamed body is sent after the
+    request's dependencies (and their session) are closed.
+    """
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS) if compress else None  # gzip container
+    async with (session_factory or AsyncSessionLocal)() as db:
+        async for rows in stream_timeline_by_user_id(db, user_id=user_id, batch_size=batch_size):
+            chunk = timeline_ndjson(rows)
+            if compressor is not None:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+    if compressor is not None:
+        yield compressor.flush()
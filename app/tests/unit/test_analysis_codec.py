@@ -0,0 +1,100 @@
+import pytest
+import zstandard
+from unittest.mock import AsyncMock, MagicMock
+from app.core.db_config import db_settings
+from app.models.symptoms import Symptom
+from app.utils import analysis_codec
+
+DISCLAIMER = (
+    "Disclaimer: I am an AI assistant and not a medical professional. This analysis is for informational "
+    "purposes only and is not a substitute for professional medical advice, diagnosis, or treatment."
+)
+
+
+def _analysis(i: int) -> str:
+    return (
+        f"# Potential Conditions\n1. **Condition {i % 7}**: symptoms over {i % 14 + 1} days fit this pattern.\n\n"
+        f"# Explanation\nA severity of {i % 10}/10 with cough and fever suggests a viral cause.\n\n"
+        "# Recommended Next Steps\n- Rest and stay well hydrated.\n- See a doctor if breathing gets harder.\n\n"
+        f"# Disclaimer\n{DISCLAIMER}"
+    )
+
+
+@pytest.fixture(autouse=True)
+def dictionary():
+    analysis_codec.clear_dictionaries()
+    trained = zstandard.train_dictionary(2048, [_analysis(i).encode() for i in range(300)], dict_id=3)
+    analysis_codec.register_dictionary(3, trained.as_bytes())
+    yield trained
+    analysis_codec.clear_dictionaries()
+
+
+def test_round_trip_names_dictionary_in_frame():
+    text = _analysis(1000)
+
+    frame, version = analysis_codec.compress(text)
+
+    assert version == 3 and zstandard.get_frame_parameters(frame).dict_id == 3
+    assert len(frame) * 5 < len(text.encode())
+    assert analysis_codec.decode(frame) == text
+
+
+def test_plain_text_decodes_as_is():
+    assert analysis_codec.decode("Analysis currently unavailable.".encode()) == "Analysis currently unavailable."
+    assert analysis_codec.decode(None) is None
+
+
+def test_frame_from_unloaded_dictionary_is_reported():
+    frame, _ = analysis_codec.compress(_analysis(1))
+    analysis_codec.clear_dictionaries()
+
+    with pytest.raises(analysis_codec.UnknownDictionary):
+        analysis_codec.decode(frame)
+
+
+def test_encode_keeps_text_when_disabled_or_not_smaller(mocker):
+    mocker.patch.object(db_settings, "ANALYSIS_COMPRESSION", False)
+    assert analysis_codec.encode(_analysis(1)) == (None, None)
+
+    mocker.patch.object(db_settings, "ANALYSIS_COMPRESSION", True)
+    assert analysis_codec.encode("ok") == (None, None)
+    frame, version = analysis_codec.encode(_analysis(1))
+    assert version == 3 and frame.startswith(analysis_codec.ZSTD_MAGIC)
+
+
+def test_model_attribute_compresses_and_decodes(mocker):
+    """
+    GIVEN compression is on and a dictionary is loaded
+    WHEN an analysis is assigned to a check
+    THEN the frame and dictionary version are stored, the text rides along for the search
+         trigger, and reading the attribute gives the text back from the frame
+    """
+    mocker.patch.object(db_settings, "ANALYSIS_COMPRESSION", True)
+    check = Symptom()
+
+    check.analysis = _analysis(5)
+
+    assert check.analysis_dict == 3 and check.analysis_zstd is not None
+    assert check.analysis_plain == _analysis(5)
+    check.analysis_plain = None  # as the trigger leaves it
+    assert check.analysis == _analysis(5)
+
+
+@pytest.mark.asyncio
+async def test_fetch_all_loads_new_dictionaries_and_retries(dictionary):
+    """
+    GIVEN a row compressed with a dictionary trained after this process loaded its own
+    WHEN it is fetched
+    THEN the new dictionaries are loaded and the query runs once more
+    """
+    analysis_codec.clear_dictionaries()
+    stale, loaded, fresh = MagicMock(), MagicMock(), MagicMock()
+    stale.all.side_effect = analysis_codec.UnknownDictionary(3)
+    loaded.all.return_value = [(3, dictionary.as_bytes())]
+    fresh.all.return_value = ["row"]
+    db = AsyncMock()
+    db.execute.side_effect = [stale, loaded, fresh]
+
+    assert await analysis_codec.fetch_all(db, "statement") == ["row"]
+    assert analysis_codec.active_version() == 3
+    assert db.execute.await_count == 3
@@ -0,0 +1,58 @@
+import pytest
+from unittest.mock import MagicMock
+from sqlalchemy import exc
+from sqlalchemy.util import greenlet_spawn
+from app.core.db_config import db_settings
+from app.db import pool as db_pool
+from app.db.pool import CHECKOUT_WAIT_SECONDS, InstrumentedPool, engine_options, pool_stats
+
+
+def test_engine_options_follow_settings(mocker):
+    mocker.patch.multiple(db_settings, DB_POOL_SIZE=8, DB_MAX_OVERFLOW=2, DB_POOL_TIMEOUT_SEC=3.0,
+                          DB_POOL_RECYCLE_SEC=600, DB_POOL_PRE_PING=True, DB_PGBOUNCER=False)
+
+    options = engine_options("replica0")
+
+    assert options["poolclass"] is InstrumentedPool and options["pool_logging_name"] == "replica0"
+    assert (options["pool_size"], options["max_overflow"], options["pool_timeout"], options["pool_recycle"]) == (8, 2, 3.0, 600)
+    assert options["pool_pre_ping"] is True
+    assert "connect_args" not in options
+
+
+def test_pgbouncer_mode_disables_statement_caches(mocker):
+    """
+    GIVEN PgBouncer mode
+    WHEN engine options are built
+    THEN asyncpg's and SQLAlchemy's prepared statement caches are off and statement names are unique
+    """
+    mocker.patch.object(db_settings, "DB_PGBOUNCER", True)
+
+    connect_args = engine_options()["connect_args"]
+
+    assert connect_args["statement_cache_size"] == 0 and connect_args["prepared_statement_cache_size"] == 0
+    name = connect_args["prepared_statement_name_func"]
+    assert name() != name()
+
+
+@pytest.mark.asyncio
+async def test_checkouts_are_timed_and_timeouts_counted(mocker):
+    """
+    GIVEN a pool of one connection without overflow
+    WHEN the connection is checked out and a second checkout is attempted
+    THEN the second times out, both checkouts are in the wait histogram and the timeout is counted
+    """
+    mocker.patch.object(db_pool, "checkout_timeouts", {})
+    pool = InstrumentedPool(MagicMock, pool_size=1, max_overflow=0, timeout=0.01, logging_name="test_timeouts")
+    engine = MagicMock(pool=pool)
+
+    conn = await greenlet_spawn(pool.connect)
+    assert pool_stats(engine)["checked_out"] == 1
+    with pytest.raises(exc.TimeoutError):
+        await greenlet_spawn(pool.connect)
+
+    stats = pool_stats(engine)
+    assert stats["timeouts"] == 1 and stats["overflow"] == 0
+    assert CHECKOUT_WAIT_SECONDS.snapshot({"pool": "test_timeouts"})["count"] == 2
+    assert stats["checkout_wait_p99"] >= 0.01
+    await greenlet_spawn(conn.close)
+    assert pool_stats(engine)["checked_out"] == 0
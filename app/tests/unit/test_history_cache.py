@@ -0,0 +1,167 @@
+import asyncio
+import pytest
+import redis.asyncio as redis
+from app.utils.history_cache import HistoryCache, etag_matches
+
+pytestmark = pytest.mark.asyncio
+
+
+class InMemoryRedis:
+    """The handful of Redis commands HistoryCache uses, kept in a dict."""
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, nx=False, px=None, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = str(value)
+        return True
+
+    async def eval(self, _script, _numkeys, key, token):
+        if self.data.get(key) == token:
+            del self.data[key]
+            return 1
+        return 0
+
+
+class BrokenRedis:
+    async def get(self, key):
+        raise redis.ConnectionError("down")
+
+
+def _loader(pages):
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return pages[len(calls) - 1] if len(calls) <= len(pages) else pages[-1]
+
+    return load, calls
+
+
+async def test_second_read_is_a_hit():
+    cache, client = HistoryCache("t"), InMemoryRedis()
+    load, calls = _loader(['{"history":[1]}'])
+
+    assert await cache.get_or_load(client, "u1", load) == '{"history":[1]}'
+    assert await cache.get_or_load(client, "u1", load) == '{"history":[1]}'
+
+    assert len(calls) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+async def test_invalidate_forces_reload():
+    cache, client = HistoryCache("t"), InMemoryRedis()
+    load, calls = _loader(["old", "new"])
+
+    await cache.get_or_load(client, "u1", load)
+    await cache.invalidate(client, "u1")
+
+    assert await cache.get_or_load(client, "u1", load) == "new"
+    assert len(calls) == 2
+
+
+async def test_concurrent_misses_load_once():
+    """
+    GIVEN an empty cache
+    WHEN many requests for the same user's page arrive at once
+    THEN the database is read once and every request gets the page
+    """
+    cache, client = HistoryCache("t"), InMemoryRedis()
+    load, calls = _loader(["page"])
+
+    results = await asyncio.gather(*(cache.get_or_load(client, "u1", load) for _ in range(20)))
+
+    assert results == ["page"] * 20
+    assert len(calls) == 1
+
+
+async def test_waits_for_other_worker_holding_the_lock():
+    cache, client = HistoryCache("t", poll_interval=0.005), InMemoryRedis()
+    client.data["history_cache_gen:t:u1"] = "7"
+    client.data["history_cache:t:u1:7:lock"] = "other-worker"
+    load, calls = _loader(["mine"])
+
+    async def other_worker_fills():
+        await asyncio.sleep(0.02)
+        client.data["history_cache:t:u1:7"] = "theirs"
+
+    filler = asyncio.create_task(other_worker_fills())
+    assert await cache.get_or_load(client, "u1", load) == "theirs"
+    await filler
+    assert calls == []
+
+
+async def test_page_loaded_before_a_write_is_not_served_after_it():
+    """
+    GIVEN a page load that started before a new check was committed
+    WHEN the load finishes after the invalidation
+    THEN the next read does not return that stale page
+    """
+    cache, client = HistoryCache("t"), InMemoryRedis()
+    started, release = asyncio.Event(), asyncio.Event()
+
+    async def slow_stale_load():
+        started.set()
+        await release.wait()
+        return "stale"
+
+    reader = asyncio.create_task(cache.get_or_load(client, "u1", slow_stale_load))
+    await started.wait()
+    await cache.invalidate(client, "u1")
+    release.set()
+    await reader
+
+    load, _ = _loader(["fresh"])
+    assert await cache.get_or_load(client, "u1", load) == "fresh"
+
+
+async def test_etag_is_stable_until_the_history_changes():
+    cache, client = HistoryCache("t"), InMemoryRedis()
+
+    first = await cache.etag(client, "u1", 10, None)
+    assert await cache.etag(client, "u1", 10, None) == first
+    assert await cache.etag(client, "u1", 20, None) != first
+    assert await cache.etag(client, "u2", 10, None) != first
+
+    await cache.invalidate(client, "u1")
+    assert await cache.etag(client, "u1", 10, None) != first
+
+
+async def test_lost_version_does_not_revive_old_etags():
+    """
+    GIVEN an ETag handed out before the user's version key expired or was evicted
+    WHEN the next request arrives with that tag
+    THEN it no longer matches, since the history may have changed in between
+    """
+    cache, client = HistoryCache("t"), InMemoryRedis()
+    old = await cache.etag(client, "u1", 10, None)
+
+    client.data.clear()
+
+    assert await cache.etag(client, "u1", 10, None) != old
+
+
+async def test_etag_is_skipped_when_redis_is_down():
+    assert await HistoryCache("t").etag(BrokenRedis(), "u1", 10, None) is None
+
+
+async def test_etag_matches_if_none_match_forms():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc"', '"abc"')
+    assert etag_matches('"x", "abc"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"abcd"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+
+
+async def test_redis_outage_falls_back_to_loader():
+    cache = HistoryCache("t")
+    load, calls = _loader(["page"])
+
+    assert await cache.get_or_load(BrokenRedis(), "u1", load) == "page"
+    assert len(calls) == 1
@@ -0,0 +1,104 @@
+import datetime
+import json
+import uuid
+from types import SimpleNamespace
+
+from app.models.symptoms import SexEnum, StatusEnum
+from app.schemas.ocr_symptom_history import OCRSymptomHistoryOut
+from app.schemas.symptom_history import SymptomHistoryOut
+from app.schemas.timeline import TimelineOut
+from app.utils.history_json import ocr_symptom_history_json, symptom_history_json, timeline_json
+
+STRUCTURED = {
+    "conditions": [{"name": "Common cold", "rationale": "Runny nose and sneezing."}],
+    "explanation": "Likely viral.",
+    "next_steps": ["Rest"],
+    "red_flags": [],
+    "clarifying_questions": [],
+}
+
+
+SUBMITTED_AT = datetime.datetime(2025, 10, 1, 12, 30, 5, 120000, tzinfo=datetime.timezone.utc)
+
+
+def _symptom_row(structured=None, **input_fields):
+    # Same column order as app.crud.symptom.HISTORY_COLUMNS
+    i = SimpleNamespace(**input_fields)
+    return (uuid.uuid4(), uuid.uuid4(), SUBMITTED_AT, i.age, i.sex, i.symptoms, i.duration, i.severity,
+            i.additional_notes, "Analysis", StatusEnum.completed, structured)
+
+
+def _ocr_row(input, structured=None):
+    # Same column order as app.crud.ocr_symptom.OCR_HISTORY_COLUMNS
+    return (uuid.uuid4(), uuid.uuid4(), SUBMITTED_AT, input, "Analysis", StatusEnum.completed, structured)
+
+
+def test_symptom_history_json_matches_response_model():
+    rows = [
+        _symptom_row(age=30, sex=SexEnum.female, symptoms="cough", duration="2 days", severity=4, additional_notes=None),
+        _symptom_row(STRUCTURED, age=61, sex=SexEnum.male, symptoms="headache", duration="1 day", severity=2, additional_notes="none"),
+    ]
+
+    expected = SymptomHistoryOut(
+        user_id="u1",
+        history=[
+            {
+                "id": str(r[0]), "user_id": str(r[1]), "timestamp": r[2],
+                "input": {"age": r[3], "sex": r[4], "symptoms": r[5], "duration": r[6],
+                          "severity": r[7], "additional_notes": r[8]},
+                "analysis": r[9], "status": r[10], "structured": r[11],
+            }
+            for r in rows
+        ],
+        next_cursor="abc",
+    )
+
+    assert json.loads(symptom_history_json("u1", rows, "abc")) == json.loads(expected.model_dump_json())
+
+
+def test_delta_sync_page_ignores_trailing_updated_at_and_carries_watermark():
+    row = _symptom_row(age=30, sex=SexEnum.female, symptoms="cough", duration="2 days", severity=4, additional_notes=None)
+
+    body = json.loads(symptom_history_json("u1", [row + (SUBMITTED_AT,)], None, watermark="w1"))
+
+    assert body["watermark"] == "w1"
+    assert body["history"] == json.loads(symptom_history_json("u1", [row], None))["history"]
+
+
+def test_ocr_symptom_history_json_matches_response_model():
+    rows = [_ocr_row({"chief_complaint": "cough", "wbc_count": 11500, "temperature_f": 99.1})]
+
+    expected = OCRSymptomHistoryOut(
+        user_id="u1",
+        history=[
+            {"id": str(r[0]), "user_id": str(r[1]), "timestamp": r[2], "input": r[3],
+             "analysis": r[4], "status": r[5], "structured": r[6]}
+            for r in rows
+        ],
+    )
+
+    assert json.loads(ocr_symptom_history_json("u1", rows, None)) == json.loads(expected.model_dump_json())
+
+
+def test_timeline_json_matches_response_model():
+    text_row = _symptom_row(age=30, sex=SexEnum.female, symptoms="cough", duration="2 days", severity=4, additional_notes=None)
+    ocr_row = _ocr_row({"chief_complaint": "cough"}, STRUCTURED)
+    # Same column order as app.crud.timeline: discriminator, shared columns, text inputs, OCR input
+    rows = [
+        ("symptom", *text_row[:9], None, *text_row[9:]),
+        ("ocr", *ocr_row[:3], None, None, None, None, None, None, *ocr_row[3:]),
+    ]
+
+    expected = TimelineOut(
+        user_id="u1",
+        history=[
+            {"type": "symptom", "id": str(text_row[0]), "user_id": str(text_row[1]), "timestamp": text_row[2],
+             "input": {"age": 30, "sex": "female", "symptoms": "cough", "duration": "2 days", "severity": 4, "additional_notes": None},
+             "analysis": "Analysis", "status": "completed", "structured": None},
+            {"type": "ocr", "id": str(ocr_row[0]), "user_id": str(ocr_row[1]), "timestamp": ocr_row[2],
+             "input": {"chief_complaint": "cough"}, "analysis": "Analysis", "status": "completed", "structured": STRUCTURED},
+        ],
+        next_cursor="abc",
+    )
+
+    assert json.loads(timeline_json("u1", rows, "abc")) == json.loads(expected.model_dump_json())
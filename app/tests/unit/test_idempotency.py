@@ -0,0 +1,116 @@
+import asyncio
+import json
+import httpx
+import pytest
+from starlette.responses import Response
+from app.api.idempotency import IdempotencyMiddleware
+
+pytestmark = pytest.mark.asyncio
+
+
+class InMemoryRedis:
+    """The handful of Redis commands IdempotencyMiddleware uses, kept in a dict."""
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def eval(self, _script, _numkeys, key, token):
+        if self.data.get(key) == token:
+            del self.data[key]
+            return 1
+        return 0
+
+
+def _client(statuses=(201,), delay=0.0):
+    """A client for an app that counts its calls and answers with the next of `statuses`."""
+    calls = []
+
+    async def app(scope, receive, send):
+        body = (await receive())["body"]
+        calls.append(body)
+        await asyncio.sleep(delay)
+        status = statuses[min(len(calls), len(statuses)) - 1]
+        payload = json.dumps({"id": len(calls), "echo": body.decode()}).encode()
+        await Response(payload, status_code=status, media_type="application/json")(scope, receive, send)
+
+    redis_client = InMemoryRedis()
+    middleware = IdempotencyMiddleware(app, paths=("/symptom-check/",), poll_interval=0.005, redis_factory=lambda: redis_client)
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=middleware), base_url="http://test")
+    return client, calls, middleware
+
+
+def _headers(key="k1", api_key="secret"):
+    return {"Idempotency-Key": key, "X-User-ID": "u1", "X-API-Key": api_key}
+
+
+async def test_retry_gets_the_stored_response_byte_for_byte():
+    """
+    GIVEN a symptom check that succeeded with an Idempotency-Key
+    WHEN the client retries it with the same key and body
+    THEN the stored response is returned as it was sent, without running the endpoint again
+    """
+    client, calls, middleware = _client()
+    async with client:
+        first = await client.post("/symptom-check/", content=b'{"age": 30}', headers=_headers())
+        retry = await client.post("/symptom-check/", content=b'{"age": 30}', headers=_headers())
+
+    assert len(calls) == 1 and middleware.replays == 1
+    assert retry.status_code == first.status_code == 201
+    assert retry.content == first.content
+    assert retry.headers["content-type"] == first.headers["content-type"]
+    assert retry.headers["idempotent-replayed"] == "true"
+
+
+async def test_concurrent_retries_wait_for_the_first_request():
+    client, calls, _ = _client(delay=0.05)
+    async with client:
+        responses = await asyncio.gather(*(client.post("/symptom-check/", content=b"{}", headers=_headers()) for _ in range(5)))
+
+    assert len(calls) == 1
+    assert {r.content for r in responses} == {responses[0].content}
+
+
+async def test_key_reused_with_a_different_body_is_rejected():
+    client, calls, _ = _client()
+    async with client:
+        await client.post("/symptom-check/", content=b'{"age": 30}', headers=_headers())
+        reused = await client.post("/symptom-check/", content=b'{"age": 31}', headers=_headers())
+
+    assert reused.status_code == 422
+    assert len(calls) == 1
+
+
+async def test_failed_request_is_not_stored():
+    """
+    GIVEN a request that failed upstream (502)
+    WHEN the client retries it with the same key
+    THEN the endpoint runs again and its successful response is the one stored
+    """
+    client, calls, _ = _client(statuses=(502, 201))
+    async with client:
+        failed = await client.post("/symptom-check/", content=b"{}", headers=_headers())
+        retried = await client.post("/symptom-check/", content=b"{}", headers=_headers())
+        replayed = await client.post("/symptom-check/", content=b"{}", headers=_headers())
+
+    assert (failed.status_code, retried.status_code) == (502, 201)
+    assert replayed.content == retried.content
+    assert len(calls) == 2
+
+
+async def test_stored_response_is_not_replayed_to_other_credentials():
+    client, calls, _ = _client()
+    async with client:
+        await client.post("/symptom-check/", content=b"{}", headers=_headers())
+        other = await client.post("/symptom-check/", content=b"{}", headers=_headers(api_key="guess"))
+        unkeyed = await client.post("/symptom-check/", content=b"{}", headers={"X-User-ID": "u1", "X-API-Key": "secret"})
+
+    assert "idempotent-replayed" not in other.headers and "idempotent-replayed" not in unkeyed.headers
+    assert len(calls) == 3
@@ -0,0 +1,95 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from app import lifespan
+from app.core.openai_config import openai_settings
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_failed_warmup_step_does_not_stop_startup(mocker):
+    """
+    GIVEN a database that cannot be reached and a Redis that answers
+    WHEN the worker warms up
+    THEN the database step is skipped with a warning and the other steps still run
+    """
+    mocker.patch.object(openai_settings, "OPENAI_WARMUP", False)
+    mocker.patch.object(lifespan, "_warm_database", AsyncMock(side_effect=ConnectionRefusedError()))
+    warm_redis = mocker.patch.object(lifespan, "_warm_redis", AsyncMock())
+
+    timings = await lifespan.warm_up(timeout=1)
+
+    assert set(timings) == {"redis", "threadpool"}
+    warm_redis.assert_awaited_once()
+
+
+async def test_slow_warmup_step_is_abandoned_after_the_timeout(mocker):
+    mocker.patch.object(openai_settings, "OPENAI_WARMUP", True)
+    mocker.patch.object(lifespan, "_warm_database", AsyncMock())
+    mocker.patch.object(lifespan, "_warm_redis", AsyncMock())
+
+    async def hang(timeout):
+        await asyncio.sleep(10)
+
+    mocker.patch.object(lifespan.openai_client, "warm_up", hang)
+
+    timings = await asyncio.wait_for(lifespan.warm_up(timeout=0.05), timeout=1)
+
+    assert "openai" not in timings and "database" in timings
+
+
+async def test_database_warmup_opens_connections_side_by_side(mocker):
+    open_now, peak = 0, 0
+
+    async def lookup(session, user_id):
+        nonlocal open_now, peak
+        open_now += 1
+        peak = max(peak, open_now)
+        await asyncio.sleep(0.01)
+        open_now -= 1
+
+    mocker.patch.object(lifespan, "AsyncSessionLocal", MagicMock(return_value=AsyncMock()))
+    mocker.patch.object(lifespan, "get_user_by_id", lookup)
+    mocker.patch.object(lifespan.replica_router, "replicas", [])
+
+    await lifespan._warm_database(3)
+
+    assert peak == 3
+
+
+async def test_database_warmup_checks_every_replica_and_loads_dictionaries(mocker):
+    """
+    GIVEN two read replicas and analysis compression on
+    WHEN the database is warmed up
+    THEN each replica's health is checked and the compression dictionaries are still loaded
+    """
+    replicas = [MagicMock(), MagicMock()]
+    mocker.patch.object(lifespan, "AsyncSessionLocal", MagicMock(return_value=AsyncMock()))
+    mocker.patch.object(lifespan, "get_user_by_id", AsyncMock())
+    mocker.patch.object(lifespan.replica_router, "replicas", replicas)
+    check = mocker.patch.object(lifespan.replica_router, "check", AsyncMock(return_value=True))
+    mocker.patch.object(lifespan.db_settings, "ANALYSIS_COMPRESSION", True)
+    ensure_loaded = mocker.patch.object(lifespan, "ensure_loaded", AsyncMock())
+
+    await lifespan._warm_database(1)
+
+    assert [c.args[0] for c in check.await_args_list] == replicas
+    ensure_loaded.assert_awaited_once()
+
+
+async def test_shutdown_writes_buffered_checks_before_closing_connections(mocker):
+    calls = []
+
+    def recorder(name):
+        return AsyncMock(side_effect=lambda *args: calls.append(name))
+
+    mocker.patch.object(lifespan.symptom_write_buffer, "drain", recorder("drain"))
+    mocker.patch.object(lifespan.ocr_symptom_write_buffer, "drain", recorder("drain_ocr"))
+    mocker.patch.object(lifespan.openai_client, "close_client", recorder("openai"))
+    mocker.patch.object(lifespan.redis_session, "pool", MagicMock(aclose=recorder("redis")))
+    mocker.patch.object(lifespan.replica_router, "dispose", recorder("replicas"))
+    mocker.patch.object(lifespan, "engine", MagicMock(dispose=recorder("primary")))
+
+    await lifespan.shut_down()
+
+    assert calls == ["drain", "drain_ocr", "openai", "redis", "replicas", "primary"]
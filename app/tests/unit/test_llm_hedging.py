@@ -0,0 +1,151 @@
+import asyncio
+import pytest
+from app.core.metrics import Histogram
+from app.exceptions.openai_exceptions import OpenAITransientError
+from app.utils import openai_client
+from app.utils.llm_hedging import Hedger, HedgeBudget
+from app.utils.llm_scheduler import FairScheduler
+
+pytestmark = pytest.mark.asyncio
+
+
+class StandInUpstream:
+    """Local upstream whose call latencies come from a scripted sequence."""
+    def __init__(self, latencies, fail=()):
+        self.latencies = list(latencies)
+        self.fail = set(fail)
+        self.started = 0
+        self.cancelled = 0
+
+    async def call(self, label):
+        index = self.started
+        self.started += 1
+        try:
+            await asyncio.sleep(self.latencies[index])
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if index in self.fail:
+            raise RuntimeError(f"call {index} failed")
+        return label
+
+
+async def test_fast_call_is_not_hedged():
+    upstream = StandInUpstream([0.001])
+    hedger = Hedger(initial_delay=0.05)
+
+    result, from_hedge = await hedger.run(lambda: upstream.call("primary"), lambda: upstream.call("hedge"))
+
+    assert (result, from_hedge) == ("primary", False)
+    assert upstream.started == 1
+    assert hedger.hedges == 0
+
+
+async def test_slow_call_is_hedged_and_loser_cancelled():
+    """
+    GIVEN a primary call slower than the hedge delay
+    WHEN the hedge completes first
+    THEN the hedge's result is returned and the primary is cancelled
+    """
+    upstream = StandInUpstream([1.0, 0.001])
+    hedger = Hedger(initial_delay=0.01)
+
+    result, from_hedge = await hedger.run(lambda: upstream.call("primary"), lambda: upstream.call("hedge"))
+    await asyncio.sleep(0)
+
+    assert (result, from_hedge) == ("hedge", True)
+    assert upstream.cancelled == 1
+    assert hedger.hedge_wins == 1
+
+
+async def test_failed_hedge_still_waits_for_primary():
+    upstream = StandInUpstream([0.05, 0.001], fail={1})
+    hedger = Hedger(initial_delay=0.01)
+
+    result, from_hedge = await hedger.run(lambda: upstream.call("primary"), lambda: upstream.call("hedge"))
+
+    assert (result, from_hedge) == ("primary", False)
+
+
+async def test_no_hedge_without_a_free_slot():
+    """
+    GIVEN a slow primary call while every upstream call slot is taken
+    WHEN the hedge delay passes
+    THEN no hedge is sent and the hedge budget is left unspent
+    """
+    upstream = StandInUpstream([0.03, 0.001])
+    hedger = Hedger(initial_delay=0.01)
+
+    result, from_hedge = await hedger.run(lambda: upstream.call("primary"), lambda: upstream.call("hedge"), can_hedge=lambda: False)
+
+    assert (result, from_hedge) == ("primary", False)
+    assert upstream.started == 1 and hedger.hedges == 0
+    assert hedger.budget.try_spend()
+
+
+async def test_cancelled_loser_latency_is_recorded():
+    upstream = StandInUpstream([1.0, 0.02])
+    hedger = Hedger(initial_delay=0.01)
+
+    await hedger.run(lambda: upstream.call("primary"), lambda: upstream.call("hedge"))
+
+    # The winning hedge and the primary it beat, which had run for the delay plus the hedge's time
+    assert len(hedger._latencies) == 2
+    assert max(hedger._latencies) >= 0.03
+
+
+async def test_both_failing_raises():
+    upstream = StandInUpstream([0.02, 0.001], fail={0, 1})
+    hedger = Hedger(initial_delay=0.01)
+
+    with pytest.raises(RuntimeError):
+        await hedger.run(lambda: upstream.call("primary"), lambda: upstream.call("hedge"))
+
+
+async def test_hedge_budget_caps_extra_calls():
+    """
+    GIVEN every call is slow and the hedge budget is 10%
+    WHEN many calls run
+    THEN roughly one in ten is hedged
+    """
+    calls = 100
+    upstream = StandInUpstream([0.003] * (calls * 2))
+    hedger = Hedger(initial_delay=0.001, min_samples=calls + 1, budget=HedgeBudget(ratio=0.1, burst=1))
+
+    for _ in range(calls):
+        await hedger.run(lambda: upstream.call("primary"), lambda: upstream.call("hedge"))
+
+    assert 8 <= hedger.hedges <= 11
+
+
+async def test_delay_tracks_recent_percentile():
+    hedger = Hedger(percentile=90, initial_delay=5.0, min_delay=0.0, min_samples=10)
+    assert hedger.delay == 5.0
+
+    hedger._latencies.extend([0.1] * 90 + [2.0] * 10)
+
+    assert hedger.delay == 2.0
+
+
+async def test_hedge_runs_on_its_own_call_slot(mocker):
+    """
+    GIVEN a scheduler with one slot held by the primary call
+    WHEN a hedge is attempted, and again once a second slot is free
+    THEN the first is refused and the second holds a slot while it runs, keeping calls within capacity
+    """
+    scheduler = FairScheduler(capacity=1, wait_histogram=Histogram("t", "t"))
+    inflight = []
+
+    async def complete(messages, model, response_format=None):
+        inflight.append(scheduler.inflight)
+        return "hedged"
+
+    mocker.patch.object(openai_client, "complete", complete)
+    await scheduler.acquire("u1")
+
+    with pytest.raises(OpenAITransientError):
+        await openai_client._hedge([], model="m", scheduler=scheduler)
+
+    scheduler.capacity = 2
+    assert await openai_client._hedge([], model="m", scheduler=scheduler) == "hedged"
+    assert inflight == [2] and scheduler.inflight == 1
@@ -0,0 +1,108 @@
+import asyncio
+import pytest
+from app.core.metrics import Histogram
+from app.utils.llm_scheduler import FairScheduler, Priority
+
+pytestmark = pytest.mark.asyncio
+
+
+async def _start(scheduler, user_id, priority=Priority.interactive, order=None, hold=None):
+    """Acquire a slot, record the grant order, then hold it until `hold` is set."""
+    await scheduler.acquire(user_id, priority)
+    if order is not None:
+        order.append(user_id)
+    if hold is not None:
+        await hold.wait()
+    scheduler.release(user_id)
+
+
+async def test_acquire_and_release_within_capacity():
+    scheduler = FairScheduler(capacity=2, wait_histogram=Histogram("t", "t"))
+
+    await scheduler.acquire("a")
+    await scheduler.acquire("b")
+    assert scheduler.inflight == 2
+    assert scheduler.saturated is True
+
+    scheduler.release("a")
+    scheduler.release("b")
+    assert scheduler.inflight == 0
+    assert scheduler.saturated is False
+
+
+async def test_light_user_is_not_starved_by_heavy_user():
+    """
+    GIVEN a heavy user with many queued calls ahead of a light user
+    WHEN a slot frees up
+    THEN the light user is served before the heavy user's backlog
+    """
+    scheduler = FairScheduler(capacity=1, wait_histogram=Histogram("t", "t"))
+    order, hold = [], asyncio.Event()
+
+    await scheduler.acquire("blocker")
+    tasks = [asyncio.create_task(_start(scheduler, "heavy", order=order, hold=hold)) for _ in range(5)]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(_start(scheduler, "light", order=order, hold=hold)))
+    await asyncio.sleep(0)
+
+    hold.set()
+    scheduler.release("blocker")
+    await asyncio.gather(*tasks)
+
+    assert order.index("light") <= 1
+
+
+async def test_per_user_inflight_cap():
+    scheduler = FairScheduler(capacity=4, max_inflight_per_user=1, wait_histogram=Histogram("t", "t"))
+
+    await scheduler.acquire("heavy")
+    second = asyncio.create_task(scheduler.acquire("heavy"))
+    await asyncio.sleep(0)
+
+    # Capacity is free, but the user is at its cap
+    assert not second.done()
+    await scheduler.acquire("other")
+
+    scheduler.release("heavy")
+    await second
+    assert scheduler.inflight == 2
+
+
+async def test_acquire_timeout_leaves_queue_clean():
+    scheduler = FairScheduler(capacity=1, wait_histogram=Histogram("t", "t"))
+    await scheduler.acquire("a")
+
+    with pytest.raises(asyncio.TimeoutError):
+        await scheduler.acquire("b", timeout=0.01)
+
+    assert scheduler.waiting == 0
+    scheduler.release("a")
+    assert scheduler.inflight == 0
+
+
+async def test_try_acquire_never_jumps_the_queue():
+    """
+    GIVEN a call queued for the only slot
+    WHEN the slot is released and another caller tries to take a slot without waiting
+    THEN it is refused, since the released slot went to the queued call
+    """
+    scheduler = FairScheduler(capacity=1, wait_histogram=Histogram("t", "t"))
+    assert scheduler.try_acquire()
+    queued = asyncio.ensure_future(scheduler.acquire("u1"))
+    await asyncio.sleep(0)
+
+    assert not scheduler.try_acquire()
+    scheduler.release()
+    assert not scheduler.try_acquire()
+    await queued
+    assert scheduler.inflight == 1
+
+
+async def test_queue_wait_is_recorded_per_class():
+    histogram = Histogram("t", "t")
+    scheduler = FairScheduler(capacity=1, wait_histogram=histogram)
+
+    await scheduler.acquire("a", Priority.interactive)
+    scheduler.release("a")
+
+    assert histogram.snapshot({"priority": "interactive"})["count"] == 1
@@ -0,0 +1,93 @@
+import httpx
+import pytest
+from unittest.mock import AsyncMock
+from fastapi import FastAPI, HTTPException
+from app.api.dependencies import RATE_LIMIT_DECISIONS, RedisTokenBucketRateLimiter
+from app.api.routers import metrics as metrics_router
+from app.core.db_config import db_settings
+from app.core.metrics import Counter, Gauge, Histogram, Registry
+from app.schemas.authenticated_user import AuthenticatedUser
+
+
+def test_histogram_is_rendered_with_cumulative_buckets():
+    """
+    GIVEN a histogram with two observations in different buckets
+    WHEN the registry is rendered
+    THEN each bucket line counts every observation at or below its bound, ending with +Inf, _sum and _count
+    """
+    registry = Registry()
+    histogram = registry.register(Histogram("stage_seconds", "Stage latency", buckets=(0.1, 1.0)))
+    histogram.observe(0.05, {"stage": "auth"})
+    histogram.observe(2.0, {"stage": "auth"})
+
+    lines = registry.render().splitlines()
+
+    assert lines == [
+        "# HELP stage_seconds Stage latency",
+        "# TYPE stage_seconds histogram",
+        'stage_seconds_bucket{stage="auth",le="0.1"} 1',
+        'stage_seconds_bucket{stage="auth",le="1"} 1',
+        'stage_seconds_bucket{stage="auth",le="+Inf"} 2',
+        'stage_seconds_sum{stage="auth"} 2.05',
+        'stage_seconds_count{stage="auth"} 2',
+    ]
+
+
+def test_counter_label_values_are_escaped():
+    registry = Registry()
+    counter = registry.register(Counter("errors_total", "Errors"))
+    counter.inc({"type": 'say "hi"\\\n'})
+    counter.inc({"type": 'say "hi"\\\n'})
+
+    assert 'errors_total{type="say \\"hi\\"\\\\\\n"} 2' in registry.render()
+
+
+def test_collected_gauge_is_read_when_rendered():
+    in_use = []
+    registry = Registry()
+    registry.register(Gauge("pool_connections", "Connections", collect=lambda: [({"state": "in_use"}, len(in_use))]))
+
+    in_use.append(object())
+
+    assert 'pool_connections{state="in_use"} 1' in registry.render()
+
+
+def test_registering_a_name_twice_fails():
+    registry = Registry()
+    registry.register(Gauge("g", "g"))
+
+    with pytest.raises(ValueError):
+        registry.register(Counter("g", "g"))
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_counts_limited_requests(mocker):
+    """
+    GIVEN a user whose token bucket is empty
+    WHEN the rate limiter rejects their request
+    THEN the decision is counted as limited for the limiter's endpoint
+    """
+    limiter = RedisTokenBucketRateLimiter(capacity=1, refill_rate=0, endpoint="test_limited")
+    mocker.patch.object(limiter, "_take_token", AsyncMock(side_effect=HTTPException(status_code=429)))
+
+    with pytest.raises(HTTPException):
+        await limiter(redis_client=AsyncMock(), current_user=AuthenticatedUser(id="u1", api_key="k"))
+
+    assert RATE_LIMIT_DECISIONS.value({"endpoint": "test_limited", "decision": "limited"}) == 1
+    assert RATE_LIMIT_DECISIONS.value({"endpoint": "test_limited", "decision": "allowed"}) == 0
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_requires_the_token_when_set(mocker):
+    mocker.patch.object(db_settings, "METRICS_TOKEN", "scrape-secret")
+    app = FastAPI()
+    app.include_router(metrics_router.router, prefix="/metrics")
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        denied = await client.get("/metrics", headers={"Authorization": "Bearer wrong"})
+        allowed = await client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+
+    assert denied.status_code == 401
+    assert allowed.status_code == 200
+    assert allowed.headers["content-type"] == "text/plain; version=0.0.4; charset=utf-8"
+    assert "# TYPE auth_seconds histogram" in allowed.text
@@ -0,0 +1,74 @@
+import pytest
+from pydantic import ValidationError
+from app.schemas.symptom_check import SymptomCheckIn
+from app.utils.model_router import ModelRouter, FAST_TIER, FULL_TIER, score_request
+
+MODELS = {FULL_TIER: "gpt-4o", FAST_TIER: "gpt-4o-mini"}
+
+
+def _text_payload(symptoms="runny nose", severity=2, notes=""):
+    return {"age": 30, "sex": "female", "symptoms": symptoms, "duration": "2 days", "severity": severity, "additional_notes": notes}
+
+
+def test_short_low_severity_text_goes_to_fast_model():
+    decision = ModelRouter(MODELS, policy="balanced").route(_text_payload(), source="text")
+
+    assert decision.tier == FAST_TIER
+    assert decision.model == "gpt-4o-mini"
+
+
+def test_red_flag_terms_always_use_full_model():
+    """
+    GIVEN a short, low-severity request mentioning a red-flag symptom
+    WHEN it is routed with the most aggressive policy
+    THEN the full model is used
+    """
+    decision = ModelRouter(MODELS, policy="aggressive").route(_text_payload(symptoms="mild Chest Pain"), source="text")
+
+    assert decision.tier == FULL_TIER
+    assert decision.reasons == ["red_flag:chest pain"]
+
+
+def test_score_grows_with_severity_size_and_ocr():
+    low, _ = score_request(_text_payload(severity=2))
+    severe, _ = score_request(_text_payload(severity=9))
+    long, _ = score_request(_text_payload(notes="took some medicine yesterday " * 100))
+    ocr, reasons = score_request({"age": 30, "chief_complaint": "runny nose", "severity": 2}, source="ocr")
+
+    assert low < severe
+    assert low < long
+    assert low < ocr
+    assert "source:ocr" in reasons
+
+
+def test_off_scale_severity_is_scored_as_unknown():
+    """
+    GIVEN OCR input whose severity is off the 0-10 scale
+    WHEN it is scored
+    THEN it counts as an unknown severity, not as the scale's maximum or minimum, and the reason says why
+    """
+    lowest, _ = score_request({"chief_complaint": "runny nose", "severity": 0}, source="ocr")
+    highest, _ = score_request({"chief_complaint": "runny nose", "severity": 10}, source="ocr")
+    too_high, reasons = score_request({"chief_complaint": "runny nose", "severity": 100}, source="ocr")
+    negative, _ = score_request({"chief_complaint": "runny nose", "severity": -3}, source="ocr")
+
+    assert lowest < too_high < highest and lowest < negative < highest
+    assert "severity:out_of_range:100" in reasons
+
+
+@pytest.mark.parametrize("severity", [-1, 11])
+def test_symptom_check_rejects_severity_off_the_scale(severity):
+    with pytest.raises(ValidationError):
+        SymptomCheckIn(**_text_payload(severity=severity))
+
+
+def test_routing_disabled_without_fast_model_or_when_off():
+    payload = _text_payload()
+
+    assert ModelRouter({FULL_TIER: "gpt-4o", FAST_TIER: None}).route(payload).model == "gpt-4o"
+    assert ModelRouter(MODELS, policy="off").route(payload).model == "gpt-4o"
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        ModelRouter(MODELS, policy="cheapest")
@@ -0,0 +1,109 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from sqlalchemy.dialects import postgresql
+from app.crud.ocr_symptom import ocr_filter_symptom_checks
+from app.schemas.ocr_symptom_history import OCRVitalsFilter
+from app.utils.ocr_normalize import canonical_key, normalize_identified_data, parse_numeric
+
+
+def test_schema_example_is_normalized():
+    data = {
+        "chief_complaint": "Persistent cough and fatigue",
+        "blood_pressure": "118/76 mmHg",
+        "heart_rate_bpm": 82,
+        "temperature_f": "99.1",
+        "wbc_count": 11500,
+    }
+
+    assert normalize_identified_data(data) == {
+        "chief_complaint": "Persistent cough and fatigue",
+        "blood_pressure": "118/76 mmHg",
+        "systolic_bp": 118,
+        "diastolic_bp": 76,
+        "heart_rate_bpm": 82,
+        "temperature_f": 99.1,
+        "wbc_count": 11500,
+    }
+
+
+def test_aliases_and_units_map_to_canonical_fields():
+    """
+    GIVEN vitals under the names and units OCR'd forms use
+    WHEN the data is normalized on ingest
+    THEN they land under their canonical names as numbers in the canonical unit
+    """
+    data = {"Temp": "38.5 C", "Pulse": "104 bpm", "SpO2": "97%", "WBC": "11.5 K/uL", "RR": 18, "Chief Complaint": "cough"}
+
+    assert normalize_identified_data(data) == {
+        "temperature_f": 101.3, "heart_rate_bpm": 104, "spo2_pct": 97, "wbc_count": 11500,
+        "respiratory_rate": 18, "chief_complaint": "cough",
+    }
+
+
+@pytest.mark.parametrize("field,value,expected", [
+    ("temperature_f", "99.1", 99.1),
+    ("temperature_f", "99.1 °F", 99.1),
+    ("temperature_f", 37, 37),  # no unit given: taken as written
+    ("wbc_count", "11,500", 11500),
+    ("wbc_count", "11.5 x10^9/L", 11500),
+    ("heart_rate_bpm", "irregular", None),
+    ("heart_rate_bpm", "82 mmHg", None),
+    ("spo2_pct", True, None),
+])
+def test_parse_numeric(field, value, expected):
+    assert parse_numeric(field, value) == expected
+
+
+def test_key_implied_celsius():
+    assert normalize_identified_data({"temp_c": 37}) == {"temperature_f": 98.6}
+
+
+def test_unitless_generic_temperature_unit_is_inferred_from_its_range():
+    """
+    GIVEN unitless readings under temperature keys that name no unit
+    WHEN the data is normalized
+    THEN Celsius-range values are converted, Fahrenheit-range values kept, and values in neither range left as given
+    """
+    assert normalize_identified_data({"temperature": "38.5"}) == {"temperature_f": 101.3}
+    assert normalize_identified_data({"Temp": 36.6}) == {"temperature_f": 97.88}
+    assert normalize_identified_data({"body_temp": "101.3"}) == {"temperature_f": 101.3}
+    assert normalize_identified_data({"temp": 60}) == {"temp": 60}
+
+
+def test_nothing_is_lost_on_conflicts_or_unparseable_values():
+    data = {"temp": "feels warm", "temperature_f": 100.2, "Temperature": "38 C", "pulse": "irregular", "heart_rate_bpm": "n/a"}
+
+    assert normalize_identified_data(data) == {
+        "temp": "feels warm", "temperature_f": 100.2, "temperature": "38 C", "pulse": "irregular", "heart_rate_bpm": "n/a",
+    }
+
+
+def test_canonical_key():
+    assert canonical_key("  Heart Rate (BPM) ") == "heart_rate_bpm"
+    assert canonical_key("SpO2") == "spo2"
+
+
+@pytest.mark.asyncio
+async def test_filter_query_uses_typed_columns():
+    """
+    GIVEN bounds on two vitals
+    WHEN the user's checks are filtered
+    THEN the query compares the typed generated columns, not the JSON input
+    """
+    db = AsyncMock()
+    db.execute.return_value = MagicMock()
+    ranges = OCRVitalsFilter(min_wbc_count=11000, min_temperature_f=100.4, max_temperature_f=104).ranges()
+
+    await ocr_filter_symptom_checks(db, ranges=ranges, user_id="u1", limit=11)
+
+    sql = str(db.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "ocr_symptoms.temperature_f >= " in sql and "ocr_symptoms.temperature_f <= " in sql
+    assert "ocr_symptoms.wbc_count >= " in sql and "heart_rate_bpm" not in sql
+    assert "ocr_symptoms.input ->>" not in sql
+    assert "ocr_symptoms.user_id = " in sql and "ocr_symptoms.status = 'completed'" in sql
+
+
+@pytest.mark.asyncio
+async def test_filter_rejects_unknown_fields():
+    with pytest.raises(ValueError, match="unknown_vital"):
+        await ocr_filter_symptom_checks(AsyncMock(), ranges={"input": (1, None)})
@@ -0,0 +1,129 @@
+import datetime
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from app.db.partitions import (
+    add_months, create_partition_sql, expired_before, maintain_table, months, partition_month, partition_name,
+)
+
+TODAY = datetime.date(2025, 11, 14)
+
+
+def _conn(attached, detached=()):
+    """An AUTOCOMMIT connection whose catalog holds the given partitions."""
+    conn = AsyncMock()
+
+    async def execute(statement, params=None):
+        res = MagicMock()
+        sql = str(statement)
+        if "pg_inherits" in sql:
+            res.all.return_value = list(attached)
+        elif "relispartition" in sql:
+            res.all.return_value = [(name,) for name in detached]
+        return res
+
+    conn.execute.side_effect = execute
+    return conn
+
+
+def _run(conn):
+    return [str(call.args[0]) for call in conn.execute.await_args_list if call.args[0].text.split()[0] in ("CREATE", "ALTER", "DROP")]
+
+
+def test_month_arithmetic():
+    assert add_months(datetime.date(2025, 11, 1), 3) == datetime.date(2026, 2, 1)
+    assert add_months(datetime.date(2025, 1, 1), -1) == datetime.date(2024, 12, 1)
+    assert list(months(datetime.date(2025, 11, 14), datetime.date(2026, 1, 1))) == [
+        datetime.date(2025, 11, 1), datetime.date(2025, 12, 1), datetime.date(2026, 1, 1),
+    ]
+
+
+def test_partition_names_round_trip():
+    name = partition_name("ocr_symptoms", datetime.date(2025, 3, 1))
+
+    assert name == "ocr_symptoms_p2025_03"
+    assert partition_month("ocr_symptoms", name) == datetime.date(2025, 3, 1)
+    # symptoms_p... never matches ocr_symptoms and vice versa
+    assert partition_month("symptoms", name) is None
+    assert partition_month("symptoms", "symptoms_default") is None
+
+
+def test_partition_bounds_are_utc_month_edges():
+    sql = create_partition_sql("symptoms", datetime.date(2025, 12, 1))
+
+    assert sql == (
+        "CREATE TABLE IF NOT EXISTS symptoms_p2025_12 PARTITION OF symptoms "
+        "FOR VALUES FROM ('2025-12-01 00:00:00+00') TO ('2026-01-01 00:00:00+00')"
+    )
+
+
+def test_expired_before():
+    assert expired_before(TODAY, 0) is None
+    assert expired_before(TODAY, 6) == datetime.date(2025, 5, 1)
+
+
+@pytest.mark.asyncio
+async def test_maintain_creates_missing_months_ahead():
+    """
+    GIVEN partitions through the current month only
+    WHEN maintenance runs with 2 months of premake and no retention
+    THEN the next two months are created and nothing is detached
+    """
+    conn = _conn([("symptoms_p2024_01", False), ("symptoms_p2025_10", False), ("symptoms_p2025_11", False)])
+
+    statements = await maintain_table(conn, "symptoms", TODAY, premake_months=2)
+
+    assert statements == [
+        create_partition_sql("symptoms", datetime.date(2025, 12, 1)),
+        create_partition_sql("symptoms", datetime.date(2026, 1, 1)),
+    ]
+    assert _run(conn) == statements
+
+
+@pytest.mark.asyncio
+async def test_maintain_detaches_expired_months():
+    """
+    GIVEN partitions reaching back past a 6 month retention, one with an interrupted detach
+    WHEN maintenance runs without drop
+    THEN expired months are detached concurrently (or finalized) and kept, and retained ones untouched
+    """
+    conn = _conn([
+        ("symptoms_p2025_03", True), ("symptoms_p2025_04", False), ("symptoms_p2025_05", False),
+        ("symptoms_p2025_11", False), ("symptoms_p2025_12", False),
+    ])
+
+    statements = await maintain_table(conn, "symptoms", TODAY, premake_months=1, retention_months=6)
+
+    assert statements == [
+        "ALTER TABLE symptoms DETACH PARTITION symptoms_p2025_03 FINALIZE",
+        "ALTER TABLE symptoms DETACH PARTITION symptoms_p2025_04 CONCURRENTLY",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_maintain_drops_expired_and_previously_detached():
+    conn = _conn(
+        [("symptoms_p2025_04", False), ("symptoms_p2025_11", False), ("symptoms_p2025_12", False)],
+        detached=["symptoms_p2025_01", "symptoms_p2025_05"],
+    )
+
+    statements = await maintain_table(conn, "symptoms", TODAY, premake_months=1, retention_months=6, drop=True)
+
+    assert statements == [
+        "ALTER TABLE symptoms DETACH PARTITION symptoms_p2025_04 CONCURRENTLY",
+        "DROP TABLE symptoms_p2025_04",
+        "DROP TABLE symptoms_p2025_01",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_maintain_dry_run_changes_nothing():
+    conn = _conn([("symptoms_p2025_01", False)])
+
+    statements = await maintain_table(conn, "symptoms", TODAY, premake_months=0, retention_months=6, drop=True, dry_run=True)
+
+    assert statements == [
+        create_partition_sql("symptoms", datetime.date(2025, 11, 1)),
+        "ALTER TABLE symptoms DETACH PARTITION symptoms_p2025_01 CONCURRENTLY",
+        "DROP TABLE symptoms_p2025_01",
+    ]
+    assert _run(conn) == []
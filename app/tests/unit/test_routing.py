@@ -0,0 +1,55 @@
+import httpx
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.responses import ORJSONResponse
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+from app.api.routing import ORJSONRoute
+
+
+class Item(BaseModel):
+    name: str
+    severity: int
+
+
+def _client() -> httpx.AsyncClient:
+    router = APIRouter(route_class=ORJSONRoute)
+
+    @router.post("/items")
+    async def create(item: Item):
+        return {"name": item.name, "severity": item.severity, "note": "naïve"}
+
+    app = FastAPI(default_response_class=ORJSONResponse)
+    app.include_router(router)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+@pytest.mark.asyncio
+async def test_body_is_parsed_and_response_rendered_with_orjson():
+    async with _client() as client:
+        response = await client.post("/items", content=b'{"name": "cough", "severity": 4}', headers={"content-type": "application/json"})
+
+    assert response.status_code == 200
+    assert response.content == '{"name":"cough","severity":4,"note":"naïve"}'.encode()
+
+
+@pytest.mark.asyncio
+async def test_malformed_body_is_still_a_422():
+    """
+    GIVEN a request body that is not valid JSON
+    WHEN it is parsed by orjson
+    THEN FastAPI answers 422 json_invalid, as it does with the stdlib parser
+    """
+    async with _client() as client:
+        response = await client.post("/items", content=b'{"name": "cough",', headers={"content-type": "application/json"})
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["type"] == "json_invalid"
+
+
+def test_every_api_route_uses_the_orjson_route_class():
+    from app.main import app
+
+    routes = [route for route in app.routes if isinstance(route, APIRoute)]
+
+    assert routes and all(isinstance(route, ORJSONRoute) for route in routes)
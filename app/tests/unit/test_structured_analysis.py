@@ -0,0 +1,53 @@
+import json
+import pytest
+from app.utils.structured_analysis import DISCLAIMER, parse_structured_analysis, render_markdown
+
+VALID = {
+    "conditions": [
+        {"name": "Common cold", "rationale": "Cough and mild fever over a few days."},
+        {"name": "Influenza", "rationale": "Fever with marked fatigue."},
+    ],
+    "explanation": "The symptoms most likely point to a self-limiting viral infection.",
+    "next_steps": ["Rest and drink fluids.", "See a doctor if symptoms last over 10 days."],
+    "red_flags": ["shortness of breath", "fever above 103°F / 39.4°C"],
+    "clarifying_questions": [],
+}
+
+
+def test_parse_valid_structured_analysis():
+    analysis = parse_structured_analysis(json.dumps(VALID))
+
+    assert [c.name for c in analysis.conditions] == ["Common cold", "Influenza"]
+    assert analysis.red_flags[0] == "shortness of breath"
+
+
+@pytest.mark.parametrize("content", [
+    None,
+    "",
+    "# Potential Conditions\nnot json",
+    json.dumps({"conditions": [], "next_steps": []}),                       # missing explanation
+    json.dumps({**VALID, "conditions": [{"name": "x", "rationale": "y"}] * 4}),  # too many conditions
+    json.dumps({**VALID, "conditions": [], "clarifying_questions": []}),     # says nothing
+])
+def test_parse_rejects_invalid_content(content):
+    with pytest.raises(ValueError):
+        parse_structured_analysis(content)
+
+
+def test_render_markdown_has_four_sections_and_fixed_disclaimer():
+    markdown = render_markdown(parse_structured_analysis(json.dumps(VALID)))
+
+    headings = [line for line in markdown.splitlines() if line.startswith("# ")]
+    assert headings == ["# Potential Conditions", "# Explanation", "# Recommended Next Steps", "# Disclaimer"]
+    assert "1. **Common cold**: Cough and mild fever over a few days." in markdown
+    assert "- Seek medical care immediately if: shortness of breath" in markdown
+    assert markdown.endswith(DISCLAIMER)
+
+
+def test_render_markdown_with_clarifying_questions_only():
+    vague = {**VALID, "conditions": [], "clarifying_questions": ["How long have you had the cough?"]}
+
+    markdown = render_markdown(parse_structured_analysis(json.dumps(vague)))
+
+    assert "- How long have you had the cough?" in markdown
+    assert markdown.endswith(DISCLAIMER)
@@ -1,7 +1,11 @@
 import pytest
+import uuid
 from unittest.mock import AsyncMock, MagicMock
+from sqlalchemy.dialects import postgresql
 from app.services.symptoms_check_service import process_symptom_check
+from app.services.ocr_symptoms_check_service import process_symptom_check as process_ocr_symptom_check
 from app.models.symptoms import StatusEnum 
+from app.utils.openai_call import OpenAIRateLimitError
 
 pytestmark = pytest.mark.asyncio
 
@@ -20,11 +24,11 @@ def mock_dependencies(mocker):
 
     mock_symptom_check = MagicMock()
     mock_symptom_check.id = "1"
-    mock_symptom_check.analysis = None 
-    mock_symptom_check.status = StatusEnum.not_completed
+    mock_symptom_check.analysis = "analysis"
+    mock_symptom_check.status = StatusEnum.completed
     
-    mock_submit_symptom_check = mocker.patch(
-        "app.services.symptoms_check_service.submit_symptom_check",
+    mock_insert_symptom_check = mocker.patch(
+        "app.services.symptoms_check_service.insert_symptom_check",
         new_callable=AsyncMock,
         return_value=mock_symptom_check
     )
@@ -33,6 +37,13 @@ def mock_dependencies(mocker):
         'app.services.symptoms_check_service.decrypt_api_key', 
         return_value='decrypted_raw_api_key'
     )
+
+    mock_open_ai_analysis = mocker.patch(
+        "app.services.symptoms_check_service.open_ai_analysis",
+        new_callable=AsyncMock,
+        return_value="analysis"
+    )
+    mocker.patch("app.services.symptoms_check_service.symptom_history_cache.invalidate", new_callable=AsyncMock)
     
     mock_db = AsyncMock()
     
@@ -46,8 +57,9 @@ def mock_dependencies(mocker):
     return {
         "db": mock_db,
         "get_user_by_id": mock_get_user_by_id,
-        "submit_symptom_check": mock_submit_symptom_check,
+        "insert_symptom_check": mock_insert_symptom_check,
         "decrypt_api_key": mock_decrypt,
+        "open_ai_analysis": mock_open_ai_analysis,
         "user_data": mock_user,
         "symptom_data": mock_symptom_check
     }
@@ -74,10 +86,11 @@ async def test_process_symptom_check_success(mock_dependencies):
     # Assert that our mocked functions were called correctly
     mock_dependencies["get_user_by_id"].assert_awaited_once_with(mock_dependencies["db"], "1")
     mock_dependencies["decrypt_api_key"].assert_called_once_with("encrypted_api_key")
-    mock_dependencies["submit_symptom_check"].assert_awaited_once()
+    mock_dependencies["open_ai_analysis"].assert_awaited_once()
+    assert mock_dependencies["insert_symptom_check"].await_args.kwargs["analysis"] == "analysis"
     
-    # Assert that the transaction was committed
-    mock_dependencies["db"].commit.assert_awaited_once()
+    # Assert that the read transaction was ended before the OpenAI call and the check committed
+    assert mock_dependencies["db"].commit.await_count == 2
 
 
 async def test_process_symptom_check_invalid_user(mock_dependencies):
@@ -92,7 +105,8 @@ async def test_process_symptom_check_invalid_user(mock_dependencies):
 
     # Assert that the process stopped early
     mock_dependencies["decrypt_api_key"].assert_not_called()
-    mock_dependencies["submit_symptom_check"].assert_not_awaited()
+    mock_dependencies["open_ai_analysis"].assert_not_awaited()
+    mock_dependencies["insert_symptom_check"].assert_not_awaited()
     mock_dependencies["db"].commit.assert_not_awaited()
 
 
@@ -106,5 +120,85 @@ async def test_process_symptom_check_invalid_api_key(mock_dependencies):
     # Assert that the process stopped after checking the key
     mock_dependencies["get_user_by_id"].assert_awaited_once()
     mock_dependencies["decrypt_api_key"].assert_called_once()
-    mock_dependencies["submit_symptom_check"].assert_not_awaited()
-    mock_dependencies["db"].commit.assert_not_awaited()
\ No newline at end of file
+    mock_dependencies["insert_symptom_check"].assert_not_awaited()
+    mock_dependencies["db"].commit.assert_not_awaited()
+
+def _session_for(mocker, user):
+    """A mocked session whose first query finds `user` and whose second returns the written check."""
+    lookup, written = MagicMock(), MagicMock()
+    lookup.scalars.return_value.first.return_value = user
+    written.scalar_one.return_value = MagicMock(status=StatusEnum.completed)
+    db = AsyncMock()
+    db.add = MagicMock()
+    db.execute.side_effect = [lookup, written]
+    mocker.patch("app.services.symptoms_check_service.symptom_history_cache.invalidate", new_callable=AsyncMock)
+    mocker.patch("app.services.ocr_symptoms_check_service.ocr_symptom_history_cache.invalidate", new_callable=AsyncMock)
+    return db
+
+
+def _statement(db, i: int) -> str:
+    return str(db.execute.await_args_list[i].args[0].compile(dialect=postgresql.dialect()))
+
+
+async def test_completed_check_is_written_in_one_statement(mocker):
+    """
+    GIVEN a valid user and a successful analysis
+    WHEN a symptom check is processed
+    THEN after the user lookup the check is written by a single INSERT ... RETURNING: no flush,
+         no follow-up SELECT or UPDATE, no refresh; one commit ends the lookup, one the write
+    """
+    user = MagicMock(id=uuid.uuid4(), api_key_enc="enc")
+    mocker.patch("app.services.symptoms_check_service.decrypt_api_key", return_value="key")
+    mocker.patch("app.services.symptoms_check_service.open_ai_analysis", new_callable=AsyncMock, return_value="analysis")
+    db = _session_for(mocker, user)
+
+    result = await process_symptom_check(db, user_id=str(user.id), api_key="key", age=30, sex="male",
+                                         symptoms="cough", duration="2 days", severity=3)
+
+    assert result.status == StatusEnum.completed
+    assert db.execute.await_count == 2
+    sql = _statement(db, 1)
+    assert sql.startswith("INSERT INTO symptoms") and "RETURNING" in sql and "ON CONFLICT" not in sql
+    assert db.commit.await_count == 2
+    db.add.assert_not_called()
+    db.flush.assert_not_awaited()
+    db.refresh.assert_not_awaited()
+
+
+async def test_failed_check_is_recorded_with_one_upsert(mocker):
+    """
+    GIVEN the OpenAI call fails
+    WHEN a symptom check is processed
+    THEN the check is recorded as not completed by a single upsert on (id, submitted_at), committed, and the error re-raised
+    """
+    user = MagicMock(id=uuid.uuid4(), api_key_enc="enc")
+    mocker.patch("app.services.symptoms_check_service.decrypt_api_key", return_value="key")
+    mocker.patch("app.services.symptoms_check_service.open_ai_analysis", new_callable=AsyncMock, side_effect=OpenAIRateLimitError("busy"))
+    db = _session_for(mocker, user)
+
+    with pytest.raises(OpenAIRateLimitError):
+        await process_symptom_check(db, user_id=str(user.id), api_key="key", age=30, sex="male",
+                                    symptoms="cough", duration="2 days", severity=3)
+
+    assert db.execute.await_count == 2
+    sql = _statement(db, 1)
+    assert sql.startswith("INSERT INTO symptoms") and "ON CONFLICT (id, submitted_at) DO UPDATE" in sql and "RETURNING" in sql
+    assert db.execute.await_args_list[1].args[0].compile().params["status"] == StatusEnum.not_completed
+    assert db.commit.await_count == 2
+    db.refresh.assert_not_awaited()
+
+
+async def test_completed_ocr_check_is_written_in_one_statement(mocker):
+    user = MagicMock(id=uuid.uuid4(), api_key_enc="enc")
+    mocker.patch("app.services.ocr_symptoms_check_service.decrypt_api_key", return_value="key")
+    analysis = mocker.patch("app.services.ocr_symptoms_check_service.ocr_open_ai_analysis", new_callable=AsyncMock, return_value="analysis")
+    db = _session_for(mocker, user)
+
+    await process_ocr_symptom_check(db, user_id=str(user.id), api_key="key", identified_data={"age": 30, "Temp": "38.5 C"})
+
+    # The analysis sees, and the row stores, the normalized input
+    assert analysis.await_args.args[0] == {"age": 30, "temperature_f": 101.3}
+    assert db.execute.await_count == 2
+    assert _statement(db, 1).startswith("INSERT INTO ocr_symptoms")
+    assert db.commit.await_count == 2
+    db.refresh.assert_not_awaited()
@@ -1,8 +1,12 @@
 import pytest
 from unittest.mock import AsyncMock, MagicMock
-from app.services.symptoms_history_services import get_symptom_history
+from app.services.symptoms_history_services import get_symptom_history, get_symptom_history_changes
 from app.models.symptoms import StatusEnum
 import datetime
+import uuid
+from sqlalchemy.dialects import postgresql
+from app.crud.symptom import get_symptom_changes_by_user_id, get_symptom_checkby_user_id
+from app.utils.pagination import SYNC_FROM_START, decode_cursor, decode_watermark, encode_cursor
 
 pytestmark = pytest.mark.asyncio
 
@@ -78,31 +82,33 @@ def mock_dependencies_factory(mocker):
 async def test_get_symptom_history_success(mock_dependencies_factory):
     mocks = mock_dependencies_factory(user_id_to_mock="1", has_history=True)
 
-    result = await get_symptom_history(
+    result, next_cursor = await get_symptom_history(
         db=mocks["db"],
         user_id="1",
         api_key="decrypted_raw_api_key"
     )
 
     assert len(result) == 2
+    assert next_cursor is None
     mocks["get_user_by_id"].assert_awaited_once_with(mocks["db"], "1")
     mocks["decrypt_api_key"].assert_called_once_with("encrypted_api_key")
-    mocks["get_symptom_by_id"].assert_awaited_once_with(mocks["db"], user_id="1", limit=10, offset=0)
+    mocks["get_symptom_by_id"].assert_awaited_once_with(mocks["db"], user_id="1", limit=11, cursor=None)
 
 
 async def test_get_symptom_history_no_history(mock_dependencies_factory):
     mocks = mock_dependencies_factory(user_id_to_mock="2", has_history=False)
     
-    result = await get_symptom_history(
+    result, next_cursor = await get_symptom_history(
         db=mocks["db"],
         user_id="2",
         api_key="decrypted_raw_api_key"
     )
 
     assert len(result) == 0
+    assert next_cursor is None
     mocks["get_user_by_id"].assert_awaited_once_with(mocks["db"], "2")
     mocks["decrypt_api_key"].assert_called_once_with("encrypted_api_key")
-    mocks["get_symptom_by_id"].assert_awaited_once_with(mocks["db"], user_id="2", limit=10, offset=0)
+    mocks["get_symptom_by_id"].assert_awaited_once_with(mocks["db"], user_id="2", limit=11, cursor=None)
 
 
 async def test_get_symptom_history_invalid_user(mock_dependencies_factory):
@@ -133,4 +139,124 @@ async def test_get_symptom_history_invalid_api_key(mock_dependencies_factory):
 
     mocks["get_user_by_id"].assert_awaited_once_with(mocks["db"], "1")
     mocks["decrypt_api_key"].assert_called_once_with("encrypted_api_key")
-    mocks["get_symptom_by_id"].assert_not_awaited()
\ No newline at end of file
+    mocks["get_symptom_by_id"].assert_not_awaited()
+
+
+async def test_get_symptom_history_returns_next_cursor_when_more_rows(mock_dependencies_factory):
+    """
+    GIVEN the query returns one row more than the page size
+    WHEN a page is requested
+    THEN the extra row is dropped and next_cursor points after the last returned row
+    """
+    mocks = mock_dependencies_factory(user_id_to_mock="1", has_history=True)
+    rows = mocks["get_symptom_by_id"].return_value
+    for i, row in enumerate(rows):
+        row.submitted_at = datetime.datetime(2023, 10, 2 - i, 12, tzinfo=datetime.timezone.utc)
+        row.id = uuid.UUID(int=i + 1)
+
+    result, next_cursor = await get_symptom_history(
+        db=mocks["db"],
+        user_id="1",
+        api_key="decrypted_raw_api_key",
+        limit=1
+    )
+
+    assert result == rows[:1]
+    assert decode_cursor(next_cursor) == (rows[0].submitted_at, rows[0].id)
+    mocks["get_symptom_by_id"].assert_awaited_once_with(mocks["db"], user_id="1", limit=2, cursor=None)
+
+
+async def test_get_symptom_history_passes_decoded_cursor(mock_dependencies_factory):
+    mocks = mock_dependencies_factory(user_id_to_mock="1", has_history=False)
+    after = (datetime.datetime(2023, 10, 1, 12, tzinfo=datetime.timezone.utc), uuid.uuid4())
+
+    await get_symptom_history(
+        db=mocks["db"],
+        user_id="1",
+        api_key="decrypted_raw_api_key",
+        cursor=encode_cursor(*after)
+    )
+
+    mocks["get_symptom_by_id"].assert_awaited_once_with(mocks["db"], user_id="1", limit=11, cursor=after)
+
+
+async def test_get_symptom_history_invalid_cursor(mock_dependencies_factory):
+    mocks = mock_dependencies_factory(user_id_to_mock="1")
+
+    with pytest.raises(ValueError, match="invalid_cursor"):
+        await get_symptom_history(
+            db=mocks["db"],
+            user_id="1",
+            api_key="decrypted_raw_api_key",
+            cursor="not-a-cursor"
+        )
+
+    mocks["get_symptom_by_id"].assert_not_awaited()
+
+
+async def test_history_query_uses_keyset_predicate():
+    db = AsyncMock()
+    db.execute.return_value = MagicMock()
+    after = (datetime.datetime(2023, 10, 1, 12, tzinfo=datetime.timezone.utc), uuid.uuid4())
+
+    await get_symptom_checkby_user_id(db, user_id=str(uuid.uuid4()), limit=11, cursor=after)
+
+    sql = str(db.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "(symptoms.submitted_at, symptoms.id) < (" in sql
+    assert "ORDER BY symptoms.submitted_at DESC, symptoms.id DESC" in sql
+    assert "OFFSET" not in sql
+    # A literal, so generic plans can still match the partial index's predicate
+    assert "symptoms.status = 'completed'" in sql
+
+
+async def test_history_changes_start_before_everything_and_return_new_watermark(mocker):
+    """
+    GIVEN a client syncing for the first time (since=0)
+    WHEN changed checks exist
+    THEN the query starts before every row and the watermark points past the last change
+    """
+    mocker.patch("app.services.symptoms_history_services.get_user_by_id", new_callable=AsyncMock, return_value=MagicMock(id="1"))
+    mocker.patch("app.services.symptoms_history_services.decrypt_api_key", return_value="raw")
+    changed = [
+        MagicMock(id=uuid.uuid4(), updated_at=datetime.datetime(2025, 10, 1, 12, i, tzinfo=datetime.timezone.utc))
+        for i in range(2)
+    ]
+    fetch = mocker.patch("app.services.symptoms_history_services.get_symptom_changes_by_user_id", new_callable=AsyncMock, return_value=changed)
+    db = AsyncMock()
+
+    rows, watermark = await get_symptom_history_changes(db, user_id="1", api_key="raw", since=SYNC_FROM_START, limit=10)
+
+    since = fetch.await_args.kwargs["since"]
+    assert since == decode_watermark(SYNC_FROM_START) and since[0].year == 1
+    assert rows == changed
+    assert decode_watermark(watermark) == (changed[1].updated_at, changed[1].id)
+
+
+async def test_history_changes_keep_watermark_when_nothing_changed(mocker):
+    mocker.patch("app.services.symptoms_history_services.get_user_by_id", new_callable=AsyncMock, return_value=MagicMock(id="1"))
+    mocker.patch("app.services.symptoms_history_services.decrypt_api_key", return_value="raw")
+    mocker.patch("app.services.symptoms_history_services.get_symptom_changes_by_user_id", new_callable=AsyncMock, return_value=[])
+    since = encode_cursor(datetime.datetime(2025, 10, 1, tzinfo=datetime.timezone.utc), uuid.uuid4())
+
+    rows, watermark = await get_symptom_history_changes(AsyncMock(), user_id="1", api_key="raw", since=since)
+
+    assert (rows, watermark) == ([], since)
+
+
+async def test_history_changes_invalid_watermark():
+    with pytest.raises(ValueError, match="invalid_watermark"):
+        await get_symptom_history_changes(AsyncMock(), user_id="1", api_key="raw", since="not-a-watermark")
+
+
+async def test_history_changes_query_reads_settled_changes_oldest_first():
+    db = AsyncMock()
+    db.execute.return_value = MagicMock()
+    since = (datetime.datetime(2023, 10, 1, 12, tzinfo=datetime.timezone.utc), uuid.uuid4())
+
+    await get_symptom_changes_by_user_id(db, user_id=str(uuid.uuid4()), since=since, limit=11)
+
+    sql = str(db.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "(symptoms.updated_at, symptoms.id) > (" in sql
+    assert "symptoms.updated_at <= clock_timestamp() - " in sql
+    assert "ORDER BY symptoms.updated_at, symptoms.id" in sql
+    assert "symptoms.status = 'completed'" in sql
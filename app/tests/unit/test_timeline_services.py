@@ -0,0 +1,228 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from sqlalchemy.dialects import postgresql
+from app.crud.timeline import get_timeline_by_user_id, search_timeline_by_user_id, stream_timeline_by_user_id
+from app.models.symptoms import SexEnum, StatusEnum
+from app.services.timeline_service import get_timeline, search_timeline, stream_timeline_export
+from app.utils.pagination import decode_search_cursor, encode_cursor
+import datetime
+import gzip
+import json
+import tracemalloc
+import uuid
+
+pytestmark = pytest.mark.asyncio
+
+
+def _compiled_sql(db) -> str:
+    statement = db.execute.await_args.args[0]
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+async def test_timeline_is_one_union_all_with_limited_branches():
+    """
+    GIVEN a user with text and OCR checks
+    WHEN the first timeline page is fetched
+    THEN both tables are read in one UNION ALL statement, each branch ordered and limited on its own
+    """
+    db = AsyncMock()
+    db.execute.return_value = MagicMock()
+
+    await get_timeline_by_user_id(db, user_id=str(uuid.uuid4()), limit=11)
+
+    db.execute.assert_awaited_once()
+    sql = _compiled_sql(db)
+    assert sql.count("UNION ALL") == 1
+    assert "ORDER BY symptoms.submitted_at DESC, symptoms.id DESC" in sql
+    assert "ORDER BY ocr_symptoms.submitted_at DESC, ocr_symptoms.id DESC" in sql
+    assert "ORDER BY timeline.submitted_at DESC, timeline.id DESC" in sql
+    assert "symptoms.status = 'completed'" in sql and "ocr_symptoms.status = 'completed'" in sql
+    assert db.execute.await_args.args[1]["limit"] == 11
+
+
+async def test_timeline_cursor_applies_to_both_branches():
+    db = AsyncMock()
+    db.execute.return_value = MagicMock()
+    after = (datetime.datetime(2023, 10, 1, 12, tzinfo=datetime.timezone.utc), uuid.uuid4())
+
+    await get_timeline_by_user_id(db, user_id=str(uuid.uuid4()), limit=11, cursor=after)
+
+    sql = _compiled_sql(db)
+    assert "(symptoms.submitted_at, symptoms.id) < (" in sql
+    assert "(ocr_symptoms.submitted_at, ocr_symptoms.id) < (" in sql
+    params = db.execute.await_args.args[1]
+    assert (params["after_at"], params["after_id"]) == after
+
+
+async def test_get_timeline_pages_with_one_extra_row(mocker):
+    mock_user = MagicMock(id="1", api_key_enc="encrypted_api_key")
+    mocker.patch("app.services.timeline_service.get_user_by_id", new_callable=AsyncMock, return_value=mock_user)
+    mocker.patch("app.services.timeline_service.decrypt_api_key", return_value="raw")
+    rows = [
+        MagicMock(id=uuid.uuid4(), submitted_at=datetime.datetime(2023, 10, 3 - i, tzinfo=datetime.timezone.utc))
+        for i in range(3)
+    ]
+    fetch = mocker.patch("app.services.timeline_service.get_timeline_by_user_id", new_callable=AsyncMock, return_value=rows)
+    db = AsyncMock()
+
+    page, next_cursor = await get_timeline(db, user_id="1", api_key="raw", limit=2)
+
+    fetch.assert_awaited_once_with(db, user_id="1", limit=3, cursor=None)
+    assert page == rows[:2]
+    assert next_cursor == encode_cursor(rows[1].submitted_at, rows[1].id)
+
+
+async def test_get_timeline_invalid_api_key(mocker):
+    mocker.patch("app.services.timeline_service.get_user_by_id", new_callable=AsyncMock, return_value=MagicMock())
+    mocker.patch("app.services.timeline_service.decrypt_api_key", return_value="raw")
+    fetch = mocker.patch("app.services.timeline_service.get_timeline_by_user_id", new_callable=AsyncMock)
+
+    with pytest.raises(ValueError, match="invalid_api_key"):
+        await get_timeline(AsyncMock(), user_id="1", api_key="wrong")
+
+    fetch.assert_not_awaited()
+
+
+async def test_search_matches_and_ranks_in_both_tables():
+    """
+    GIVEN a free-text query
+    WHEN the user's checks are searched
+    THEN both tables are matched against their search_vector with one websearch_to_tsquery, best rank first
+    """
+    db = AsyncMock()
+    db.execute.return_value = MagicMock()
+
+    await search_timeline_by_user_id(db, user_id=str(uuid.uuid4()), query="chest pain -cough", limit=11)
+
+    sql = _compiled_sql(db)
+    assert sql.count("UNION ALL") == 1
+    assert "symptoms.search_vector @@ websearch_to_tsquery('english'::regconfig" in sql
+    assert "ocr_symptoms.search_vector @@ websearch_to_tsquery('english'::regconfig" in sql
+    assert "ORDER BY matches.rank DESC, matches.submitted_at DESC, matches.id DESC" in sql
+    assert "symptoms.status = 'completed'" in sql and "ocr_symptoms.status = 'completed'" in sql
+    params = db.execute.await_args.args[1]
+    assert (params["q"], params["limit"]) == ("chest pain -cough", 11)
+
+
+async def test_search_cursor_resumes_after_rank_and_position():
+    db = AsyncMock()
+    db.execute.return_value = MagicMock()
+    after = (0.25, datetime.datetime(2023, 10, 1, 12, tzinfo=datetime.timezone.utc), uuid.uuid4())
+
+    await search_timeline_by_user_id(db, user_id=str(uuid.uuid4()), query="fever", cursor=after)
+
+    sql = _compiled_sql(db)
+    assert "(ts_rank_cd(symptoms.search_vector, websearch_to_tsquery('english'::regconfig" in sql
+    assert ", symptoms.submitted_at, symptoms.id) < (" in sql
+    assert ", ocr_symptoms.submitted_at, ocr_symptoms.id) < (" in sql
+    params = db.execute.await_args.args[1]
+    assert (params["after_rank"], params["after_at"], params["after_id"]) == after
+
+
+async def test_search_pages_with_a_rank_cursor(mocker):
+    mocker.patch("app.services.timeline_service.get_user_by_id", new_callable=AsyncMock, return_value=MagicMock(id="1", api_key_enc="enc"))
+    mocker.patch("app.services.timeline_service.decrypt_api_key", return_value="raw")
+    rows = [
+        MagicMock(id=uuid.uuid4(), submitted_at=datetime.datetime(2023, 10, 1, tzinfo=datetime.timezone.utc), rank=rank)
+        for rank in (0.5, 0.30000001192092896, 0.1)
+    ]
+    fetch = mocker.patch("app.services.timeline_service.search_timeline_by_user_id", new_callable=AsyncMock, return_value=rows)
+    db = AsyncMock()
+
+    page, next_cursor = await search_timeline(db, user_id="1", api_key="raw", query="fever", limit=2)
+
+    fetch.assert_awaited_once_with(db, user_id="1", query="fever", limit=3, cursor=None)
+    assert page == rows[:2]
+    # float4 ranks survive the cursor round trip exactly, so the keyset comparison neither skips nor repeats a row
+    assert decode_search_cursor(next_cursor) == (rows[1].rank, rows[1].submitted_at, rows[1].id)
+
+
+async def test_search_rejects_a_timeline_cursor(mocker):
+    fetch = mocker.patch("app.services.timeline_service.search_timeline_by_user_id", new_callable=AsyncMock)
+    cursor = encode_cursor(datetime.datetime(2023, 10, 1, tzinfo=datetime.timezone.utc), uuid.uuid4())
+
+    with pytest.raises(ValueError, match="invalid_cursor"):
+        await search_timeline(AsyncMock(), user_id="1", api_key="raw", query="fever", cursor=cursor)
+
+    fetch.assert_not_awaited()
+
+
+async def test_export_rows_are_read_through_a_server_side_cursor(mocker):
+    """
+    GIVEN a user's timeline export
+    WHEN its rows are read
+    THEN the statement is streamed with yield_per, and rows are handed on one partition at a time
+    """
+    mocker.patch("app.crud.timeline.load_dictionaries", new_callable=AsyncMock)
+    partitions = [["row1", "row2"], ["row3"]]
+
+    async def partitions_of():
+        for partition in partitions:
+            yield partition
+
+    result = MagicMock(partitions=MagicMock(return_value=partitions_of()))
+    db = AsyncMock()
+    db.stream.return_value = result
+
+    batches = [rows async for rows in stream_timeline_by_user_id(db, "u1", batch_size=250)]
+
+    assert batches == partitions
+    db.stream.assert_awaited_once()
+    assert db.stream.await_args.kwargs["execution_options"] == {"yield_per": 250}
+    db.execute.assert_not_awaited()
+
+
+def _fake_stream(total_rows: int):
+    """Stands in for the server-side cursor: yields `total_rows` rows in batches, building each batch on demand."""
+    now = datetime.datetime(2025, 10, 1, tzinfo=datetime.timezone.utc)
+    row_id, user_id = uuid.uuid4(), uuid.uuid4()
+
+    async def stream(db, user_id: str, batch_size: int):
+        for start in range(0, total_rows, batch_size):
+            yield [
+                ("symptom", row_id, user_id, now - datetime.timedelta(seconds=i), 30, SexEnum.female, "cough",
+                 "2 days", 4, None, None, "analysis " * 100, StatusEnum.completed, None)
+                for i in range(start, min(start + batch_size, total_rows))
+            ]
+
+    return stream
+
+
+async def _export_peak(mocker, total_rows: int):
+    mocker.patch("app.services.timeline_service.AsyncSessionLocal", return_value=AsyncMock())
+    mocker.patch("app.services.timeline_service.stream_timeline_by_user_id", _fake_stream(total_rows))
+
+    lines = 0
+    tracemalloc.start()
+    try:
+        async for chunk in stream_timeline_export("u1"):
+            lines += chunk.count(b"\n")
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return lines, peak
+
+
+async def test_export_memory_stays_flat_over_100k_rows(mocker):
+    """
+    GIVEN histories of 10k and 100k rows, each about 1 KB as NDJSON, fed in batches as the cursor yields them
+    WHEN both are streamed through the export
+    THEN every row is written, and the export's peak memory is about the same for both, far below the 100 MB export
+    """
+    small_lines, small_peak = await _export_peak(mocker, 10_000)
+    large_lines, large_peak = await _export_peak(mocker, 100_000)
+
+    assert (small_lines, large_lines) == (10_000, 100_000)
+    assert large_peak < small_peak * 1.5
+    assert large_peak < 5 * 1024 * 1024
+
+
+async def test_export_gzip_is_one_valid_stream(mocker):
+    mocker.patch("app.services.timeline_service.AsyncSessionLocal", return_value=AsyncMock())
+    mocker.patch("app.services.timeline_service.stream_timeline_by_user_id", _fake_stream(1_200))
+
+    body = b"".join([chunk async for chunk in stream_timeline_export("u1", compress=True, batch_size=500)])
+
+    lines = gzip.decompress(body).splitlines()
+    assert len(lines) == 1_200
+    assert json.loads(lines[0])["type"] == "symptom"
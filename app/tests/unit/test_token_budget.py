@@ -0,0 +1,84 @@
+import pytest
+from app.utils.token_budget import TRUNCATION_MARKER, count_payload_tokens, count_tokens, field_tier, fit_to_budget
+
+
+def _chart(notes_words: int = 2000):
+    return {
+        "age": 34,
+        "sex": "female",
+        "chief_complaint": "Persistent cough and fatigue",
+        "onset_duration": "Approximately 5 days",
+        "heart_rate_bpm": 82,
+        "temperature_f": "99.1",
+        "wbc_count": 11500,
+        "physician_notes": "Lungs clear on auscultation. " * (notes_words // 4),
+        "clinic_address": "221B Baker Street, London",
+    }
+
+
+def test_count_tokens_is_roughly_proportional_to_text():
+    assert count_tokens("") == 0
+    assert count_tokens("cough") == 2
+    assert count_tokens("a b c") == 3
+    assert count_tokens("word " * 100) > count_tokens("word " * 10)
+
+
+@pytest.mark.parametrize("key,tier", [
+    ("age", 0), ("sex", 0),
+    ("chief_complaint", 1), ("onset_duration", 1),
+    ("temperature_f", 2), ("wbc_count", 2),
+    ("current_medications", 3),
+    ("physician_notes", 4),
+    ("some_unknown_field", 5),
+    ("clinic_address", 6), ("patient_name", 6),
+])
+def test_field_tier(key, tier):
+    assert field_tier(key) == tier
+
+
+def test_payload_within_budget_is_untouched():
+    payload = _chart(notes_words=10)
+
+    trimmed, report = fit_to_budget(payload, max_tokens=10_000)
+
+    assert trimmed is payload
+    assert report is None
+
+
+def test_low_value_fields_are_trimmed_first():
+    """
+    GIVEN an OCR chart with very long physician notes
+    WHEN it is fitted to a small budget
+    THEN the notes are truncated or dropped while clinical fields are kept
+    """
+    payload = _chart()
+
+    trimmed, report = fit_to_budget(payload, max_tokens=150)
+
+    assert count_payload_tokens(trimmed) <= 150
+    assert report["final_tokens"] <= 150
+    assert report["original_tokens"] > 150
+    for key in ("age", "sex", "chief_complaint", "onset_duration", "heart_rate_bpm", "temperature_f", "wbc_count"):
+        assert trimmed[key] == payload[key]
+    assert "clinic_address" in report["elided"]
+    assert "physician_notes" in report["truncated"] or "physician_notes" in report["elided"]
+    if "physician_notes" in trimmed:
+        assert trimmed["physician_notes"].endswith(TRUNCATION_MARKER)
+
+
+def test_clinical_text_is_truncated_but_never_dropped():
+    payload = {"age": 40, "sex": "male", "symptoms": "headache " * 500, "additional_notes": "note " * 500}
+
+    trimmed, report = fit_to_budget(payload, max_tokens=80)
+
+    assert "additional_notes" in report["elided"]
+    assert trimmed["symptoms"].endswith(TRUNCATION_MARKER)
+    assert trimmed["age"] == 40 and trimmed["sex"] == "male"
+
+
+def test_protected_keys_are_kept():
+    payload = _chart()
+
+    trimmed, _ = fit_to_budget(payload, max_tokens=60, protected=["clinic_address"])
+
+    assert trimmed["clinic_address"] == payload["clinic_address"]
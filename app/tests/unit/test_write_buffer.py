@@ -0,0 +1,105 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from app.db.write_buffer import WriteBuffer
+from app.models.symptoms import Symptom
+
+pytestmark = pytest.mark.asyncio
+
+
+def _session(*execute_results):
+    """A mocked AsyncSession; each execute() returns or raises the next of `execute_results`."""
+    session = AsyncMock()
+    session.__aenter__.return_value = session
+    session.__aexit__.return_value = False
+    nested = AsyncMock()
+    nested.__aexit__.return_value = False
+    session.begin_nested = MagicMock(return_value=nested)
+    session.execute.side_effect = list(execute_results)
+    return session
+
+
+def _stored(*rows):
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = list(rows)
+    result.scalar_one.return_value = rows[0] if rows else None
+    return result
+
+
+def _values(n: int) -> dict:
+    return {"id": n, "analysis": f"analysis {n}", "status": "completed"}
+
+
+async def test_concurrent_checks_share_one_insert_and_commit():
+    """
+    GIVEN three checks submitted within one window
+    WHEN the window closes
+    THEN they are written by one multi-row INSERT ... RETURNING and one commit, and each caller gets its own row
+    """
+    session = _session(_stored("row0", "row1", "row2"))
+    buffer = WriteBuffer(Symptom, session_factory=MagicMock(return_value=session), window_ms=5)
+
+    results = await asyncio.gather(*(buffer.submit(_values(i)) for i in range(3)))
+
+    assert results == ["row0", "row1", "row2"]
+    session.execute.assert_awaited_once()
+    statement, rows = session.execute.await_args.args
+    assert [row["id"] for row in rows] == [0, 1, 2]
+    assert rows[1]["analysis_plain"] == "analysis 1" and "analysis" not in rows[1]
+    assert statement._sort_by_parameter_order
+    session.commit.assert_awaited_once()
+    assert (buffer.batches, buffer.rows) == (1, 3)
+
+
+async def test_full_buffer_is_written_without_waiting_for_the_window():
+    session = _session(_stored("row0", "row1"))
+    buffer = WriteBuffer(Symptom, session_factory=MagicMock(return_value=session), window_ms=60_000, max_size=2)
+
+    results = await asyncio.wait_for(asyncio.gather(buffer.submit(_values(0)), buffer.submit(_values(1))), timeout=1)
+
+    assert results == ["row0", "row1"]
+
+
+async def test_failed_batch_maps_errors_to_their_rows():
+    """
+    GIVEN a batch whose multi-row INSERT fails on one row's foreign key
+    WHEN the buffer writes it
+    THEN the rows are retried one by one under savepoints: the bad row's caller gets the
+         IntegrityError and the others get their rows, committed
+    """
+    violation = IntegrityError("INSERT INTO symptoms ...", {}, Exception("violates foreign key constraint"))
+    batch_session = _session(violation)
+    retry_session = _session(_stored("row0"), violation, _stored("row2"))
+    buffer = WriteBuffer(Symptom, session_factory=MagicMock(side_effect=[batch_session, retry_session]), window_ms=5)
+
+    results = await asyncio.gather(*(buffer.submit(_values(i)) for i in range(3)), return_exceptions=True)
+
+    assert results[0] == "row0" and results[2] == "row2"
+    assert results[1] is violation
+    assert retry_session.begin_nested.call_count == 3
+    retry_session.commit.assert_awaited_once()
+
+
+async def test_lost_connection_fails_the_whole_batch():
+    lost = DBAPIError("INSERT INTO symptoms ...", {}, Exception("connection was closed"), connection_invalidated=True)
+    factory = MagicMock(return_value=_session(lost))
+    buffer = WriteBuffer(Symptom, session_factory=factory, window_ms=5)
+
+    results = await asyncio.gather(*(buffer.submit(_values(i)) for i in range(3)), return_exceptions=True)
+
+    assert results == [lost, lost, lost]
+    factory.assert_called_once()
+
+
+async def test_cancelled_caller_still_has_its_check_written():
+    session = _session(_stored("row0"))
+    buffer = WriteBuffer(Symptom, session_factory=MagicMock(return_value=session), window_ms=20)
+
+    caller = asyncio.create_task(buffer.submit(_values(0)))
+    await asyncio.sleep(0)
+    caller.cancel()
+    await buffer.drain()
+
+    session.execute.assert_awaited_once()
+    session.commit.assert_awaited_once()
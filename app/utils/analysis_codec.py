@@ -0,0 +1,160 @@
+"""
+zstd dictionary compression of analysis text.
+
+Analyses are short and repeat the same headings, next steps and disclaimer, which plain
+compression barely shrinks but a dictionary trained on past analyses does. Dictionaries live in
+the analysis_dictionaries table (app.models.analysis) and are never changed once stored. Each
+is trained with its version as the zstd dictionary id, so every frame names the dictionary
+it needs.
+
+A check stores its analysis in one of two ways: as text in `analysis`, or compressed in
+`analysis_zstd` with `analysis_dict` set to the version. The models expose either one as
+`analysis` (AnalysisMixin). In SQL they are read as one bytea value, decoded by
+AnalysisText: a zstd frame starts with a magic number that valid UTF-8 text never starts
+with. Search still covers compressed analyses: the search_vector trigger indexes the text
+written alongside a frame, then drops it.
+
+Compression of new analyses is on with ANALYSIS_COMPRESSION once a dictionary exists
+(`python -m app.db.analysis_compression train`). Existing rows are recompressed with the
+same tool.
+"""
+import logging
+from typing import Dict, Optional, Sequence, Tuple
+
+import zstandard
+from sqlalchemy import LargeBinary, func, literal_column, select, type_coerce
+from sqlalchemy.types import TypeDecorator
+
+from app.core.db_config import db_settings
+
+logger = logging.getLogger(__name__)
+
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+class UnknownDictionary(LookupError):
+    """A frame needs a dictionary this process has not loaded (trained after it started)."""
+
+
+# Loaded dictionaries by version; the highest one compresses new analyses
+_DICTIONARIES: Dict[int, zstandard.ZstdCompressionDict] = {}
+_DECOMPRESSORS: Dict[int, zstandard.ZstdDecompressor] = {}
+_COMPRESSORS: Dict[int, zstandard.ZstdCompressor] = {}
+_LOADED = False
+
+
+def register_dictionary(version: int, data: bytes) -> None:
+    dictionary = zstandard.ZstdCompressionDict(data)
+    _DICTIONARIES[version] = dictionary
+    _DECOMPRESSORS[version] = zstandard.ZstdDecompressor(dict_data=dictionary)
+
+
+def clear_dictionaries() -> None:
+    global _LOADED
+    _DICTIONARIES.clear()
+    _DECOMPRESSORS.clear()
+    _COMPRESSORS.clear()
+    _LOADED = False
+
+
+def active_version() -> Optional[int]:
+    return max(_DICTIONARIES, default=None)
+
+
+def _compressor(version: int) -> zstandard.ZstdCompressor:
+    compressor = _COMPRESSORS.get(version)
+    if compressor is None:
+        compressor = _COMPRESSORS[version] = zstandard.ZstdCompressor(
+            level=db_settings.ANALYSIS_COMPRESSION_LEVEL, dict_data=_DICTIONARIES[version],
+            write_checksum=False, write_dict_id=True,
+        )
+    return compressor
+
+
+async def load_dictionaries(db) -> None:
+    """Load the dictionaries stored since this process last looked."""
+    global _LOADED
+    from app.models.analysis import AnalysisDictionary
+
+    q = select(AnalysisDictionary.version, AnalysisDictionary.dictionary)
+    if _DECOMPRESSORS:
+        q = q.where(AnalysisDictionary.version.notin_(list(_DECOMPRESSORS)))
+    res = await db.execute(q)
+    for version, data in res.all():
+        register_dictionary(version, data)
+        logger.info("Loaded analysis dictionary v%s", version)
+    _LOADED = True
+
+
+async def ensure_loaded(db) -> None:
+    """Load the dictionaries once per process, before the first analysis is compressed."""
+    if db_settings.ANALYSIS_COMPRESSION and not _LOADED:
+        await load_dictionaries(db)
+
+
+def compress(text: str, version: Optional[int] = None) -> Optional[Tuple[bytes, int]]:
+    """
+    (frame, dictionary version) for `text` with the given, or newest loaded, dictionary; None
+    when there is none, or when the frame would not be smaller than the text.
+    """
+    version = active_version() if version is None else version
+    if version is None:
+        return None
+    raw = text.encode("utf-8")
+    frame = _compressor(version).compress(raw)
+    if len(frame) >= len(raw):
+        return None
+    return frame, version
+
+
+def decompress(frame: bytes) -> str:
+    version = zstandard.get_frame_parameters(frame).dict_id
+    try:
+        decompressor = _DECOMPRESSORS[version]
+    except KeyError:
+        raise UnknownDictionary(version) from None
+    return decompressor.decompress(frame).decode("utf-8")
+
+
+def decode(payload: Optional[bytes]) -> Optional[str]:
+    """Text from a stored analysis: a zstd frame, or the UTF-8 text itself."""
+    if payload is None:
+        return None
+    payload = bytes(payload)
+    if payload[:4] == ZSTD_MAGIC:
+        return decompress(payload)
+    return payload.decode("utf-8")
+
+
+def encode(text: Optional[str]) -> Tuple[Optional[bytes], Optional[int]]:
+    """(analysis_zstd, analysis_dict) to store for `text`; (None, None) to store it as text."""
+    if text is None or not db_settings.ANALYSIS_COMPRESSION:
+        return None, None
+    return compress(text) or (None, None)
+
+
+class AnalysisText(TypeDecorator):
+    """Result type of analysis_expression(): the stored bytea decoded to text."""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_result_value(self, value, dialect):
+        return decode(value)
+
+
+def analysis_expression(plain, packed):
+    """The analysis of a check as SQL, whichever way it is stored; reads back as text."""
+    return type_coerce(func.coalesce(packed, func.convert_to(plain, literal_column("'UTF8'"))), AnalysisText()).label("analysis")
+
+
+async def fetch_all(db, statement, params: Optional[dict] = None) -> Sequence:
+    """
+    `db.execute(statement, params).all()`, reloading dictionaries and retrying once when a row
+    was compressed with one this process has not seen yet.
+    """
+    try:
+        return (await db.execute(statement, params)).all()
+    except UnknownDictionary:
+        await load_dictionaries(db)
+        return (await db.execute(statement, params)).all()
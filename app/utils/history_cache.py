@@ -0,0 +1,180 @@
+import asyncio
+import hashlib
+import logging
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, Optional, Union
+
+import redis.asyncio as redis
+
+from app.core.db_config import db_settings
+
+logger = logging.getLogger(__name__)
+
+# Release the stampede lock only if we still own it
+_RELEASE_LOCK = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class HistoryCache:
+    """Per-user cache of a history endpoint's serialized first page.
+
+    Entries are keyed by a per-user version. invalidate() replaces the version,
+    so a page loaded from the database before a write can never be served after
+    it, even if it lands in the cache late. The same version backs the
+    endpoint's ETag (see etag()). On a miss a single
+    loader per user fills the entry (an in-process single-flight plus a Redis
+    lock across workers); other callers wait briefly for it and fall back to
+    the database if it does not show up. Redis errors fall back to the database.
+    """
+    def __init__(self, kind: str, ttl: int = 300, version_ttl: int = 86400, lock_ttl_ms: int = 5000,
+                 wait_timeout: float = 1.0, poll_interval: float = 0.02):
+        self.kind = kind
+        self.ttl = ttl
+        self.version_ttl = version_ttl
+        self.lock_ttl_ms = lock_ttl_ms
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+
+    def _gen_key(self, user_id: str) -> str:
+        return f"history_cache_gen:{self.kind}:{user_id}"
+
+    def _page_key(self, user_id: str, generation: str) -> str:
+        return f"history_cache:{self.kind}:{user_id}:{generation}"
+
+    async def version(self, redis_client: redis.Redis, user_id: str) -> str:
+        """The user's current history version; it changes whenever invalidate() is called."""
+        key = self._gen_key(user_id)
+        generation = await redis_client.get(key)
+        if generation is None:
+            # Never fall back to a fixed value: an expired or evicted version must not
+            # bring back a page or ETag from before the last write
+            fresh = str(time.time_ns())
+            if await redis_client.set(key, fresh, nx=True, ex=self.version_ttl):
+                return fresh
+            generation = await redis_client.get(key) or fresh
+        return generation
+
+    async def etag(self, redis_client: redis.Redis, user_id: str, *params) -> Optional[str]:
+        """
+        ETag for the user's history as requested with `params` (page size, cursor...),
+        or None when Redis is unavailable. It stays the same until the history changes.
+        """
+        try:
+            generation = await self.version(redis_client, user_id)
+        except redis.RedisError as e:
+            logger.warning("History version unavailable, skipping ETag: %s", e)
+            return None
+        raw = ":".join([self.kind, user_id, generation, *(str(p) for p in params)])
+        return f'"{hashlib.sha1(raw.encode()).hexdigest()[:20]}"'
+
+    async def _cached(self, redis_client: redis.Redis, user_id: str) -> tuple[str, Optional[str]]:
+        generation = await self.version(redis_client, user_id)
+        return generation, await redis_client.get(self._page_key(user_id, generation))
+
+    async def get_or_load(self, redis_client: redis.Redis, user_id: str, loader: Callable[[], Awaitable[Union[str, bytes]]]) -> Union[str, bytes]:
+        """Return the cached page for `user_id`, calling `loader` to build it on a miss."""
+        try:
+            generation, page = await self._cached(redis_client, user_id)
+        except redis.RedisError as e:
+            logger.warning("History cache unavailable, reading from the database: %s", e)
+            self.misses += 1
+            self.loads += 1
+            return await loader()
+
+        if page is not None:
+            self.hits += 1
+            return page
+        self.misses += 1
+
+        page_key = self._page_key(user_id, generation)
+        pending = self._inflight.get(page_key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[page_key] = future
+        try:
+            page = await self._fill(redis_client, page_key, loader)
+            future.set_result(page)
+            return page
+        except BaseException as e:
+            future.set_exception(e)
+            # Don't leave an unretrieved exception behind when nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            del self._inflight[page_key]
+
+    async def _fill(self, redis_client: redis.Redis, page_key: str, loader: Callable[[], Awaitable[Union[str, bytes]]]) -> Union[str, bytes]:
+        lock_key, token = f"{page_key}:lock", uuid.uuid4().hex
+        try:
+            locked = bool(await redis_client.set(lock_key, token, nx=True, px=self.lock_ttl_ms))
+            contended = not locked
+        except redis.RedisError:
+            locked = contended = False
+
+        if contended:
+            # Another worker is loading this page; wait for it instead of hitting the database too
+            waited = 0.0
+            while waited < self.wait_timeout:
+                await asyncio.sleep(self.poll_interval)
+                waited += self.poll_interval
+                try:
+                    page = await redis_client.get(page_key)
+                except redis.RedisError:
+                    break
+                if page is not None:
+                    return page
+
+        self.loads += 1
+        try:
+            page = await loader()
+            try:
+                await redis_client.set(page_key, page, ex=self.ttl)
+            except redis.RedisError as e:
+                logger.warning("Could not store history page in cache: %s", e)
+            return page
+        finally:
+            if locked:
+                try:
+                    await redis_client.eval(_RELEASE_LOCK, 1, lock_key, token)
+                except redis.RedisError:
+                    pass
+
+    async def invalidate(self, redis_client: redis.Redis, user_id: str) -> None:
+        """Retire the user's cached page. Call after committing a change to their history."""
+        try:
+            # A fresh, never-reused version, so no old page or ETag can match it
+            await redis_client.set(self._gen_key(user_id), time.time_ns(), ex=self.version_ttl)
+        except redis.RedisError as e:
+            # Entries expire after `ttl`, which bounds the staleness of cached pages if this fails.
+            # ETags are not bounded by it; they stay valid until the version expires.
+            logger.warning("Could not invalidate history cache for user %s: %s", user_id, e)
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header value matches `etag` (weak comparison, as RFC 9110 asks)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+symptom_history_cache = HistoryCache("symptom", ttl=db_settings.HISTORY_CACHE_TTL_SEC, version_ttl=db_settings.HISTORY_VERSION_TTL_SEC)
+ocr_symptom_history_cache = HistoryCache("ocr", ttl=db_settings.HISTORY_CACHE_TTL_SEC, version_ttl=db_settings.HISTORY_VERSION_TTL_SEC)
@@ -0,0 +1,107 @@
+from typing import Iterable, Optional
+
+from pydantic_core import to_json
+
+# Serialize history rows straight to JSON bytes. The rows come from our own
+# completed checks, so re-validating every field through the response models
+# buys nothing; the output has the same shape as SymptomHistoryOut and
+# OCRSymptomHistoryOut.
+#
+# Rows are unpacked positionally in the order of HISTORY_COLUMNS /
+# OCR_HISTORY_COLUMNS (app/crud), which is much cheaper than Row attribute
+# access; trailing extra columns (updated_at on delta-sync pages) are
+# ignored. UUIDs and enums are turned into plain strings first: asyncpg
+# returns its own UUID subclass, which the encoder only handles on a slow
+# fallback path.
+
+
+def symptom_history_json(user_id: str, rows: Iterable[tuple], next_cursor: Optional[str], watermark: Optional[str] = None) -> bytes:
+    return to_json({
+        "user_id": user_id,
+        "history": [
+            {
+                "id": str(id_),
+                "user_id": str(owner_id),
+                "timestamp": submitted_at,
+                "input": {
+                    "age": age,
+                    "sex": sex.value,
+                    "symptoms": symptoms,
+                    "duration": duration,
+                    "severity": severity,
+                    "additional_notes": additional_notes,
+                },
+                "analysis": analysis,
+                "status": status.value,
+                "structured": structured,
+            }
+            for (id_, owner_id, submitted_at, age, sex, symptoms, duration, severity,
+                 additional_notes, analysis, status, structured, *_) in rows
+        ],
+        "next_cursor": next_cursor,
+        "watermark": watermark,
+    })
+
+
+def ocr_symptom_history_json(user_id: str, rows: Iterable[tuple], next_cursor: Optional[str], watermark: Optional[str] = None) -> bytes:
+    return to_json({
+        "user_id": user_id,
+        "history": [
+            {
+                "id": str(id_),
+                "user_id": str(owner_id),
+                "timestamp": submitted_at,
+                "input": input_,
+                "analysis": analysis,
+                "status": status.value,
+                "structured": structured,
+            }
+            for (id_, owner_id, submitted_at, input_, analysis, status, structured, *_) in rows
+        ],
+        "next_cursor": next_cursor,
+        "watermark": watermark,
+    })
+
+
+def _timeline_item(row: tuple) -> dict:
+    (kind, id_, owner_id, submitted_at, age, sex, symptoms, duration, severity,
+     additional_notes, input_, analysis, status, structured, *_) = row
+    if input_ is None:
+        input_ = {
+            "age": age,
+            "sex": sex.value,
+            "symptoms": symptoms,
+            "duration": duration,
+            "severity": severity,
+            "additional_notes": additional_notes,
+        }
+    return {
+        "type": kind,
+        "id": str(id_),
+        "user_id": str(owner_id),
+        "timestamp": submitted_at,
+        "input": input_,
+        "analysis": analysis,
+        "status": status.value,
+        "structured": structured,
+    }
+
+
+def timeline_json(user_id: str, rows: Iterable[tuple], next_cursor: Optional[str]) -> bytes:
+    """Rows of app.crud.timeline.timeline_query(); `type` says which kind of check each one is."""
+    return to_json({"user_id": user_id, "history": [_timeline_item(row) for row in rows], "next_cursor": next_cursor})
+
+
+def timeline_search_json(user_id: str, query: str, rows: Iterable[tuple], next_cursor: Optional[str]) -> bytes:
+    """Search results: timeline rows followed by their rank, best match first."""
+    return to_json({
+        "user_id": user_id,
+        "query": query,
+        "history": [_timeline_item(row) for row in rows],
+        "next_cursor": next_cursor,
+    })
+
+
+def timeline_ndjson(rows: Iterable[tuple]) -> bytes:
+    """The same items as timeline_json(), one JSON object per line, for streaming exports."""
+    return b"".join(to_json(_timeline_item(row)) + b"\n" for row in rows)
@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class HedgeBudget:
+    """Caps hedged calls at a fraction of primary calls.
+
+    Every primary call earns `ratio` credits (up to `burst`) and every hedge spends one,
+    so over time at most `ratio` extra calls are made per primary call.
+    """
+    def __init__(self, ratio: float = 0.05, burst: float = 5.0):
+        if not 0 <= ratio <= 1:
+            raise ValueError("ratio must be between 0 and 1")
+        self.ratio = ratio
+        self.burst = max(1.0, burst)
+        self._credits = 1.0
+
+    def record_call(self) -> None:
+        self._credits = min(self.burst, self._credits + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self._credits < 1.0:
+            return False
+        self._credits -= 1.0
+        return True
+
+
+class Hedger:
+    """Runs a call and, if it is slower than the recent `percentile` latency, races a second one.
+
+    The hedge delay tracks the last `window` call latencies; until `min_samples` have been
+    seen `initial_delay` is used. Whichever call succeeds first wins and the other is
+    cancelled, its time so far recorded as a lower bound of its latency. If the first to
+    finish fails, the other is still awaited. Hedges are limited by `budget`, and by
+    `can_hedge` when given (e.g. whether an upstream call slot is free).
+    """
+    def __init__(
+        self,
+        percentile: float = 95,
+        budget: Optional[HedgeBudget] = None,
+        initial_delay: float = 10.0,
+        min_delay: float = 0.5,
+        window: int = 500,
+        min_samples: int = 50,
+    ):
+        if not 0 < percentile < 100:
+            raise ValueError("percentile must be between 0 and 100")
+        self.percentile = percentile
+        self.budget = budget or HedgeBudget()
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self._latencies: Deque[float] = deque(maxlen=window)
+
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    @property
+    def delay(self) -> float:
+        """Seconds to wait for the primary call before hedging."""
+        if len(self._latencies) < self.min_samples:
+            return self.initial_delay
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+        return max(self.min_delay, ordered[index])
+
+    def _observe(self, started: float) -> None:
+        self._latencies.append(time.monotonic() - started)
+
+    async def run(self, primary: Callable[[], Awaitable[T]], hedge: Callable[[], Awaitable[T]],
+                  can_hedge: Optional[Callable[[], bool]] = None) -> Tuple[T, bool]:
+        """
+        Await `primary()`, hedging with `hedge()` if it is slow, `can_hedge()` is true and the
+        budget allows. Returns the result and whether it came from the hedge.
+        """
+        self.calls += 1
+        self.budget.record_call()
+
+        started = time.monotonic()
+        primary_task = asyncio.ensure_future(primary())
+        try:
+            done, _ = await asyncio.wait({primary_task}, timeout=self.delay)
+            if done or (can_hedge is not None and not can_hedge()) or not self.budget.try_spend():
+                result = await primary_task
+                self._observe(started)
+                return result, False
+
+            self.hedges += 1
+            hedge_started = time.monotonic()
+            hedge_task = asyncio.ensure_future(hedge())
+            starts = {primary_task: started, hedge_task: hedge_started}
+            pending = {primary_task, hedge_task}
+            first_error = None
+            try:
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        if task.exception() is None:
+                            # The loser is cancelled below; it took at least this long
+                            for timed in (task, *pending):
+                                self._observe(starts[timed])
+                            if task is hedge_task:
+                                self.hedge_wins += 1
+                            return task.result(), task is hedge_task
+                        first_error = first_error or task.exception()
+                        logger.warning("%s call failed while hedged: %s", "Hedge" if task is hedge_task else "Primary", task.exception())
+                raise first_error
+            finally:
+                hedge_task.cancel()
+        finally:
+            primary_task.cancel()
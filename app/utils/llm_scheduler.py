@@ -0,0 +1,204 @@
+import asyncio
+import enum
+import itertools
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional, Tuple
+
+from app.core.metrics import REGISTRY, Gauge, Histogram
+
+# Queue wait per priority class, shared by every scheduler in the process
+QUEUE_WAIT_SECONDS = REGISTRY.register(Histogram(
+    "llm_scheduler_queue_wait_seconds",
+    "Time spent waiting for an LLM call slot, by priority class",
+))
+# The named schedulers, whose slots are reported by the gauges below
+schedulers: Dict[str, "FairScheduler"] = {}
+REGISTRY.register(Gauge(
+    "llm_scheduler_inflight",
+    "LLM calls holding a slot, by scheduler",
+    collect=lambda: [({"scheduler": name}, s.inflight) for name, s in schedulers.items()],
+))
+REGISTRY.register(Gauge(
+    "llm_scheduler_waiting",
+    "LLM calls queued for a slot, by scheduler",
+    collect=lambda: [({"scheduler": name}, s.waiting) for name, s in schedulers.items()],
+))
+
+
+class Priority(enum.IntEnum):
+    """Priority classes for LLM call slots. Lower values are served first.
+
+    Every analysis is requested interactively today; a lower class is added here
+    alongside the first background caller (e.g. a job queue) that would use it.
+    """
+    interactive = 0
+
+
+class _Waiter:
+    __slots__ = ("user_key", "priority", "start_tag", "seq", "future", "enqueued_at")
+
+    def __init__(self, user_key, priority, start_tag, seq, future):
+        self.user_key = user_key
+        self.priority = priority
+        self.start_tag = start_tag
+        self.seq = seq
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+
+class FairScheduler:
+    """A concurrency limiter with strict priority classes and per-user fair queuing.
+
+    Slots are handed out to the highest priority class that has an eligible waiter.
+    Within a class, users are served by start-time fair queuing, so a user with many
+    queued calls cannot starve users with a single call. Each user is also capped
+    at `max_inflight_per_user` concurrent calls. Calls without a user_id are queued
+    fairly as one anonymous flow and are not subject to the per-user cap. A scheduler
+    given a `name` reports its in-flight and queued calls on /metrics.
+    """
+    def __init__(self, capacity: int, max_inflight_per_user: Optional[int] = None, wait_histogram: Histogram = QUEUE_WAIT_SECONDS, name: Optional[str] = None):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        if name is not None:
+            schedulers[name] = self
+        self.capacity = capacity
+        self.max_inflight_per_user = max_inflight_per_user
+        self.wait_histogram = wait_histogram
+
+        self._inflight = 0
+        self._user_inflight: Dict[Optional[str], int] = {}
+        self._weights: Dict[str, float] = {}
+        self._queues: Dict[Priority, Dict[Optional[str], Deque[_Waiter]]] = {p: {} for p in Priority}
+        self._virtual_time: Dict[Priority, float] = {p: 0.0 for p in Priority}
+        self._last_finish: Dict[Tuple[Priority, Optional[str]], float] = {}
+        self._waiting = 0
+        self._seq = itertools.count()
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    @property
+    def waiting(self) -> int:
+        return self._waiting
+
+    @property
+    def saturated(self) -> bool:
+        """True when a new call would have to queue for a slot."""
+        return self._inflight >= self.capacity or self._waiting > 0
+
+    def set_weight(self, user_id: str, weight: float) -> None:
+        """Give a user a larger (or smaller) share of slots within its priority class."""
+        if weight <= 0:
+            raise ValueError("weight must be positive")
+        self._weights[user_id] = weight
+
+    def _user_capped(self, user_key: Optional[str]) -> bool:
+        if user_key is None or self.max_inflight_per_user is None:
+            return False
+        return self._user_inflight.get(user_key, 0) >= self.max_inflight_per_user
+
+    def _enqueue(self, user_key: Optional[str], priority: Priority) -> _Waiter:
+        flow = (priority, user_key)
+        start_tag = max(self._virtual_time[priority], self._last_finish.get(flow, 0.0))
+        self._last_finish[flow] = start_tag + 1.0 / self._weights.get(user_key, 1.0)
+
+        waiter = _Waiter(user_key, priority, start_tag, next(self._seq), asyncio.get_running_loop().create_future())
+        self._queues[priority].setdefault(user_key, deque()).append(waiter)
+        self._waiting += 1
+        return waiter
+
+    def _remove(self, waiter: _Waiter) -> None:
+        flows = self._queues[waiter.priority]
+        queue = flows.get(waiter.user_key)
+        if queue is None:
+            return
+        try:
+            queue.remove(waiter)
+        except ValueError:
+            return
+        self._waiting -= 1
+        if not queue:
+            del flows[waiter.user_key]
+
+    def _next_waiter(self) -> Optional[_Waiter]:
+        for priority in Priority:
+            best = None
+            for user_key, queue in self._queues[priority].items():
+                if self._user_capped(user_key):
+                    continue
+                head = queue[0]
+                if best is None or (head.start_tag, head.seq) < (best.start_tag, best.seq):
+                    best = head
+            if best is not None:
+                return best
+        return None
+
+    def _dispatch(self) -> None:
+        while self._inflight < self.capacity:
+            waiter = self._next_waiter()
+            if waiter is None:
+                return
+            self._remove(waiter)
+            self._virtual_time[waiter.priority] = waiter.start_tag
+            self._grant(waiter.user_key)
+            self.wait_histogram.observe(time.monotonic() - waiter.enqueued_at, {"priority": waiter.priority.name})
+            waiter.future.set_result(None)
+
+        # Flows that finished below the virtual clock carry no credit; drop them
+        if len(self._last_finish) > 4096:
+            self._last_finish = {
+                flow: finish for flow, finish in self._last_finish.items()
+                if finish > self._virtual_time[flow[0]]
+            }
+
+    def _grant(self, user_key: Optional[str]) -> None:
+        self._inflight += 1
+        self._user_inflight[user_key] = self._user_inflight.get(user_key, 0) + 1
+
+    async def acquire(self, user_id: Optional[str] = None, priority: Priority = Priority.interactive, timeout: Optional[float] = None) -> None:
+        """Wait for a call slot. Raises asyncio.TimeoutError if none is granted within `timeout`."""
+        waiter = self._enqueue(user_id, priority)
+        self._dispatch()
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout=timeout)
+        except BaseException:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted just as we gave up: hand the slot back
+                self.release(user_id)
+            else:
+                waiter.future.cancel()
+                queue = self._queues[priority].get(user_id)
+                if queue and queue[-1] is waiter:
+                    # Abandoned tail of the flow: don't charge the user for it
+                    self._last_finish[(priority, user_id)] = waiter.start_tag
+                self._remove(waiter)
+            raise
+
+    def release(self, user_id: Optional[str] = None) -> None:
+        """Return a slot previously granted by acquire()."""
+        self._inflight -= 1
+        remaining = self._user_inflight.get(user_id, 0) - 1
+        if remaining > 0:
+            self._user_inflight[user_id] = remaining
+        else:
+            self._user_inflight.pop(user_id, None)
+        self._dispatch()
+
+    def try_acquire(self, user_id: Optional[str] = None) -> bool:
+        """Take a slot only if one is free and nobody is queued for it; never waits. Release it with release()."""
+        if self.saturated or self._user_capped(user_id):
+            return False
+        self._grant(user_id)
+        return True
+
+    @asynccontextmanager
+    async def slot(self, user_id: Optional[str] = None, priority: Priority = Priority.interactive, timeout: Optional[float] = None):
+        await self.acquire(user_id, priority, timeout)
+        try:
+            yield
+        finally:
+            self.release(user_id)
@@ -0,0 +1,123 @@
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.utils.token_budget import count_payload_tokens
+
+# Terms that always send a request to the full model, whatever the policy
+RED_FLAG_TERMS = (
+    "chest pain", "chest tightness", "shortness of breath", "difficulty breathing", "can't breathe", "cannot breathe",
+    "unconscious", "fainted", "fainting", "seizure", "stroke", "slurred speech", "facial droop", "numbness",
+    "paralysis", "confusion", "severe headache", "worst headache", "stiff neck", "coughing blood", "vomiting blood",
+    "blood in stool", "black stool", "suicidal", "overdose", "anaphylaxis", "swollen throat", "pregnant",
+)
+_RED_FLAG_RE = re.compile("|".join(re.escape(term) for term in RED_FLAG_TERMS), re.IGNORECASE)
+
+# Score weights; a request scores between 0 (trivial) and 1 (complex)
+_SIZE_WEIGHT = 0.35
+_SIZE_SATURATION_TOKENS = 600
+_SEVERITY_WEIGHT = 0.35
+# The 0-10 scale SymptomCheckIn enforces; OCR input is free-form and may be off it
+_MAX_SEVERITY = 10
+_UNKNOWN_SEVERITY = 5
+_OCR_WEIGHT = 0.2
+
+FAST_TIER = "fast"
+FULL_TIER = "full"
+
+# Policies map a score to a tier: the first tier whose threshold is above the score wins
+POLICIES: Dict[str, Tuple[Tuple[float, str], ...]] = {
+    "off": ((float("inf"), FULL_TIER),),
+    "conservative": ((0.25, FAST_TIER), (float("inf"), FULL_TIER)),
+    "balanced": ((0.4, FAST_TIER), (float("inf"), FULL_TIER)),
+    "aggressive": ((0.6, FAST_TIER), (float("inf"), FULL_TIER)),
+}
+
+
+@dataclass(frozen=True)
+class RoutingDecision:
+    model: str
+    tier: str
+    score: float
+    reasons: List[str] = field(default_factory=list)
+
+    def as_meta(self, policy: str) -> dict:
+        return {"policy": policy, "tier": self.tier, "score": round(self.score, 3), "reasons": self.reasons}
+
+
+def _severity(payload: Dict[str, Any]) -> Tuple[Optional[float], str]:
+    """The payload's severity as a fraction of _MAX_SEVERITY, or None when missing, unparseable or off the scale; and its reason."""
+    for key, value in payload.items():
+        if "severity" in key.lower():
+            try:
+                severity = float(value)
+            except (TypeError, ValueError):
+                return None, "severity:unknown"
+            if not 0 <= severity <= _MAX_SEVERITY:
+                return None, f"severity:out_of_range:{severity:g}"
+            return severity / _MAX_SEVERITY, f"severity:{severity:g}"
+    return None, "severity:unknown"
+
+
+def score_request(payload: Dict[str, Any], source: str = "text") -> Tuple[float, List[str]]:
+    """
+    Score how demanding a request is from its size, severity, source and red-flag terms.
+    Returns the score in [0, 1] and the reasons that contributed to it.
+    """
+    reasons = []
+
+    text = " ".join(str(value) for value in payload.values() if isinstance(value, str))
+    red_flag = _RED_FLAG_RE.search(text)
+    if red_flag:
+        return 1.0, [f"red_flag:{red_flag.group().lower()}"]
+
+    tokens = count_payload_tokens(payload)
+    score = _SIZE_WEIGHT * min(1.0, tokens / _SIZE_SATURATION_TOKENS)
+    reasons.append(f"tokens:{tokens}")
+
+    severity, reason = _severity(payload)
+    reasons.append(reason)
+    score += _SEVERITY_WEIGHT * (severity if severity is not None else _UNKNOWN_SEVERITY / _MAX_SEVERITY)
+
+    if source == "ocr":
+        score += _OCR_WEIGHT
+        reasons.append("source:ocr")
+
+    return min(1.0, score), reasons
+
+
+class ModelRouter:
+    """Picks a model tier for each request from its complexity score.
+
+    `models` maps tier names to model ids; tiers without a model fall back to the full
+    tier, so an unset fast model disables routing. `scorer` can be swapped to route on
+    other signals.
+    """
+    def __init__(
+        self,
+        models: Dict[str, Optional[str]],
+        policy: str = "balanced",
+        scorer: Callable[[Dict[str, Any], str], Tuple[float, List[str]]] = score_request,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown routing policy {policy!r}; expected one of {sorted(POLICIES)}")
+        if not models.get(FULL_TIER):
+            raise ValueError("a model for the full tier is required")
+        self.models = models
+        self.policy = policy
+        self.scorer = scorer
+
+    @property
+    def enabled(self) -> bool:
+        return self.policy != "off" and any(model and tier != FULL_TIER for tier, model in self.models.items())
+
+    def route(self, payload: Dict[str, Any], source: str = "text") -> RoutingDecision:
+        if not self.enabled:
+            return RoutingDecision(self.models[FULL_TIER], FULL_TIER, 1.0, ["routing:off"])
+
+        score, reasons = self.scorer(payload, source)
+        tier = next(tier for threshold, tier in POLICIES[self.policy] if score < threshold)
+        model = self.models.get(tier)
+        if not model:
+            tier, model = FULL_TIER, self.models[FULL_TIER]
+        return RoutingDecision(model, tier, score, reasons)
@@ -0,0 +1,135 @@
+import re
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+Number = Union[int, float]
+
+# Canonical numeric fields, the other names OCR/intake forms use for them, and the unit
+# suffixes they arrive with mapped to a conversion into the canonical unit. A unit implied
+# by the key (temp_c) applies when the value has none of its own.
+_IDENTITY: Callable[[float], float] = lambda v: v
+_CELSIUS_TO_F: Callable[[float], float] = lambda v: v * 9 / 5 + 32
+_THOUSANDS: Callable[[float], float] = lambda v: v * 1000
+
+_NUMERIC_FIELDS: Dict[str, Tuple[Tuple[str, ...], Dict[str, Callable[[float], float]]]] = {
+    "temperature_f": (
+        ("temperature", "temp", "temp_f", "body_temperature", "body_temp", "temperature_c", "temp_c"),
+        {"f": _IDENTITY, "°f": _IDENTITY, "fahrenheit": _IDENTITY, "c": _CELSIUS_TO_F, "°c": _CELSIUS_TO_F, "celsius": _CELSIUS_TO_F},
+    ),
+    "heart_rate_bpm": (
+        ("heart_rate", "pulse", "pulse_rate", "hr", "heart_rate_per_min"),
+        {"bpm": _IDENTITY, "/min": _IDENTITY, "beats/min": _IDENTITY},
+    ),
+    "respiratory_rate": (
+        ("resp_rate", "rr", "respiratory_rate_per_min", "breaths_per_minute", "respirations"),
+        {"/min": _IDENTITY, "breaths/min": _IDENTITY, "bpm": _IDENTITY},
+    ),
+    "spo2_pct": (
+        ("spo2", "sp_o2", "oxygen_saturation", "o2_sat", "o2_saturation", "sao2", "pulse_ox"),
+        {"%": _IDENTITY},
+    ),
+    "wbc_count": (
+        ("wbc", "white_blood_cells", "white_blood_cell_count", "white_cell_count", "leukocytes", "leukocyte_count"),
+        {"/ul": _IDENTITY, "/µl": _IDENTITY, "cells/ul": _IDENTITY, "cells/µl": _IDENTITY, "/mm3": _IDENTITY,
+         "k/ul": _THOUSANDS, "k/µl": _THOUSANDS, "x10^3/ul": _THOUSANDS, "x10^3/µl": _THOUSANDS, "x10^9/l": _THOUSANDS},
+    ),
+    "systolic_bp": (("systolic", "sbp", "systolic_blood_pressure"), {"mmhg": _IDENTITY}),
+    "diastolic_bp": (("diastolic", "dbp", "diastolic_blood_pressure"), {"mmhg": _IDENTITY}),
+}
+_IMPLIED_UNITS = {"temperature_c": "c", "temp_c": "c", "temp_f": "f"}
+
+
+def _temperature_unit(value: float) -> Optional[str]:
+    # Body temperatures in the two scales don't overlap: 38.5 can only be Celsius, 101.3 only Fahrenheit
+    if 25 <= value <= 45:
+        return "c"
+    if 77 <= value <= 113:
+        return "f"
+    return None
+
+
+# Keys that name no unit: a value without one of its own gets the unit its range implies,
+# and is left unnormalized if it fits none
+_INFERRED_UNITS: Dict[str, Callable[[float], Optional[str]]] = {
+    key: _temperature_unit for key in ("temperature", "temp", "body_temperature", "body_temp")
+}
+_ALIASES = {alias: canonical for canonical, (aliases, _) in _NUMERIC_FIELDS.items() for alias in aliases}
+
+# "118/76 mmHg" also yields systolic_bp and diastolic_bp
+_BLOOD_PRESSURE_KEYS = {"blood_pressure", "bp", "blood_pressure_mmhg"}
+_BLOOD_PRESSURE_RE = re.compile(r"^\s*(\d{2,3})\s*/\s*(\d{2,3})\s*(?:mm\s*hg)?\s*$", re.IGNORECASE)
+
+_NUMBER_RE = re.compile(r"^\s*([-+]?\d{1,3}(?:,\d{3})+|[-+]?\d+(?:\.\d+)?|[-+]?\.\d+)\s*(.*?)\s*$")
+
+
+def canonical_key(key: str) -> str:
+    """Lower-case snake_case spelling of a field name ("Heart Rate" -> "heart_rate")."""
+    return re.sub(r"[^a-z0-9]+", "_", key.strip().lower()).strip("_")
+
+
+def _as_number(value: float) -> Number:
+    # Whole numbers stay ints so they read back the way they were written
+    return int(value) if float(value).is_integer() and abs(value) < 2**53 else round(value, 4)
+
+
+def parse_numeric(field: str, value: Any, implied_unit: Optional[str] = None,
+                  infer_unit: Optional[Callable[[float], Optional[str]]] = None) -> Optional[Number]:
+    """
+    `value` as a number in `field`'s canonical unit, or None when it isn't a recognisable measurement.
+    A value without a unit is taken in `implied_unit`, else in the unit `infer_unit` picks from the
+    number (None when it picks none), else as written.
+    """
+    _, units = _NUMERIC_FIELDS[field]
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        number, unit = float(value), ""
+    elif isinstance(value, str):
+        match = _NUMBER_RE.match(value)
+        if not match:
+            return None
+        number, unit = float(match.group(1).replace(",", "")), match.group(2).lower().replace(" ", "")
+    else:
+        return None
+    unit = unit or implied_unit or ""
+    if not unit and infer_unit is not None:
+        unit = infer_unit(number)
+        if unit is None:
+            return None
+    if unit:
+        convert = units.get(unit)
+        if convert is None:
+            return None
+        number = convert(number)
+    return _as_number(number)
+
+
+def normalize_identified_data(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    OCR-identified data with known vitals and labs under their canonical names
+    (temperature_f, heart_rate_bpm, respiratory_rate, spo2_pct, wbc_count, systolic_bp,
+    diastolic_bp) as numbers in the canonical unit, and every other key spelled in
+    snake_case. Values that can't be parsed are kept as given, so nothing is lost; a key
+    that would clash with one already present keeps its original spelling.
+    """
+    spellings = {key: canonical_key(key) or key for key in data}
+    # A field already sent under its canonical name wins over aliases of it
+    sent_canonical = {name for name in spellings.values() if name in _NUMERIC_FIELDS}
+
+    normalized: Dict[str, Any] = {}
+    for key, value in data.items():
+        name = spellings[key]
+        field = _ALIASES.get(name, name if name in _NUMERIC_FIELDS else None)
+        if field is not None and (field == name or field not in sent_canonical) and field not in normalized:
+            number = parse_numeric(field, value, _IMPLIED_UNITS.get(name), _INFERRED_UNITS.get(name))
+            if number is not None or field == name:
+                normalized[field] = number if number is not None else value
+                continue
+        normalized[key if name in normalized else name] = value
+
+        if name in _BLOOD_PRESSURE_KEYS and isinstance(value, str):
+            match = _BLOOD_PRESSURE_RE.match(value)
+            if match:
+                for field, reading in zip(("systolic_bp", "diastolic_bp"), match.groups()):
+                    if field not in sent_canonical and field not in normalized:
+                        normalized[field] = int(reading)
+    return normalized
@@ -3,18 +3,6 @@ import asyncio
 import logging
 from typing import Optional, Dict, Any
 
-from openai import (
-    AsyncOpenAI,
-    APIError,
-    APIConnectionError,
-    RateLimitError,
-    APITimeoutError,
-    AuthenticationError,
-    OpenAIError,
-)
-
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type, RetryError
-
 from app.exceptions.openai_exceptions import (
     OpenAIAuthError,
     OpenAIRateLimitError,
@@ -24,63 +12,67 @@ from app.exceptions.openai_exceptions import (
 )
 
 from app.core.openai_config import openai_settings
+from app.utils.openai_client import complete_hedged
+from app.utils.llm_scheduler import FairScheduler, Priority
+from app.utils.token_budget import count_tokens, fit_to_budget
+from app.utils.llm_hedging import Hedger, HedgeBudget
+from app.utils.model_router import ModelRouter, FAST_TIER, FULL_TIER
+from app.utils.structured_analysis import STRUCTURED_SYSTEM_PROMPT, STRUCTURED_RESPONSE_FORMAT, parse_structured_analysis, render_markdown
 
 logger = logging.getLogger(__name__)
 
 OPENAI_API_KEY = openai_settings.OPENAI_API_KEY
 OPENAI_MODEL = openai_settings.OPENAI_MODEL
+OPENAI_FAST_MODEL = openai_settings.OPENAI_FAST_MODEL
+OPENAI_ROUTING_POLICY = openai_settings.OPENAI_ROUTING_POLICY
 OPENAI_MAX_CONCURRENCY = openai_settings.OPENAI_MAX_CONCURRENCY
 OPENAI_TIMEOUT_SEC = openai_settings.OPENAI_TIMEOUT_SEC
+OPENAI_MAX_INFLIGHT_PER_USER = openai_settings.OPENAI_MAX_INFLIGHT_PER_USER
+OPENAI_STRUCTURED_OUTPUT = openai_settings.OPENAI_STRUCTURED_OUTPUT
+OPENAI_MAX_PROMPT_TOKENS = openai_settings.OPENAI_MAX_PROMPT_TOKENS_SYMPTOM
+
+# Router: picks the model tier per request when no model is forced by the caller
+_ROUTER = ModelRouter({FULL_TIER: OPENAI_MODEL, FAST_TIER: OPENAI_FAST_MODEL}, policy=OPENAI_ROUTING_POLICY)
+
+# Hedger: races a second call (on the fallback model, if set) against slow calls within a global budget
+_HEDGER = Hedger(
+    percentile=openai_settings.OPENAI_HEDGE_PERCENTILE,
+    budget=HedgeBudget(openai_settings.OPENAI_HEDGE_BUDGET_RATIO),
+    initial_delay=openai_settings.OPENAI_HEDGE_INITIAL_DELAY_SEC,
+)
 
-client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+# Scheduler: local concurrency limit per-process, with priority classes and per-user fair queuing
+_SCHEDULER = FairScheduler(OPENAI_MAX_CONCURRENCY, max_inflight_per_user=OPENAI_MAX_INFLIGHT_PER_USER, name="symptom")
 
-# Semaphore: local concurrency limit per-process
-_SEMAPHORE = asyncio.Semaphore(OPENAI_MAX_CONCURRENCY)
+# System prompt for markdown analyses
+SYSTEM_PROMPT = (
+    """
+        You are an AI clinical assistant. Your purpose is to provide a helpful, preliminary analysis of patient symptoms. Your tone should be knowledgeable, reassuring, and clear.
 
-# Tenacity retry conditions
-retry_on = (
-    retry_if_exception_type(APIConnectionError)
-    | retry_if_exception_type(APIError)
-    | retry_if_exception_type(RateLimitError)
-    | retry_if_exception_type(APITimeoutError)
-)
+        Based on the patient data provided, you MUST generate a response formatted into these exact four sections:
 
-@retry(
-    reraise=True,
-    stop=stop_after_attempt(4),
-    wait=wait_exponential(multiplier=1, min=1, max=8),
-    retry=retry_on,
-)
-async def _call_openai_chat(messages: list[dict], model: str, timeout: int = 30) -> Any:
-    """
-    Low-level OpenAI chat call with retries for transient errors.
+        # Potential Conditions
+        Confidently list 1-3 of the most probable conditions that match the symptoms, starting with the most likely. For each condition, provide a very brief (1-sentence) rationale. Frame these as possibilities for discussion with a healthcare professional.
+
+        # Explanation
+        In a concise paragraph, explain why these conditions are plausible based on the combination of symptoms, severity, and duration provided. If certain symptoms point more strongly to one condition over others, mention it here.
+
+        # Recommended Next Steps
+        Provide a clear, actionable list of next steps. This should include:
+        - Suggestions for at-home symptom management (e.g., rest, hydration, over-the-counter medications).
+        - Specific signs or "red flags" that should prompt the user to see a doctor immediately (e.g., "if the fever exceeds 103°F / 39.4°C").
+        - General advice to consult a healthcare professional for an accurate diagnosis.
+
+        # Disclaimer
+        Conclude your entire response with this exact, unmodified disclaimer: "Disclaimer: I am an AI assistant and not a medical professional. This analysis is for informational purposes only and is not a substitute for professional medical advice, diagnosis, or treatment. Always seek the advice of your physician or another qualified health provider with any questions you may have regarding a medical condition."
+
+        If the provided symptoms are too vague or insufficient to form a reasonable list of potential conditions, you must state that and ask specific clarifying questions to get the necessary information.
     """
-    try:
-        resp = await client.chat.completions.create(
-            model=model,
-            messages=messages,
-            temperature=0.2,
-            max_tokens=600,
-            timeout=timeout,
-        )
-        return resp
-    except AuthenticationError as e:
-        # Auth error, will not be retryable
-        logger.exception("OpenAI authentication failed")
-        raise 
-    except RateLimitError as e:
-        # let tenacity retry this; if it still fails it'll propagate here after retries exhausted
-        logger.warning("OpenAI rate limit error (will be retried by decorator): %s", e)
-        raise
-    except APITimeoutError as e:
-        logger.warning("OpenAI request timed out: %s", e)
-        raise
-    except (APIConnectionError, APIError) as e:
-        logger.warning("OpenAI transient/API error (will be retried): %s", e)
-        raise
-    except OpenAIError as e:
-        logger.exception("Unexpected OpenAI SDK error")
-        raise OpenAIUnavailableError("OpenAI service error") from e
+)
+
+# Tokens left for patient data once the (larger, markdown) system prompt and message framing are counted
+_PAYLOAD_TOKEN_BUDGET = max(64, OPENAI_MAX_PROMPT_TOKENS - count_tokens(SYSTEM_PROMPT) - 32)
+
 
 async def open_ai_analysis(
     age: int,
@@ -91,39 +83,22 @@ async def open_ai_analysis(
     additional_notes: Optional[str] = None,
     model: Optional[str] = None,
     acquire_timeout: Optional[float] = None,
+    user_id: Optional[str] = None,
+    priority: Priority = Priority.interactive,
+    meta: Optional[dict] = None,
 ) -> str:
     """
     Return a plain-text analysis from OpenAI.
+
+    Without an explicit `model`, the model tier is picked by the complexity router.
+    `user_id` and `priority` place the call in the slot scheduler's fair queue. If `meta`
+    is given it is filled with details about how the analysis was produced.
     """
-    model = model or OPENAI_MODEL
     acquire_timeout = acquire_timeout if acquire_timeout is not None else OPENAI_TIMEOUT_SEC
 
     system_msg = {
         "role": "system",
-        "content": (
-            """
-                You are an AI clinical assistant. Your purpose is to provide a helpful, preliminary analysis of patient symptoms. Your tone should be knowledgeable, reassuring, and clear.
-
-                Based on the patient data provided, you MUST generate a response formatted into these exact four sections:
-
-                # Potential Conditions
-                Confidently list 1-3 of the most probable conditions that match the symptoms, starting with the most likely. For each condition, provide a very brief (1-sentence) rationale. Frame these as possibilities for discussion with a healthcare professional.
-
-                # Explanation
-                In a concise paragraph, explain why these conditions are plausible based on the combination of symptoms, severity, and duration provided. If certain symptoms point more strongly to one condition over others, mention it here.
-
-                # Recommended Next Steps
-                Provide a clear, actionable list of next steps. This should include:
-                - Suggestions for at-home symptom management (e.g., rest, hydration, over-the-counter medications).
-                - Specific signs or "red flags" that should prompt the user to see a doctor immediately (e.g., "if the fever exceeds 103°F / 39.4°C").
-                - General advice to consult a healthcare professional for an accurate diagnosis.
-
-                # Disclaimer
-                Conclude your entire response with this exact, unmodified disclaimer: "Disclaimer: I am an AI assistant and not a medical professional. This analysis is for informational purposes only and is not a substitute for professional medical advice, diagnosis, or treatment. Always seek the advice of your physician or another qualified health provider with any questions you may have regarding a medical condition."
-
-                If the provided symptoms are too vague or insufficient to form a reasonable list of potential conditions, you must state that and ask specific clarifying questions to get the necessary information.
-            """
-        ),
+        "content": SYSTEM_PROMPT,
     }
 
     user_payload = {
@@ -134,50 +109,59 @@ async def open_ai_analysis(
         "severity": severity,
         "additional_notes": additional_notes or "",
     }
+    # Route on the full input: a payload that needed trimming is not a simple request
+    if model is None:
+        decision = _ROUTER.route(user_payload, source="text")
+        model = decision.model
+        if meta is not None:
+            meta["routing"] = decision.as_meta(_ROUTER.policy)
+    if meta is not None:
+        meta["model"] = model
+
+    user_payload, budget_report = fit_to_budget(user_payload, _PAYLOAD_TOKEN_BUDGET)
+    if budget_report:
+        logger.info("Symptom payload trimmed from %d to %d tokens", budget_report["original_tokens"], budget_report["final_tokens"])
+        if meta is not None:
+            meta["input_budget"] = budget_report
+
     user_msg = {
         "role": "user",
         "content": f"Patient data:\n{json.dumps(user_payload, ensure_ascii=False)}\n\nProvide a concise plain-text analysis.",
     }
 
-    # Acquire semaphore with timeout so callers can fail fast if system is overloaded
+    # Acquire a call slot with timeout so callers can fail fast if system is overloaded
     try:
-        await asyncio.wait_for(_SEMAPHORE.acquire(), timeout=acquire_timeout)
+        await _SCHEDULER.acquire(user_id, priority, timeout=acquire_timeout)
     except asyncio.TimeoutError as e:
-        logger.warning("Too many concurrent OpenAI requests; semaphore acquire timed out")
+        logger.warning("Too many concurrent OpenAI requests; slot acquire timed out (priority=%s)", priority.name)
         raise OpenAITransientError("Too many concurrent OpenAI requests; try again later") from e
 
     try:
-        try:
-            resp = await _call_openai_chat([system_msg, user_msg], model=model, timeout=30)
-        except RateLimitError as e:
-            logger.warning("OpenAI rate limit exhausted after retries")
-            raise OpenAIRateLimitError("OpenAI rate limit reached") from e
-        except APITimeoutError as e:
-            raise OpenAITimeoutError("OpenAI timeout") from e
-        except AuthenticationError as e:
-            raise OpenAIAuthError("OpenAI authentication failed") from e
-        except (APIConnectionError, APIError) as e:
-            raise OpenAITransientError("OpenAI transient error") from e
-        except RetryError as e:
-            logger.exception("OpenAI retries exhausted: %s", e)
-            raise OpenAIUnavailableError("OpenAI retries exhausted") from e
-
-        try:
-            content = resp.choices[0].message.content
-            analysis_text = str(content).strip()
-        except Exception:
+        if OPENAI_STRUCTURED_OUTPUT:
+            structured_msgs = [
+                {"role": "system", "content": STRUCTURED_SYSTEM_PROMPT},
+                {"role": "user", "content": f"Patient data:\n{json.dumps(user_payload, ensure_ascii=False)}"},
+            ]
+            content = await complete_hedged(structured_msgs, model=model, scheduler=_SCHEDULER, hedger=_HEDGER, response_format=STRUCTURED_RESPONSE_FORMAT, meta=meta)
             try:
-                resp_dict = resp.to_dict() if hasattr(resp, "to_dict") else dict(resp)
-                analysis_text = resp_dict["choices"][0]["message"]["content"]
-            except Exception:
-                logger.exception("Unexpected OpenAI response shape: %s", resp)
-                raise OpenAIUnavailableError("Invalid response from OpenAI")
+                structured = parse_structured_analysis(content)
+            except ValueError as e:
+                logger.warning("Structured analysis rejected (%s); retrying with the markdown prompt", e)
+            else:
+                if meta is not None:
+                    meta["output_format"] = "structured"
+                    meta["structured"] = structured.model_dump()
+                return render_markdown(structured)
+
+        analysis_text = await complete_hedged([system_msg, user_msg], model=model, scheduler=_SCHEDULER, hedger=_HEDGER, meta=meta)
 
         if not analysis_text:
             logger.warning("OpenAI returned empty content; using fallback text")
             return "Analysis unavailable at the moment; please try again later."
 
+        if meta is not None:
+            meta["output_format"] = "markdown"
         return analysis_text
 
     finally:
-        _SEMAPHORE.release()
+        _SCHEDULER.release(user_id)
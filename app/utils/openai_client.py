@@ -0,0 +1,188 @@
+import time
+import logging
+from typing import Any, Optional
+
+from openai import (
+    AsyncOpenAI,
+    APIError,
+    APIConnectionError,
+    RateLimitError,
+    APITimeoutError,
+    AuthenticationError,
+    OpenAIError,
+)
+
+from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type, RetryError
+
+from app.exceptions.openai_exceptions import (
+    OpenAIAuthError,
+    OpenAIRateLimitError,
+    OpenAITransientError,
+    OpenAITimeoutError,
+    OpenAIUnavailableError,
+)
+
+from app.core.metrics import REGISTRY, Counter, Histogram
+from app.core.openai_config import openai_settings
+from app.utils.llm_hedging import Hedger
+from app.utils.llm_scheduler import FairScheduler
+
+logger = logging.getLogger(__name__)
+
+CALL_SECONDS = REGISTRY.register(Histogram(
+    "openai_call_seconds",
+    "Time for one chat completion attempt (retries are observed separately), by model",
+))
+ERRORS = REGISTRY.register(Counter(
+    "openai_errors_total",
+    "Symptom checks that failed with an OpenAI error, by exception type and endpoint",
+))
+
+# One client, and so one HTTP connection pool, for the text and OCR analyses
+_client: Optional[AsyncOpenAI] = None
+
+
+def get_client() -> AsyncOpenAI:
+    """The process's OpenAI client, created on first use (its TLS setup costs a few tens of ms)."""
+    global _client
+    if _client is None:
+        _client = AsyncOpenAI(api_key=openai_settings.OPENAI_API_KEY)
+    return _client
+
+
+async def warm_up(timeout: float) -> None:
+    """Open a connection to the API ahead of the first analysis. Retrieving a model costs no tokens."""
+    await get_client().models.retrieve(openai_settings.OPENAI_MODEL, timeout=timeout)
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+
+# Tenacity retry conditions
+retry_on = (
+    retry_if_exception_type(APIConnectionError)
+    | retry_if_exception_type(APIError)
+    | retry_if_exception_type(RateLimitError)
+    | retry_if_exception_type(APITimeoutError)
+)
+
+@retry(
+    reraise=True,
+    stop=stop_after_attempt(4),
+    wait=wait_exponential(multiplier=1, min=1, max=8),
+    retry=retry_on,
+)
+async def _call_openai_chat(messages: list[dict], model: str, timeout: int = 30, max_tokens: int = 600, response_format: Optional[dict] = None) -> Any:
+    """
+    Low-level OpenAI chat call with retries for transient errors.
+    """
+    started = time.perf_counter()
+    try:
+        resp = await get_client().chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=0.2,
+            max_tokens=max_tokens,
+            timeout=timeout,
+            **({"response_format": response_format} if response_format else {}),
+        )
+        return resp
+    except AuthenticationError as e:
+        # Auth error, will not be retryable
+        logger.exception("OpenAI authentication failed")
+        raise 
+    except RateLimitError as e:
+        # let tenacity retry this; if it still fails it'll propagate here after retries exhausted
+        logger.warning("OpenAI rate limit error (will be retried by decorator): %s", e)
+        raise
+    except APITimeoutError as e:
+        logger.warning("OpenAI request timed out: %s", e)
+        raise
+    except (APIConnectionError, APIError) as e:
+        logger.warning("OpenAI transient/API error (will be retried): %s", e)
+        raise
+    except OpenAIError as e:
+        logger.exception("Unexpected OpenAI SDK error")
+        raise OpenAIUnavailableError("OpenAI service error") from e
+    finally:
+        CALL_SECONDS.observe(time.perf_counter() - started, {"model": model})
+
+async def complete(messages: list[dict], model: str, max_tokens: int = 600, response_format: Optional[dict] = None) -> str:
+    """
+    Run one chat completion and map SDK errors onto our OpenAI* exceptions.
+    """
+    try:
+        resp = await _call_openai_chat(messages, model=model, timeout=30, max_tokens=max_tokens, response_format=response_format)
+    except RateLimitError as e:
+        logger.warning("OpenAI rate limit exhausted after retries")
+        raise OpenAIRateLimitError("OpenAI rate limit reached") from e
+    except APITimeoutError as e:
+        raise OpenAITimeoutError("OpenAI timeout") from e
+    except AuthenticationError as e:
+        raise OpenAIAuthError("OpenAI authentication failed") from e
+    except (APIConnectionError, APIError) as e:
+        raise OpenAITransientError("OpenAI transient error") from e
+    except RetryError as e:
+        logger.exception("OpenAI retries exhausted: %s", e)
+        raise OpenAIUnavailableError("OpenAI retries exhausted") from e
+
+    try:
+        content = resp.choices[0].message.content
+        return str(content).strip()
+    except Exception:
+        try:
+            resp_dict = resp.to_dict() if hasattr(resp, "to_dict") else dict(resp)
+            return resp_dict["choices"][0]["message"]["content"]
+        except Exception:
+            logger.exception("Unexpected OpenAI response shape: %s", resp)
+            raise OpenAIUnavailableError("Invalid response from OpenAI")
+
+
+async def _hedge(messages: list[dict], model: str, scheduler: FairScheduler, response_format: Optional[dict] = None) -> str:
+    """
+    The hedge's complete(), on a call slot of its own so hedging never exceeds the scheduler's capacity.
+    Only takes a free slot nobody is queued for; otherwise the hedge fails and the primary call is awaited.
+    """
+    if not scheduler.try_acquire():
+        raise OpenAITransientError("No free call slot for a hedge")
+    try:
+        return await complete(messages, model=model, response_format=response_format)
+    finally:
+        scheduler.release()
+
+
+async def complete_hedged(messages: list[dict], model: str, scheduler: FairScheduler, hedger: Hedger,
+                          response_format: Optional[dict] = None, meta: Optional[dict] = None) -> str:
+    """
+    complete() with tail-latency hedging and a fallback model for failed calls.
+
+    `scheduler` is the caller's slot scheduler, which hedges take their own slot from, and
+    `hedger` tracks that caller's latencies and hedge budget.
+    """
+    fallback_model = openai_settings.OPENAI_FALLBACK_MODEL or model
+    try:
+        if not openai_settings.OPENAI_HEDGE_ENABLED:
+            return await complete(messages, model=model, response_format=response_format)
+        content, from_hedge = await hedger.run(
+            lambda: complete(messages, model=model, response_format=response_format),
+            lambda: _hedge(messages, model=fallback_model, scheduler=scheduler, response_format=response_format),
+            can_hedge=lambda: not scheduler.saturated,
+        )
+    except (OpenAIRateLimitError, OpenAITimeoutError, OpenAITransientError, OpenAIUnavailableError):
+        if fallback_model == model:
+            raise
+        logger.warning("OpenAI call on %s failed; falling back to %s", model, fallback_model)
+        content = await complete(messages, model=fallback_model, response_format=response_format)
+        if meta is not None:
+            meta["model"] = fallback_model
+            meta["fallback"] = True
+        return content
+
+    if from_hedge and meta is not None:
+        meta["model"] = fallback_model
+        meta["hedged"] = True
+    return content
@@ -0,0 +1,91 @@
+import base64
+import datetime
+import json
+import uuid
+from typing import Optional, Tuple
+
+DEFAULT_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 100
+
+# Watermark a client syncs from when it has nothing yet
+SYNC_FROM_START = "0"
+
+
+def encode_cursor(submitted_at: datetime.datetime, item_id: uuid.UUID) -> str:
+    """Opaque keyset cursor pointing just past (submitted_at, id) in newest-first order."""
+    raw = json.dumps({"t": submitted_at.isoformat(), "id": str(item_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime.datetime, uuid.UUID]:
+    """Inverse of encode_cursor. Raises ValueError("invalid_cursor") for anything malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        submitted_at = datetime.datetime.fromisoformat(data["t"])
+        item_id = uuid.UUID(data["id"])
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValueError("invalid_cursor") from e
+    if submitted_at.tzinfo is None:
+        raise ValueError("invalid_cursor")
+    return submitted_at, item_id
+
+
+def encode_search_cursor(rank: float, submitted_at: datetime.datetime, item_id: uuid.UUID) -> str:
+    """Like encode_cursor, for search results ordered by (rank, submitted_at, id) descending."""
+    raw = json.dumps({"r": rank, "t": submitted_at.isoformat(), "id": str(item_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_search_cursor(cursor: str) -> Tuple[float, datetime.datetime, uuid.UUID]:
+    """Inverse of encode_search_cursor. Raises ValueError("invalid_cursor") for anything malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        rank = float(data["r"])
+        submitted_at = datetime.datetime.fromisoformat(data["t"])
+        item_id = uuid.UUID(data["id"])
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValueError("invalid_cursor") from e
+    if submitted_at.tzinfo is None:
+        raise ValueError("invalid_cursor")
+    return rank, submitted_at, item_id
+
+
+def next_page(rows: list, limit: int) -> Tuple[list, Optional[str]]:
+    """Split a `limit + 1` fetch into the page and the cursor for the next one, if any."""
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    last = page[-1]
+    return page, encode_cursor(last.submitted_at, last.id)
+
+
+def next_search_page(rows: list, limit: int) -> Tuple[list, Optional[str]]:
+    """next_page for search results, whose rows carry a `rank`."""
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    last = page[-1]
+    return page, encode_search_cursor(last.rank, last.submitted_at, last.id)
+
+
+def decode_watermark(watermark: str) -> Tuple[datetime.datetime, uuid.UUID]:
+    """
+    Delta-sync position (updated_at, id) from a watermark. Watermarks use the cursor encoding;
+    SYNC_FROM_START means before everything. Raises ValueError("invalid_watermark").
+    """
+    if watermark == SYNC_FROM_START:
+        return datetime.datetime.min.replace(tzinfo=datetime.timezone.utc), uuid.UUID(int=0)
+    try:
+        return decode_cursor(watermark)
+    except ValueError as e:
+        raise ValueError("invalid_watermark") from e
+
+
+def next_watermark(rows: list, since: str) -> str:
+    """Watermark just past the last change in `rows` (which end with updated_at), or `since` if there were none."""
+    if not rows:
+        return since
+    last = rows[-1]
+    return encode_cursor(last.updated_at, last.id)
@@ -1,18 +1,23 @@
 import secrets
+from functools import lru_cache
 from cryptography.fernet import InvalidToken, Fernet
-from passlib.context import CryptContext
 from datetime import datetime, timedelta, timezone
 from app.core.db_config import db_settings
 
-pwd_ctx = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 FERNET = Fernet(db_settings.FERNET_KEY)
 
+@lru_cache(maxsize=1)
+def _pwd_ctx():
+    # Only signup and signin need passlib, so workers import it on first use
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+
 # Password helpers
 def hash_password(plain: str) -> str:
-    return pwd_ctx.hash(plain)
+    return _pwd_ctx().hash(plain)
 
 def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_ctx.verify(plain, hashed)
+    return _pwd_ctx().verify(plain, hashed)
 
 # API Key helpers
 def generate_api_key_hex(nbytes: int = 32) -> str:
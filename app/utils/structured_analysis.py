@@ -0,0 +1,66 @@
+import json
+from typing import Optional
+
+from pydantic import ValidationError
+
+from app.schemas.structured_analysis import StructuredAnalysis
+
+DISCLAIMER = (
+    "Disclaimer: I am an AI assistant and not a medical professional. This analysis is for informational purposes only "
+    "and is not a substitute for professional medical advice, diagnosis, or treatment. Always seek the advice of your "
+    "physician or another qualified health provider with any questions you may have regarding a medical condition."
+)
+
+# Same clinical guidance as the markdown prompt, minus formatting and the verbatim disclaimer,
+# which are rendered server-side
+STRUCTURED_SYSTEM_PROMPT = (
+    "You are an AI clinical assistant giving a preliminary, reassuring and clear analysis of patient symptoms. "
+    "Reply with a single JSON object and nothing else, using exactly these keys:\n"
+    '{"conditions": [{"name": str, "rationale": str}], "explanation": str, "next_steps": [str], '
+    '"red_flags": [str], "clarifying_questions": [str]}\n'
+    "- conditions: 1-3 most probable conditions, most likely first, each with a one-sentence rationale.\n"
+    "- explanation: one concise paragraph on why they fit the symptoms, severity and duration.\n"
+    "- next_steps: at-home management and advice to consult a healthcare professional.\n"
+    '- red_flags: specific signs that need a doctor immediately (e.g. "fever above 103°F / 39.4°C").\n'
+    "- clarifying_questions: only if the data is too vague to list conditions; then leave conditions empty.\n"
+    "Be brief. Do not include a disclaimer."
+)
+
+STRUCTURED_RESPONSE_FORMAT = {"type": "json_object"}
+
+
+def parse_structured_analysis(content: Optional[str]) -> StructuredAnalysis:
+    """Validate a model reply against the structured schema. Raises ValueError if it does not conform."""
+    if not content:
+        raise ValueError("empty structured analysis")
+    try:
+        analysis = StructuredAnalysis.model_validate(json.loads(content))
+    except (json.JSONDecodeError, ValidationError) as e:
+        raise ValueError(f"invalid structured analysis: {e}") from e
+    if not analysis.conditions and not analysis.clarifying_questions:
+        raise ValueError("structured analysis has neither conditions nor clarifying questions")
+    return analysis
+
+
+def render_markdown(analysis: StructuredAnalysis) -> str:
+    """Render a structured analysis into the same four-section markdown the free-text prompt produces."""
+    sections = []
+
+    if analysis.conditions:
+        lines = [f"{i}. **{c.name}**: {c.rationale}" for i, c in enumerate(analysis.conditions, start=1)]
+        sections.append("# Potential Conditions\n" + "\n".join(lines))
+    else:
+        lines = [f"- {q}" for q in analysis.clarifying_questions]
+        sections.append(
+            "# Potential Conditions\nThe information provided is not enough to suggest likely conditions. "
+            "Please help clarify:\n" + "\n".join(lines)
+        )
+
+    sections.append("# Explanation\n" + analysis.explanation.strip())
+
+    steps = [f"- {step}" for step in analysis.next_steps]
+    steps += [f"- Seek medical care immediately if: {flag}" for flag in analysis.red_flags]
+    sections.append("# Recommended Next Steps\n" + "\n".join(steps))
+
+    sections.append("# Disclaimer\n" + DISCLAIMER)
+    return "\n\n".join(sections)
@@ -0,0 +1,135 @@
+import json
+import math
+import re
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+# Words, numbers and single punctuation marks; long words cost roughly one token per 4 characters,
+# which tracks the GPT-4o tokenizer closely enough for budgeting without shipping a tokenizer
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+TRUNCATION_MARKER = " …[truncated]"
+
+# Relevance tiers for OCR/intake fields, matched as substrings of the lower-cased key.
+# Lower tier = more clinically relevant = trimmed last.
+_PROTECTED_FIELDS = {"age", "sex", "gender"}
+_FIELD_TIERS: Tuple[Tuple[int, Tuple[str, ...]], ...] = (
+    (1, ("chief_complaint", "complaint", "symptom", "severity", "onset", "duration", "diagnos", "pain")),
+    (2, ("temp", "heart_rate", "pulse", "blood_pressure", "bp", "spo2", "oxygen", "respiratory", "resp_rate",
+         "wbc", "rbc", "hemoglobin", "hgb", "platelet", "glucose", "crp", "creatinine", "sodium", "potassium", "lab")),
+    (3, ("medication", "allerg", "history", "pregnan", "weight", "height", "bmi")),
+    (4, ("note", "comment", "remark", "observation", "narrative", "summary", "description")),
+    (6, ("name", "address", "phone", "email", "insurance", "mrn", "record_number", "patient_id", "date", "signature",
+         "clinic", "provider", "physician_name", "facility", "page", "fax")),
+)
+_UNKNOWN_TIER = 5
+_PROTECTED_TIER = 0
+
+# Strings are never truncated below this many tokens
+_MIN_TRUNCATED_TOKENS = 24
+# Headroom for JSON quoting/escaping that the per-field estimate doesn't see
+_TRUNCATION_SLACK = 8
+
+
+def count_tokens(text: str) -> int:
+    """Approximate the number of model tokens in `text`."""
+    return sum(max(1, math.ceil(len(piece) / 4)) for piece in _TOKEN_RE.findall(text))
+
+
+def count_payload_tokens(payload: Dict[str, Any]) -> int:
+    """Approximate tokens of a payload as it is rendered into the prompt."""
+    return count_tokens(json.dumps(payload, ensure_ascii=False))
+
+
+def field_tier(key: str) -> int:
+    """Relevance tier of a field name. Lower is more relevant."""
+    lowered = key.lower()
+    if lowered in _PROTECTED_FIELDS:
+        return _PROTECTED_TIER
+    for tier, patterns in _FIELD_TIERS:
+        if any(pattern in lowered for pattern in patterns):
+            return tier
+    return _UNKNOWN_TIER
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    """Cut `text` to roughly `max_tokens`, on a word boundary."""
+    used = 0
+    for match in _TOKEN_RE.finditer(text):
+        used += max(1, math.ceil(len(match.group()) / 4))
+        if used > max_tokens:
+            return text[:match.start()].rstrip() + TRUNCATION_MARKER
+    return text
+
+
+def _field_cost(key: str, value: Any) -> int:
+    """Tokens a single `"key": value, ` entry adds to the rendered payload."""
+    return count_tokens(json.dumps({key: value}, ensure_ascii=False)) - 1
+
+
+def fit_to_budget(payload: Dict[str, Any], max_tokens: int, protected: Iterable[str] = ()) -> Tuple[Dict[str, Any], Optional[dict]]:
+    """
+    Trim `payload` so it renders to at most `max_tokens`, dropping the least relevant data first.
+
+    Administrative fields (names, addresses, ids) are elided first, then long strings in other
+    low-relevance fields (notes, history, unknown keys) are truncated and those fields elided.
+    Only then are clinical strings truncated and, finally, vitals and labs elided. Tier-0
+    fields, tier-1 fields and `protected` keys are never removed. Returns the trimmed payload
+    and a report of what was trimmed, or None if the payload already fit.
+    """
+    # Track per-field cost so each step is O(field) rather than re-rendering the whole payload.
+    # Each entry is charged one brace/comma; the closing brace is the +1.
+    costs = {key: _field_cost(key, value) for key, value in payload.items()}
+    total = original_tokens = 1 + sum(costs.values())
+    if original_tokens <= max_tokens:
+        return payload, None
+
+    protected = set(protected)
+    trimmed = dict(payload)
+    report = {"original_tokens": original_tokens, "max_tokens": max_tokens, "truncated": {}, "elided": []}
+
+    # Least relevant first; among equals, biggest first
+    order = sorted(trimmed, key=lambda k: (field_tier(k), costs[k]), reverse=True)
+    admin = [k for k in order if field_tier(k) == 6 and k not in protected]
+    low = [k for k in order if 3 <= field_tier(k) < 6 and k not in protected]
+    clinical = [k for k in order if field_tier(k) in (1, 2) and k not in protected]
+
+    def truncate_pass(keys):
+        nonlocal total
+        for key in keys:
+            excess = total - max_tokens
+            if excess <= 0:
+                return
+            value = trimmed[key]
+            if not isinstance(value, str):
+                continue
+            value_tokens = count_tokens(value)
+            target = max(_MIN_TRUNCATED_TOKENS, value_tokens - excess - count_tokens(TRUNCATION_MARKER) - _TRUNCATION_SLACK)
+            if target >= value_tokens:
+                continue
+            trimmed[key] = _truncate(value, target)
+            new_cost = _field_cost(key, trimmed[key])
+            total += new_cost - costs[key]
+            costs[key] = new_cost
+            report["truncated"].setdefault(key, value_tokens)
+
+    def elide_pass(keys):
+        nonlocal total
+        for key in keys:
+            if total <= max_tokens:
+                return
+            del trimmed[key]
+            total -= costs.pop(key)
+            report["elided"].append(key)
+            report["truncated"].pop(key, None)
+
+    # 1. Drop administrative fields, then truncate and drop other low-relevance fields
+    elide_pass(admin)
+    truncate_pass(low)
+    elide_pass(low)
+
+    # 2. Truncate clinical free text, then drop vitals and labs
+    truncate_pass(clinical)
+    elide_pass([k for k in clinical if field_tier(k) == 2])
+
+    report["final_tokens"] = total
+    return trimmed, report
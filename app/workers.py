@@ -0,0 +1,10 @@
+from uvicorn.workers import UvicornWorker as _UvicornWorker
+
+
+class UvicornWorker(_UvicornWorker):
+    """Gunicorn worker (see gunicorn.conf.py) serving the app on uvloop with the httptools parser.
+
+    Named explicitly rather than left to uvicorn's "auto", so a missing uvloop or httptools
+    fails the worker at boot instead of silently falling back to asyncio and h11.
+    """
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools", "lifespan": "on"}
@@ -0,0 +1,177 @@
+"""Measure what dictionary compression of analysis text saves and what it costs to read.
+
+Seeds 200k completed text checks over 2,000 users in a scratch schema (see
+benchmarks/pg_scratch.py). Their analyses follow the prompt's four sections with varying
+conditions, durations, advice and free-text sentences. Prints the table size and the
+history page time with the analyses stored as text, where Postgres compresses only those
+over its ~2 KB TOAST threshold. Then it runs app.db.analysis_compression's train and
+recompress and prints the same numbers again, plus the Python cost of compressing and
+decoding one analysis. Run from the project root:
+
+    BENCHMARK_DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.analysis_compression
+"""
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import text
+
+from benchmarks.pg_scratch import scratch_schema
+from app.crud.symptom import get_symptom_checkby_user_id
+from app.db.analysis_compression import recompress_table, report, train
+from app.models.symptoms import Symptom
+from app.utils import analysis_codec
+
+ROWS = 200_000
+USERS = 2_000
+REPEATS = 50
+
+SEED_SQL = """
+INSERT INTO users (id, email, username, password_hash, api_key_enc)
+SELECT gen_random_uuid(), 'u' || i || '@bench', 'u' || i, 'x', 'k' || i FROM generate_series(1, CAST(:users AS int)) AS i;
+
+CREATE TEMP TABLE bench_users AS SELECT id, row_number() OVER (ORDER BY username) AS n FROM users;
+
+CREATE TEMP TABLE words AS SELECT ARRAY[
+    'cough', 'fever', 'fatigue', 'sore throat', 'headache', 'nausea', 'chest tightness', 'runny nose', 'body aches',
+    'shortness of breath', 'dizziness', 'chills', 'congestion', 'wheezing', 'abdominal pain', 'rash', 'joint pain',
+    'light sensitivity', 'loss of appetite', 'night sweats'
+] AS symptoms, ARRAY[
+    'Viral upper respiratory infection', 'Influenza', 'Acute bronchitis', 'Migraine', 'Tension headache',
+    'Gastroenteritis', 'Community-acquired pneumonia', 'Allergic rhinitis', 'Acute sinusitis', 'Urinary tract infection',
+    'Costochondritis', 'COVID-19', 'Strep throat', 'Asthma exacerbation', 'Mononucleosis'
+] AS conditions, ARRAY[
+    'Over-the-counter acetaminophen or ibuprofen can relieve pain and fever; follow the package directions.',
+    'Saline nasal rinses and a humidifier can ease congestion.',
+    'Small, frequent meals and oral rehydration solutions help with nausea.',
+    'Avoid screens and bright light and rest in a quiet, dark room during attacks.',
+    'Honey in warm water or tea can soothe a cough; do not give honey to children under one year.',
+    'Track your temperature twice a day and note any new symptoms.'
+] AS advice, ARRAY[
+    'difficulty breathing, chest pain, confusion, or a fever above 103°F / 39.4°C',
+    'a stiff neck, sudden severe headache, or vision changes',
+    'blood in your stool or vomit, or signs of dehydration such as dizziness and very little urine',
+    'lips or fingertips turning blue, or oxygen saturation below 92% on a home monitor',
+    'a rash that does not fade when pressed, or swelling of the face or throat'
+] AS red_flags;
+
+INSERT INTO symptoms (user_id, age, sex, symptoms, duration, severity, analysis, submitted_at, status)
+SELECT b.id, 18 + g % 60, 'female', s1 || ', ' || s2, d || ' days', sev, concat_ws(E'\\n',
+    '# Potential Conditions',
+    '1. **' || c1 || '**: The combination of ' || s1 || ' and ' || s2 || ' over ' || d || ' days is consistent with ' || lower(c1) || '.',
+    '2. **' || c2 || '**: ' || s3 || ' with a severity of ' || sev || '/10 can also point to ' || lower(c2) || '.',
+    '', '# Explanation',
+    'Your ' || s1 || ', ' || s2 || ' and ' || s3 || ' lasting ' || d || ' days suggest ' || lower(c1)
+        || ' as the most likely cause, although ' || lower(c2) || ' cannot be ruled out without an examination. '
+        || 'You mentioned ' || s4 || ' starting around day ' || (1 + g % d) || ', which '
+        || (ARRAY['fits a viral illness that usually resolves within one to two weeks.',
+                  'points more strongly to an inflammatory process than an infection.',
+                  'makes an infectious cause more likely because of how suddenly it began.',
+                  'is common with this condition and should improve with rest.'])[1 + g % 4],
+    '', '# Recommended Next Steps',
+    '- Rest and stay well hydrated; aim for at least 2 liters of fluids per day.',
+    '- ' || a1, '- ' || a2,
+    '- Seek medical care immediately if you develop ' || rf || '.',
+    '- If symptoms do not improve within ' || (3 + g % 8) || ' days, consult a healthcare professional for an accurate diagnosis.',
+    '', '# Disclaimer',
+    'Disclaimer: I am an AI assistant and not a medical professional. This analysis is for informational purposes only '
+        || 'and is not a substitute for professional medical advice, diagnosis, or treatment. Always seek the advice of your '
+        || 'physician or another qualified health provider with any questions you may have regarding a medical condition.'
+), now() - g * interval '1 minute', 'completed'
+FROM generate_series(1, CAST(:rows AS int)) AS g
+JOIN bench_users b ON b.n = 1 + g % CAST(:users AS int)
+CROSS JOIN words w
+CROSS JOIN LATERAL (SELECT
+    w.symptoms[1 + (g * 7) % 20] AS s1, w.symptoms[1 + (g * 11 + 3) % 20] AS s2,
+    w.symptoms[1 + (g * 13 + 5) % 20] AS s3, w.symptoms[1 + (g * 17 + 9) % 20] AS s4,
+    w.conditions[1 + (g * 5) % 15] AS c1, w.conditions[1 + (g * 3 + 7) % 15] AS c2,
+    w.advice[1 + g % 6] AS a1, w.advice[1 + (g / 6) % 6] AS a2, w.red_flags[1 + (g / 7) % 5] AS rf,
+    1 + g % 14 AS d, 1 + (g * 3) % 10 AS sev
+) AS pick
+"""
+
+INDEX = (
+    "CREATE INDEX symptoms_user_completed_submitted_at_idx ON symptoms "
+    "(user_id, submitted_at DESC, id DESC) WHERE status = 'completed'"
+)
+
+# Heap plus TOAST of the rows, without indexes
+SIZE_SQL = "SELECT pg_table_size('symptoms_default'), sum(pg_column_size(analysis)), sum(pg_column_size(analysis_zstd)) FROM symptoms"
+
+
+async def _vacuum(engine, full: bool = False):
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text(f"VACUUM {'FULL ' if full else ''}ANALYZE symptoms_default"))
+
+
+async def _pages(Session, user_id) -> dict:
+    out = {}
+    async with Session() as session:
+        for limit in (20, 100):
+            await get_symptom_checkby_user_id(session, user_id=user_id, limit=limit)  # warm up
+            samples = []
+            for _ in range(REPEATS):
+                started = time.perf_counter()
+                await get_symptom_checkby_user_id(session, user_id=user_id, limit=limit)
+                samples.append(time.perf_counter() - started)
+            out[limit] = statistics.median(samples) * 1000
+    return out
+
+
+def _print_state(label: str, sizes, pages: dict):
+    table_bytes, plain_bytes, packed_bytes = sizes
+    print(f"\n{label}")
+    print(f"  table (heap + TOAST)        {table_bytes / 2**20:>8.1f} MiB")
+    print(f"  analysis column, as stored  {((plain_bytes or 0) + (packed_bytes or 0)) / 2**20:>8.1f} MiB")
+    for limit, ms in pages.items():
+        print(f"  history page of {limit:<3}         {ms:>8.2f} ms")
+
+
+async def main():
+    async with scratch_schema() as (engine, Session):
+        started = time.perf_counter()
+        async with engine.begin() as conn:
+            for statement in SEED_SQL.strip().split(";\n\n"):
+                await conn.execute(text(statement), {"users": USERS, "rows": ROWS})
+            await conn.execute(text(INDEX))
+            user_id = (await conn.execute(text("SELECT id FROM users WHERE username = 'u1'"))).scalar_one()
+            raw = (await conn.execute(text("SELECT sum(octet_length(analysis)), avg(octet_length(analysis)) FROM symptoms"))).one()
+        await _vacuum(engine)
+        print(f"seeded {ROWS:,} checks in {time.perf_counter() - started:.0f}s; analyses average {raw[1]:.0f} bytes, {raw[0] / 2**20:.1f} MiB in all")
+
+        async with engine.connect() as conn:
+            plain = (await conn.execute(text(SIZE_SQL))).one()
+        _print_state("stored as text", plain, await _pages(Session, user_id))
+
+        started = time.perf_counter()
+        async with engine.begin() as conn:
+            version = await train(conn)
+        trained = time.perf_counter() - started
+        started = time.perf_counter()
+        counts = await recompress_table(engine, Symptom, version, batch_size=1000)
+        recompressed = time.perf_counter() - started
+        await _vacuum(engine, full=True)
+        print(f"\ntrained dictionary v{version} in {trained:.1f}s; recompressed in {recompressed:.0f}s: {counts}")
+
+        async with engine.connect() as conn:
+            packed = (await conn.execute(text(SIZE_SQL))).one()
+            stats = (await report(conn, sample=5000))["symptoms"]
+            texts = [row[0] for row in (await conn.execute(
+                text("SELECT analysis_zstd FROM symptoms WHERE analysis_zstd IS NOT NULL LIMIT 2000")
+            )).all()]
+        _print_state(f"compressed with dictionary v{version}", packed, await _pages(Session, user_id))
+
+        texts = [analysis_codec.decode(frame) for frame in texts]
+        started = time.perf_counter()
+        for analysis in texts:
+            analysis_codec.compress(analysis)
+        compress_us = (time.perf_counter() - started) / len(texts) * 1e6
+
+        print(f"\nframes {stats['ratio']:.1f}x smaller than their text; per analysis in Python: "
+              f"compress {compress_us:.1f}us, decode p50 {stats['decode_us_p50']:.1f}us / p99 {stats['decode_us_p99']:.1f}us")
+        print(f"table {plain[0] / packed[0]:.1f}x smaller")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,103 @@
+"""Cold start of a worker: import time, and time from process start to the first 200.
+
+Starts `uvicorn app.main:app` against a scratch database (see benchmarks/pg_scratch.py)
+and the Redis at REDIS_HOST/REDIS_PORT, with the startup warmup off and on, and polls an
+authenticated GET /symptom-history/ (user lookup, rate limiter, history query) until it
+returns 200. Prints, as medians of RUNS starts: the seconds until that first 200 and the
+latency of the first and the second history request. OpenAI warmup is left off unless
+BENCHMARK_OPENAI_WARMUP=true, since it needs a real OPENAI_API_KEY and network access.
+Run from the project root:
+
+    BENCHMARK_DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.cold_start
+"""
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-unused")
+
+import httpx
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from benchmarks.pg_scratch import scratch_database
+from app.utils.security import encrypt_api_key
+
+RUNS = 5
+API_KEY = "cold-start-key"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _import_seconds() -> float:
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import app.main"], check=True, env=os.environ)
+    return time.perf_counter() - started
+
+
+async def _new_user(url: str) -> str:
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        user_id = (await conn.execute(text(
+            "INSERT INTO users (id, email, username, password_hash, api_key_enc) "
+            "VALUES (gen_random_uuid(), gen_random_uuid() || '@bench', gen_random_uuid(), 'x', :key) RETURNING id"
+        ), {"key": encrypt_api_key(API_KEY)})).scalar_one()
+    await engine.dispose()
+    return str(user_id)
+
+
+async def _start(url: str, warmup: bool) -> tuple:
+    """(seconds to the first 200, first request latency, second request latency) of a fresh server."""
+    port = _free_port()
+    headers = {"X-User-ID": await _new_user(url), "X-API-Key": API_KEY}
+    env = {
+        **os.environ, "USER_DATABASE_URL": url, "STARTUP_WARMUP": str(warmup).lower(),
+        "OPENAI_WARMUP": os.getenv("BENCHMARK_OPENAI_WARMUP", "false"),
+    }
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL,
+    )
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=30) as client:
+            while True:
+                sent = time.perf_counter()
+                try:
+                    response = await client.get("/symptom-history/", headers=headers)
+                except httpx.TransportError:
+                    await asyncio.sleep(0.005)
+                    continue
+                response.raise_for_status()
+                break
+            ready, first = time.perf_counter() - started, time.perf_counter() - sent
+            sent = time.perf_counter()
+            (await client.get("/symptom-history/", headers=headers)).raise_for_status()
+            return ready, first, time.perf_counter() - sent
+    finally:
+        server.terminate()
+        server.wait()
+
+
+async def main():
+    imports = [_import_seconds() for _ in range(RUNS)]
+    print(f"import app.main: {statistics.median(imports) * 1000:.0f} ms (median of {RUNS})")
+
+    async with scratch_database() as url:
+        print(f"{'warmup':>6} {'first 200 s':>11} {'1st req ms':>10} {'2nd req ms':>10}")
+        for warmup in (False, True):
+            runs = [await _start(url, warmup) for _ in range(RUNS)]
+            ready, first, second = (statistics.median(column) for column in zip(*runs))
+            print(f"{'on' if warmup else 'off':>6} {ready:>11.2f} {first * 1000:>10.1f} {second * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
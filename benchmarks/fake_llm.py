@@ -0,0 +1,78 @@
+"""A local stand-in for the OpenAI chat API used by the benchmarks.
+
+Latency is modelled as time-to-first-token plus per-token prefill and decode cost,
+behind an upstream concurrency limit, so prompt and output size both show up in
+the measurements. Token counts are a rough 4-characters-per-token estimate.
+"""
+import asyncio
+import os
+import random
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+# Benchmarks import the real call modules, which need an API key to construct their client
+os.environ.setdefault("OPENAI_API_KEY", "sk-local-benchmark")
+
+CANNED_ANALYSIS = """# Potential Conditions
+1. **Viral upper respiratory infection**: Cough, mild fever and fatigue over several days are typical of a common cold or similar virus.
+2. **Acute bronchitis**: A persistent cough with low-grade fever can indicate inflammation of the bronchial tubes.
+3. **Influenza**: Fever with marked fatigue is consistent with flu, especially during flu season.
+
+# Explanation
+The combination of cough, low-grade fever and tiredness lasting a few days most commonly points to a self-limiting viral infection. The moderate severity and absence of breathing difficulty make a viral cause more likely than a bacterial pneumonia, while a cough that persists beyond the fever could suggest bronchitis.
+
+# Recommended Next Steps
+- Rest, drink plenty of fluids and consider over-the-counter fever reducers such as acetaminophen or ibuprofen.
+- Use honey or throat lozenges to soothe the cough, and a humidifier to ease congestion.
+- Seek care immediately if you develop shortness of breath, chest pain, a fever above 103°F / 39.4°C, or confusion.
+- See a healthcare professional if symptoms last more than 10 days or worsen after initially improving.
+
+# Disclaimer
+Disclaimer: I am an AI assistant and not a medical professional. This analysis is for informational purposes only and is not a substitute for professional medical advice, diagnosis, or treatment. Always seek the advice of your physician or another qualified health provider with any questions you may have regarding a medical condition."""
+
+def approx_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+@dataclass
+class FakeLLM:
+    concurrency: int = 4
+    ttft: float = 0.03
+    prefill_per_token: float = 0.00001
+    decode_per_token: float = 0.0002
+    # Optional extra latency sampler, e.g. to inject a heavy tail
+    extra_latency: Optional[Callable[[], float]] = None
+    responder: Optional[Callable[[List[dict]], str]] = None
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    calls: int = 0
+    _semaphore: asyncio.Semaphore = field(default=None, init=False, repr=False)
+
+    def _reply(self, messages: List[dict]) -> str:
+        if self.responder is not None:
+            return self.responder(messages)
+        return CANNED_ANALYSIS
+
+    async def complete(self, messages: List[dict], **_kwargs) -> str:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        async with self._semaphore:
+            prompt = sum(approx_tokens(m["content"]) for m in messages)
+            reply = self._reply(messages)
+            completion = approx_tokens(reply)
+            delay = self.ttft + prompt * self.prefill_per_token + completion * self.decode_per_token
+            if self.extra_latency is not None:
+                delay += self.extra_latency()
+            await asyncio.sleep(delay)
+
+            self.calls += 1
+            self.prompt_tokens += prompt
+            self.completion_tokens += completion
+            return reply
+
+
+def lognormal_tail(median: float, sigma: float) -> Callable[[], float]:
+    """Latency sampler with a long right tail around `median` seconds."""
+    import math
+    mu = math.log(median)
+    return lambda: random.lognormvariate(mu, sigma)
@@ -0,0 +1,62 @@
+"""Compare tail latency of plain vs hedged analysis calls against an upstream with a heavy tail.
+
+The local fake LLM adds a lognormal delay to every call, so a few calls are many times
+slower than the median. Hedged calls race a second request once the first is slower
+than the recent p95, within a 5% extra-call budget. Run from the project root:
+
+    python -m benchmarks.hedging_tail
+"""
+import asyncio
+import random
+import statistics
+import time
+
+from benchmarks.fake_llm import FakeLLM, lognormal_tail
+from app.utils.llm_hedging import Hedger, HedgeBudget
+
+CALLS = 2000
+CONCURRENCY = 50
+MESSAGES = [{"role": "system", "content": "You are a clinical assistant."}, {"role": "user", "content": "Patient data: {}"}]
+
+
+def _upstream() -> FakeLLM:
+    # Median ~40ms on top of decode time, with a 1-2% chance of a multi-second stall
+    tail = lognormal_tail(0.04, 0.4)
+    stall = lambda: tail() + (random.uniform(1.0, 3.0) if random.random() < 0.015 else 0.0)
+    return FakeLLM(concurrency=CONCURRENCY * 2, extra_latency=stall)
+
+
+async def _run(hedger):
+    llm = _upstream()
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            if hedger is None:
+                await llm.complete(MESSAGES)
+            else:
+                await hedger.run(lambda: llm.complete(MESSAGES), lambda: llm.complete(MESSAGES))
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one() for _ in range(CALLS)))
+    cuts = statistics.quantiles(latencies, n=100)
+    return cuts[49], cuts[98], max(latencies)
+
+
+async def main():
+    random.seed(11)
+    plain = await _run(None)
+    hedger = Hedger(percentile=95, budget=HedgeBudget(ratio=0.05), initial_delay=0.2, min_delay=0.05)
+    hedged = await _run(hedger)
+
+    print(f"{CALLS} calls, concurrency {CONCURRENCY}")
+    print(f"{'mode':<8}{'p50':>9}{'p99':>9}{'max':>9}{'extra calls':>13}")
+    print(f"{'plain':<8}{plain[0]*1000:>7.0f}ms{plain[1]*1000:>7.0f}ms{plain[2]*1000:>7.0f}ms{0:>12.1%}")
+    print(f"{'hedged':<8}{hedged[0]*1000:>7.0f}ms{hedged[1]*1000:>7.0f}ms{hedged[2]*1000:>7.0f}ms{hedger.hedges / hedger.calls:>12.1%}")
+    print(f"hedge wins: {hedger.hedge_wins}/{hedger.hedges}, final hedge delay {hedger.delay*1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
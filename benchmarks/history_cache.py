@@ -0,0 +1,159 @@
+"""Measure the history read cache: hit ratio, database queries saved and latency.
+
+Drives GET /symptom-history/ through the real app (httpx ASGI transport) against a
+scratch Postgres schema (see benchmarks/pg_scratch.py) and a Redis database given by
+BENCHMARK_REDIS_URL (default redis://localhost:6379/15, flushed before each run).
+Users poll their history with a skewed popularity; a few percent of requests are
+followed by a completed check, which invalidates that user's cached page the way
+process_symptom_check does. Rate limits are disabled. Run from the project root:
+
+    BENCHMARK_DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.history_cache
+"""
+import asyncio
+import os
+import random
+import statistics
+import time
+
+import httpx
+import redis.asyncio as redis
+from sqlalchemy import event, text
+
+from benchmarks.pg_scratch import scratch_schema
+from app.main import app
+from app.db.session import get_session
+from app.db.redis_session import get_redis_client
+from app.api.routers.symptom_history import symptom_history_rate_limiter
+from app.utils.history_cache import symptom_history_cache
+from app.utils.security import encrypt_api_key
+
+USERS = 200
+ROWS_PER_USER = 60
+REQUESTS = 4000
+CONCURRENCY = 32
+WRITE_RATIO = 0.03
+STAMPEDE = 50
+
+SEED_SQL = """
+INSERT INTO symptoms (user_id, age, sex, symptoms, duration, severity, analysis, submitted_at, status, meta)
+SELECT u.id, 30, 'female', 'cough, fever', '2 days', 4, repeat('analysis ', 80),
+       now() - (g * interval '1 hour'), 'completed', '{}'::jsonb
+FROM users u CROSS JOIN generate_series(1, CAST(:rows AS int)) AS g
+"""
+WRITE_SQL = """
+INSERT INTO symptoms (user_id, age, sex, symptoms, duration, severity, analysis, status, meta)
+VALUES (:u, 30, 'female', 'headache', '1 day', 3, 'new analysis', 'completed', '{}'::jsonb)
+"""
+
+
+async def _passthrough(_redis_client, _user_id, loader):
+    return await loader()
+
+
+async def _run(client, Session, users, redis_client, cached: bool, queries: list):
+    rng = random.Random(5)
+    weights = [1 / (rank + 1) for rank in range(len(users))]
+    picks = rng.choices(users, weights=weights, k=REQUESTS)
+    writes = {i for i in range(REQUESTS) if rng.random() < WRITE_RATIO}
+    latencies = []
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def one(i, user):
+        user_id, api_key = user
+        async with semaphore:
+            started = time.perf_counter()
+            resp = await client.get("/symptom-history/", headers={"X-User-ID": user_id, "X-API-Key": api_key})
+            latencies.append(time.perf_counter() - started)
+            assert resp.status_code == 200, resp.text
+            if i in writes:
+                async with Session() as session:
+                    await session.execute(text(WRITE_SQL), {"u": user_id})
+                    await session.commit()
+                if cached:
+                    await symptom_history_cache.invalidate(redis_client, user_id)
+
+    original = symptom_history_cache.get_or_load
+    if not cached:
+        symptom_history_cache.get_or_load = _passthrough
+    hits, misses, reads = symptom_history_cache.hits, symptom_history_cache.misses, queries[0]
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(one(i, user) for i, user in enumerate(picks)))
+    finally:
+        symptom_history_cache.get_or_load = original
+    elapsed = time.perf_counter() - started
+    history_queries = queries[0] - reads
+
+    cuts = statistics.quantiles(latencies, n=100)
+    lookups = (symptom_history_cache.hits - hits) + (symptom_history_cache.misses - misses)
+    return {
+        "hit_ratio": (symptom_history_cache.hits - hits) / lookups if lookups else 0.0,
+        # SELECTs per GET: the auth lookup plus, on a miss, the service's user check and the page query
+        "queries_per_get": history_queries / REQUESTS,
+        "db_qps": history_queries / elapsed,
+        "rps": REQUESTS / elapsed,
+        "p50": cuts[49] * 1000,
+        "p99": cuts[98] * 1000,
+    }
+
+
+async def main():
+    redis_client = redis.Redis.from_url(os.getenv("BENCHMARK_REDIS_URL", "redis://localhost:6379/15"), decode_responses=True)
+    await redis_client.flushdb()
+
+    async with scratch_schema() as (engine, Session):
+        queries = [0]
+
+        def count_reads(_conn, _cursor, statement, *_args):
+            if statement.lstrip().upper().startswith("SELECT"):
+                queries[0] += 1
+        event.listen(engine.sync_engine, "before_cursor_execute", count_reads)
+
+        users = []
+        async with engine.begin() as conn:
+            for i in range(USERS):
+                api_key = f"bench-key-{i}"
+                user_id = (await conn.execute(text(
+                    "INSERT INTO users (email, username, password_hash, api_key_enc) VALUES (:e, :n, 'x', :k) RETURNING id"
+                ), {"e": f"u{i}@bench", "n": f"u{i}", "k": encrypt_api_key(api_key)})).scalar_one()
+                users.append((str(user_id), api_key))
+            await conn.execute(text(SEED_SQL), {"rows": ROWS_PER_USER})
+            await conn.execute(text("ANALYZE"))
+
+        async def session_override():
+            async with Session() as session:
+                yield session
+
+        app.dependency_overrides[get_session] = session_override
+        app.dependency_overrides[get_redis_client] = lambda: redis_client
+        app.dependency_overrides[symptom_history_rate_limiter] = lambda: None
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            uncached = await _run(client, Session, users, redis_client, cached=False, queries=queries)
+            cached = await _run(client, Session, users, redis_client, cached=True, queries=queries)
+
+            # Stampede: many concurrent first reads of one cold page
+            await redis_client.flushdb()
+            user_id, api_key = users[0]
+            loads = symptom_history_cache.loads
+            await asyncio.gather(*(
+                client.get("/symptom-history/", headers={"X-User-ID": user_id, "X-API-Key": api_key}) for _ in range(STAMPEDE)
+            ))
+            stampede_loads = symptom_history_cache.loads - loads
+
+        app.dependency_overrides.clear()
+    await redis_client.aclose()
+
+    print(f"{REQUESTS} GETs over {USERS} users (skewed), {WRITE_RATIO:.0%} followed by a new check, concurrency {CONCURRENCY}")
+    print(f"{'mode':<10}{'hit ratio':>10}{'queries/GET':>13}{'DB QPS':>9}{'req/s':>8}{'p50':>9}{'p99':>9}")
+    for name, r in (("no cache", uncached), ("cache", cached)):
+        print(f"{name:<10}{r['hit_ratio']:>10.1%}{r['queries_per_get']:>13.2f}{r['db_qps']:>9.0f}{r['rps']:>8.0f}"
+              f"{r['p50']:>7.1f}ms{r['p99']:>7.1f}ms")
+    saved = 1 - cached["queries_per_get"] / uncached["queries_per_get"]
+    print(f"database queries saved per GET: {saved:.0%}")
+    print(f"stampede: {STAMPEDE} concurrent cold reads of one page -> {stampede_loads} database load(s)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
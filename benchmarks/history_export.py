@@ -0,0 +1,82 @@
+"""Compare memory and time of the streamed history export against building the whole list in memory.
+
+Seeds one user with 100k completed checks (60k text, 40k OCR, long analyses) in a scratch
+schema (see benchmarks/pg_scratch.py), then exports them three ways: one in-memory
+fetch serialized as a single JSON document, the streamed NDJSON export, and the streamed
+export with gzip. Peak Python memory is measured with tracemalloc. Run from the project root:
+
+    BENCHMARK_DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.history_export
+"""
+import asyncio
+import time
+import tracemalloc
+
+from sqlalchemy import text
+
+from benchmarks.pg_scratch import scratch_schema
+import app.services.timeline_service as timeline_service
+from app.crud.timeline import get_timeline_by_user_id
+from app.utils.history_json import timeline_json
+
+TEXT_ROWS = 60_000
+OCR_ROWS = 40_000
+
+SEED_SQL = """
+INSERT INTO symptoms (user_id, age, sex, symptoms, duration, severity, analysis, submitted_at, status)
+SELECT CAST(:u AS uuid), 30, 'female', 'cough, fever', '2 days', 4, repeat('analysis ', 100),
+       now() - g * interval '1 minute', 'completed'
+FROM generate_series(1, CAST(:text_rows AS int)) AS g;
+
+INSERT INTO ocr_symptoms (user_id, input, analysis, submitted_at, status)
+SELECT CAST(:u AS uuid), jsonb_build_object('chief_complaint', 'cough', 'wbc_count', 11500), repeat('analysis ', 100),
+       now() - g * interval '90 seconds', 'completed'
+FROM generate_series(1, CAST(:ocr_rows AS int)) AS g;
+"""
+
+
+async def _measure(fn):
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        size = await fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return size, peak / 2**20, time.perf_counter() - started
+
+
+async def main():
+    async with scratch_schema() as (engine, Session):
+        async with engine.begin() as conn:
+            user_id = (await conn.execute(text(
+                "INSERT INTO users (email, username, password_hash, api_key_enc) VALUES ('b@bench', 'b', 'x', 'k') RETURNING id"
+            ))).scalar_one()
+            for statement in SEED_SQL.strip().split(";\n\n"):
+                await conn.execute(text(statement), {"u": user_id, "text_rows": TEXT_ROWS, "ocr_rows": OCR_ROWS})
+            await conn.execute(text("ANALYZE"))
+
+        # The export opens its own session; point it at the scratch schema
+        timeline_service.AsyncSessionLocal = Session
+
+        async def in_memory():
+            async with Session() as session:
+                rows = await get_timeline_by_user_id(session, user_id=user_id, limit=TEXT_ROWS + OCR_ROWS)
+                return len(timeline_json(str(user_id), rows, None))
+
+        def streamed(compress):
+            async def run():
+                size = 0
+                async for chunk in timeline_service.stream_timeline_export(user_id, compress=compress):
+                    size += len(chunk)
+                return size
+            return run
+
+        print(f"{TEXT_ROWS + OCR_ROWS:,} rows")
+        print(f"{'path':<26}{'body MB':>9}{'peak MB':>9}{'seconds':>9}")
+        for name, fn in (("in-memory list", in_memory), ("streamed NDJSON", streamed(False)), ("streamed NDJSON + gzip", streamed(True))):
+            size, peak, seconds = await _measure(fn)
+            print(f"{name:<26}{size / 2**20:>9.1f}{peak:>9.1f}{seconds:>9.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
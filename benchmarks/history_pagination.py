@@ -0,0 +1,146 @@
+"""Compare OFFSET and keyset history pagination for a user with a long history.
+
+Seeds one heavy user (12k checks, ~90% completed) among 500 lighter users in a scratch schema
+(see benchmarks/pg_scratch.py), then times fetching the first, a middle and the last
+page of the heavy user's history, before and after the partial keyset index added by
+migration 3c1f9a7d2b64. Reports server execution time (EXPLAIN ANALYZE) and end-to-end
+time through the ORM. Run from the project root:
+
+    BENCHMARK_DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.history_pagination
+"""
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import select, text
+
+from benchmarks.pg_scratch import scratch_schema
+from app.crud.symptom import get_symptom_checkby_user_id
+from app.models.symptoms import Symptom, StatusEnum
+
+HEAVY_ROWS = 12_000
+LIGHT_USERS = 500
+LIGHT_ROWS = 40
+PAGE = 20
+REPEATS = 15
+
+SEED_SQL = """
+INSERT INTO users (id, email, username, password_hash, api_key_enc)
+SELECT gen_random_uuid(), 'u' || i || '@bench', 'u' || i, 'x', 'k' || i FROM generate_series(0, CAST(:users AS int)) AS i;
+
+INSERT INTO symptoms (user_id, age, sex, symptoms, duration, severity, analysis, submitted_at, status)
+SELECT u.id, 30, 'female', 'cough, fever', '2 days', 4, repeat('analysis ', 80),
+       now() - (g * interval '1 minute') - (random() * interval '1 minute'),
+       CASE WHEN random() < 0.1 THEN 'not_completed'::status_enum ELSE 'completed'::status_enum END
+FROM users u
+CROSS JOIN LATERAL generate_series(1, CASE WHEN u.username = 'u0' THEN CAST(:heavy AS int) ELSE CAST(:light AS int) END) AS g;
+"""
+
+KEYSET_INDEX = (
+    "CREATE INDEX symptoms_user_completed_submitted_at_idx ON symptoms "
+    "(user_id, submitted_at DESC, id DESC) WHERE status = 'completed'"
+)
+
+
+async def _offset_page(session, user_id, offset):
+    q = (
+        select(Symptom).where(Symptom.user_id == user_id).where(Symptom.status == StatusEnum.completed)
+        .order_by(Symptom.submitted_at.desc()).limit(PAGE).offset(offset)
+    )
+    return (await session.execute(q)).scalars().all()
+
+
+OFFSET_SQL = (
+    "SELECT * FROM symptoms WHERE user_id = :u AND status = 'completed' "
+    "ORDER BY submitted_at DESC LIMIT :n OFFSET :o"
+)
+KEYSET_SQL = (
+    "SELECT * FROM symptoms WHERE user_id = :u AND status = 'completed' AND (submitted_at, id) < (:t, :i) "
+    "ORDER BY submitted_at DESC, id DESC LIMIT :n"
+)
+FIRST_SQL = (
+    "SELECT * FROM symptoms WHERE user_id = :u AND status = 'completed' "
+    "ORDER BY submitted_at DESC, id DESC LIMIT :n"
+)
+
+
+async def _server_ms(session, sql, params) -> float:
+    samples = []
+    for _ in range(REPEATS):
+        plan = (await session.execute(text("EXPLAIN (ANALYZE, FORMAT JSON) " + sql), params)).scalar_one()
+        samples.append(plan[0]["Execution Time"])
+    return statistics.median(samples)
+
+
+async def _time(fn) -> float:
+    samples = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+async def _measure(Session, user_id, completed):
+    positions = {"first": 0, "middle": completed // 2, "last": completed - PAGE}
+    results = {}
+    async with Session() as session:
+        # Keyset cursors for the same positions, taken from the row just before each page
+        cursors = {}
+        for name, offset in positions.items():
+            if offset == 0:
+                cursors[name] = None
+            else:
+                prev = (await _offset_page(session, user_id, offset - 1))[0]
+                cursors[name] = (prev.submitted_at, prev.id)
+
+        for name, offset in positions.items():
+            results[("offset", name)] = (
+                await _server_ms(session, OFFSET_SQL, {"u": user_id, "n": PAGE, "o": offset}),
+                await _time(lambda: _offset_page(session, user_id, offset)),
+            )
+            if cursors[name] is None:
+                keyset_sql, keyset_params = FIRST_SQL, {"u": user_id, "n": PAGE + 1}
+            else:
+                keyset_sql, keyset_params = KEYSET_SQL, {"u": user_id, "n": PAGE + 1, "t": cursors[name][0], "i": cursors[name][1]}
+            results[("keyset", name)] = (
+                await _server_ms(session, keyset_sql, keyset_params),
+                await _time(lambda: get_symptom_checkby_user_id(session, user_id=user_id, limit=PAGE + 1, cursor=cursors[name])),
+            )
+            session.expunge_all()
+
+        plan = await session.execute(text("EXPLAIN " + FIRST_SQL), {"u": user_id, "n": PAGE + 1})
+        results["plan"] = [row[0] for row in plan]
+    return results
+
+
+async def main():
+    async with scratch_schema() as (engine, Session):
+        async with engine.begin() as conn:
+            for statement in SEED_SQL.strip().split(";\n\n"):
+                await conn.execute(text(statement), {"users": LIGHT_USERS, "heavy": HEAVY_ROWS, "light": LIGHT_ROWS})
+            await conn.execute(text("ANALYZE"))
+            user_id = (await conn.execute(text("SELECT id FROM users WHERE username = 'u0'"))).scalar_one()
+            completed = (await conn.execute(text(
+                "SELECT count(*) FROM symptoms WHERE user_id = :u AND status = 'completed'"
+            ), {"u": user_id})).scalar_one()
+
+        before = await _measure(Session, user_id, completed)
+        async with engine.begin() as conn:
+            await conn.execute(text(KEYSET_INDEX))
+            await conn.execute(text("ANALYZE symptoms"))
+        after = await _measure(Session, user_id, completed)
+
+    print(f"heavy user: {completed} completed checks, page size {PAGE}, median of {REPEATS} (ms)")
+    print(f"{'':<18}{'--- server ---':>26}{'--- end to end ---':>26}")
+    print(f"{'query':<10}{'page':<8}{'user_id idx':>13}{'keyset idx':>13}{'user_id idx':>13}{'keyset idx':>13}")
+    for mode in ("offset", "keyset"):
+        for name in ("first", "middle", "last"):
+            (sb, eb), (sa, ea) = before[(mode, name)], after[(mode, name)]
+            print(f"{mode:<10}{name:<8}{sb:>13.2f}{sa:>13.2f}{eb:>13.2f}{ea:>13.2f}")
+    print("\nfirst page plan, user_id index only:\n  " + "\n  ".join(before["plan"]))
+    print("first page plan, keyset index:\n  " + "\n  ".join(after["plan"]))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
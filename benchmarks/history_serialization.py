@@ -0,0 +1,132 @@
+"""Compare the old and lean serialization paths for a 100-item history page.
+
+old:  ORM objects -> SymptomInput/SymptomCheckOut models built one by one -> model_dump_json
+lean: column rows -> plain dicts -> pydantic_core.to_json
+
+Serialization alone is timed in-process. With BENCHMARK_DATABASE_URL set, the full
+fetch + serialize path is also timed against a scratch schema (benchmarks/pg_scratch.py).
+Run from the project root:
+
+    python -m benchmarks.history_serialization
+"""
+import asyncio
+import datetime
+import os
+import statistics
+import time
+import uuid
+
+from sqlalchemy import select, text
+
+from benchmarks.pg_scratch import scratch_schema
+from app.crud.symptom import get_symptom_checkby_user_id
+from app.models.symptoms import SexEnum, StatusEnum, Symptom
+from app.schemas.symptom_history import SymptomCheckOut, SymptomHistoryOut, SymptomInput
+from app.utils.history_json import symptom_history_json
+
+ITEMS = 100
+ROUNDS = 300
+DB_ROUNDS = 100
+
+
+def _old_json(user_id, items) -> bytes:
+    history = []
+    for item in items:
+        history.append(
+            SymptomCheckOut(
+                id=str(item.id),
+                user_id=str(item.user_id),
+                timestamp=item.submitted_at,
+                input=SymptomInput(
+                    age=item.age, sex=item.sex, symptoms=item.symptoms, duration=item.duration,
+                    severity=item.severity, additional_notes=item.additional_notes,
+                ),
+                analysis=item.analysis,
+                status=item.status,
+                structured=(item.meta or {}).get("structured"),
+            )
+        )
+    return SymptomHistoryOut(user_id=user_id, history=history).model_dump_json().encode()
+
+
+def _time(fn, rounds) -> float:
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+async def _atime(fn, rounds) -> float:
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def _in_memory():
+    user_id = uuid.uuid4()
+    now = datetime.datetime.now(datetime.timezone.utc)
+    objects = [
+        Symptom(
+            id=uuid.uuid4(), user_id=user_id, age=30, sex=SexEnum.female, symptoms="headache and fever for 2 days",
+            duration="2 days", severity=6, additional_notes="also experiencing fatigue", analysis="analysis " * 150,
+            submitted_at=now - datetime.timedelta(minutes=i), status=StatusEnum.completed, meta={"output_format": "markdown"},
+        )
+        for i in range(ITEMS)
+    ]
+    # Tuples in the lean query's column order (HISTORY_COLUMNS)
+    rows = [
+        tuple(getattr(o, c) for c in ("id", "user_id", "submitted_at", "age", "sex", "symptoms", "duration",
+                                      "severity", "additional_notes", "analysis", "status")) + (None,)
+        for o in objects
+    ]
+    old = _time(lambda: _old_json(str(user_id), objects), ROUNDS)
+    lean = _time(lambda: symptom_history_json(str(user_id), rows, None), ROUNDS)
+    return old, lean
+
+
+async def _with_database():
+    async with scratch_schema() as (engine, Session):
+        async with engine.begin() as conn:
+            user_id = (await conn.execute(text(
+                "INSERT INTO users (email, username, password_hash, api_key_enc) VALUES ('b@bench', 'b', 'x', 'k') RETURNING id"
+            ))).scalar_one()
+            await conn.execute(text(
+                "INSERT INTO symptoms (user_id, age, sex, symptoms, duration, severity, additional_notes, analysis, submitted_at, status, meta) "
+                "SELECT :u, 30, 'female', 'headache and fever for 2 days', '2 days', 6, 'also experiencing fatigue', repeat('analysis ', 150), "
+                "now() - g * interval '1 minute', 'completed', jsonb_build_object('output_format', 'markdown', 'input_budget', repeat('x', 400)) "
+                "FROM generate_series(1, CAST(:n AS int)) AS g"
+            ), {"u": user_id, "n": ITEMS})
+
+        async with Session() as session:
+            async def old():
+                q = (select(Symptom).where(Symptom.user_id == user_id).where(Symptom.status == StatusEnum.completed)
+                     .order_by(Symptom.submitted_at.desc(), Symptom.id.desc()).limit(ITEMS))
+                items = (await session.execute(q)).scalars().all()
+                _old_json(str(user_id), items)
+                session.expunge_all()
+
+            async def lean():
+                rows = await get_symptom_checkby_user_id(session, user_id=user_id, limit=ITEMS)
+                symptom_history_json(str(user_id), rows, None)
+
+            await old(), await lean()  # warm up statement caches
+            return await _atime(old, DB_ROUNDS), await _atime(lean, DB_ROUNDS)
+
+
+def main():
+    old, lean = _in_memory()
+    print(f"{ITEMS}-item page, median ms")
+    print(f"{'path':<28}{'old':>8}{'lean':>8}{'speedup':>9}")
+    print(f"{'serialize only':<28}{old:>8.2f}{lean:>8.2f}{old / lean:>8.1f}x")
+    if os.getenv("BENCHMARK_DATABASE_URL"):
+        old, lean = asyncio.run(_with_database())
+        print(f"{'fetch + serialize (Postgres)':<28}{old:>8.2f}{lean:>8.2f}{old / lean:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
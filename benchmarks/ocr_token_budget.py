@@ -0,0 +1,69 @@
+"""Measure the input token budgeter on synthetic large OCR payloads.
+
+Reports prompt tokens before and after budgeting, what was trimmed and the
+budgeting cost per payload. Run from the project root:
+
+    python -m benchmarks.ocr_token_budget
+"""
+import random
+import time
+
+from app.utils.token_budget import count_payload_tokens, fit_to_budget
+
+BUDGET = 1900  # roughly the OCR default once the system prompt is counted
+RUNS = 200
+
+_WORDS = ("patient", "reports", "mild", "pain", "left", "lower", "quadrant", "no", "fever", "history", "of",
+          "hypertension", "denies", "nausea", "lungs", "clear", "auscultation", "abdomen", "soft", "tender")
+
+
+def _text(words: int) -> str:
+    return " ".join(random.choice(_WORDS) for _ in range(words)) + "."
+
+
+def _payload(notes_words: int, extra_fields: int) -> dict:
+    payload = {
+        "age": 52,
+        "sex": "male",
+        "chief_complaint": "Abdominal pain and fatigue",
+        "onset_duration": "3 days",
+        "blood_pressure": "142/91 mmHg",
+        "heart_rate_bpm": 96,
+        "temperature_f": "100.4",
+        "wbc_count": 13200,
+        "current_medications": _text(40),
+        "physician_notes": _text(notes_words),
+        "patient_name": "John Example",
+        "clinic_address": "1 Example Road, Springfield",
+    }
+    for i in range(extra_fields):
+        payload[f"ocr_field_{i}"] = _text(30)
+    return payload
+
+
+def main():
+    random.seed(11)
+    cases = {
+        "typical chart": _payload(notes_words=60, extra_fields=0),
+        "long notes": _payload(notes_words=4_000, extra_fields=0),
+        "many fields": _payload(notes_words=200, extra_fields=120),
+        "huge scan": _payload(notes_words=20_000, extra_fields=300),
+    }
+
+    print(f"budget={BUDGET} tokens")
+    print(f"{'payload':<15}{'before':>9}{'after':>9}{'truncated':>11}{'elided':>9}{'cost':>12}")
+    for name, payload in cases.items():
+        started = time.perf_counter()
+        for _ in range(RUNS):
+            trimmed, report = fit_to_budget(payload, BUDGET)
+        cost = (time.perf_counter() - started) / RUNS
+        truncated = len(report["truncated"]) if report else 0
+        elided = len(report["elided"]) if report else 0
+        print(
+            f"{name:<15}{count_payload_tokens(payload):>9}{count_payload_tokens(trimmed):>9}"
+            f"{truncated:>11}{elided:>9}{cost * 1000:>10.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Compare filtering OCR checks on the typed vital columns with the same filter over the JSON input.
+
+Seeds 1M completed OCR checks in a scratch schema (see benchmarks/pg_scratch.py), one heavy
+user with 20k of them and the rest spread over 2,000 users, each with normalized vitals
+present about two times in three. Adds the indexes from migrations 3c1f9a7d2b64 and
+a41c6e2d9b08, then times app.crud.ocr_symptom.ocr_filter_symptom_checks() against the
+same predicates written on `input ->> key`, for a selective and a broad filter, for one
+user and across all users. Run from the project root:
+
+    BENCHMARK_DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.ocr_vitals_filter
+"""
+import asyncio
+import statistics
+import time
+from decimal import Decimal
+
+from sqlalchemy import text
+
+from benchmarks.pg_scratch import scratch_schema
+from app.crud.ocr_symptom import ocr_filter_symptom_checks
+
+ROWS = 1_000_000
+USERS = 2_000
+HEAVY_ROWS = 20_000
+PAGE = 20
+REPEATS = 5
+
+FILTERS = (
+    # About 4% of checks
+    ("wbc_count >= 20000", {"wbc_count": (Decimal(20000), None)}),
+    # About 7% of checks, on two vitals
+    ("temperature_f >= 100.4 and heart_rate_bpm >= 100",
+     {"temperature_f": (Decimal("100.4"), None), "heart_rate_bpm": (Decimal(100), None)}),
+)
+
+SEED_SQL = """
+INSERT INTO users (id, email, username, password_hash, api_key_enc)
+SELECT gen_random_uuid(), 'u' || i || '@bench', 'u' || i, 'x', 'k' || i FROM generate_series(0, CAST(:users AS int)) AS i;
+
+CREATE TEMP TABLE bench_users AS SELECT id, row_number() OVER (ORDER BY username) AS n FROM users WHERE username <> 'u0';
+
+INSERT INTO ocr_symptoms (user_id, input, analysis, submitted_at, status)
+SELECT CASE WHEN g <= CAST(:heavy AS int) THEN h.id ELSE b.id END,
+       jsonb_strip_nulls(jsonb_build_object(
+           'chief_complaint', 'cough and fatigue',
+           'temperature_f', CASE WHEN random() < 0.67 THEN round((97 + random() * 6)::numeric, 1) END,
+           'heart_rate_bpm', CASE WHEN random() < 0.67 THEN 55 + floor(random() * 70)::int END,
+           'spo2_pct', CASE WHEN random() < 0.67 THEN 88 + floor(random() * 12)::int END,
+           'wbc_count', CASE WHEN random() < 0.67 THEN 3000 + floor(random() * 18000)::int END,
+           'physician_notes', repeat('Lungs clear on auscultation. ', 4)
+       )),
+       repeat('analysis ', 60), now() - g * interval '1 minute', 'completed'
+FROM generate_series(1, CAST(:rows AS int)) AS g
+CROSS JOIN (SELECT id FROM users WHERE username = 'u0') AS h
+JOIN bench_users b ON b.n = 1 + g % CAST(:users AS int)
+"""
+
+INDEXES = (
+    "CREATE INDEX ocr_symptoms_user_completed_submitted_at_idx ON ocr_symptoms "
+    "(user_id, submitted_at DESC, id DESC) WHERE status = 'completed'",
+) + tuple(
+    f"CREATE INDEX ocr_symptoms_{key}_idx ON ocr_symptoms ({key}) WHERE status = 'completed' AND {key} IS NOT NULL"
+    for key in ("temperature_f", "heart_rate_bpm", "spo2_pct", "wbc_count")
+)
+
+
+def _json_sql(ranges: dict, scoped: bool) -> str:
+    """The filter as it had to be written before the typed columns."""
+    conditions = ["status = 'completed'"] + (["user_id = :user_id"] if scoped else [])
+    for key, (low, _) in ranges.items():
+        conditions.append(f"jsonb_typeof(input -> '{key}') = 'number' AND (input ->> '{key}')::numeric >= {low}")
+    return (
+        "SELECT id, user_id, submitted_at, input, analysis, status FROM ocr_symptoms WHERE "
+        + " AND ".join(conditions)
+        + " ORDER BY submitted_at DESC, id DESC LIMIT :limit"
+    )
+
+
+async def _time(fn) -> float:
+    await fn()  # warm up statement caches
+    samples = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+async def main():
+    async with scratch_schema() as (engine, Session):
+        started = time.perf_counter()
+        async with engine.begin() as conn:
+            for statement in SEED_SQL.strip().split(";\n\n"):
+                await conn.execute(text(statement), {"users": USERS, "rows": ROWS, "heavy": HEAVY_ROWS})
+            for ddl in INDEXES:
+                await conn.execute(text(ddl))
+            heavy = (await conn.execute(text("SELECT id FROM users WHERE username = 'u0'"))).scalar_one()
+            typical = (await conn.execute(text("SELECT id FROM users WHERE username = 'u1'"))).scalar_one()
+        # As autovacuum would have by now; sets the visibility map so counts can be index-only
+        async with engine.connect() as conn:
+            await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.execute(text("VACUUM ANALYZE ocr_symptoms"))
+        print(f"seeded {ROWS:,} OCR checks in {time.perf_counter() - started:.0f}s")
+
+        async with Session() as session:
+            print(f"\nfirst page of {PAGE}, median of {REPEATS} end to end (ms)")
+            print(f"{'filter':<50}{'scope':<15}{'JSON':>9}{'typed':>9}{'speedup':>9}")
+            for name, ranges in FILTERS:
+                for scope, user_id in (("heavy user", heavy), ("typical user", typical), ("all users", None)):
+                    json_sql = _json_sql(ranges, scoped=user_id is not None)
+
+                    async def as_json():
+                        await session.execute(text(json_sql), {"user_id": user_id, "limit": PAGE + 1})
+
+                    async def typed():
+                        await ocr_filter_symptom_checks(session, ranges=ranges, user_id=user_id, limit=PAGE + 1)
+
+                    json_ms, typed_ms = await _time(as_json), await _time(typed)
+                    print(f"{name:<50}{scope:<15}{json_ms:>9.2f}{typed_ms:>9.2f}{json_ms / typed_ms:>8.1f}x")
+
+            # Analytics: how many checks across all users cross a threshold
+            for name, sql in (
+                ("JSON", "SELECT count(*) FROM ocr_symptoms WHERE status = 'completed' "
+                         "AND jsonb_typeof(input -> 'wbc_count') = 'number' AND (input ->> 'wbc_count')::numeric >= 20000"),
+                ("typed", "SELECT count(*) FROM ocr_symptoms WHERE status = 'completed' AND wbc_count >= 20000"),
+            ):
+                async def count():
+                    await session.execute(text(sql))
+
+                print(f"{'count(*) wbc_count >= 20000, all users':<50}{name:<15}{await _time(count):>9.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,122 @@
+"""Compare a retention purge on the monthly-partitioned symptoms table with DELETE on a plain copy.
+
+Seeds 24 months of text checks (600k rows over 2,000 users) in a scratch schema (see
+benchmarks/pg_scratch.py), once into symptoms split into monthly partitions as
+app.db.partitions creates them and once into an unpartitioned copy with the same indexes.
+Then times the newest history page on both, and expiring the oldest 12 months: DELETE plus
+the VACUUM that has to follow it on the copy, and app.db.partitions.maintain_table() with
+drop on the partitioned table. Run from the project root:
+
+    BENCHMARK_DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.partition_retention
+"""
+import asyncio
+import datetime
+import statistics
+import time
+
+from sqlalchemy import text
+
+from benchmarks.pg_scratch import scratch_schema
+from app.db.partitions import add_months, create_partition_sql, maintain_table, month_start, months
+
+MONTHS = 24
+ROWS = 600_000
+USERS = 2_000
+RETENTION_MONTHS = 12
+PAGE = 20
+REPEATS = 50
+
+SEED_SQL = """
+INSERT INTO users (id, email, username, password_hash, api_key_enc)
+SELECT gen_random_uuid(), 'u' || i || '@bench', 'u' || i, 'x', 'k' || i FROM generate_series(1, CAST(:users AS int)) AS i;
+
+CREATE TEMP TABLE bench_users AS SELECT id, row_number() OVER (ORDER BY username) AS n FROM users;
+
+INSERT INTO symptoms (user_id, age, sex, symptoms, duration, severity, analysis, submitted_at, status)
+SELECT b.id, 30, 'female', 'cough, fever', '2 days', 4, repeat('analysis ', 80),
+       now() - (g * CAST(:span AS interval) / CAST(:rows AS int)), 'completed'
+FROM generate_series(1, CAST(:rows AS int)) AS g
+JOIN bench_users b ON b.n = 1 + g % CAST(:users AS int);
+
+CREATE TABLE symptoms_flat (LIKE symptoms INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING INDEXES);
+
+INSERT INTO symptoms_flat (id, user_id, age, sex, symptoms, duration, severity, analysis, submitted_at, status, meta, updated_at)
+SELECT id, user_id, age, sex, symptoms, duration, severity, analysis, submitted_at, status, meta, updated_at FROM symptoms
+"""
+
+# The query behind GET /symptom-history/, on either table
+PAGE_SQL = (
+    "SELECT id, user_id, age, sex, symptoms, duration, severity, additional_notes, analysis, submitted_at, status "
+    "FROM {table} WHERE user_id = :user_id AND status = 'completed' ORDER BY submitted_at DESC, id DESC LIMIT :limit"
+)
+
+INDEXES = tuple(
+    f"CREATE INDEX {table}_user_completed_submitted_at_idx ON {table} "
+    "(user_id, submitted_at DESC, id DESC) WHERE status = 'completed'"
+    for table in ("symptoms", "symptoms_flat")
+)
+
+
+async def _time(fn, repeats: int = REPEATS) -> float:
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+async def main():
+    today = datetime.datetime.now(datetime.timezone.utc).date()
+    first = add_months(month_start(today), -MONTHS)
+
+    async with scratch_schema() as (engine, Session):
+        async with engine.begin() as conn:
+            # Monthly partitions instead of the scratch schema's catch-all one
+            await conn.execute(text("DROP TABLE symptoms_default"))
+            for month in months(first, add_months(month_start(today), 3)):
+                await conn.execute(text(create_partition_sql("symptoms", month)))
+            for statement in SEED_SQL.strip().split(";\n\n"):
+                await conn.execute(text(statement), {"users": USERS, "rows": ROWS, "span": datetime.timedelta(days=MONTHS * 30 - 15)})
+            for ddl in INDEXES:
+                await conn.execute(text(ddl))
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.execute(text("VACUUM ANALYZE symptoms"))
+            await conn.execute(text("VACUUM ANALYZE symptoms_flat"))
+            user_id = (await conn.execute(text("SELECT id FROM users WHERE username = 'u1'"))).scalar_one()
+
+            async with Session() as session:
+                print(f"{ROWS:,} checks over {MONTHS} months\n")
+                print(f"newest history page, median of {REPEATS} (ms)")
+                for name, table in (("partitioned", "symptoms"), ("unpartitioned", "symptoms_flat")):
+                    async def page():
+                        await session.execute(text(PAGE_SQL.format(table=table)), {"user_id": user_id, "limit": PAGE + 1})
+
+                    await page()  # warm up statement caches
+                    print(f"  {name:<16}{await _time(page):>8.2f}")
+
+            cutoff = add_months(month_start(today), -RETENTION_MONTHS)
+            print(f"\nexpire checks before {cutoff} (s)")
+
+            started = time.perf_counter()
+            deleted = (await conn.execute(text("DELETE FROM symptoms_flat WHERE submitted_at < :cutoff"), {"cutoff": cutoff})).rowcount
+            deleting = time.perf_counter() - started
+            started = time.perf_counter()
+            await conn.execute(text("VACUUM symptoms_flat"))
+            vacuuming = time.perf_counter() - started
+            print(f"  DELETE {deleted:,} rows {deleting:>8.2f}  + VACUUM {vacuuming:.2f}")
+
+            started = time.perf_counter()
+            statements = await maintain_table(conn, "symptoms", today, premake_months=3, retention_months=RETENTION_MONTHS, drop=True)
+            dropping = time.perf_counter() - started
+            dropped = sum(statement.startswith("DROP") for statement in statements)
+            print(f"  detach + drop {dropped} partitions {dropping:>5.2f}")
+
+            remaining = (await conn.execute(text("SELECT count(*) FROM symptoms"))).scalar_one()
+            flat_remaining = (await conn.execute(text("SELECT count(*) FROM symptoms_flat"))).scalar_one()
+            print(f"\nrows left: partitioned {remaining:,}, unpartitioned {flat_remaining:,}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,103 @@
+"""Size the per-worker connection pool: request throughput and checkout wait for several pools.
+
+Seeds 50k completed text checks over 500 users in a scratch schema (see
+benchmarks/pg_scratch.py), then has CLIENTS concurrent clients each make REQUESTS history
+requests (the authentication lookup plus a page of 20) through engines built by
+app.db.pool.engine_options() with different DB_POOL_SIZE / DB_MAX_OVERFLOW. Prints
+requests per second, request p50/p99, checkout wait p50/p99 (from the pool's histogram,
+so bucket upper bounds), the most connections checked out at once and checkout timeouts.
+The last two rows repeat one pool with DB_PGBOUNCER on, which turns prepared statement
+caching off, to show what that costs per request. Run from the project root:
+
+    BENCHMARK_DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.pool_sizing
+"""
+import asyncio
+import random
+import statistics
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from benchmarks.pg_scratch import database_url, scratch_schema
+from app.core.db_config import db_settings
+from app.crud.symptom import get_symptom_checkby_user_id
+from app.crud.user import get_user_by_id
+from app.db.pool import engine_options, pool_stats
+
+USERS = 500
+ROWS = 50_000
+CLIENTS = 50
+REQUESTS = 40
+# (pool size, max overflow, PgBouncer mode)
+POOLS = [(2, 0, False), (5, 0, False), (5, 10, False), (10, 10, False), (20, 0, False), (10, 10, True)]
+
+SEED_SQL = """
+INSERT INTO users (id, email, username, password_hash, api_key_enc)
+SELECT gen_random_uuid(), 'u' || i || '@bench', 'u' || i, 'x', 'k' || i FROM generate_series(1, CAST(:users AS int)) AS i;
+
+INSERT INTO symptoms (user_id, age, sex, symptoms, duration, severity, analysis, submitted_at, status)
+SELECT u.id, 30, 'female', 'cough, fever', '2 days', 4, repeat('analysis ', 80), now() - g * interval '1 minute', 'completed'
+FROM generate_series(1, CAST(:rows AS int)) AS g
+JOIN (SELECT id, row_number() OVER (ORDER BY username) AS n FROM users) AS u ON u.n = 1 + g % CAST(:users AS int);
+
+CREATE INDEX symptoms_user_completed_submitted_at_idx ON symptoms (user_id, submitted_at DESC, id DESC) WHERE status = 'completed'
+"""
+
+
+async def _run(label: str, pool_size: int, max_overflow: int, pgbouncer: bool, search_path: str, user_ids: list) -> None:
+    db_settings.DB_POOL_SIZE, db_settings.DB_MAX_OVERFLOW, db_settings.DB_PGBOUNCER = pool_size, max_overflow, pgbouncer
+    options = engine_options(label)
+    options["connect_args"] = {**options.get("connect_args", {}), "server_settings": {"search_path": search_path}}
+    engine = create_async_engine(database_url(), **options)
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+
+    peak = 0
+    latencies = []
+
+    async def client(rng: random.Random):
+        nonlocal peak
+        for _ in range(REQUESTS):
+            started = time.perf_counter()
+            async with Session() as session:
+                user = await get_user_by_id(session, rng.choice(user_ids))
+                await get_symptom_checkby_user_id(session, user_id=user.id, limit=20)
+                peak = max(peak, engine.pool.checkedout())
+            latencies.append(time.perf_counter() - started)
+
+    # Open the pool's connections before timing, as a warm worker would have them
+    await asyncio.gather(*(client(random.Random(i)) for i in range(pool_size)))
+    latencies.clear()
+    peak = 0
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(random.Random(i)) for i in range(CLIENTS)), return_exceptions=True)
+    elapsed = time.perf_counter() - started
+    stats = pool_stats(engine)
+    await engine.dispose()
+
+    q = statistics.quantiles(latencies, n=100)
+    print(f"{pool_size:>4} {max_overflow:>8} {'on' if pgbouncer else 'off':>9} {len(latencies) / elapsed:>8.0f} "
+          f"{q[49] * 1000:>8.1f} {q[98] * 1000:>8.1f} {stats['checkout_wait_p50'] * 1000:>9.1f} "
+          f"{stats['checkout_wait_p99'] * 1000:>9.1f} {peak:>5} {stats['timeouts']:>8}")
+
+
+async def main():
+    async with scratch_schema() as (engine, _):
+        async with engine.begin() as conn:
+            for statement in SEED_SQL.strip().split(";\n\n"):
+                await conn.execute(text(statement), {"users": USERS, "rows": ROWS})
+            user_ids = [str(u) for (u,) in (await conn.execute(text("SELECT id FROM users"))).all()]
+            search_path = (await conn.execute(text("SHOW search_path"))).scalar_one()
+        async with engine.connect() as conn:
+            await conn.execute(text("COMMIT"))
+            await conn.execute(text("VACUUM ANALYZE symptoms_default"))
+
+        print(f"{CLIENTS} clients x {REQUESTS} history requests; times in ms, checkout wait as bucket upper bounds")
+        print(f"{'size':>4} {'overflow':>8} {'pgbouncer':>9} {'req/s':>8} {'p50':>8} {'p99':>8} {'wait p50':>9} {'wait p99':>9} {'peak':>5} {'timeouts':>8}")
+        for i, (pool_size, max_overflow, pgbouncer) in enumerate(POOLS):
+            await _run(f"bench{i}", pool_size, max_overflow, pgbouncer, search_path, user_ids)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
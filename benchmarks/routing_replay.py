@@ -0,0 +1,114 @@
+"""Replay recorded analysis requests through each routing policy and compare latency and cost.
+
+Nothing is sent to OpenAI: every request is routed offline and priced with the model
+profiles below (list prices per 1M tokens, time to first token and decode speed).
+Requests are read from a JSONL file with one {"source": "text"|"ocr", "payload": {...}}
+object per line, e.g. exported from symptom_checks / ocr_symptom_checks; without
+--input a synthetic mix of text and OCR submissions is replayed. Run from the project root:
+
+    python -m benchmarks.routing_replay [--input requests.jsonl] [--fast-model gpt-4o-mini]
+"""
+import argparse
+import json
+import random
+import statistics
+
+from app.utils.model_router import POLICIES, FAST_TIER, FULL_TIER, ModelRouter
+from app.utils.token_budget import count_payload_tokens
+
+FULL_MODEL = "gpt-4o"
+FAST_MODEL = "gpt-4o-mini"
+
+# USD per 1M tokens, seconds to first token, output tokens per second
+MODEL_PROFILES = {
+    "gpt-4o": {"input_price": 2.50, "output_price": 10.00, "ttft": 0.45, "tokens_per_sec": 80},
+    "gpt-4o-mini": {"input_price": 0.15, "output_price": 0.60, "ttft": 0.30, "tokens_per_sec": 140},
+}
+
+# System prompt and framing around the patient data, and a typical analysis length
+PROMPT_OVERHEAD_TOKENS = 420
+OUTPUT_TOKENS = 450
+
+_SYMPTOMS = [
+    ("runny nose, sneezing", 2), ("mild sore throat", 3), ("cough, fever", 5), ("headache after screen time", 3),
+    ("itchy rash on forearm", 2), ("stomach ache after eating", 4), ("lower back pain", 5), ("chest pain when climbing stairs", 7),
+    ("shortness of breath at night", 8), ("persistent fatigue and weight loss", 6), ("severe headache and stiff neck", 9),
+]
+_NOTES = ["", "", "Started after a cold.", "Took ibuprofen, helped a little. " * 3, "History of asthma; uses an inhaler occasionally. " * 6]
+
+
+def synthetic_requests(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    requests = []
+    for _ in range(count):
+        symptoms, severity = rng.choice(_SYMPTOMS)
+        if rng.random() < 0.7:
+            payload = {
+                "age": rng.randint(18, 80), "sex": rng.choice(["male", "female"]), "symptoms": symptoms,
+                "duration": f"{rng.randint(1, 14)} days", "severity": severity, "additional_notes": rng.choice(_NOTES),
+            }
+            requests.append({"source": "text", "payload": payload})
+        else:
+            payload = {"age": rng.randint(18, 80), "sex": rng.choice(["male", "female"]), "chief_complaint": symptoms}
+            for i in range(rng.randint(3, 25)):
+                payload[f"lab_{i}"] = round(rng.uniform(0.5, 150), 1)
+            if rng.random() < 0.5:
+                payload["physician_notes"] = "Patient reports symptoms as described; exam otherwise unremarkable. " * rng.randint(1, 10)
+            requests.append({"source": "ocr", "payload": payload})
+    return requests
+
+
+def _estimate(model: str, payload: dict):
+    profile = MODEL_PROFILES[model]
+    prompt_tokens = PROMPT_OVERHEAD_TOKENS + count_payload_tokens(payload)
+    cost = (prompt_tokens * profile["input_price"] + OUTPUT_TOKENS * profile["output_price"]) / 1_000_000
+    latency = profile["ttft"] + OUTPUT_TOKENS / profile["tokens_per_sec"]
+    return latency, cost
+
+
+def replay(requests, policy: str, fast_model: str):
+    router = ModelRouter({FULL_TIER: FULL_MODEL, FAST_TIER: fast_model}, policy=policy)
+    latencies, total_cost, fast, red_flags_fast = [], 0.0, 0, 0
+    for request in requests:
+        decision = router.route(request["payload"], source=request.get("source", "text"))
+        latency, cost = _estimate(decision.model, request["payload"])
+        latencies.append(latency)
+        total_cost += cost
+        if decision.tier == FAST_TIER:
+            fast += 1
+            red_flags_fast += any(reason.startswith("red_flag") for reason in decision.reasons)
+    p95 = statistics.quantiles(latencies, n=20)[18] if len(latencies) > 1 else latencies[0]
+    return {
+        "fast_share": fast / len(requests),
+        "mean_latency": statistics.mean(latencies),
+        "p95_latency": p95,
+        "cost_per_1k": total_cost / len(requests) * 1000,
+        "red_flags_fast": red_flags_fast,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--input", help="JSONL file of recorded requests")
+    parser.add_argument("--count", type=int, default=2000, help="number of synthetic requests without --input")
+    parser.add_argument("--fast-model", default=FAST_MODEL, choices=sorted(MODEL_PROFILES))
+    args = parser.parse_args()
+
+    if args.input:
+        with open(args.input, encoding="utf-8") as f:
+            requests = [json.loads(line) for line in f if line.strip()]
+    else:
+        requests = synthetic_requests(args.count)
+    if not requests:
+        parser.error("no requests to replay")
+
+    print(f"{len(requests)} requests, full={FULL_MODEL}, fast={args.fast_model}")
+    print(f"{'policy':<14}{'fast share':>11}{'mean lat':>10}{'p95 lat':>10}{'$ / 1k':>9}{'red flags fast':>16}")
+    for policy in POLICIES:
+        r = replay(requests, policy, args.fast_model)
+        print(f"{policy:<14}{r['fast_share']:>10.0%}{r['mean_latency']:>9.2f}s{r['p95_latency']:>9.2f}s"
+              f"{r['cost_per_1k']:>9.2f}{r['red_flags_fast']:>16}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Compare the default and the production runtime profile on the history endpoint.
+
+Seeds users with 20 completed checks each in a scratch database (see
+benchmarks/pg_scratch.py), then serves the app twice: as `uvicorn --loop asyncio --http h11`
+(the stdlib event loop and pure-Python HTTP parser) and as `gunicorn -c gunicorn.conf.py`
+(uvloop, httptools, WEB_CONCURRENCY workers, default one per core). CONNECTIONS keep-alive
+clients send authenticated GET /symptom-history/ requests, each for the next user so the
+rate limiter never answers 429, and the script prints requests per second and latency
+p50/p99. Both serve the same app, so orjson (which history's pre-serialized pages don't
+go through anyway) is not part of the comparison. The load generator is a bare asyncio HTTP/1.1 client so that it costs little next
+to the server; run it on a machine with a core to spare. Run from the project root:
+
+    BENCHMARK_DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.runtime_profile
+"""
+import asyncio
+import itertools
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-unused")
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from benchmarks.pg_scratch import scratch_database
+from app.utils.security import encrypt_api_key
+
+CONNECTIONS = 50
+REQUESTS = 4000
+API_KEY = "runtime-profile-key"
+PROFILES = {
+    "default": [sys.executable, "-m", "uvicorn", "app.main:app", "--loop", "asyncio", "--http", "h11", "--log-level", "warning"],
+    "tuned": [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--log-level", "warning", "app.main:app"],
+}
+
+SEED_SQL = """
+INSERT INTO users (id, email, username, password_hash, api_key_enc)
+SELECT gen_random_uuid(), 'u' || i || '@bench', 'u' || i, 'x', :key FROM generate_series(1, CAST(:users AS int)) AS i;
+
+INSERT INTO symptoms (user_id, age, sex, symptoms, duration, severity, analysis, submitted_at, status)
+SELECT u.id, 30, 'female', 'cough, fever', '2 days', 4, repeat('analysis ', 80), now() - g * interval '1 minute', 'completed'
+FROM users AS u CROSS JOIN generate_series(1, 20) AS g
+"""
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _seed(url: str) -> list:
+    # Each user can make 10 history requests a minute; give every request, and each profile, its own
+    users = 2 * (REQUESTS + CONNECTIONS)
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        for statement in SEED_SQL.strip().split(";\n\n"):
+            await conn.execute(text(statement), {"users": users, "key": encrypt_api_key(API_KEY)})
+        user_ids = [str(u) for (u,) in (await conn.execute(text("SELECT id FROM users ORDER BY username"))).all()]
+    await engine.dispose()
+    return user_ids
+
+
+async def _get(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, user_id: str) -> int:
+    writer.write(
+        f"GET /symptom-history/ HTTP/1.1\r\nHost: bench\r\nX-User-ID: {user_id}\r\nX-API-Key: {API_KEY}\r\n\r\n".encode()
+    )
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    length = next(int(line.split(b":", 1)[1]) for line in head.split(b"\r\n") if line.lower().startswith(b"content-length:"))
+    await reader.readexactly(length)
+    return status
+
+
+async def _load(port: int, user_ids: list, requests: int) -> tuple:
+    users = iter(user_ids)
+    remaining = itertools.count(requests, -1)
+    latencies, errors = [], 0
+
+    async def client():
+        nonlocal errors
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        while next(remaining) > 0:
+            started = time.perf_counter()
+            if await _get(reader, writer, next(users)) != 200:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+        writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(CONNECTIONS)))
+    elapsed = time.perf_counter() - started
+    q = statistics.quantiles(latencies, n=100)
+    return len(latencies) / elapsed, q[49] * 1000, q[98] * 1000, errors
+
+
+async def _serve(profile: str, url: str, user_ids: list) -> tuple:
+    port = _free_port()
+    command = PROFILES[profile] + (["--port", str(port)] if profile == "default" else [])
+    env = {**os.environ, "USER_DATABASE_URL": url, "OPENAI_WARMUP": "false", "BIND": f"127.0.0.1:{port}"}
+    server = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL)
+    try:
+        while True:
+            try:
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                writer.close()
+                break
+            except OSError:
+                await asyncio.sleep(0.05)
+        # One round to open every worker's connections before timing
+        await _load(port, user_ids[:CONNECTIONS], CONNECTIONS)
+        return await _load(port, user_ids[CONNECTIONS:], REQUESTS)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+async def main():
+    async with scratch_database() as url:
+        user_ids = await _seed(url)
+        half = len(user_ids) // 2
+        print(f"{CONNECTIONS} keep-alive connections, {REQUESTS} history requests, {os.cpu_count()} cores")
+        print(f"{'profile':>8} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'non-200':>8}")
+        for i, profile in enumerate(PROFILES):
+            rate, p50, p99, errors = await _serve(profile, url, user_ids[i * half:(i + 1) * half])
+            print(f"{profile:>8} {rate:>8.0f} {p50:>8.1f} {p99:>8.1f} {errors:>8}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,74 @@
+"""Simulate LLM slot contention between one heavy hitter and many light users.
+
+Compares the previous FIFO semaphore with the fair scheduler and reports the
+time light users spend waiting for a slot. Run from the project root:
+
+    python -m benchmarks.scheduler_fairness
+"""
+import asyncio
+import random
+import statistics
+import time
+
+from app.core.metrics import Histogram
+from app.utils.llm_scheduler import FairScheduler
+
+CAPACITY = 5
+HEAVY_BURST = 200          # calls fired at once by the integrator
+LIGHT_USERS = 40           # interactive users arriving during the burst
+CALL_LATENCY = (0.02, 0.06)  # simulated upstream latency in seconds
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def _fake_llm_call():
+    await asyncio.sleep(random.uniform(*CALL_LATENCY))
+
+
+async def _run(acquire, release):
+    light_waits = []
+
+    async def call(user_id, record):
+        queued_at = time.perf_counter()
+        await acquire(user_id)
+        if record:
+            light_waits.append(time.perf_counter() - queued_at)
+        try:
+            await _fake_llm_call()
+        finally:
+            release(user_id)
+
+    async def light_user(i):
+        await asyncio.sleep(random.uniform(0, 0.5))
+        await call(f"light-{i}", record=True)
+
+    tasks = [asyncio.create_task(call("heavy", record=False)) for _ in range(HEAVY_BURST)]
+    tasks += [asyncio.create_task(light_user(i)) for i in range(LIGHT_USERS)]
+    started = time.perf_counter()
+    await asyncio.gather(*tasks)
+    return light_waits, time.perf_counter() - started
+
+
+async def main():
+    random.seed(7)
+    semaphore = asyncio.Semaphore(CAPACITY)
+    fifo = await _run(lambda _user: semaphore.acquire(), lambda _user: semaphore.release())
+
+    random.seed(7)
+    scheduler = FairScheduler(CAPACITY, max_inflight_per_user=2, wait_histogram=Histogram("bench", "bench"))
+    fair = await _run(lambda user: scheduler.acquire(user), scheduler.release)
+
+    print(f"{HEAVY_BURST} heavy calls + {LIGHT_USERS} light users, capacity={CAPACITY}")
+    print(f"{'mode':<8}{'p50 wait':>12}{'p99 wait':>12}{'max wait':>12}{'makespan':>12}")
+    for name, (waits, makespan) in (("fifo", fifo), ("fair", fair)):
+        print(
+            f"{name:<8}{statistics.median(waits) * 1000:>10.1f}ms{_percentile(waits, 0.99) * 1000:>10.1f}ms"
+            f"{max(waits) * 1000:>10.1f}ms{makespan:>11.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,180 @@
+"""Compare full-text search over a user's checks with the ILIKE scan it replaces, at 1M rows.
+
+Seeds 700k text and 300k OCR checks in a scratch schema (see benchmarks/pg_scratch.py):
+one heavy user with 50k text and 20k OCR checks, the rest spread over 2,000 users, all
+drawn from a small vocabulary of complaints and analyses plus one rare term. Adds the keyset indexes from
+migration 3c1f9a7d2b64 and the GIN indexes from migration 5e8a3d1c7f20, then times
+app.crud.timeline.search_timeline_by_user_id() against the same search written as ILIKE
+over symptoms, additional_notes, the OCR input and analysis, for the heavy user, a typical
+user, and across every user. Run from the project root:
+
+    BENCHMARK_DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.search_fulltext
+"""
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import text
+
+from benchmarks.pg_scratch import scratch_schema
+from app.crud.timeline import search_timeline_by_user_id
+
+TEXT_ROWS = 700_000
+OCR_ROWS = 300_000
+USERS = 2_000
+HEAVY_TEXT_ROWS = 50_000
+HEAVY_OCR_ROWS = 20_000
+PAGE = 20
+REPEATS = 5
+# Two terms in about one check in six, and one in one check in a thousand
+QUERIES = (("chest pain", "%chest pain%"), ("migraine", "%migraine%"), ("pericarditis", "%pericarditis%"))
+
+COMPLAINTS = (
+    "persistent dry cough", "fever and chills", "sharp chest pain when breathing", "migraine with aura",
+    "lower back pain", "sore throat", "shortness of breath", "nausea after meals", "dizziness on standing",
+    "skin rash on forearms", "joint stiffness in the morning", "heart palpitations at night",
+)
+ANALYSES = (
+    "Symptoms are consistent with a viral upper respiratory infection. Rest and fluids are advised.",
+    "The pattern suggests tension-type headache or migraine; keep a headache diary.",
+    "Chest pain with exertion warrants an ECG and review by a clinician to exclude a cardiac cause.",
+    "Likely musculoskeletal strain. Gentle movement and over-the-counter analgesia should help.",
+    "Findings point to gastritis; avoid NSAIDs and alcohol and follow up if it persists.",
+    "Orthostatic hypotension is possible; increase fluid intake and rise slowly.",
+)
+
+SEED_SQL = """
+CREATE TEMP TABLE complaints AS SELECT * FROM unnest(CAST(:complaints AS text[])) WITH ORDINALITY AS c(phrase, n);
+
+CREATE TEMP TABLE analyses AS SELECT * FROM unnest(CAST(:analyses AS text[])) WITH ORDINALITY AS a(phrase, n);
+
+INSERT INTO users (id, email, username, password_hash, api_key_enc)
+SELECT gen_random_uuid(), 'u' || i || '@bench', 'u' || i, 'x', 'k' || i FROM generate_series(0, CAST(:users AS int)) AS i;
+
+CREATE TEMP TABLE bench_users AS SELECT id, row_number() OVER (ORDER BY username) AS n FROM users WHERE username <> 'u0';
+
+INSERT INTO symptoms (user_id, age, sex, symptoms, duration, severity, additional_notes, analysis, submitted_at, status)
+SELECT CASE WHEN g <= CAST(:heavy_text AS int) THEN h.id ELSE b.id END,
+       30, 'female', c1.phrase || ', ' || c2.phrase, '2 days', 4,
+       CASE WHEN g % 1000 = 0 THEN 'history of pericarditis' WHEN g % 3 = 0 THEN 'started after ' || c2.phrase END,
+       a.phrase || ' ' || repeat('Monitor symptoms and seek care if they worsen. ', 4),
+       now() - g * interval '1 minute', 'completed'
+FROM generate_series(1, CAST(:text_rows AS int)) AS g
+CROSS JOIN (SELECT id FROM users WHERE username = 'u0') AS h
+JOIN bench_users b ON b.n = 1 + g % CAST(:users AS int)
+JOIN complaints c1 ON c1.n = 1 + (g * 7) % 12
+JOIN complaints c2 ON c2.n = 1 + (g * 5 + g / 12) % 12
+JOIN analyses a ON a.n = 1 + (g * 11) % 6;
+
+INSERT INTO ocr_symptoms (user_id, input, analysis, submitted_at, status)
+SELECT CASE WHEN g <= CAST(:heavy_ocr AS int) THEN h.id ELSE b.id END,
+       jsonb_build_object('chief_complaint', CASE WHEN g % 1000 = 0 THEN 'pericarditis follow-up' ELSE c.phrase END,
+                          'heart_rate_bpm', 60 + g % 50, 'wbc_count', 4000 + g % 9000),
+       a.phrase || ' ' || repeat('Monitor symptoms and seek care if they worsen. ', 4),
+       now() - g * interval '2 minutes', 'completed'
+FROM generate_series(1, CAST(:ocr_rows AS int)) AS g
+CROSS JOIN (SELECT id FROM users WHERE username = 'u0') AS h
+JOIN bench_users b ON b.n = 1 + g % CAST(:users AS int)
+JOIN complaints c ON c.n = 1 + (g * 7) % 12
+JOIN analyses a ON a.n = 1 + (g * 13) % 6
+"""
+
+INDEXES = tuple(
+    f"CREATE INDEX {table}_user_completed_submitted_at_idx ON {table} "
+    "(user_id, submitted_at DESC, id DESC) WHERE status = 'completed'"
+    for table in ("symptoms", "ocr_symptoms")
+) + tuple(
+    f"CREATE INDEX {table}_search_vector_idx ON {table} USING gin (search_vector) WHERE status = 'completed'"
+    for table in ("symptoms", "ocr_symptoms")
+)
+
+# The search as it would be written without the tsvector columns; unranked, so newest first
+ILIKE_SQL = """
+SELECT * FROM (
+    (SELECT id, submitted_at FROM symptoms
+     WHERE {scope} status = 'completed'
+       AND (symptoms ILIKE :pattern OR additional_notes ILIKE :pattern OR analysis ILIKE :pattern)
+     ORDER BY submitted_at DESC, id DESC LIMIT :limit)
+    UNION ALL
+    (SELECT id, submitted_at FROM ocr_symptoms
+     WHERE {scope} status = 'completed' AND (input::text ILIKE :pattern OR analysis ILIKE :pattern)
+     ORDER BY submitted_at DESC, id DESC LIMIT :limit)
+) AS matches ORDER BY submitted_at DESC, id DESC LIMIT :limit
+"""
+
+# search_timeline_by_user_id() without the user scope, for the all-users row
+FTS_ALL_SQL = """
+SELECT * FROM (
+    (SELECT id, submitted_at, ts_rank_cd(search_vector, q) AS rank FROM symptoms, websearch_to_tsquery('english', :q) AS q
+     WHERE status = 'completed' AND search_vector @@ q ORDER BY rank DESC, submitted_at DESC, id DESC LIMIT :limit)
+    UNION ALL
+    (SELECT id, submitted_at, ts_rank_cd(search_vector, q) AS rank FROM ocr_symptoms, websearch_to_tsquery('english', :q) AS q
+     WHERE status = 'completed' AND search_vector @@ q ORDER BY rank DESC, submitted_at DESC, id DESC LIMIT :limit)
+) AS matches ORDER BY rank DESC, submitted_at DESC, id DESC LIMIT :limit
+"""
+
+
+async def _time(fn) -> float:
+    await fn()  # warm up statement caches
+    samples = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+async def main():
+    async with scratch_schema() as (engine, Session):
+        started = time.perf_counter()
+        async with engine.begin() as conn:
+            for statement in SEED_SQL.strip().split(";\n\n"):
+                await conn.execute(text(statement), {
+                    "complaints": list(COMPLAINTS), "analyses": list(ANALYSES), "users": USERS,
+                    "text_rows": TEXT_ROWS, "ocr_rows": OCR_ROWS,
+                    "heavy_text": HEAVY_TEXT_ROWS, "heavy_ocr": HEAVY_OCR_ROWS,
+                })
+            for ddl in INDEXES:
+                await conn.execute(text(ddl))
+            await conn.execute(text("ANALYZE"))
+            heavy = (await conn.execute(text("SELECT id FROM users WHERE username = 'u0'"))).scalar_one()
+            typical = (await conn.execute(text("SELECT id FROM users WHERE username = 'u1'"))).scalar_one()
+            sizes = (await conn.execute(text(
+                "SELECT pg_size_pretty(pg_relation_size('symptoms_search_vector_idx') + pg_relation_size('ocr_symptoms_search_vector_idx'))"
+            ))).scalar_one()
+        print(f"seeded {TEXT_ROWS + OCR_ROWS:,} rows in {time.perf_counter() - started:.0f}s; GIN indexes {sizes}")
+
+        async with Session() as session:
+            print(f"\nfirst page of {PAGE}, median of {REPEATS} end to end (ms)")
+            print(f"{'query':<14}{'scope':<18}{'ILIKE':>9}{'tsvector':>10}{'speedup':>9}")
+            for query, pattern in QUERIES:
+                for scope, user_id in (("heavy user", heavy), ("typical user", typical), ("all users", None)):
+                    if user_id is None:
+                        ilike_sql, fts_sql = ILIKE_SQL.format(scope=""), FTS_ALL_SQL
+
+                        async def fts():
+                            await session.execute(text(fts_sql), {"q": query, "limit": PAGE + 1})
+                    else:
+                        ilike_sql = ILIKE_SQL.format(scope="user_id = :user_id AND")
+
+                        async def fts():
+                            await search_timeline_by_user_id(session, user_id=user_id, query=query, limit=PAGE + 1)
+
+                    async def ilike():
+                        await session.execute(text(ilike_sql), {"pattern": pattern, "user_id": user_id, "limit": PAGE + 1})
+
+                    ilike_ms, fts_ms = await _time(ilike), await _time(fts)
+                    print(f"{query:<14}{scope:<18}{ilike_ms:>9.2f}{fts_ms:>10.2f}{ilike_ms / fts_ms:>8.1f}x")
+
+            explain = await session.execute(text(
+                "EXPLAIN (ANALYZE, COSTS OFF, TIMING OFF, SUMMARY OFF) "
+                "SELECT id FROM symptoms WHERE user_id = :u AND status = 'completed' "
+                "AND search_vector @@ websearch_to_tsquery('english', 'pericarditis')"
+            ), {"u": heavy})
+            print("\nheavy user, symptoms branch:")
+            for (line,) in explain:
+                print(f"  {line}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
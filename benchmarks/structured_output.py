@@ -0,0 +1,67 @@
+"""Compare output tokens and latency of the markdown prompt vs structured JSON output.
+
+Both modes answer with the same clinical content through a local fake LLM whose
+latency is dominated by decode time per output token. Run from the project root:
+
+    python -m benchmarks.structured_output
+"""
+import asyncio
+import json
+import statistics
+import time
+
+from benchmarks.fake_llm import CANNED_ANALYSIS, FakeLLM, approx_tokens
+from app.utils.openai_call import SYSTEM_PROMPT
+from app.utils.structured_analysis import STRUCTURED_SYSTEM_PROMPT, parse_structured_analysis, render_markdown
+
+CALLS = 50
+
+# The same content as CANNED_ANALYSIS, in the compact structured form
+CANNED_STRUCTURED = json.dumps({
+    "conditions": [
+        {"name": "Viral upper respiratory infection", "rationale": "Cough, mild fever and fatigue over several days are typical of a common cold or similar virus."},
+        {"name": "Acute bronchitis", "rationale": "A persistent cough with low-grade fever can indicate inflammation of the bronchial tubes."},
+        {"name": "Influenza", "rationale": "Fever with marked fatigue is consistent with flu, especially during flu season."},
+    ],
+    "explanation": "The combination of cough, low-grade fever and tiredness lasting a few days most commonly points to a self-limiting viral infection. The moderate severity and absence of breathing difficulty make a viral cause more likely than a bacterial pneumonia, while a cough that persists beyond the fever could suggest bronchitis.",
+    "next_steps": [
+        "Rest, drink plenty of fluids and consider over-the-counter fever reducers such as acetaminophen or ibuprofen.",
+        "Use honey or throat lozenges to soothe the cough, and a humidifier to ease congestion.",
+        "See a healthcare professional if symptoms last more than 10 days or worsen after initially improving.",
+    ],
+    "red_flags": ["shortness of breath", "chest pain", "a fever above 103°F / 39.4°C", "confusion"],
+    "clarifying_questions": [],
+}, separators=(",", ":"), ensure_ascii=False)
+
+USER_MSG = "Patient data:\n" + json.dumps({"age": 35, "sex": "male", "symptoms": "cough, fever", "duration": "3 days", "severity": 5})
+
+
+async def _measure(system_prompt: str, reply: str, render: bool):
+    llm = FakeLLM(concurrency=CALLS, responder=lambda _messages: reply)
+    latencies = []
+
+    async def one():
+        started = time.perf_counter()
+        content = await llm.complete([{"role": "system", "content": system_prompt}, {"role": "user", "content": USER_MSG}])
+        if render:
+            render_markdown(parse_structured_analysis(content))
+        latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one() for _ in range(CALLS)))
+    return llm.completion_tokens / CALLS, llm.prompt_tokens / CALLS, statistics.mean(latencies)
+
+
+async def main():
+    markdown = await _measure(SYSTEM_PROMPT, CANNED_ANALYSIS, render=False)
+    structured = await _measure(STRUCTURED_SYSTEM_PROMPT, CANNED_STRUCTURED, render=True)
+
+    rendered = render_markdown(parse_structured_analysis(CANNED_STRUCTURED))
+    print(f"rendered markdown: ~{approx_tokens(rendered)} tokens delivered to clients in structured mode")
+    print(f"{'mode':<12}{'output tok':>12}{'prompt tok':>12}{'mean latency':>15}")
+    for name, (output, prompt, latency) in (("markdown", markdown), ("structured", structured)):
+        print(f"{name:<12}{output:>12.0f}{prompt:>12.0f}{latency * 1000:>13.1f}ms")
+    print(f"output tokens -{(1 - structured[0] / markdown[0]) * 100:.0f}%, latency -{(1 - structured[2] / markdown[2]) * 100:.0f}%")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
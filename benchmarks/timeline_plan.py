@@ -0,0 +1,151 @@
+"""Check the unified timeline query's plan and compare it with two separate history queries.
+
+Seeds a heavy user (12k text and 6k OCR checks) among 500 lighter users in a scratch schema
+(see benchmarks/pg_scratch.py), adds the partial keyset indexes from migration 3c1f9a7d2b64
+and EXPLAINs app.crud.timeline.timeline_query() for the first page and a deep page, both as
+a custom plan and as the generic plan Postgres switches prepared statements to after a few
+executions. Exits non-zero unless both UNION ALL branches read their table with an index
+scan on that index in every case.
+Also times one timeline query against the two per-table history queries it replaces.
+Run from the project root:
+
+    BENCHMARK_DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.timeline_plan
+"""
+import asyncio
+import statistics
+import sys
+import time
+
+from sqlalchemy import text
+
+from benchmarks.pg_scratch import scratch_schema
+from app.crud.ocr_symptom import ocr_get_symptom_checkby_user_id
+from app.crud.symptom import get_symptom_checkby_user_id
+from app.crud.timeline import get_timeline_by_user_id, timeline_query
+
+HEAVY_ROWS = 12_000
+LIGHT_USERS = 500
+LIGHT_ROWS = 40
+PAGE = 20
+REPEATS = 50
+
+SEED_SQL = """
+INSERT INTO users (id, email, username, password_hash, api_key_enc)
+SELECT gen_random_uuid(), 'u' || i || '@bench', 'u' || i, 'x', 'k' || i FROM generate_series(0, CAST(:users AS int)) AS i;
+
+INSERT INTO symptoms (user_id, age, sex, symptoms, duration, severity, analysis, submitted_at, status)
+SELECT u.id, 30, 'female', 'cough, fever', '2 days', 4, repeat('analysis ', 80),
+       now() - (g * interval '1 minute') - (random() * interval '1 minute'),
+       CASE WHEN random() < 0.1 THEN 'not_completed'::status_enum ELSE 'completed'::status_enum END
+FROM users u
+CROSS JOIN LATERAL generate_series(1, CASE WHEN u.username = 'u0' THEN CAST(:heavy AS int) ELSE CAST(:light AS int) END) AS g;
+
+INSERT INTO ocr_symptoms (user_id, input, analysis, submitted_at, status)
+SELECT u.id, jsonb_build_object('chief_complaint', 'cough', 'wbc_count', 11500), repeat('analysis ', 80),
+       now() - (g * interval '2 minutes') - (random() * interval '1 minute'),
+       CASE WHEN random() < 0.1 THEN 'not_completed'::status_enum ELSE 'completed'::status_enum END
+FROM users u
+CROSS JOIN LATERAL generate_series(1, CASE WHEN u.username = 'u0' THEN CAST(:heavy AS int) / 2 ELSE CAST(:light AS int) END) AS g;
+"""
+
+KEYSET_INDEXES = tuple(
+    f"CREATE INDEX {table}_user_completed_submitted_at_idx ON {table} "
+    "(user_id, submitted_at DESC, id DESC) WHERE status = 'completed'"
+    for table in ("symptoms", "ocr_symptoms")
+)
+
+
+def _scans(plan: dict):
+    """Yield every node of a JSON plan that reads a table."""
+    if "Relation Name" in plan:
+        yield plan
+    for child in plan.get("Plans", ()):
+        yield from _scans(child)
+
+
+async def _explain(conn, query, plan_cache_mode: str) -> dict:
+    statement, values = query
+    compiled = statement.compile(dialect=conn.dialect)
+    params = tuple(values.get(name, compiled.params.get(name)) for name in compiled.positiontup)
+    # EXECUTE takes no bind parameters; quoted literals are coerced to the prepared parameter types
+    args = ", ".join("'" + str(value).replace("'", "''") + "'" for value in params)
+    await conn.exec_driver_sql(f"PREPARE timeline_plan AS {compiled}")
+    try:
+        await conn.exec_driver_sql(f"SET plan_cache_mode = {plan_cache_mode}")
+        result = await conn.exec_driver_sql(f"EXPLAIN (ANALYZE, FORMAT JSON) EXECUTE timeline_plan({args})")
+        return result.scalar_one()[0]
+    finally:
+        await conn.exec_driver_sql("DEALLOCATE timeline_plan")
+        await conn.exec_driver_sql("RESET plan_cache_mode")
+
+
+def _check(plan: dict) -> list:
+    """Problems with the plan; empty when both branches use their keyset index."""
+    problems = []
+    scans = {node["Relation Name"]: node for node in _scans(plan["Plan"])}
+    for table in ("symptoms", "ocr_symptoms"):
+        node = scans.get(table)
+        if node is None:
+            problems.append(f"{table}: not read")
+        elif node["Node Type"] not in ("Index Scan", "Index Only Scan"):
+            problems.append(f"{table}: {node['Node Type']}")
+        elif node.get("Index Name") != f"{table}_user_completed_submitted_at_idx":
+            problems.append(f"{table}: index scan on {node.get('Index Name')}")
+    return problems
+
+
+async def _time(fn) -> float:
+    samples = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+async def main():
+    async with scratch_schema() as (engine, Session):
+        async with engine.begin() as conn:
+            for statement in SEED_SQL.strip().split(";\n\n"):
+                await conn.execute(text(statement), {"users": LIGHT_USERS, "heavy": HEAVY_ROWS, "light": LIGHT_ROWS})
+            for ddl in KEYSET_INDEXES:
+                await conn.execute(text(ddl))
+            await conn.execute(text("ANALYZE"))
+            user_id = (await conn.execute(text("SELECT id FROM users WHERE username = 'u0'"))).scalar_one()
+
+        async with Session() as session:
+            # A deep page: resume after the 5000th newest item
+            rows = await get_timeline_by_user_id(session, user_id=user_id, limit=5000)
+            deep = (rows[-1].submitted_at, rows[-1].id)
+
+            failed = False
+            conn = await session.connection()
+            for name, cursor in (("first page", None), ("deep page", deep)):
+                for mode in ("force_custom_plan", "force_generic_plan"):
+                    plan = await _explain(conn, timeline_query(user_id, PAGE + 1, cursor), mode)
+                    problems = _check(plan)
+                    failed |= bool(problems)
+                    scans = ", ".join(f"{n['Relation Name']}: {n['Node Type']} using {n.get('Index Name')}" for n in _scans(plan["Plan"]))
+                    print(f"{name:<11}{mode.split('_')[1]:<9}{plan['Execution Time']:>6.2f} ms  {scans}")
+                    for problem in problems:
+                        print(f"  FAIL {problem}")
+
+            async def unified():
+                await get_timeline_by_user_id(session, user_id=user_id, limit=PAGE + 1)
+
+            async def separate():
+                await get_symptom_checkby_user_id(session, user_id=user_id, limit=PAGE + 1)
+                await ocr_get_symptom_checkby_user_id(session, user_id=user_id, limit=PAGE + 1)
+
+            await unified(), await separate()  # warm up statement caches
+            print(f"\nfirst page of {PAGE}, median of {REPEATS} end to end (ms)")
+            print(f"  one UNION ALL query        {await _time(unified):>6.2f}")
+            print(f"  two history queries        {await _time(separate):>6.2f}")
+
+    if failed:
+        sys.exit("timeline query is not served by the keyset indexes")
+    print("\nOK: both branches use index scans")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,88 @@
+"""Compare one INSERT + COMMIT per completed check against the coalescing write buffer.
+
+Concurrent clients in a scratch schema (see benchmarks/pg_scratch.py) each store WRITES
+completed text checks back to back, as requests finishing their analyses would: either
+through insert_symptom_check and a commit of their own, or through app.db.write_buffer
+(DB_WRITE_BUFFER_ENABLED). Prints checks stored per second, write latency p50/p99 and the
+number of transactions for each client count. Every commit waits for its WAL flush, so
+the gap depends on the disk; run it where the database will run. Run from the project root:
+
+    BENCHMARK_DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.write_coalescing
+"""
+import asyncio
+import datetime
+import statistics
+import time
+import uuid
+
+from sqlalchemy import text
+
+from benchmarks.pg_scratch import scratch_schema
+from app.crud.symptom import insert_symptom_check
+from app.db.write_buffer import WriteBuffer
+from app.models.symptoms import SexEnum, StatusEnum, Symptom
+
+CLIENTS = (10, 50, 200)
+WRITES = 20
+ANALYSIS = "# Potential Conditions\n1. **Viral upper respiratory infection**\n\n# Disclaimer\n" + "Not medical advice. " * 30
+
+
+def _check(user_id) -> dict:
+    return dict(
+        id=uuid.uuid4(), submitted_at=datetime.datetime.now(datetime.timezone.utc), user_id=user_id, age=30,
+        sex=SexEnum.female, symptoms="cough, fever", duration="2 days", severity=4, additional_notes=None,
+    )
+
+
+async def _run(clients: int, write) -> tuple:
+    latencies = []
+
+    async def client():
+        for _ in range(WRITES):
+            started = time.perf_counter()
+            await write()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+    q = statistics.quantiles(latencies, n=100)
+    return len(latencies) / elapsed, q[49] * 1000, q[98] * 1000
+
+
+async def main():
+    async with scratch_schema() as (engine, Session):
+        async with engine.begin() as conn:
+            user_id = (await conn.execute(text(
+                "INSERT INTO users (id, email, username, password_hash, api_key_enc) "
+                "VALUES (gen_random_uuid(), 'u@bench', 'u', 'x', 'k') RETURNING id"
+            ))).scalar_one()
+            synchronous_commit = (await conn.execute(text("SHOW synchronous_commit"))).scalar_one()
+
+        async def direct():
+            async with Session() as session:
+                await insert_symptom_check(session, **_check(user_id), analysis=ANALYSIS, meta={})
+                await session.commit()
+
+        buffer = WriteBuffer(Symptom, session_factory=Session)
+
+        async def buffered():
+            await buffer.submit({**_check(user_id), "status": StatusEnum.completed, "analysis": ANALYSIS, "meta": {}})
+
+        await _run(5, direct)  # warm up the pool
+        print(f"{WRITES} writes per client, synchronous_commit={synchronous_commit}, {engine.pool.size()} pooled connections")
+        print(f"{'clients':>7} {'mode':>9} {'checks/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'commits':>8}")
+        for clients in CLIENTS:
+            rate, p50, p99 = await _run(clients, direct)
+            print(f"{clients:>7} {'direct':>9} {rate:>9.0f} {p50:>8.1f} {p99:>8.1f} {clients * WRITES:>8}")
+            batches = buffer.batches
+            rate, p50, p99 = await _run(clients, buffered)
+            print(f"{clients:>7} {'buffered':>9} {rate:>9.0f} {p50:>8.1f} {p99:>8.1f} {buffer.batches - batches:>8}")
+
+        async with engine.connect() as conn:
+            stored = (await conn.execute(text("SELECT count(*) FROM symptoms"))).scalar_one()
+        print(f"{stored:,} checks stored")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,24 @@
+"""Production server settings: gunicorn -c gunicorn.conf.py app.main:app
+
+Each setting can be overridden from the environment, e.g. WEB_CONCURRENCY=4.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+worker_class = "app.workers.UvicornWorker"
+
+# Async workers each serve many requests at once, so one per core is enough. Every worker has
+# its own database pool: keep WEB_CONCURRENCY x (DB_POOL_SIZE + DB_MAX_OVERFLOW) below max_connections.
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+
+# Keep idle client connections open longer than the load balancer's idle timeout (60 s on an
+# AWS ALB), so it never sends a request on a connection the worker is just closing
+keepalive = int(os.getenv("KEEPALIVE_SEC", "75"))
+
+# Time for in-flight analyses to finish (and the write buffers to drain) on restart or deploy
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT_SEC", "60"))
+timeout = int(os.getenv("WORKER_TIMEOUT_SEC", "60"))
+
+backlog = int(os.getenv("BACKLOG", "2048"))
+accesslog = os.getenv("ACCESS_LOG")  # off unless set, e.g. "-" for stdout
@@ -0,0 +1,37 @@
+"""add history keyset indexes
+
+Revision ID: 3c1f9a7d2b64
+Revises: 870ee829865b
+Create Date: 2025-10-20 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1f9a7d2b64'
+down_revision: Union[str, Sequence[str], None] = '870ee829865b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # History pages read a user's completed checks newest first, resuming after (submitted_at, id).
+    # A partial index in that order serves each page as a short index range scan, with no sort.
+    for table in ("symptoms", "ocr_symptoms"):
+        op.create_index(
+            f"{table}_user_completed_submitted_at_idx",
+            table,
+            ["user_id", sa.text("submitted_at DESC"), sa.text("id DESC")],
+            postgresql_where=sa.text("status = 'completed'"),
+        )
+
+
+def downgrade() -> None:
+
+    # drop keyset indexes
+    op.drop_index("ocr_symptoms_user_completed_submitted_at_idx", table_name="ocr_symptoms")
+    op.drop_index("symptoms_user_completed_submitted_at_idx", table_name="symptoms")
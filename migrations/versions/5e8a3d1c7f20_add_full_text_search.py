@@ -0,0 +1,54 @@
+"""add full text search
+
+Revision ID: 5e8a3d1c7f20
+Revises: 9b4e2f6c1a57
+Create Date: 2025-10-28 14:05:52.914330
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e8a3d1c7f20'
+down_revision: Union[str, Sequence[str], None] = '9b4e2f6c1a57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_VECTORS = {
+    "symptoms": (
+        "setweight(to_tsvector('english', symptoms), 'A') || "
+        "setweight(to_tsvector('english', coalesce(additional_notes, '')), 'B') || "
+        "setweight(to_tsvector('english', coalesce(analysis, '')), 'C')"
+    ),
+    "ocr_symptoms": (
+        "setweight(jsonb_to_tsvector('english', input, '[\"string\", \"numeric\"]'), 'A') || "
+        "setweight(to_tsvector('english', coalesce(analysis, '')), 'C')"
+    ),
+}
+
+
+def upgrade() -> None:
+    for table, expression in SEARCH_VECTORS.items():
+        # A stored generated column rewrites the table under an exclusive lock; run off-peak on large tables
+        op.add_column(table, sa.Column("search_vector", postgresql.TSVECTOR(), sa.Computed(expression, persisted=True)))
+
+        # Searches only ever look at completed checks
+        op.create_index(
+            f"{table}_search_vector_idx",
+            table,
+            ["search_vector"],
+            postgresql_using="gin",
+            postgresql_where=sa.text("status = 'completed'"),
+        )
+
+
+def downgrade() -> None:
+
+    # drop search indexes and columns
+    for table in ("ocr_symptoms", "symptoms"):
+        op.drop_index(f"{table}_search_vector_idx", table_name=table)
+        op.drop_column(table, "search_vector")
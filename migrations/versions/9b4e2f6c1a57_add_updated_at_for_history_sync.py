@@ -0,0 +1,42 @@
+"""add updated_at for history sync
+
+Revision ID: 9b4e2f6c1a57
+Revises: 3c1f9a7d2b64
+Create Date: 2025-10-27 09:41:18.552907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b4e2f6c1a57'
+down_revision: Union[str, Sequence[str], None] = '3c1f9a7d2b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    for table in ("symptoms", "ocr_symptoms"):
+        # Add without a default first so existing rows can be backfilled from submitted_at
+        op.add_column(table, sa.Column("updated_at", sa.TIMESTAMP(timezone=True), nullable=True))
+        op.execute(f"UPDATE {table} SET updated_at = submitted_at")
+        op.alter_column(table, "updated_at", nullable=False, server_default=sa.text("now()"))
+
+        # Delta sync reads a user's completed checks changed after (updated_at, id), oldest first
+        op.create_index(
+            f"{table}_user_completed_updated_at_idx",
+            table,
+            ["user_id", "updated_at", "id"],
+            postgresql_where=sa.text("status = 'completed'"),
+        )
+
+
+def downgrade() -> None:
+
+    # drop delta sync indexes and columns
+    for table in ("ocr_symptoms", "symptoms"):
+        op.drop_index(f"{table}_user_completed_updated_at_idx", table_name=table)
+        op.drop_column(table, "updated_at")
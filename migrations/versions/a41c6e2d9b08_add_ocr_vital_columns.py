@@ -0,0 +1,54 @@
+"""add ocr vital columns
+
+Revision ID: a41c6e2d9b08
+Revises: 5e8a3d1c7f20
+Create Date: 2025-10-29 10:12:37.405118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41c6e2d9b08'
+down_revision: Union[str, Sequence[str], None] = '5e8a3d1c7f20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+VITALS = ("temperature_f", "heart_rate_bpm", "spo2_pct", "wbc_count")
+
+
+def _vital(key: str) -> str:
+    # Numbers, and numeric strings from rows stored before normalization; NULL for anything else
+    return (
+        f"CASE WHEN jsonb_typeof(input -> '{key}') = 'number' "
+        f"OR (input ->> '{key}') ~ '^\\s*[-+]?[0-9]+(\\.[0-9]+)?\\s*$' "
+        f"THEN (input ->> '{key}')::numeric END"
+    )
+
+
+def upgrade() -> None:
+    # One ALTER TABLE so the table is rewritten once for all columns; run off-peak on large tables
+    op.execute(
+        "ALTER TABLE ocr_symptoms "
+        + ", ".join(f"ADD COLUMN {key} NUMERIC GENERATED ALWAYS AS ({_vital(key)}) STORED" for key in VITALS)
+    )
+
+    # Range filters over completed checks; most rows lack most vitals, so leave NULLs out
+    for key in VITALS:
+        op.create_index(
+            f"ocr_symptoms_{key}_idx",
+            "ocr_symptoms",
+            [key],
+            postgresql_where=sa.text(f"status = 'completed' AND {key} IS NOT NULL"),
+        )
+
+
+def downgrade() -> None:
+
+    # drop vital indexes and columns
+    for key in reversed(VITALS):
+        op.drop_index(f"ocr_symptoms_{key}_idx", table_name="ocr_symptoms")
+        op.drop_column("ocr_symptoms", key)
@@ -0,0 +1,106 @@
+"""partition checks by month
+
+Revision ID: c7d2e9f4a3b1
+Revises: a41c6e2d9b08
+Create Date: 2025-10-30 08:26:51.730442
+
+Rebuilds symptoms and ocr_symptoms as tables range-partitioned on submitted_at, one
+partition per month (see app.db.partitions), and copies the rows across. The copy runs in
+the migration's transaction and holds the tables exclusively until it commits; on large
+tables run it in a maintenance window with disk for a second copy of both.
+
+Postgres requires the partition key in every unique index, so the primary key becomes
+(id, submitted_at) and id alone is no longer unique-indexed; ids come from gen_random_uuid().
+"""
+import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.partitions import add_months, create_partition_sql, month_start, months
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d2e9f4a3b1'
+down_revision: Union[str, Sequence[str], None] = 'a41c6e2d9b08'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Stored columns; generated ones (search_vector, the OCR vitals) are recomputed on insert
+COLUMNS = {
+    "symptoms": ("id", "user_id", "age", "sex", "symptoms", "duration", "severity", "additional_notes",
+                 "analysis", "submitted_at", "status", "meta", "updated_at"),
+    "ocr_symptoms": ("id", "user_id", "input", "analysis", "submitted_at", "status", "meta", "updated_at"),
+}
+OCR_VITALS = ("temperature_f", "heart_rate_bpm", "spo2_pct", "wbc_count")
+# Months created ahead at upgrade; `python -m app.db.partitions` keeps that going
+PREMAKE_MONTHS = 3
+
+
+def _create_indexes(table: str) -> None:
+    completed = sa.text("status = 'completed'")
+    op.create_index(f"{table}_user_id_idx", table, ["user_id"])
+    op.create_index(
+        f"{table}_user_completed_submitted_at_idx", table,
+        ["user_id", sa.text("submitted_at DESC"), sa.text("id DESC")], postgresql_where=completed,
+    )
+    op.create_index(f"{table}_user_completed_updated_at_idx", table, ["user_id", "updated_at", "id"], postgresql_where=completed)
+    op.create_index(f"{table}_search_vector_idx", table, ["search_vector"], postgresql_using="gin", postgresql_where=completed)
+    if table == "ocr_symptoms":
+        for key in OCR_VITALS:
+            op.create_index(
+                f"ocr_symptoms_{key}_idx", table, [key],
+                postgresql_where=sa.text(f"status = 'completed' AND {key} IS NOT NULL"),
+            )
+
+
+def _copy(source: str, target: str, table: str) -> None:
+    columns = ", ".join(COLUMNS[table])
+    op.execute(f"INSERT INTO {target} ({columns}) SELECT {columns} FROM {source}")
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    today = datetime.datetime.now(datetime.timezone.utc).date()
+
+    for table in COLUMNS:
+        old = f"{table}_unpartitioned"
+        op.execute(f"ALTER TABLE {table} RENAME TO {old}")
+        op.execute(
+            f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING GENERATED) "
+            "PARTITION BY RANGE (submitted_at)"
+        )
+
+        # One partition per month from the oldest check through PREMAKE_MONTHS ahead
+        first, last = bind.execute(sa.text(
+            f"SELECT (date_trunc('month', min(submitted_at) AT TIME ZONE 'UTC'))::date, "
+            f"(date_trunc('month', max(submitted_at) AT TIME ZONE 'UTC'))::date FROM {old}"
+        )).one()
+        ahead = add_months(month_start(today), PREMAKE_MONTHS)
+        for month in months(min(first or today, today), max(last or ahead, ahead)):
+            op.execute(create_partition_sql(table, month))
+
+        _copy(old, table, table)
+        op.drop_table(old)
+
+        # Keys and indexes on the parent; Postgres creates them on every partition
+        op.create_primary_key(f"{table}_pkey", table, ["id", "submitted_at"])
+        op.create_foreign_key(f"{table}_user_id_fkey", table, "users", ["user_id"], ["id"], ondelete="CASCADE")
+        _create_indexes(table)
+
+
+def downgrade() -> None:
+
+    # rebuild unpartitioned tables; partitions detached earlier are left as they are
+    for table in reversed(tuple(COLUMNS)):
+        old = f"{table}_partitioned"
+        op.execute(f"ALTER TABLE {table} RENAME TO {old}")
+        op.execute(f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING GENERATED)")
+        _copy(old, table, table)
+        op.drop_table(old)
+
+        op.create_primary_key(f"{table}_pkey", table, ["id"])
+        op.create_index(f"{table}_id_idx", table, ["id"], unique=True)
+        op.create_foreign_key(f"{table}_user_id_fkey", table, "users", ["user_id"], ["id"], ondelete="CASCADE")
+        _create_indexes(table)
@@ -0,0 +1,113 @@
+"""add compressed analysis storage
+
+Revision ID: e3b8f1a6c205
+Revises: c7d2e9f4a3b1
+Create Date: 2025-10-31 10:12:37.508116
+
+Adds the analysis_dictionaries table and the columns that hold a zstd-compressed analysis
+(see app.utils.analysis_codec). search_vector stops being a generated column, which can only
+read the row's own text, and is kept by a trigger instead; it keeps its current values.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+import zstandard
+
+from app.models.analysis import search_vector_trigger
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3b8f1a6c205'
+down_revision: Union[str, Sequence[str], None] = 'c7d2e9f4a3b1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# search_vector terms for each table's own columns, as the trigger sees them
+INPUT_VECTORS = {
+    "symptoms": (
+        "setweight(to_tsvector('english', NEW.symptoms), 'A') || "
+        "setweight(to_tsvector('english', coalesce(NEW.additional_notes, '')), 'B')"
+    ),
+    "ocr_symptoms": "setweight(jsonb_to_tsvector('english', NEW.input, '[\"string\", \"numeric\"]'), 'A')",
+}
+# The generated columns from 5e8a3d1c7f20, restored on downgrade
+GENERATED_VECTORS = {
+    "symptoms": (
+        "setweight(to_tsvector('english', symptoms), 'A') || "
+        "setweight(to_tsvector('english', coalesce(additional_notes, '')), 'B') || "
+        "setweight(to_tsvector('english', coalesce(analysis, '')), 'C')"
+    ),
+    "ocr_symptoms": (
+        "setweight(jsonb_to_tsvector('english', input, '[\"string\", \"numeric\"]'), 'A') || "
+        "setweight(to_tsvector('english', coalesce(analysis, '')), 'C')"
+    ),
+}
+
+
+def upgrade() -> None:
+    # Trained dictionaries; the version is also the zstd dictionary id
+    op.create_table(
+        "analysis_dictionaries",
+        sa.Column("version", sa.SmallInteger(), autoincrement=False, nullable=False),
+        sa.Column("dictionary", sa.LargeBinary(), nullable=False),
+        sa.Column("sample_count", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.TIMESTAMP(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.PrimaryKeyConstraint("version"),
+    )
+
+    for table, input_vector in INPUT_VECTORS.items():
+        # A compressed analysis leaves `analysis` NULL; a dictionary can't be removed while rows need it
+        op.add_column(table, sa.Column("analysis_zstd", sa.LargeBinary(), nullable=True))
+        op.add_column(table, sa.Column("analysis_dict", sa.SmallInteger(), nullable=True))
+        op.create_foreign_key(
+            f"{table}_analysis_dict_fkey", table, "analysis_dictionaries", ["analysis_dict"], ["version"],
+        )
+
+        # Plain column from here on, maintained by the trigger; no rewrite, the index stays as it is
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN search_vector DROP EXPRESSION")
+        for statement in search_vector_trigger(table, input_vector):
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+
+    # decompress analyses back into `analysis`
+    decompressors = {
+        version: zstandard.ZstdDecompressor(dict_data=zstandard.ZstdCompressionDict(data))
+        for version, data in bind.execute(sa.text("SELECT version, dictionary FROM analysis_dictionaries"))
+    }
+    for table in ("ocr_symptoms", "symptoms"):
+        rows = bind.execute(sa.text(
+            f"SELECT id, submitted_at, analysis_dict, analysis_zstd FROM {table} WHERE analysis_zstd IS NOT NULL"
+        )).all()
+        if rows:
+            bind.execute(
+                sa.text(
+                    f"UPDATE {table} SET analysis = :analysis, analysis_zstd = NULL, analysis_dict = NULL "
+                    "WHERE id = :id AND submitted_at = :submitted_at"
+                ),
+                [
+                    {"id": id_, "submitted_at": submitted_at, "analysis": decompressors[version].decompress(frame).decode("utf-8")}
+                    for id_, submitted_at, version, frame in rows
+                ],
+            )
+
+        # drop the trigger and regenerate search_vector (rewrites the table)
+        op.execute(f"DROP TRIGGER {table}_search_vector ON {table}")
+        op.execute(f"DROP FUNCTION {table}_search_vector()")
+        op.drop_index(f"{table}_search_vector_idx", table_name=table)
+        op.drop_column(table, "search_vector")
+        op.add_column(table, sa.Column("search_vector", postgresql.TSVECTOR(), sa.Computed(GENERATED_VECTORS[table], persisted=True)))
+        op.create_index(
+            f"{table}_search_vector_idx", table, ["search_vector"],
+            postgresql_using="gin", postgresql_where=sa.text("status = 'completed'"),
+        )
+
+        op.drop_constraint(f"{table}_analysis_dict_fkey", table, type_="foreignkey")
+        op.drop_column(table, "analysis_dict")
+        op.drop_column(table, "analysis_zstd")
+
+    op.drop_table("analysis_dictionaries")